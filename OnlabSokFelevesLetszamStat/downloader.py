@@ -1,11 +1,29 @@
 """
 Download module for fetching course statistics Excel files from the university website.
+
+After the interactive login in the browser, the export URLs are fetched directly
+with an HTTP client that reuses the browser's session cookies, several semesters
+in parallel. A semester that cannot be fetched that way is downloaded through
+the browser as before (fallback).
 """
+import argparse
 import os
 import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 
+# Parallel direct downloads (also the size of the HTTP connection pool)
+DIRECT_WORKERS = 4
+DIRECT_TIMEOUT = 30  # seconds per request
+# Excel (.xlsx) files are ZIP archives; anything else (e.g. an error or login page) is not an export
+XLSX_SIGNATURE = b"PK\x03\x04"
+# Consecutive missing semesters after which the download stops
+MAX_CONSECUTIVE_FAILURES = 3
+
 
 def setup_chrome_driver(downloads_dir):
     """Setup Chrome driver with download preferences."""
@@ -76,7 +94,145 @@ def wait_for_download(downloads_dir, timeout=3):
     return False
 
 
-def download_semester_files(base_url_template, start_id=1, login_url=None):
+def session_from_driver(driver, pool_size=DIRECT_WORKERS):
+    """
+    Create a pooled HTTP session that carries the cookies and user agent of the browser session.
+    
+    Same as SeleniumUtils.create_http_session of ProjectLabAdmin. This project is run
+    and installed on its own and does not depend on the shared package there, so the
+    few lines are kept here; change both copies together.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["User-Agent"] = driver.execute_script("return navigator.userAgent")
+    for cookie in driver.get_cookies():
+        session.cookies.set(cookie["name"], cookie["value"],
+                            domain=cookie.get("domain", ""), path=cookie.get("path", "/"))
+    return session
+
+
+def fetch_export(session, url, timeout=DIRECT_TIMEOUT):
+    """Fetch an Excel export directly. Returns the file content, or None if the response is not an Excel file."""
+    try:
+        response = session.get(url, timeout=timeout)
+    except requests.RequestException:
+        return None
+    if response.status_code != 200 or not response.content.startswith(XLSX_SIGNATURE):
+        return None
+    return response.content
+
+
+def download_via_browser(driver, url, downloads_dir, target_path):
+    """Download one export by navigating the browser to it and rename it. Returns True on success."""
+    if driver is None:
+        print("✗ No Excel export received", end=" ")
+        return False
+    
+    # Count files before download
+    files_before = set(os.listdir(downloads_dir))
+    
+    # Navigate to URL - this triggers the download directly
+    driver.get(url)
+    
+    # Wait for download to complete
+    if not wait_for_download(downloads_dir, timeout=3):
+        print("✗ Download timeout", end=" ")
+        return False
+    
+    # Find the new file
+    files_after = set(os.listdir(downloads_dir))
+    new_files = files_after - files_before
+    new_files = [f for f in new_files if not f.endswith('.crdownload')]
+    
+    if not new_files:
+        print("✗ No new file detected", end=" ")
+        return False
+    
+    # Rename the downloaded file
+    downloaded_file = new_files[0]
+    downloaded_path = os.path.join(downloads_dir, downloaded_file)
+    
+    # Wait a bit to ensure file is completely written
+    time.sleep(1)
+    
+    try:
+        os.rename(downloaded_path, target_path)
+        return True
+    except Exception as e:
+        print(f"✗ Failed to rename: {e}", end=" ")
+        return False
+
+
+def download_semesters(base_url_template, start_id, downloads_dir, driver=None, session=None, workers=DIRECT_WORKERS):
+    """
+    Download the semester files that are not in the downloads folder yet.
+    
+    With a session, the exports are fetched directly, `workers` semesters at a
+    time; a semester that fails that way is downloaded through the browser (if
+    there is a driver). Without a session every file goes through the browser.
+    A session without a driver can be pointed at a local stub server for testing.
+    
+    Returns:
+        (number of downloaded files, number of skipped existing files)
+    """
+    batch_size = workers if session is not None else 1
+    
+    # Start downloading files
+    semester_id = start_id
+    successful_downloads = 0
+    skipped_files = 0
+    consecutive_failures = 0
+    
+    with ThreadPoolExecutor(max_workers=batch_size) as executor:
+        while consecutive_failures < MAX_CONSECUTIVE_FAILURES:
+            batch = list(range(semester_id, semester_id + batch_size))
+            targets = {sid: os.path.join(downloads_dir, f"PortalResults_SemesterId{sid:02d}.xlsx") for sid in batch}
+            
+            # Fetch the missing files of the batch in parallel
+            fetches = {}
+            if session is not None:
+                fetches = {sid: executor.submit(fetch_export, session, base_url_template.format(semester_id=sid))
+                           for sid in batch if not os.path.exists(targets[sid])}
+            
+            # Evaluate the batch in semester order (files after the stop are not saved)
+            for sid in batch:
+                url = base_url_template.format(semester_id=sid)
+                target_filename = os.path.basename(targets[sid])
+                
+                # Check if file already exists
+                if os.path.exists(targets[sid]):
+                    print(f"Semester {sid}... ⊘ Skipped (already exists)")
+                    skipped_files += 1
+                    consecutive_failures = 0
+                    continue
+                
+                print(f"Downloading semester {sid}...", end=" ", flush=True)
+                content = fetches[sid].result() if sid in fetches else None
+                if content is not None:
+                    with open(targets[sid], "wb") as f:
+                        f.write(content)
+                    print(f"✓ Success (saved as {target_filename}, direct)")
+                    successful_downloads += 1
+                    consecutive_failures = 0
+                elif download_via_browser(driver, url, downloads_dir, targets[sid]):
+                    print(f"✓ Success (saved as {target_filename}{', browser' if session is not None else ''})")
+                    successful_downloads += 1
+                    consecutive_failures = 0
+                else:
+                    print()
+                    consecutive_failures += 1
+                    if consecutive_failures >= MAX_CONSECUTIVE_FAILURES:
+                        print(f"\n✓ No more files to download after ID {sid - MAX_CONSECUTIVE_FAILURES}")
+                        break
+            
+            semester_id += batch_size
+    
+    return successful_downloads, skipped_files
+
+
+def download_semester_files(base_url_template, start_id=1, login_url=None, direct=True, workers=DIRECT_WORKERS):
     """
     Download Excel files for all available semesters.
     
@@ -84,6 +240,9 @@ def download_semester_files(base_url_template, start_id=1, login_url=None):
         base_url_template: URL template with {semester_id} placeholder
         start_id: Starting semester ID (default: 1)
         login_url: URL to navigate to for login (default: None, uses first semester URL)
+        direct: Fetch the exports directly with the browser's session cookies, in parallel
+            (default: True); semesters failing that way are downloaded through the browser
+        workers: Number of parallel direct downloads
     
     Returns:
         Number of files successfully downloaded
@@ -106,70 +265,9 @@ def download_semester_files(base_url_template, start_id=1, login_url=None):
             initial_url = base_url_template.format(semester_id=start_id)
         wait_for_user_login(driver, initial_url)
         
-        # Start downloading files
-        semester_id = start_id
-        successful_downloads = 0
-        skipped_files = 0
-        consecutive_failures = 0
-        
-        while True:
-            url = base_url_template.format(semester_id=semester_id)
-            target_filename = f"PortalResults_SemesterId{semester_id:02d}.xlsx"
-            target_path = os.path.join(downloads_dir, target_filename)
-            
-            # Check if file already exists
-            if os.path.exists(target_path):
-                print(f"Semester {semester_id}... ⊘ Skipped (already exists)")
-                skipped_files += 1
-                consecutive_failures = 0
-                semester_id += 1
-                continue
-            
-            print(f"Downloading semester {semester_id}...", end=" ", flush=True)
-            
-            # Count files before download
-            files_before = set(os.listdir(downloads_dir))
-            
-            # Navigate to URL - this triggers the download directly
-            driver.get(url)
-            
-            # Wait for download to complete
-            if wait_for_download(downloads_dir, timeout=3):
-                # Find the new file
-                files_after = set(os.listdir(downloads_dir))
-                new_files = files_after - files_before
-                new_files = [f for f in new_files if not f.endswith('.crdownload')]
-                
-                if new_files:
-                    # Rename the downloaded file
-                    downloaded_file = new_files[0]
-                    downloaded_path = os.path.join(downloads_dir, downloaded_file)
-                    
-                    # Wait a bit to ensure file is completely written
-                    time.sleep(1)
-                    
-                    try:
-                        os.rename(downloaded_path, target_path)
-                        print(f"✓ Success (saved as {target_filename})")
-                        successful_downloads += 1
-                        consecutive_failures = 0
-                    except Exception as e:
-                        print(f"✗ Failed to rename: {e}")
-                        consecutive_failures += 1
-                else:
-                    print("✗ No new file detected")
-                    consecutive_failures += 1
-                    if consecutive_failures >= 3:
-                        print(f"\n✓ No more files to download after ID {semester_id - 1}")
-                        break
-            else:
-                print("✗ Download timeout")
-                consecutive_failures += 1
-                if consecutive_failures >= 3:
-                    print(f"\n✓ No more files to download after ID {semester_id - 1}")
-                    break
-            
-            semester_id += 1
+        session = session_from_driver(driver, workers) if direct else None
+        successful_downloads, skipped_files = download_semesters(
+            base_url_template, start_id, downloads_dir, driver=driver, session=session, workers=workers)
         
         print(f"\n✓ Downloaded {successful_downloads} new files, skipped {skipped_files} existing files")
         return successful_downloads
@@ -183,10 +281,19 @@ def download_semester_files(base_url_template, start_id=1, login_url=None):
 
 
 if __name__ == "__main__":
-    base_url = "https://www.aut.bme.hu/Tasks/TaskGradeExport.aspx?SemesterId={semester_id}"
-    login_url = "https://www.aut.bme.hu/Tasks/TaskManagement.aspx"
+    parser = argparse.ArgumentParser(description="Download the semester statistics Excel files")
+    parser.add_argument("--base-url", default="https://www.aut.bme.hu/Tasks/TaskGradeExport.aspx?SemesterId={semester_id}",
+                        help="Export URL template with a {semester_id} placeholder (e.g. a local stub server)")
+    parser.add_argument("--login-url", default="https://www.aut.bme.hu/Tasks/TaskManagement.aspx",
+                        help="Page opened for the login")
+    parser.add_argument("--browser-only", action="store_true",
+                        help="Download every file through the browser instead of direct HTTP requests")
+    parser.add_argument("--workers", type=int, default=DIRECT_WORKERS,
+                        help=f"Parallel direct downloads (default: {DIRECT_WORKERS})")
+    args = parser.parse_args()
     try:
-        download_semester_files(base_url, login_url=login_url)
+        download_semester_files(args.base_url, login_url=args.login_url,
+                                direct=not args.browser_only, workers=args.workers)
     except Exception as e:
         print(f"Error: {e}")
         exit(1)
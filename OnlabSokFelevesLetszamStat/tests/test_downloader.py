@@ -0,0 +1,113 @@
+"""
+Unit tests for the semester downloads against a local stub server.
+"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from types import SimpleNamespace
+from urllib.parse import parse_qs, urlsplit
+import sys
+
+import pytest
+
+# Add project directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from downloader import download_semesters, session_from_driver
+
+XLSX = b"PK\x03\x04 semester export"
+URL_TEMPLATE = "/Tasks/TaskGradeExport.aspx?SemesterId={semester_id}"
+
+
+@pytest.fixture
+def portal():
+    """
+    Local stub of the export URLs.
+
+    Attributes of the returned namespace:
+        base_url_template: Export URL template with a {semester_id} placeholder
+        exports: Semester ID -> body of the export (other semesters get a login page)
+        requests: (semester ID, request headers) of the requests so far
+    """
+    site = SimpleNamespace(exports={}, requests=[])
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            semester_id = int(parse_qs(urlsplit(self.path).query)["SemesterId"][0])
+            site.requests.append((semester_id, dict(self.headers)))
+            body = site.exports.get(semester_id, b"<html><body>Login</body></html>")
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    site.base_url_template = f"http://127.0.0.1:{server.server_port}{URL_TEMPLATE}"
+    yield site
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+class FakeDriver:
+    """Logged-in browser: only its cookies and user agent are used"""
+
+    def execute_script(self, script):
+        return "Mozilla/5.0 (test browser)"
+
+    def get_cookies(self):
+        return [{"name": "ASP.NET_SessionId", "value": "session-42", "domain": "127.0.0.1", "path": "/"}]
+
+
+def _saved(downloads_dir):
+    return sorted(path.name for path in Path(downloads_dir).iterdir())
+
+
+class TestDownloadSemesters:
+    """Test cases for download_semesters with a session and no browser."""
+
+    def test_exports_saved_until_three_missing_semesters(self, tmp_path, portal):
+        portal.exports = {1: XLSX + b"1", 2: XLSX + b"2", 3: XLSX + b"3", 8: XLSX + b"8"}
+
+        downloaded, skipped = download_semesters(portal.base_url_template, 1, str(tmp_path),
+                                                 session=session_from_driver(FakeDriver()), workers=4)
+
+        assert (downloaded, skipped) == (3, 0)
+        # Semester 8 is after the third missing semester (4, 5, 6): fetched with its batch, not saved
+        assert _saved(tmp_path) == [f"PortalResults_SemesterId0{sid}.xlsx" for sid in (1, 2, 3)]
+        assert (tmp_path / "PortalResults_SemesterId02.xlsx").read_bytes() == XLSX + b"2"
+        assert max(sid for sid, _ in portal.requests) == 8
+
+    def test_existing_files_are_skipped(self, tmp_path, portal):
+        portal.exports = {1: XLSX, 2: XLSX, 3: XLSX}
+        (tmp_path / "PortalResults_SemesterId02.xlsx").write_bytes(b"PK\x03\x04 earlier download")
+
+        downloaded, skipped = download_semesters(portal.base_url_template, 1, str(tmp_path),
+                                                 session=session_from_driver(FakeDriver()), workers=2)
+
+        assert (downloaded, skipped) == (2, 1)
+        assert 2 not in [sid for sid, _ in portal.requests]
+        assert (tmp_path / "PortalResults_SemesterId02.xlsx").read_bytes() == b"PK\x03\x04 earlier download"
+
+    def test_login_page_is_not_saved(self, tmp_path, portal):
+        downloaded, skipped = download_semesters(portal.base_url_template, 1, str(tmp_path),
+                                                 session=session_from_driver(FakeDriver()), workers=4)
+
+        assert (downloaded, skipped) == (0, 0)
+        assert _saved(tmp_path) == []
+
+    def test_browser_cookies_and_user_agent_are_forwarded(self, tmp_path, portal):
+        portal.exports = {1: XLSX}
+
+        download_semesters(portal.base_url_template, 1, str(tmp_path),
+                           session=session_from_driver(FakeDriver()), workers=1)
+
+        for _, headers in portal.requests:
+            assert headers["Cookie"] == "ASP.NET_SessionId=session-42"
+            assert headers["User-Agent"] == "Mozilla/5.0 (test browser)"
@@ -3,9 +3,10 @@
 Quick script to count students enrolled in specific courses
 """
 
-import json
 from pathlib import Path
 
+from fused_store import FusedStudentStore
+
 # Target course codes
 TARGET_COURSES = {
     'BMEVIAUMT00', 'BMEVIAUMT10', 'BMEVIAUMT12', 'BMEVIAUM026',
@@ -19,29 +20,14 @@ def main():
     # Load fused data
     data_file = Path(__file__).parent.parent / "data" / "fused_student_data.json"
     
-    with open(data_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    # Indexed store of the fused data (rebuilt from the JSON file if outdated)
+    store = FusedStudentStore.open_for_json(data_file)
     
-    total_students = len(data['students'])
-    students_in_target_courses = 0
-    students_with_topics_in_target_courses = 0
+    total_students = store.count_students()
     
-    # Count students enrolled in target courses
-    for student in data['students']:
-        enrolled_courses = student.get('enrolled_courses', [])
-        
-        # Check if student is enrolled in any target course
-        has_target_course = any(
-            course.get('course_code') in TARGET_COURSES
-            for course in enrolled_courses
-        )
-        
-        if has_target_course:
-            students_in_target_courses += 1
-            
-            # Also count if they have a topic
-            if student.get('has_topic'):
-                students_with_topics_in_target_courses += 1
+    # Count students enrolled in target courses (course code index lookups)
+    students_in_target_courses = store.count_students(course_codes=TARGET_COURSES)
+    students_with_topics_in_target_courses = store.count_students(course_codes=TARGET_COURSES, has_topic=True)
     
     # Print results
     print("=" * 60)
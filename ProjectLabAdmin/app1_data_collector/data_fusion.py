@@ -5,242 +5,458 @@ Separated according to SRP
 
 import json
 import pandas as pd
+from collections import Counter
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, Iterable, List, Any, Optional, Set
 import logging
 
+from fused_store import FusedStudentStore
+
+
+def is_english_topic(topic_title: Optional[str]) -> bool:
+    """Check if a topic is English based on title prefix (Z-ENG)"""
+    if not topic_title:
+        return False
+    return topic_title.upper().startswith('Z-ENG')
+
 
 class DataFusionEngine:
-    """Responsible for the core data fusion logic"""
-    
+    """
+    Responsible for the core data fusion logic
+
+    Enrollments are kept per source file (DLNEP course export) and student, and
+    topics per student, so every fused student record is built from its own
+    enrollments only. Keyed indexes (student -> courses, course -> students,
+    supervisor -> students) and the summary counters are maintained while the
+    records are built, and a changed course export only rebuilds the students
+    it touches.
+
+    Input records:
+        DLNEP enrollment: student_neptun, student_name, course_code, is_english_course,
+            schedule_type, entry, partial_result, source_file
+        DLXLS topic: student_neptun, student_name, supervisor, category, topic_title
+    """
+
     def __init__(self, logger: logging.Logger):
         self.logger = logger
-    
+        self._reset()
+
+    def _reset(self) -> None:
+        # DLNEP data of the last full fusion; grouped by source file on the first update
+        self._dlnep_data: List[Dict[str, Any]] = []
+        self._grouped = False
+        # source file -> student -> enrollments, in the order of the rows
+        self._enrollments: Dict[str, Dict[str, List[Dict[str, Any]]]] = {}
+        self._student_files: Dict[str, Set[str]] = {}
+        # student -> last DLXLS record (and the name of the first one)
+        self._topics: Dict[str, Dict[str, Any]] = {}
+        self._topic_names: Dict[str, str] = {}
+
+        self.students: Dict[str, Dict[str, Any]] = {}
+        self.student_courses: Dict[str, Set[str]] = {}
+        self.course_students: Dict[str, Set[str]] = {}
+        self.supervisor_students: Dict[str, Set[str]] = {}
+
+        self._counters = Counter()
+        self._course_languages = Counter()   # (course code, is English) -> fused course entries
+        self._categories = Counter()         # (is English topic, category) -> students
+        self._sorted: Optional[List[Dict[str, Any]]] = None
+
     def fuse_data(self, dlxls_data: List[Dict[str, Any]], dlnep_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
         Fuse DLXLS and DLNEP data into a unified dataset
-        
+
+        For each student: the courses they are enrolled in (from DLNEP, one entry per
+        course) and, if they have a topic (from DLXLS), its supervisor and category.
+
         Args:
             dlxls_data: List of student topic data from DLXLS
-            dlnep_data: List of student enrollment data from DLNEP
-            
+            dlnep_data: List of student enrollment data from DLNEP, ordered by source file
+                name as DLNEPDataLoader reads the exports (updates keep that order)
+
         Returns:
-            List of fused student records
+            List of fused student records, sorted by student name
         """
         try:
             if not dlxls_data and not dlnep_data:
                 self.logger.error("No data provided for fusion")
                 return []
-            
+
             self.logger.info("Starting data fusion process...")
-            
-            # Create a dictionary of students from DLNEP data (enrollments)
-            students_dict = {}
-            
-            # First, collect all course enrollments per student
+            self._reset()
+            self._dlnep_data = dlnep_data
+
+            # One pass over the enrollments; the per-file grouping is only built for updates
+            students = self.students
+            student_courses: Dict[str, Dict[str, Dict[str, Any]]] = {}
             for enrollment in dlnep_data:
-                neptun_code = enrollment['student_neptun']
-                course_code = enrollment['course_code']
-                
-                if neptun_code not in students_dict:
-                    students_dict[neptun_code] = {
-                        'student_neptun': neptun_code,
-                        'student_name': enrollment['student_name'],
-                        'enrolled_courses': [],
-                        'has_topic': False,
-                        'supervisor': None,
-                        'topic_category': None,
-                        'topic_title': None,
-                        'is_english_topic': False,
-                    }
-                
-                # Add course to enrolled courses list
-                course_info = {
-                    'course_code': course_code,
-                    'is_english': enrollment['is_english_course'],
-                    'schedule_type': enrollment.get('schedule_type', ''),
-                    'entry': enrollment.get('entry', ''),
-                    'partial_result': enrollment.get('partial_result', '')
-                }
-                
-                students_dict[neptun_code]['enrolled_courses'].append(course_info)
-            
-            # Then, add topic information from DLXLS data
+                neptun = enrollment['student_neptun']
+                courses = student_courses.get(neptun)
+                if courses is None:
+                    courses = student_courses[neptun] = {}
+                    students[neptun] = self._new_student(neptun, enrollment['student_name'])
+                if enrollment['course_code'] not in courses:
+                    courses[enrollment['course_code']] = self._course_entry(enrollment)
+                if enrollment['is_english_course']:
+                    students[neptun]['is_enrolled_in_english_course'] = True
+
             for topic_data in dlxls_data:
-                neptun_code = topic_data['student_neptun']
-                
-                if neptun_code in students_dict:
-                    # Student exists in both datasets
-                    students_dict[neptun_code].update({
-                        'has_topic': topic_data['has_topic'],
-                        'supervisor': topic_data['supervisor'],
-                        'topic_category': topic_data['topic_category'],
-                        'topic_title': topic_data['topic_title'],
-                        'is_english_topic': topic_data['is_english_topic']
-                    })
-                else:
-                    # Student only in DLXLS (has topic but no enrollments in allowed courses)
-                    students_dict[neptun_code] = {
-                        'student_neptun': neptun_code,
-                        'student_name': topic_data['student_name'],
-                        'enrolled_courses': [],
-                        'has_topic': topic_data['has_topic'],
-                        'supervisor': topic_data['supervisor'],
-                        'topic_category': topic_data['topic_category'],
-                        'topic_title': topic_data['topic_title'],
-                        'is_english_topic': topic_data['is_english_topic']
-                    }
-            
-            # Convert dictionary to list
-            fused_students = list(students_dict.values())
-            
+                self._add_topic(topic_data)
+            for neptun, topic_data in self._topics.items():
+                if neptun not in students:
+                    students[neptun] = self._new_student(neptun, self._topic_names[neptun])
+                self._set_topic(students[neptun], topic_data)
+
+            for neptun, record in students.items():
+                record['enrolled_courses'] = list(student_courses.get(neptun, {}).values())
+                self._account(record, 1)
+
+            fused_students = self.fused_students
             self.logger.info(f"Data fusion completed. {len(fused_students)} students in fused dataset")
-            
-            # Log statistics
-            students_with_topics = sum(1 for s in fused_students if s['has_topic'])
-            students_with_enrollments = sum(1 for s in fused_students if s['enrolled_courses'])
-            
-            self.logger.info(f"Statistics: {students_with_topics} students with topics, {students_with_enrollments} students with course enrollments")
-            
+            self.logger.info(f"Statistics: {self._counters['students_with_topics']} students with topics, "
+                             f"{self._counters['students_with_enrollments']} students with course enrollments")
+
             return fused_students
-            
+
         except Exception as e:
             self.logger.error(f"Error during data fusion: {e}")
             return []
 
+    def update_course_export(self, source_file: str, enrollments: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Replace the enrollments of one course export and rebuild only the students it affects
+
+        Args:
+            source_file: Name of the DLNEP export file
+            enrollments: All enrollments of the file (empty if the file was removed)
+
+        Returns:
+            List of fused student records, sorted by student name
+        """
+        self._group_by_file()
+        old = self._enrollments.pop(source_file, {})
+        for neptun in old:
+            self._student_files[neptun].discard(source_file)
+            if not self._student_files[neptun]:
+                del self._student_files[neptun]
+
+        for enrollment in enrollments:
+            self._add_enrollment({**enrollment, 'source_file': source_file})
+
+        affected = set(old) | {enrollment['student_neptun'] for enrollment in enrollments}
+        self._rebuild(affected)
+        self.logger.info(f"Updated {source_file}: {len(enrollments)} enrollments, {len(affected)} students rebuilt")
+        return self.fused_students
+
+    def update_topics(self, dlxls_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Replace the DLXLS topic data and rebuild the students whose topic may have changed"""
+        affected = set(self._topics)
+        self._topics.clear()
+        self._topic_names.clear()
+        for topic_data in dlxls_data:
+            self._add_topic(topic_data)
+        affected |= set(self._topics)
+        self._rebuild(affected)
+        return self.fused_students
+
+    def _group_by_file(self) -> None:
+        """Group the enrollments of the last full fusion by source file and student"""
+        if not self._grouped:
+            self._grouped = True
+            for enrollment in self._dlnep_data:
+                self._add_enrollment(enrollment)
+
+    def _add_enrollment(self, enrollment: Dict[str, Any]) -> None:
+        source_file = enrollment.get('source_file', '')
+        neptun = enrollment['student_neptun']
+        self._enrollments.setdefault(source_file, {}).setdefault(neptun, []).append(enrollment)
+        self._student_files.setdefault(neptun, set()).add(source_file)
+
+    def _add_topic(self, topic_data: Dict[str, Any]) -> None:
+        neptun = topic_data['student_neptun']
+        self._topics[neptun] = topic_data
+        self._topic_names.setdefault(neptun, topic_data['student_name'])
+
+    def _build_student(self, neptun: str) -> Optional[Dict[str, Any]]:
+        """Fused record of a student from the grouped enrollments (by source file name) and topic"""
+        files = sorted(self._student_files.get(neptun, ()))
+        enrollments = [enrollment for source_file in files for enrollment in self._enrollments[source_file][neptun]]
+        if not enrollments and neptun not in self._topics:
+            return None
+        return self._make_student(neptun, enrollments)
+
+    def _make_student(self, neptun: str, enrollments: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Fused record of a student from their enrollments and topic"""
+        record = self._new_student(neptun, enrollments[0]['student_name'] if enrollments else self._topic_names[neptun])
+
+        # One entry per course (the first enrollment of the course)
+        courses: Dict[str, Dict[str, Any]] = {}
+        for enrollment in enrollments:
+            if enrollment['course_code'] not in courses:
+                courses[enrollment['course_code']] = self._course_entry(enrollment)
+            if enrollment['is_english_course']:
+                record['is_enrolled_in_english_course'] = True
+        record['enrolled_courses'] = list(courses.values())
+
+        topic = self._topics.get(neptun)
+        if topic is not None:
+            self._set_topic(record, topic)
+        return record
+
+    @staticmethod
+    def _new_student(neptun: str, name: str) -> Dict[str, Any]:
+        return {
+            'student_neptun': neptun,
+            'student_name': name,
+            'enrolled_courses': [],
+            'has_topic': False,
+            'supervisor': None,
+            'topic_category': None,
+            'topic_title': None,
+            'is_english_topic': False,
+            'is_enrolled_in_english_course': False
+        }
+
+    @staticmethod
+    def _course_entry(enrollment: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'course_code': enrollment['course_code'],
+            'is_english_course': enrollment['is_english_course'],
+            'schedule_type': enrollment.get('schedule_type', ''),
+            'entry': enrollment.get('entry', ''),
+            'partial_result': enrollment.get('partial_result', '')
+        }
+
+    @staticmethod
+    def _set_topic(record: Dict[str, Any], topic: Dict[str, Any]) -> None:
+        record['has_topic'] = True
+        record['supervisor'] = topic['supervisor']
+        record['topic_category'] = topic.get('category', topic.get('topic_category'))
+        record['topic_title'] = topic['topic_title']
+        record['is_english_topic'] = is_english_topic(topic['topic_title'])
+
+    def _rebuild(self, neptun_codes: Iterable[str]) -> None:
+        """Rebuild the records of the given students (after an update) with their indexes and counters"""
+        for neptun in neptun_codes:
+            old = self.students.pop(neptun, None)
+            if old is not None:
+                self._account(old, -1)
+            record = self._build_student(neptun)
+            if record is not None:
+                self.students[neptun] = record
+                self._account(record, 1)
+        self._sorted = None
+
+    def _account(self, record: Dict[str, Any], sign: int) -> None:
+        """Add (sign=1) or remove (sign=-1) a student record in the indexes and summary counters"""
+        neptun = record['student_neptun']
+        course_codes = [course['course_code'] for course in record['enrolled_courses']]
+
+        if sign > 0:
+            self.student_courses[neptun] = set(course_codes)
+            for course_code in course_codes:
+                self.course_students.setdefault(course_code, set()).add(neptun)
+            if record['supervisor'] is not None:
+                self.supervisor_students.setdefault(record['supervisor'], set()).add(neptun)
+        else:
+            self.student_courses.pop(neptun, None)
+            for course_code in course_codes:
+                self._discard(self.course_students, course_code, neptun)
+            if record['supervisor'] is not None:
+                self._discard(self.supervisor_students, record['supervisor'], neptun)
+
+        counters = self._counters
+        counters['total_students'] += sign
+        if course_codes:
+            counters['students_with_enrollments'] += sign
+        if record['is_enrolled_in_english_course']:
+            counters['students_in_english_courses'] += sign
+        if record['has_topic']:
+            counters['students_with_topics'] += sign
+            if course_codes:
+                counters['students_with_both'] += sign
+            if record['is_english_topic']:
+                counters['students_with_english_topics'] += sign
+            else:
+                counters['students_with_hungarian_topics'] += sign
+            self._categories[(record['is_english_topic'], record['topic_category'])] += sign
+        course_languages = self._course_languages
+        for course in record['enrolled_courses']:
+            course_languages[(course['course_code'], course['is_english_course'])] += sign
+
+    @staticmethod
+    def _discard(index: Dict[str, Set[str]], key: str, neptun: str) -> None:
+        students = index.get(key)
+        if students is not None:
+            students.discard(neptun)
+            if not students:
+                del index[key]
+
+    @property
+    def fused_students(self) -> List[Dict[str, Any]]:
+        """Fused student records sorted by student name (then Neptun code)"""
+        if self._sorted is None:
+            self._sorted = sorted(self.students.values(), key=lambda s: (s['student_name'], s['student_neptun']))
+        return self._sorted
+
+    def students_in_courses(self, course_codes: Iterable[str]) -> Set[str]:
+        """Neptun codes of the students enrolled in any of the given courses"""
+        result: Set[str] = set()
+        for course_code in course_codes:
+            result |= self.course_students.get(course_code, set())
+        return result
+
+    def students_of_supervisor(self, supervisor: str) -> Set[str]:
+        """Neptun codes of the students with a topic of the given supervisor"""
+        return set(self.supervisor_students.get(supervisor, ()))
+
+    def get_summary(self) -> Dict[str, Any]:
+        """
+        Summary statistics of the fused data, from the counters maintained during fusion
+
+        Returns:
+            Dictionary with fusion statistics
+        """
+        counters = self._counters
+        english_courses = {code for (code, english), count in self._course_languages.items() if english and count}
+        hungarian_courses = {code for (code, english), count in self._course_languages.items() if not english and count}
+        all_courses = english_courses | hungarian_courses
+
+        def categories(english: bool) -> Dict[str, int]:
+            return {category: count for (is_english, category), count
+                    in sorted(self._categories.items(), key=lambda item: str(item[0][1]))
+                    if is_english == english and count}
+
+        return {
+            'total_students': counters['total_students'],
+            'students_with_topics': counters['students_with_topics'],
+            'students_with_enrollments': counters['students_with_enrollments'],
+            'students_with_both': counters['students_with_both'],
+            'students_with_english_topics': counters['students_with_english_topics'],
+            'students_with_hungarian_topics': counters['students_with_hungarian_topics'],
+            'students_in_english_courses': counters['students_in_english_courses'],
+            'unique_courses': len(all_courses),
+            'english_courses': len(english_courses),
+            'hungarian_courses': len(hungarian_courses),
+            'course_list': sorted(all_courses),
+            'english_course_list': sorted(english_courses),
+            'hungarian_course_list': sorted(hungarian_courses),
+            'hungarian_topic_categories': categories(False),
+            'english_topic_categories': categories(True)
+        }
+
 
 class FusionDataValidator:
-    """Validates and analyzes fused data"""
-    
+    """Validates the input data of the fusion"""
+
     def __init__(self, logger: logging.Logger, allowed_course_codes: set):
         self.logger = logger
         self.allowed_course_codes = allowed_course_codes
-    
+
     def validate_course_coverage(self, dlxls_data: List[Dict[str, Any]], dlnep_data: List[Dict[str, Any]]) -> None:
         """
         Validate that we have data for all required courses and warn about missing ones
         """
         # Get course codes found in DLXLS data
         dlxls_courses = set(record['course_code'] for record in dlxls_data if record.get('course_code'))
-        
+
         # Get course codes found in DLNEP data
         dlnep_courses = set(record['course_code'] for record in dlnep_data if record.get('course_code'))
-        
+
         # Check for missing courses
         missing_from_dlxls = self.allowed_course_codes - dlxls_courses
         missing_from_dlnep = self.allowed_course_codes - dlnep_courses
-        
+
         if missing_from_dlxls:
             self.logger.warning(f"Missing DLXLS data for courses: {', '.join(sorted(missing_from_dlxls))}")
-        
+
         if missing_from_dlnep:
             self.logger.warning(f"Missing DLNEP data for courses: {', '.join(sorted(missing_from_dlnep))}")
-        
+
         # Log coverage summary
         self.logger.info(f"Course coverage: DLXLS has {len(dlxls_courses)}/{len(self.allowed_course_codes)} courses, "
                         f"DLNEP has {len(dlnep_courses)}/{len(self.allowed_course_codes)} courses")
-    
-    def analyze_fusion_results(self, fused_data: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """
-        Analyze the fusion results and return statistics
-        
-        Args:
-            fused_data: List of fused student records
-            
-        Returns:
-            Dictionary containing fusion statistics
-        """
-        total_students = len(fused_data)
-        students_with_topics = sum(1 for s in fused_data if s.get('has_topic'))
-        students_with_enrollments = sum(1 for s in fused_data if s.get('enrolled_courses'))
-        students_with_both = sum(1 for s in fused_data if s.get('has_topic') and s.get('enrolled_courses'))
-        
-        # Analyze courses
-        all_courses = set()
-        english_courses = set()
-        hungarian_courses = set()
-        
-        for student in fused_data:
-            for course in student.get('enrolled_courses', []):
-                course_code = course.get('course_code')
-                if course_code:
-                    all_courses.add(course_code)
-                    if course.get('is_english'):
-                        english_courses.add(course_code)
-                    else:
-                        hungarian_courses.add(course_code)
-        
-        # Count students in English courses
-        students_in_english_courses = 0
-        for student in fused_data:
-            has_english_course = any(
-                course.get('is_english', False) 
-                for course in student.get('enrolled_courses', [])
-            )
-            if has_english_course:
-                students_in_english_courses += 1
-        
-        return {
-            'total_students': total_students,
-            'students_with_topics': students_with_topics,
-            'students_with_enrollments': students_with_enrollments,
-            'students_with_both': students_with_both,
-            'unique_courses': len(all_courses),
-            'english_courses': len(english_courses),
-            'hungarian_courses': len(hungarian_courses),
-            'students_in_english_courses': students_in_english_courses,
-            'all_courses_list': sorted(all_courses),
-            'english_courses_list': sorted(english_courses),
-            'hungarian_courses_list': sorted(hungarian_courses)
-        }
 
 
 class FusionDataExporter:
-    """Responsible for exporting fused data to JSON"""
-    
+    """Responsible for exporting fused data to JSON and to the indexed student store"""
+
     def __init__(self, logger: logging.Logger):
         self.logger = logger
-    
-    def save_to_json(self, fused_data: List[Dict[str, Any]], dlxls_count: int, dlnep_count: int, 
-                    output_file: Path) -> bool:
+
+    def build_metadata(self, engine: DataFusionEngine, dlxls_count: int, dlnep_count: int) -> Dict[str, Any]:
         """
-        Save fused data to JSON file
-        
+        Metadata of the fused dataset (shared by the JSON file and the store)
+
         Args:
-            fused_data: List of fused student records
+            engine: Fusion engine holding the fused student records
             dlxls_count: Number of DLXLS records processed
             dlnep_count: Number of DLNEP records processed
+        """
+        summary = engine.get_summary()
+        return {
+            "creation_date": pd.Timestamp.now().isoformat(),
+            "total_students": summary['total_students'],
+            "students_with_topics": summary['students_with_topics'],
+            "students_with_enrollments": summary['students_with_enrollments'],
+            "dlxls_records": dlxls_count,
+            "dlnep_records": dlnep_count
+        }
+
+    def save_to_json(self, engine: DataFusionEngine, metadata: Dict[str, Any], output_file: Path) -> bool:
+        """
+        Save fused data to JSON file
+
+        Args:
+            engine: Fusion engine holding the fused student records
+            metadata: Metadata of the dataset (see build_metadata)
             output_file: Path to output JSON file
-            
+
         Returns:
             True if successful, False otherwise
         """
         try:
-            # Create metadata
-            metadata = {
-                "creation_date": pd.Timestamp.now().isoformat(),
-                "total_students": len(fused_data),
-                "students_with_topics": sum(1 for s in fused_data if s.get('has_topic')),
-                "students_with_enrollments": sum(1 for s in fused_data if s.get('enrolled_courses')),
-                "dlxls_records": dlxls_count,
-                "dlnep_records": dlnep_count
-            }
-            
+            fused_data = engine.fused_students
+
             # Create output structure
             output_data = {
                 "metadata": metadata,
                 "students": fused_data
             }
-            
+
             # Save to JSON file
             with open(output_file, 'w', encoding='utf-8') as f:
                 json.dump(output_data, f, indent=2, ensure_ascii=False)
-            
+
             self.logger.info(f"Fused data saved to: {output_file}")
             self.logger.info(f"Dataset contains {len(fused_data)} students")
-            
+
             return True
-            
+
         except Exception as e:
             self.logger.error(f"Error saving fused data: {e}")
             return False
+
+    def save_to_store(self, engine: DataFusionEngine, metadata: Dict[str, Any], db_file: Path,
+                      source_file: Optional[Path] = None) -> bool:
+        """
+        Save fused data to the indexed student store (SQLite)
+
+        Args:
+            engine: Fusion engine holding the fused student records
+            metadata: Metadata of the dataset (see build_metadata)
+            db_file: Path to the store file
+            source_file: JSON file just saved with the same data (see save_fused_data)
+
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            store = FusedStudentStore.write(db_file, engine.fused_students, metadata, self.logger,
+                                            source_file)
+            store.close()
+            return True
+
+        except Exception as e:
+            self.logger.error(f"Error saving fused student store: {e}")
+            return False
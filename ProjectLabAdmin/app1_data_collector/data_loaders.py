@@ -3,12 +3,211 @@ Data loaders for DLFUSION - separated according to SRP
 """
 
 import pandas as pd
+import hashlib
+import os
 import re
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from importlib.util import find_spec
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Callable, Dict, List, Any, Optional, Tuple
 import logging
 
 
+# Excel engine: calamine (python-calamine package) reads .xlsx files several times
+# faster than openpyxl and is used when it is installed
+EXCEL_ENGINE = 'calamine' if find_spec('python_calamine') else 'openpyxl'
+
+# Worker processes for reading the DLNEP course exports
+EXCEL_READ_WORKERS = min(8, os.cpu_count() or 1)
+
+# Parsed-sheet cache: normalized sheets are stored as Parquet when pyarrow is installed,
+# otherwise as pandas pickles. Bump SHEET_LOADER_VERSION whenever the normalization of a
+# sheet changes, so cached sheets of the old loader are not used
+SHEET_CACHE_DIR = Path(__file__).parent.parent / "data" / "sheet_cache"
+SHEET_CACHE_FORMAT = 'parquet' if find_spec('pyarrow') else 'pickle'
+SHEET_LOADER_VERSION = 1
+
+# DLNEP record field -> column of the Neptun export
+DLNEP_COLUMNS = {
+    'student_neptun': 'Neptunkód',
+    'student_name': 'Név',
+    'schedule_type': 'Tanrend típus',
+    'current_semester_entries': 'Bejegyzések (Aktuális félév)',
+    'entry': 'Bejegyzés',
+    'partial_result': 'Részeredmény'
+}
+
+# DLXLS record field -> column of the first worksheet of the BME workload export (DLFUSION)
+DLXLS_TOPIC_COLUMNS = {
+    'supervisor': 'Konzulens',
+    'supervisor_id': 'Konz. száma',
+    'course_name': 'Tárgy',
+    'course_code': 'Tárgy nept',
+    'category': 'Kategória',
+    'topic_title': 'Téma címe',
+    'student_name': 'Hallgató neve',
+    'student_neptun': 'Hallg. nept'
+}
+
+# Columns of the consultation worksheet read by DLXLSDataLoader
+DLXLS_CONSULTATION_COLUMNS = {column: column for column in
+                              ('Neptun', 'Név', 'Konzulens', 'Kategória', 'Téma címe', 'Tárgykód')}
+
+
+def read_excel(file_path: Path, sheet_name=0) -> pd.DataFrame:
+    """Read a worksheet with the fastest available Excel engine"""
+    return pd.read_excel(file_path, sheet_name=sheet_name, engine=EXCEL_ENGINE)
+
+
+def read_excel_files(file_paths: List[Path], max_workers: int = EXCEL_READ_WORKERS
+                     ) -> List[Tuple[Path, Optional[pd.DataFrame], Optional[Exception]]]:
+    """
+    Read the first worksheet of several Excel files, in a process pool if there are more than one
+    
+    Args:
+        file_paths: Excel files to read
+        max_workers: Worker processes (1 reads the files one after the other)
+        
+    Returns:
+        (file path, data frame, None) or (file path, None, error) for every file, in input order
+    """
+    if max_workers <= 1 or len(file_paths) <= 1:
+        results = []
+        for file_path in file_paths:
+            try:
+                results.append((file_path, read_excel(file_path), None))
+            except Exception as e:
+                results.append((file_path, None, e))
+        return results
+    
+    with ProcessPoolExecutor(max_workers=min(max_workers, len(file_paths))) as executor:
+        futures = [executor.submit(read_excel, file_path) for file_path in file_paths]
+        results = []
+        for file_path, future in zip(file_paths, futures):
+            try:
+                results.append((file_path, future.result(), None))
+            except Exception as e:
+                results.append((file_path, None, e))
+        return results
+
+
+def text_column(df: pd.DataFrame, column: str) -> pd.Series:
+    """Values of a column as stripped strings (str(row.get(column, '')).strip() for every row)"""
+    if column not in df.columns:
+        return pd.Series('', index=df.index, dtype=object)
+    return df[column].map(str).str.strip()
+
+
+def text_frame(df: pd.DataFrame, columns: Dict[str, str]) -> pd.DataFrame:
+    """Normalized sheet: the given columns (field -> sheet column) as stripped strings"""
+    return pd.DataFrame({field: text_column(df, column) for field, column in columns.items()}, index=df.index)
+
+
+class SheetCache:
+    """
+    On-disk cache of parsed and normalized worksheets
+    
+    Entries are keyed by the SHA-256 hash of the source file content, the kind of
+    sheet and SHEET_LOADER_VERSION, so an unchanged file is never parsed twice and
+    a changed file or a new loader version is parsed again.
+    """
+    
+    def __init__(self, cache_dir: Path = SHEET_CACHE_DIR, logger: Optional[logging.Logger] = None):
+        self.cache_dir = Path(cache_dir)
+        self.version_dir = self.cache_dir / f"v{SHEET_LOADER_VERSION}-{SHEET_CACHE_FORMAT}"
+        self.logger = logger or logging.getLogger(__name__)
+        self.stats = {'hits': 0, 'misses': 0, 'stored': 0, 'cache_seconds': 0.0, 'parse_seconds': 0.0}
+        self._digests: Dict[Path, Tuple[Tuple[int, int], str]] = {}
+        self._remove_old_versions()
+    
+    def _remove_old_versions(self) -> None:
+        """Invalidate the sheets of other loader versions (and cache formats)"""
+        if not self.cache_dir.exists():
+            return
+        for path in self.cache_dir.iterdir():
+            if path.is_dir() and path != self.version_dir:
+                shutil.rmtree(path, ignore_errors=True)
+    
+    def _entry_path(self, file_path: Path, kind: str) -> Path:
+        # The hash of a file is reused while its size and mtime are unchanged
+        stat = Path(file_path).stat()
+        signature = (stat.st_size, stat.st_mtime_ns)
+        cached = self._digests.get(file_path)
+        if cached is None or cached[0] != signature:
+            cached = (signature, hashlib.sha256(Path(file_path).read_bytes()).hexdigest())
+            self._digests[file_path] = cached
+        return self.version_dir / f"{kind}-{cached[1]}"
+    
+    def get(self, file_path: Path, kind: str) -> Optional[pd.DataFrame]:
+        """Cached sheet of the given kind of a file, or None"""
+        start = time.perf_counter()
+        entry_path = self._entry_path(file_path, kind)
+        if not entry_path.exists():
+            self.stats['misses'] += 1
+            return None
+        try:
+            if SHEET_CACHE_FORMAT == 'parquet':
+                frame = pd.read_parquet(entry_path)
+            else:
+                frame = pd.read_pickle(entry_path)
+        except Exception as e:
+            self.logger.warning(f"Ignoring unreadable cached sheet {entry_path.name}: {e}")
+            self.stats['misses'] += 1
+            return None
+        self.stats['hits'] += 1
+        self.stats['cache_seconds'] += time.perf_counter() - start
+        return frame
+    
+    def put(self, file_path: Path, kind: str, frame: pd.DataFrame) -> None:
+        """Store the normalized sheet of the given kind of a file"""
+        entry_path = self._entry_path(file_path, kind)
+        try:
+            self.version_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = entry_path.with_suffix('.tmp')
+            if SHEET_CACHE_FORMAT == 'parquet':
+                frame.to_parquet(tmp_path)
+            else:
+                frame.to_pickle(tmp_path)
+            os.replace(tmp_path, entry_path)
+            self.stats['stored'] += 1
+        except Exception as e:
+            self.logger.warning(f"Could not cache sheet of {Path(file_path).name}: {e}")
+    
+    def load(self, file_path: Path, kind: str, parse: Callable[[], Optional[pd.DataFrame]]) -> Optional[pd.DataFrame]:
+        """
+        Cached sheet of a file, parsed with parse() and stored if it is not cached yet
+        
+        Args:
+            file_path: Source Excel file
+            kind: Kind of the normalized sheet (which sheet and columns)
+            parse: Reads and normalizes the sheet; None if the file has no such sheet (not cached)
+        """
+        frame = self.get(file_path, kind)
+        if frame is None:
+            start = time.perf_counter()
+            frame = parse()
+            self.stats['parse_seconds'] += time.perf_counter() - start
+            if frame is not None:
+                self.put(file_path, kind, frame)
+        return frame
+    
+    def clear(self) -> None:
+        """Remove every cached sheet"""
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        self._digests.clear()
+        self.logger.info(f"Cleared sheet cache: {self.cache_dir}")
+    
+    def report(self) -> str:
+        """One-line summary of the cache use in this run"""
+        stats = self.stats
+        size = sum(p.stat().st_size for p in self.version_dir.glob('*')) if self.version_dir.exists() else 0
+        return (f"Sheet cache: {stats['hits']} hits ({stats['cache_seconds'] * 1000:.0f} ms), "
+                f"{stats['misses']} misses ({stats['parse_seconds'] * 1000:.0f} ms parsing), "
+                f"{stats['stored']} stored; {size / 1024:.0f} KB in {self.cache_dir} ({SHEET_CACHE_FORMAT})")
+
+
 class CourseCodeValidator:
     """Validates course codes according to specification"""
     
@@ -23,9 +222,11 @@ class CourseCodeValidator:
 class DLXLSDataLoader:
     """Responsible for loading and processing DLXLS data"""
     
-    def __init__(self, logger: logging.Logger, course_validator: CourseCodeValidator):
+    def __init__(self, logger: logging.Logger, course_validator: CourseCodeValidator,
+                 sheet_cache: Optional[SheetCache] = None):
         self.logger = logger
         self.course_validator = course_validator
+        self.sheet_cache = sheet_cache
     
     def load_data(self, file_path: Path) -> List[Dict[str, Any]]:
         """
@@ -44,17 +245,15 @@ class DLXLSDataLoader:
                 self.logger.error(f"DLXLS file not found: {file_path}")
                 return []
             
-            # Read the second worksheet (containing "konzultáció")
-            excel_file = pd.ExcelFile(file_path)
-            target_sheet = self._find_consultation_sheet(excel_file)
+            if self.sheet_cache:
+                df = self.sheet_cache.load(file_path, 'dlxls_consultation', lambda: self._read_consultation_sheet(file_path))
+            else:
+                df = self._read_consultation_sheet(file_path)
             
-            if not target_sheet:
+            if df is None:
                 self.logger.error("Could not find consultation worksheet")
                 return []
             
-            df = pd.read_excel(file_path, sheet_name=target_sheet)
-            self.logger.info(f"Read {len(df)} rows from worksheet '{target_sheet}'")
-            
             # Process the data
             student_data = self._process_dlxls_dataframe(df)
             
@@ -72,6 +271,17 @@ class DLXLSDataLoader:
             self.logger.error(f"Error loading DLXLS data: {e}")
             return []
     
+    def _read_consultation_sheet(self, file_path: Path) -> Optional[pd.DataFrame]:
+        """Read and normalize the second worksheet (containing "konzultáció")"""
+        excel_file = pd.ExcelFile(file_path, engine=EXCEL_ENGINE)
+        target_sheet = self._find_consultation_sheet(excel_file)
+        if not target_sheet:
+            return None
+        
+        df = excel_file.parse(target_sheet)
+        self.logger.info(f"Read {len(df)} rows from worksheet '{target_sheet}'")
+        return text_frame(df, DLXLS_CONSULTATION_COLUMNS)
+    
     def _find_consultation_sheet(self, excel_file) -> Optional[str]:
         """Find the worksheet containing 'konzultáció' in its name"""
         for sheet_name in excel_file.sheet_names:
@@ -80,10 +290,10 @@ class DLXLSDataLoader:
         return None
     
     def _process_dlxls_dataframe(self, df: pd.DataFrame) -> List[Dict[str, Any]]:
-        """Process DLXLS dataframe to extract student information"""
+        """Process normalized DLXLS dataframe to extract student information"""
         processed_data = []
         
-        for _, row in df.iterrows():
+        for row in df.to_dict('records'):
             try:
                 student_data = self._extract_dlxls_student_data(row)
                 if student_data and student_data.get('student_neptun'):
@@ -137,9 +347,12 @@ class DLXLSDataLoader:
 class DLNEPDataLoader:
     """Responsible for loading and processing DLNEP data"""
     
-    def __init__(self, logger: logging.Logger, course_validator: CourseCodeValidator):
+    def __init__(self, logger: logging.Logger, course_validator: CourseCodeValidator,
+                 max_workers: int = EXCEL_READ_WORKERS, sheet_cache: Optional[SheetCache] = None):
         self.logger = logger
         self.course_validator = course_validator
+        self.max_workers = max_workers
+        self.sheet_cache = sheet_cache
     
     def load_data(self, folder_path: Path) -> List[Dict[str, Any]]:
         """
@@ -158,65 +371,92 @@ class DLNEPDataLoader:
                 self.logger.error(f"DLNEP folder not found: {folder_path}")
                 return []
             
-            excel_files = list(folder_path.glob("*.xlsx"))
+            excel_files = sorted(folder_path.glob("*.xlsx"))
             if not excel_files:
                 self.logger.error(f"No Excel files found in: {folder_path}")
                 return []
             
-            all_student_data = []
-            processed_files = 0
-            
-            for file_path in excel_files:
-                student_data = self._process_dlnep_file(file_path)
-                all_student_data.extend(student_data)
-                if student_data:  # Only count non-empty files
-                    processed_files += 1
-            
-            # Filter by allowed course codes
-            filtered_data = [
-                student for student in all_student_data 
-                if student.get('course_code') and 
-                self.course_validator.is_valid_course(student['course_code'])
-            ]
-            
-            self.logger.info(f"Loaded {len(filtered_data)} student enrollments from {processed_files} DLNEP files (filtered by allowed course codes)")
-            return filtered_data
+            return self.load_files(excel_files)
             
         except Exception as e:
             self.logger.error(f"Error loading DLNEP data: {e}")
             return []
     
-    def _process_dlnep_file(self, file_path: Path) -> List[Dict[str, Any]]:
-        """Process a single DLNEP Excel file"""
-        try:
-            # Read the Excel file
-            df = pd.read_excel(file_path)
+    def load_files(self, excel_files: List[Path]) -> List[Dict[str, Any]]:
+        """
+        Load the student enrollments of DLNEP Excel files (one file per course)
+        
+        Sheets in the sheet cache are not read again; the other files are read in
+        parallel worker processes.
+        
+        Args:
+            excel_files: DLNEP Excel files
+            
+        Returns:
+            List of student enrollment dictionaries of the allowed courses
+        """
+        # The course of a file is in its name, so files of other courses are not read at all
+        courses = {}
+        for file_path in excel_files:
+            course_code, is_english_course = self._extract_course_info_from_filename(file_path.name)
+            if not course_code.startswith('BMEVI'):
+                self.logger.warning(f"Skipping file with invalid course code: {file_path.name}")
+                continue
+            courses[file_path] = (course_code, is_english_course)
+        
+        sheets = {}
+        if self.sheet_cache:
+            for file_path in courses:
+                sheets[file_path] = self.sheet_cache.get(file_path, 'dlnep')
+        
+        to_read = [file_path for file_path in courses if sheets.get(file_path) is None]
+        start = time.perf_counter()
+        for file_path, df, error in read_excel_files(to_read, self.max_workers):
+            if error is not None:
+                sheets[file_path] = error
+                continue
+            sheets[file_path] = text_frame(df, DLNEP_COLUMNS)
+            if self.sheet_cache:
+                self.sheet_cache.put(file_path, 'dlnep', sheets[file_path])
+        if self.sheet_cache:
+            self.sheet_cache.stats['parse_seconds'] += time.perf_counter() - start
+        
+        all_student_data = []
+        processed_files = 0
+        
+        for file_path, df in sheets.items():
+            if isinstance(df, Exception):
+                self.logger.warning(f"Error processing file {file_path.name}: {df}")
+                continue
             
             if df.empty:
                 self.logger.info(f"Skipping empty file: {file_path.name}")
-                return []
-            
-            # Extract course information from filename
-            course_code, is_english_course = self._extract_course_info_from_filename(file_path.name)
+                continue
             
-            # Process each student row
-            student_data = []
-            for _, row in df.iterrows():
-                student_info = self._extract_dlnep_student_data(row, course_code, is_english_course, file_path.name)
-                if student_info:
-                    student_data.append(student_info)
+            course_code, is_english_course = courses[file_path]
+            if self.course_validator.is_valid_course(course_code):
+                all_student_data.extend(
+                    self._extract_dlnep_students(df, course_code, is_english_course, file_path.name))
+            else:
+                self.logger.debug(f"Skipping DLNEP records for course {course_code} - not in allowed list")
             
+            processed_files += 1
             course_type = "English" if is_english_course else "Hungarian"
             self.logger.info(f"Processed {file_path.name}: {len(df)} students ({course_type} course)")
-            
-            return student_data
-            
-        except Exception as e:
-            self.logger.warning(f"Error processing file {file_path.name}: {e}")
-            return []
+        
+        self.logger.info(f"Loaded {len(all_student_data)} student enrollments from {processed_files} DLNEP files (filtered by allowed course codes)")
+        return all_student_data
     
     def _extract_course_info_from_filename(self, filename: str) -> tuple:
-        """Extract course code and language info from filename"""
+        """
+        Extract course code and language info from filename
+        
+        Filename format: jegyimport_BMEVIxxxxxx_YY_...
+        where YY starts with 'A' for English courses, otherwise Hungarian
+        
+        Returns:
+            Tuple of (course_code, is_english)
+        """
         try:
             # Pattern to match the filename format: jegyimport_BMEVIxxxxxx_YY_
             pattern = r'jegyimport_([^_]+)_([^_]+)_'
@@ -248,27 +488,19 @@ class DLNEPDataLoader:
         match = re.search(r'(BMEVI[A-Z]+\d+)', filename.upper())
         return match.group(1) if match else "UNKNOWN"
     
-    def _extract_dlnep_student_data(self, row, course_code: str, is_english_course: bool, filename: str) -> Optional[Dict[str, Any]]:
-        """Extract student data from DLNEP Excel row"""
-        try:
-            # Extract student information from row
-            student_neptun = str(row.get('Neptun kód', '')).strip()
-            student_name = str(row.get('Név', '')).strip()
-            
-            if not student_neptun or student_neptun == 'nan':
-                return None
-            
-            return {
-                'student_neptun': student_neptun,
-                'student_name': student_name,
+    def _extract_dlnep_students(self, df: pd.DataFrame, course_code: str, is_english_course: bool,
+                                filename: str) -> List[Dict[str, Any]]:
+        """Extract the student enrollments of a normalized DLNEP sheet (see DLNEP_COLUMNS)"""
+        # Skip empty rows
+        neptun = df['student_neptun']
+        df = df[(neptun != '') & (neptun != 'nan')]
+        
+        return [
+            {
                 'course_code': course_code,
                 'is_english_course': is_english_course,
-                'source_file': filename,
-                'schedule_type': str(row.get('Órarend típus', '')).strip(),
-                'entry': str(row.get('Felvétel', '')).strip(),
-                'partial_result': str(row.get('Részeredmény', '')).strip()
+                **record,
+                'source_file': filename
             }
-            
-        except Exception as e:
-            self.logger.warning(f"Error extracting DLNEP student data: {e}")
-            return None
+            for record in df.to_dict('records')
+        ]
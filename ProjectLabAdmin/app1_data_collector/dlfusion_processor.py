@@ -3,14 +3,22 @@ DLFUSION - Data fusion module
 This module combines data from DLXLS and DLNEP into a single JSON dataset.
 """
 
-import json
-import pandas as pd
-import re
+import argparse
 from pathlib import Path
-from typing import Dict, List, Any, Optional
-import sys
+from typing import Dict, Any, Optional
 import logging
 
+from data_loaders import (
+    DLXLS_TOPIC_COLUMNS,
+    CourseCodeValidator,
+    DLNEPDataLoader,
+    SheetCache,
+    read_excel,
+    text_frame
+)
+from data_fusion import DataFusionEngine, FusionDataExporter, FusionDataValidator
+from fused_store import default_store_path
+
 # Simple logging setup to avoid dependency issues
 def setup_logging(name: str) -> logging.Logger:
     logger = logging.getLogger(name)
@@ -36,12 +44,23 @@ class DataFusionProcessor:
         'BMEVIAUM026', 'BMEVIAUM027', 'BMEVIAUM039'
     }
     
-    def __init__(self):
-        """Initialize the data fusion processor"""
+    def __init__(self, use_sheet_cache: bool = True):
+        """
+        Initialize the data fusion processor
+        
+        Args:
+            use_sheet_cache: Serve unchanged Excel files from the parsed-sheet cache (data/sheet_cache)
+        """
         self.logger = setup_logging(__name__)
         self.dlxls_data = []
         self.dlnep_data = []
         self.fused_data = []
+        self.sheet_cache = SheetCache(logger=self.logger) if use_sheet_cache else None
+        self.dlnep_loader = DLNEPDataLoader(self.logger, CourseCodeValidator(self.ALLOWED_COURSE_CODES),
+                                            sheet_cache=self.sheet_cache)
+        self.fusion_engine = DataFusionEngine(self.logger)
+        self.validator = FusionDataValidator(self.logger, self.ALLOWED_COURSE_CODES)
+        self.exporter = FusionDataExporter(self.logger)
     
     def load_dlxls_data(self, file_path: Optional[Path] = None) -> bool:
         """
@@ -62,27 +81,17 @@ class DataFusionProcessor:
                 return False
             
             self.logger.info(f"Loading DLXLS data from: {file_path}")
-            df = pd.read_excel(file_path)
+            parse = lambda: text_frame(read_excel(file_path), DLXLS_TOPIC_COLUMNS)
+            df = self.sheet_cache.load(file_path, 'dlxls_topics', parse) if self.sheet_cache else parse()
             
             # Convert to list of dictionaries and clean up the data
             self.dlxls_data = []
-            for _, row in df.iterrows():
-                course_code = str(row.get('Tárgy nept', '')).strip()
+            for student_data in df.to_dict('records'):
+                course_code = student_data['course_code']
                 
                 # Add BME prefix if missing (handle both VIAUAL04 and BMEVIAUAL04 formats)
                 if course_code and not course_code.startswith('BME'):
-                    course_code = 'BME' + course_code
-                
-                student_data = {
-                    'supervisor': str(row.get('Konzulens', '')).strip(),
-                    'supervisor_id': str(row.get('Konz. száma', '')).strip(),
-                    'course_name': str(row.get('Tárgy', '')).strip(),
-                    'course_code': course_code,
-                    'category': str(row.get('Kategória', '')).strip(),
-                    'topic_title': str(row.get('Téma címe', '')).strip(),
-                    'student_name': str(row.get('Hallgató neve', '')).strip(),
-                    'student_neptun': str(row.get('Hallg. nept', '')).strip()
-                }
+                    student_data['course_code'] = 'BME' + course_code
                 
                 # Only add if we have essential data and course code is in allowed list
                 if student_data['student_neptun'] and student_data['course_code']:
@@ -117,145 +126,47 @@ class DataFusionProcessor:
                 return False
             
             self.logger.info(f"Loading DLNEP data from: {folder_path}")
-            excel_files = list(folder_path.glob("*.xlsx"))
+            excel_files = sorted(folder_path.glob("*.xlsx"))
             
             if not excel_files:
                 self.logger.error("No Excel files found in DLNEP folder")
                 return False
             
-            self.dlnep_data = []
-            processed_files = 0
-            
-            for file_path in excel_files:
-                try:
-                    course_code, is_english_course = self._extract_course_info_from_filename(file_path.name)
-                    
-                    if not course_code.startswith("BMEVI"):
-                        self.logger.warning(f"Skipping file with invalid course code: {file_path.name}")
-                        continue
-                    
-                    df = pd.read_excel(file_path)
-                    
-                    if len(df) == 0:
-                        self.logger.info(f"Skipping empty file: {file_path.name}")
-                        continue
-                    
-                    # Process each student in the course
-                    for _, row in df.iterrows():
-                        student_data = {
-                            'course_code': course_code,
-                            'is_english_course': is_english_course,
-                            'student_neptun': str(row.get('Neptunkód', '')).strip(),
-                            'student_name': str(row.get('Név', '')).strip(),
-                            'schedule_type': str(row.get('Tanrend típus', '')).strip(),
-                            'current_semester_entries': str(row.get('Bejegyzések (Aktuális félév)', '')).strip(),
-                            'entry': str(row.get('Bejegyzés', '')).strip(),
-                            'partial_result': str(row.get('Részeredmény', '')).strip()
-                        }
-                        
-                        # Only add if we have essential data and course code is in allowed list
-                        if student_data['student_neptun'] and student_data['course_code']:
-                            if student_data['course_code'] in self.ALLOWED_COURSE_CODES:
-                                self.dlnep_data.append(student_data)
-                            else:
-                                self.logger.debug(f"Skipping DLNEP record for course {student_data['course_code']} - not in allowed list")
-                    
-                    processed_files += 1
-                    course_type = "English" if is_english_course else "Hungarian"
-                    self.logger.info(f"Processed {file_path.name}: {len(df)} students ({course_type} course)")
-                    
-                except Exception as e:
-                    self.logger.warning(f"Error processing file {file_path.name}: {e}")
-                    continue
-            
-            self.logger.info(f"Loaded {len(self.dlnep_data)} student enrollments from {processed_files} DLNEP files (filtered by allowed course codes)")
+            # Files are read in parallel and extracted column-wise (see DLNEPDataLoader)
+            self.dlnep_data = self.dlnep_loader.load_files(excel_files)
             return True
             
         except Exception as e:
             self.logger.error(f"Error loading DLNEP data: {e}")
             return False
     
-    def _extract_course_code_from_filename(self, filename: str) -> str:
-        """Extract course code from filename"""
-        # Pattern to match BMEVI followed by letters/numbers
-        match = re.search(r'(BMEVI[A-Z]+\d+)', filename.upper())
-        return match.group(1) if match else "UNKNOWN"
-    
-    def _extract_course_info_from_filename(self, filename: str) -> tuple:
+    def update_course_export(self, file_path: Path) -> bool:
         """
-        Extract course code and language info from filename
-        
-        Filename format: jegyimport_BMEVIxxxxxx_YY_...
-        where YY starts with 'A' for English courses, otherwise Hungarian
+        Re-load one changed (or removed) DLNEP export and update the fused data incrementally
         
-        Returns:
-            Tuple of (course_code, is_english)
-        """
-        try:
-            # Pattern to match the filename format: jegyimport_BMEVIxxxxxx_YY_
-            # Use case-insensitive matching since filenames are in uppercase
-            pattern = r'jegyimport_([^_]+)_([^_]+)_'
-            match = re.search(pattern, filename, re.IGNORECASE)
-            
-            if match:
-                course_code = match.group(1).upper()
-                course_type = match.group(2).upper()
-                
-                # Verify the course code starts with BMEVI
-                if course_code.startswith('BMEVI'):
-                    is_english = course_type.startswith('A')
-                    return course_code, is_english
-                else:
-                    self.logger.warning(f"Course code {course_code} doesn't start with BMEVI in filename {filename}")
-                    return course_code, False
-            else:
-                # Fallback to old method
-                course_code = self._extract_course_code_from_filename(filename)
-                # If we can't parse the format, assume Hungarian
-                return course_code, False
-                
-        except Exception as e:
-            self.logger.warning(f"Error parsing filename {filename}: {e}")
-            course_code = self._extract_course_code_from_filename(filename)
-            return course_code, False
-    
-    def _is_english_topic(self, topic_title: str) -> bool:
-        """
-        Check if a topic is English based on title prefix
+        Only the students enrolled in the export before or after the change are rebuilt.
         
         Args:
-            topic_title: The topic title to check
+            file_path: Path to the DLNEP Excel file
             
         Returns:
-            True if topic is English (starts with Z-ENG), False otherwise
+            True if successful, False otherwise
         """
-        if not topic_title:
+        try:
+            enrollments = self.dlnep_loader.load_files([file_path]) if file_path.exists() else []
+            
+            # Records stay ordered by file name as a full load reads them, so the fused data equals a full fusion
+            others = [enrollment for enrollment in self.dlnep_data if enrollment.get('source_file') != file_path.name]
+            position = next((i for i, enrollment in enumerate(others)
+                             if enrollment.get('source_file', '') > file_path.name), len(others))
+            self.dlnep_data = others[:position] + enrollments + others[position:]
+            
+            self.fused_data = self.fusion_engine.update_course_export(file_path.name, enrollments)
+            return True
+            
+        except Exception as e:
+            self.logger.error(f"Error updating DLNEP export {file_path.name}: {e}")
             return False
-        return topic_title.upper().startswith('Z-ENG')
-    
-    def _validate_course_coverage(self) -> None:
-        """
-        Validate that we have data for all required courses and warn about missing ones
-        """
-        # Get course codes found in DLXLS data
-        dlxls_courses = set(record['course_code'] for record in self.dlxls_data if record['course_code'])
-        
-        # Get course codes found in DLNEP data
-        dlnep_courses = set(record['course_code'] for record in self.dlnep_data if record['course_code'])
-        
-        # Check for missing courses
-        missing_from_dlxls = set(self.ALLOWED_COURSE_CODES) - dlxls_courses
-        missing_from_dlnep = set(self.ALLOWED_COURSE_CODES) - dlnep_courses
-        
-        if missing_from_dlxls:
-            self.logger.warning(f"Missing DLXLS data for courses: {', '.join(sorted(missing_from_dlxls))}")
-        
-        if missing_from_dlnep:
-            self.logger.warning(f"Missing DLNEP data for courses: {', '.join(sorted(missing_from_dlnep))}")
-        
-        # Log coverage summary
-        self.logger.info(f"Course coverage: DLXLS has {len(dlxls_courses)}/{len(self.ALLOWED_COURSE_CODES)} courses, "
-                        f"DLNEP has {len(dlnep_courses)}/{len(self.ALLOWED_COURSE_CODES)} courses")
     
     def fuse_data(self) -> bool:
         """
@@ -273,91 +184,10 @@ class DataFusionProcessor:
                 self.logger.error("No data loaded for fusion")
                 return False
             
-            self.logger.info("Starting data fusion process...")
-            
             # Validate course coverage and warn about missing courses
-            self._validate_course_coverage()
-            
-            # Create a dictionary of students from DLNEP data (enrollments)
-            students_dict = {}
-            
-            # First, collect all course enrollments per student
-            for enrollment in self.dlnep_data:
-                neptun_code = enrollment['student_neptun']
-                course_code = enrollment['course_code']
-                
-                if neptun_code not in students_dict:
-                    students_dict[neptun_code] = {
-                        'student_neptun': neptun_code,
-                        'student_name': enrollment['student_name'],
-                        'enrolled_courses': [],
-                        'has_topic': False,
-                        'supervisor': None,
-                        'topic_category': None,
-                        'topic_title': None,
-                        'is_english_topic': False,
-                        'is_enrolled_in_english_course': False
-                    }
-                
-                # Add course to enrolled courses if not already present
-                course_info = {
-                    'course_code': course_code,
-                    'is_english_course': enrollment['is_english_course'],
-                    'schedule_type': enrollment['schedule_type'],
-                    'entry': enrollment['entry'],
-                    'partial_result': enrollment['partial_result']
-                }
-                
-                # Check if this course is already in the list
-                course_exists = any(c['course_code'] == course_code for c in students_dict[neptun_code]['enrolled_courses'])
-                if not course_exists:
-                    students_dict[neptun_code]['enrolled_courses'].append(course_info)
-                
-                # Mark if student is enrolled in any English course
-                if enrollment['is_english_course']:
-                    students_dict[neptun_code]['is_enrolled_in_english_course'] = True
-            
-            # Now, add topic information from DLXLS data
-            for topic_data in self.dlxls_data:
-                neptun_code = topic_data['student_neptun']
-                is_english_topic = self._is_english_topic(topic_data['topic_title'])
-                
-                # If student exists in enrollments, add topic info
-                if neptun_code in students_dict:
-                    students_dict[neptun_code]['has_topic'] = True
-                    students_dict[neptun_code]['supervisor'] = topic_data['supervisor']
-                    students_dict[neptun_code]['topic_category'] = topic_data['category']
-                    students_dict[neptun_code]['topic_title'] = topic_data['topic_title']
-                    students_dict[neptun_code]['is_english_topic'] = is_english_topic
-                else:
-                    # Student has topic but no enrollment data - still add them
-                    students_dict[neptun_code] = {
-                        'student_neptun': neptun_code,
-                        'student_name': topic_data['student_name'],
-                        'enrolled_courses': [],  # No enrollment data available
-                        'has_topic': True,
-                        'supervisor': topic_data['supervisor'],
-                        'topic_category': topic_data['category'],
-                        'topic_title': topic_data['topic_title'],
-                        'is_english_topic': is_english_topic,
-                        'is_enrolled_in_english_course': False
-                    }
-            
-            # Convert to list format
-            self.fused_data = list(students_dict.values())
-            
-            # Sort by student name for consistency
-            self.fused_data.sort(key=lambda x: x['student_name'])
-            
-            self.logger.info(f"Data fusion completed. {len(self.fused_data)} students in fused dataset")
-            
-            # Log some statistics
-            students_with_topics = sum(1 for s in self.fused_data if s['has_topic'])
-            students_with_enrollments = sum(1 for s in self.fused_data if s['enrolled_courses'])
-            
-            self.logger.info(f"Statistics: {students_with_topics} students with topics, "
-                           f"{students_with_enrollments} students with course enrollments")
+            self.validator.validate_course_coverage(self.dlxls_data, self.dlnep_data)
             
+            self.fused_data = self.fusion_engine.fuse_data(self.dlxls_data, self.dlnep_data)
             return True
             
         except Exception as e:
@@ -366,7 +196,7 @@ class DataFusionProcessor:
     
     def save_fused_data(self, output_file: Optional[Path] = None) -> bool:
         """
-        Save the fused data to JSON file
+        Save the fused data to JSON file and to the indexed store next to it (.sqlite)
         
         Args:
             output_file: Path for output JSON file (defaults to data/fused_student_data.json)
@@ -385,27 +215,13 @@ class DataFusionProcessor:
             # Ensure output directory exists
             output_file.parent.mkdir(parents=True, exist_ok=True)
             
-            # Create the final dataset structure
-            dataset = {
-                'metadata': {
-                    'creation_date': pd.Timestamp.now().isoformat(),
-                    'total_students': len(self.fused_data),
-                    'students_with_topics': sum(1 for s in self.fused_data if s['has_topic']),
-                    'students_with_enrollments': sum(1 for s in self.fused_data if s['enrolled_courses']),
-                    'dlxls_records': len(self.dlxls_data),
-                    'dlnep_records': len(self.dlnep_data)
-                },
-                'students': self.fused_data
-            }
-            
-            # Save to JSON with proper formatting
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(dataset, f, ensure_ascii=False, indent=2)
-            
-            self.logger.info(f"Fused data saved to: {output_file}")
-            self.logger.info(f"Dataset contains {len(self.fused_data)} students")
+            metadata = self.exporter.build_metadata(self.fusion_engine, len(self.dlxls_data), len(self.dlnep_data))
+            if not self.exporter.save_to_json(self.fusion_engine, metadata, output_file):
+                return False
             
-            return True
+            # Indexed store next to the JSON file for the planner statistics and queries
+            return self.exporter.save_to_store(self.fusion_engine, metadata, default_store_path(output_file),
+                                               output_file)
             
         except Exception as e:
             self.logger.error(f"Error saving fused data: {e}")
@@ -421,54 +237,9 @@ class DataFusionProcessor:
         if not self.fused_data:
             return {'error': 'No fused data available'}
         
-        # Calculate various statistics
-        students_with_topics = [s for s in self.fused_data if s['has_topic']]
-        students_with_enrollments = [s for s in self.fused_data if s['enrolled_courses']]
-        students_with_english_topics = [s for s in students_with_topics if s.get('is_english_topic', False)]
-        students_with_hungarian_topics = [s for s in students_with_topics if not s.get('is_english_topic', False)]
-        students_in_english_courses = [s for s in self.fused_data if s.get('is_enrolled_in_english_course', False)]
-        
-        # Course statistics
-        all_courses = set()
-        english_courses = set()
-        hungarian_courses = set()
-        
-        for student in self.fused_data:
-            for course in student['enrolled_courses']:
-                course_code = course['course_code']
-                all_courses.add(course_code)
-                if course.get('is_english_course', False):
-                    english_courses.add(course_code)
-                else:
-                    hungarian_courses.add(course_code)
-        
-        # Category statistics - separate Hungarian and English
-        hungarian_categories = {}
-        english_categories = {}
-        
-        for student in students_with_topics:
-            category = student.get('topic_category', 'Unknown')
-            if student.get('is_english_topic', False):
-                english_categories[category] = english_categories.get(category, 0) + 1
-            else:
-                hungarian_categories[category] = hungarian_categories.get(category, 0) + 1
-        
+        # Counters are maintained by the fusion engine, no scan of the fused data is needed
         return {
-            'total_students': len(self.fused_data),
-            'students_with_topics': len(students_with_topics),
-            'students_with_enrollments': len(students_with_enrollments),
-            'students_with_both': len([s for s in self.fused_data if s['has_topic'] and s['enrolled_courses']]),
-            'students_with_english_topics': len(students_with_english_topics),
-            'students_with_hungarian_topics': len(students_with_hungarian_topics),
-            'students_in_english_courses': len(students_in_english_courses),
-            'unique_courses': len(all_courses),
-            'english_courses': len(english_courses),
-            'hungarian_courses': len(hungarian_courses),
-            'course_list': sorted(list(all_courses)),
-            'english_course_list': sorted(list(english_courses)),
-            'hungarian_course_list': sorted(list(hungarian_courses)),
-            'hungarian_topic_categories': hungarian_categories,
-            'english_topic_categories': english_categories,
+            **self.fusion_engine.get_summary(),
             'dlxls_source_records': len(self.dlxls_data),
             'dlnep_source_records': len(self.dlnep_data)
         }
@@ -498,6 +269,9 @@ class DataFusionProcessor:
                 self.logger.error("Failed to load DLNEP data")
                 return False
             
+            if self.sheet_cache:
+                self.logger.info(self.sheet_cache.report())
+            
             # Fuse the data
             if not self.fuse_data():
                 self.logger.error("Failed to fuse data")
@@ -517,7 +291,16 @@ class DataFusionProcessor:
 
 def main():
     """Main function for testing the DLFUSION feature"""
-    processor = DataFusionProcessor()
+    parser = argparse.ArgumentParser(description='DLFUSION - combine DLXLS and DLNEP data')
+    parser.add_argument('--no-sheet-cache', action='store_true',
+                        help='Parse every Excel file without the parsed-sheet cache')
+    parser.add_argument('--clear-sheet-cache', action='store_true',
+                        help='Remove all cached sheets before processing')
+    args = parser.parse_args()
+    
+    processor = DataFusionProcessor(use_sheet_cache=not args.no_sheet_cache)
+    if args.clear_sheet_cache:
+        SheetCache(logger=processor.logger).clear()
     
     # Process the fusion
     success = processor.process_fusion()
@@ -4,7 +4,6 @@ This module handles downloading student lists from all courses in the Neptun sys
 """
 
 import os
-import time
 from pathlib import Path
 from typing import List, Dict, Any, Optional
 import pandas as pd
@@ -17,7 +16,8 @@ from selenium.webdriver.common.action_chains import ActionChains
 import sys
 sys.path.append(str(Path(__file__).parent.parent))
 
-from shared import SeleniumUtils, ExcelHandler, setup_logging
+from shared import SeleniumUtils, ExcelHandler, DownloadWatcher, StepTimer, setup_logging
+from shared.config import DOWNLOAD_TIMEOUT
 
 
 class NeptunStudentDataCollector:
@@ -47,6 +47,7 @@ class NeptunStudentDataCollector:
         
         self.collected_data = []
         self.downloaded_files = []
+        self.course_timings: List[StepTimer] = []
     
     def setup_driver_with_downloads(self):
         """Set up Chrome driver with download preferences for Neptun"""
@@ -75,6 +76,7 @@ class NeptunStudentDataCollector:
             "profile.default_content_settings.popups": 0
         }
         chrome_options.add_experimental_option("prefs", prefs)
+        SeleniumUtils.enable_network_events(chrome_options)
         
         service = Service(ChromeDriverManager().install())
         driver = webdriver.Chrome(service=service, options=chrome_options)
@@ -100,7 +102,7 @@ class NeptunStudentDataCollector:
             driver.get(self.login_url)
             
             # Wait for page to load
-            time.sleep(2)
+            self.selenium_utils.wait_for_page_load()
             
             self.logger.info("Please complete the login process in the Neptun system...")
             if not self.selenium_utils.wait_for_user_login():
@@ -110,20 +112,14 @@ class NeptunStudentDataCollector:
             self.logger.info(f"Navigating to courses page: {self.courses_url}")
             driver.get(self.courses_url)
             
-            # Wait for courses page to load
-            time.sleep(2)
-            
-            # Check if we're on the right page by looking for course table
-            try:
-                # Look for elements that would indicate we're on the courses page
-                WebDriverWait(driver, 10).until(
-                    lambda d: "Tárgykód" in driver.page_source or "course" in driver.current_url.lower()
-                )
+            # Check if we're on the right page by looking for elements of the course table
+            if self.selenium_utils.wait_until(
+                    lambda d: "Tárgykód" in d.page_source or "course" in d.current_url.lower(),
+                    10, "courses page"):
                 self.logger.info("Successfully logged in and navigated to courses page")
                 return True
-            except TimeoutException:
-                self.logger.error("Failed to navigate to courses page - login may have failed")
-                return False
+            self.logger.error("Failed to navigate to courses page - login may have failed")
+            return False
                 
         except Exception as e:
             self.logger.error(f"Error during Neptun login process: {e}")
@@ -144,8 +140,9 @@ class NeptunStudentDataCollector:
             
             self.logger.info("Extracting course list from Neptun...")
             
-            # Wait for the page to fully load
-            time.sleep(2)
+            # Wait for the page to fully load (including its AJAX requests)
+            self.selenium_utils.wait_for_page_load()
+            self.selenium_utils.wait_for_network_idle()
             
             courses = []
             
@@ -416,14 +413,10 @@ class NeptunStudentDataCollector:
                             self.logger.info(f"Found course: {course_code} - {course_name}")
                             
                             # Process this course immediately to avoid stale elements
+                            # (it navigates back to the course list when done)
                             downloaded_file = self.download_course_student_list(course_info)
                             if downloaded_file:
                                 self.downloaded_files.append(downloaded_file)
-                            
-                            # Navigate back to course list
-                            self.logger.info("Navigating back to courses page...")
-                            driver.get(self.courses_url)
-                            time.sleep(2)  # Wait for page to load completely
                     
                     except Exception as e:
                         self.logger.warning(f"Error processing course {i}: {e}")
@@ -451,14 +444,20 @@ class NeptunStudentDataCollector:
         """
         Download student list for a specific course
         
+        Every step waits for the page state it needs (menu visible, postback
+        finished, download file complete) instead of sleeping a fixed time.
+        The duration of the steps is logged per course.
+        
         Args:
             course_info: Dictionary containing course information and elements
             
         Returns:
             Path to downloaded file or None if failed
         """
+        driver = self.selenium_utils.driver
+        timer = StepTimer(course_info.get('course_code', 'unknown'))
+        self.course_timings.append(timer)
         try:
-            driver = self.selenium_utils.driver
             if not driver:
                 return None
             
@@ -472,115 +471,124 @@ class NeptunStudentDataCollector:
                 return None
             
             # Try to trigger the dropdown menu using focus event (as per specification)
-            try:
-                # First try to focus on the element to trigger the onfocus event
-                ActionChains(driver).move_to_element(dropdown_element).perform()
-                time.sleep(1)
-                
-                # Try to click or focus to trigger A2.HandleClick event
+            with timer.step("menu"):
                 try:
-                    dropdown_element.click()
-                    # self.logger.info(f"Clicked dropdown for course {course_code}")
-                except:
-                    # If click doesn't work, try focus
-                    try:
-                        driver.execute_script("arguments[0].focus();", dropdown_element)
-                        # self.logger.info(f"Focused dropdown for course {course_code}")
-                    except Exception as e:
-                        self.logger.warning(f"Could not focus dropdown: {e}")
-                
-                time.sleep(2)  # Wait for floating menu to appear
-                
-            except Exception as e:
-                self.logger.warning(f"Failed to interact with dropdown for course {course_code}: {e}")
-                return None
-            
-            # Step 2: Look for and click "Jegybeírás" option in the floating menu
-            try:
-                # Wait longer for the floating menu to appear
-                time.sleep(2)
-                
-                # Look for "Jegybeírás" in various ways
-                jegybeiras_element = None
-                
-                # Try different selectors for the menu item
-                selectors = [
-                    "//*[contains(text(), 'Jegybeírás')]",
-                    "//a[contains(text(), 'Jegybeírás')]",
-                    "//span[contains(text(), 'Jegybeírás')]",
-                    "//div[contains(text(), 'Jegybeírás')]",
-                    "//*[@title='Jegybeírás']"
-                ]
-                
-                for selector in selectors:
+                    # First try to focus on the element to trigger the onfocus event
+                    ActionChains(driver).move_to_element(dropdown_element).perform()
+                    
+                    # Try to click or focus to trigger A2.HandleClick event
                     try:
-                        jegybeiras_element = WebDriverWait(driver, 8).until(
-                            EC.element_to_be_clickable((By.XPATH, selector))
-                        )
-                        if jegybeiras_element:
-                            self.logger.info(f"Found 'Jegybeírás' element using: {selector}")
-                            break
+                        dropdown_element.click()
+                        # self.logger.info(f"Clicked dropdown for course {course_code}")
                     except:
-                        continue
-                
-                if not jegybeiras_element:
-                    self.logger.error(f"Could not find 'Jegybeírás' option for course {course_code}")
+                        # If click doesn't work, try focus
+                        try:
+                            driver.execute_script("arguments[0].focus();", dropdown_element)
+                            # self.logger.info(f"Focused dropdown for course {course_code}")
+                        except Exception as e:
+                            self.logger.warning(f"Could not focus dropdown: {e}")
+                    
+                    # Wait for the floating menu to appear
+                    self.selenium_utils.wait_for_visible(By.XPATH, "//*[contains(text(), 'Jegybeírás')]", timeout=10)
+                    
+                except Exception as e:
+                    self.logger.warning(f"Failed to interact with dropdown for course {course_code}: {e}")
                     return None
-                
-                # Click on "Jegybeírás"
-                jegybeiras_element.click()
-                # self.logger.info(f"Clicked 'Jegybeírás' for course {course_code}")
-                time.sleep(2)  # Wait 2 seconds for course details to load
-                
-            except TimeoutException:
-                self.logger.warning(f"Could not find 'Jegybeírás' option for course {course_code}")
-                return None
             
-            # Step 3: First change page size selector to maximum (500), then click export button
-            try:
-                # Step 3a: Find and change the page size dropdown to maximum value
+            # Step 2: Look for and click "Jegybeírás" option in the floating menu
+            with timer.step("grades page"):
                 try:
-                    page_size_dropdown = WebDriverWait(driver, 10).until(
-                        EC.presence_of_element_located((By.ID, "o_course_mark_gridStudents_ddlPageSize"))
-                    )
+                    # Look for "Jegybeírás" in various ways
+                    jegybeiras_element = None
                     
-                    # Create Select object and choose the maximum value (500)
-                    from selenium.webdriver.support.ui import Select
-                    select = Select(page_size_dropdown)
+                    # Try different selectors for the menu item
+                    selectors = [
+                        "//*[contains(text(), 'Jegybeírás')]",
+                        "//a[contains(text(), 'Jegybeírás')]",
+                        "//span[contains(text(), 'Jegybeírás')]",
+                        "//div[contains(text(), 'Jegybeírás')]",
+                        "//*[@title='Jegybeírás']"
+                    ]
                     
-                    # Try to select 500, or the highest available option
-                    try:
-                        select.select_by_value("500")
-                        # self.logger.info(f"Selected page size 500 for course {course_code}")
-                    except:
-                        # If 500 is not available, select the last (highest) option
-                        options = select.options
-                        if options:
-                            last_option = options[-1]
-                            option_value = last_option.get_attribute("value")
-                            if option_value:
-                                select.select_by_value(option_value)
-                                # self.logger.info(f"Selected page size {last_option.text} for course {course_code}")
-                            else:
-                                self.logger.warning(f"Could not get value for last option in course {course_code}")
+                    for selector in selectors:
+                        try:
+                            jegybeiras_element = WebDriverWait(driver, 8).until(
+                                EC.element_to_be_clickable((By.XPATH, selector))
+                            )
+                            if jegybeiras_element:
+                                self.logger.info(f"Found 'Jegybeírás' element using: {selector}")
+                                break
+                        except:
+                            continue
                     
-                    # Wait a moment for the page to update after changing page size
-                    time.sleep(2)
+                    if not jegybeiras_element:
+                        self.logger.error(f"Could not find 'Jegybeírás' option for course {course_code}")
+                        return None
+                    
+                    # Click on "Jegybeírás" and wait for the course details to load
+                    self.selenium_utils.drain_network_log()
+                    jegybeiras_element.click()
+                    # self.logger.info(f"Clicked 'Jegybeírás' for course {course_code}")
+                    self.selenium_utils.wait_for_network_idle()
                     
                 except TimeoutException:
-                    self.logger.warning(f"Could not find page size dropdown for course {course_code}, continuing anyway")
-                except Exception as e:
-                    self.logger.warning(f"Error changing page size for course {course_code}: {e}")
+                    self.logger.warning(f"Could not find 'Jegybeírás' option for course {course_code}")
+                    return None
+            
+            # Step 3: First change page size selector to maximum (500), then click export button
+            try:
+                # Step 3a: Find and change the page size dropdown to maximum value
+                with timer.step("page size"):
+                    try:
+                        page_size_dropdown = WebDriverWait(driver, 10).until(
+                            EC.presence_of_element_located((By.ID, "o_course_mark_gridStudents_ddlPageSize"))
+                        )
+                        
+                        # Create Select object and choose the maximum value (500)
+                        from selenium.webdriver.support.ui import Select
+                        select = Select(page_size_dropdown)
+                        previous_value = select.first_selected_option.get_attribute("value")
+                        self.selenium_utils.drain_network_log()
+                        
+                        # Try to select 500, or the highest available option
+                        try:
+                            select.select_by_value("500")
+                            # self.logger.info(f"Selected page size 500 for course {course_code}")
+                        except:
+                            # If 500 is not available, select the last (highest) option
+                            options = select.options
+                            if options:
+                                last_option = options[-1]
+                                option_value = last_option.get_attribute("value")
+                                if option_value:
+                                    select.select_by_value(option_value)
+                                    # self.logger.info(f"Selected page size {last_option.text} for course {course_code}")
+                                else:
+                                    self.logger.warning(f"Could not get value for last option in course {course_code}")
+                        
+                        # A changed page size reloads the grid (postback): wait until it is replaced
+                        if select.first_selected_option.get_attribute("value") != previous_value:
+                            self.selenium_utils.wait_for_staleness(page_size_dropdown, timeout=10)
+                            self.selenium_utils.wait_for_network_idle()
+                        
+                    except TimeoutException:
+                        self.logger.warning(f"Could not find page size dropdown for course {course_code}, continuing anyway")
+                    except Exception as e:
+                        self.logger.warning(f"Error changing page size for course {course_code}: {e}")
                 
                 # Step 3b: Look for and click "Exportálás Excel-fájlba" button
-                export_button = WebDriverWait(driver, 10).until(
-                    EC.element_to_be_clickable((By.XPATH, "//*[@alt='Exportálás Excel-fájlba' or contains(text(), 'Exportálás Excel-fájlba') or contains(@title, 'Exportálás Excel-fájlba')]"))
-                )
-                export_button.click()
-                # self.logger.info(f"Clicked export button for course {course_code}")
+                with timer.step("export"):
+                    export_button = WebDriverWait(driver, 10).until(
+                        EC.element_to_be_clickable((By.XPATH, "//*[@alt='Exportálás Excel-fájlba' or contains(text(), 'Exportálás Excel-fájlba') or contains(@title, 'Exportálás Excel-fájlba')]"))
+                    )
+                    # Watch the download folder from before the click, so no file event is missed
+                    with self.selenium_utils.watch_downloads(self.download_folder, f"*{course_code}*.xls*") as watcher:
+                        export_button.click()
+                        # self.logger.info(f"Clicked export button for course {course_code}")
+                        
+                        # Wait for download to complete
+                        downloaded_file = self._wait_for_download(course_code, watcher)
                 
-                # Wait for download to complete
-                downloaded_file = self._wait_for_download(course_code)
                 if downloaded_file:
                     self.logger.info(f"Successfully downloaded student list for {course_code}: {downloaded_file.name}")
                     return downloaded_file
@@ -598,43 +606,35 @@ class NeptunStudentDataCollector:
         
         finally:
             # Navigate back to courses list for next course
-            try:
-                if driver:
-                    driver.get(self.courses_url)
-                    time.sleep(2)
-            except Exception as e:
-                self.logger.warning(f"Could not navigate back to courses list: {e}")
+            with timer.step("back"):
+                try:
+                    if driver:
+                        driver.get(self.courses_url)
+                        self.selenium_utils.wait_for_page_load()
+                except Exception as e:
+                    self.logger.warning(f"Could not navigate back to courses list: {e}")
+            timer.stop()
+            self.logger.info(f"Course timing - {timer.summary()}")
     
-    def _wait_for_download(self, course_code: str, max_wait_time: int = 30) -> Optional[Path]:
+    def _wait_for_download(self, course_code: str, watcher: DownloadWatcher,
+                           max_wait_time: int = DOWNLOAD_TIMEOUT) -> Optional[Path]:
         """
         Wait for download to complete for a specific course
         
         Args:
             course_code: Course code to identify the download
+            watcher: Download watcher started before the export was clicked
             max_wait_time: Maximum time to wait in seconds
             
         Returns:
             Path to downloaded file or None if timeout
         """
-        start_time = time.time()
-        
-        while time.time() - start_time < max_wait_time:
-            # Look for Excel files containing the course code
-            excel_files = list(self.download_folder.glob(f"*{course_code}*.xls*"))
-            
-            for file in excel_files:
-                # Check if file is complete (not being downloaded)
-                if not file.name.endswith('.crdownload') and file.stat().st_size > 0:
-                    # Check if file was created recently (within last minute)
-                    file_age = time.time() - file.stat().st_mtime
-                    if file_age < 60:  # File created within last minute
-                        self.logger.debug(f"Found downloaded file for {course_code}: {file.name} (age: {file_age:.1f}s)")
-                        return file
-            
-            time.sleep(1)
-        
-        self.logger.warning(f"Download timeout for {course_code} after {max_wait_time}s")
-        return None
+        downloaded_file = watcher.wait(max_wait_time)
+        if downloaded_file:
+            self.logger.debug(f"Found downloaded file for {course_code}: {downloaded_file.name}")
+        else:
+            self.logger.warning(f"Download timeout for {course_code} after {max_wait_time}s")
+        return downloaded_file
     
     def collect_all_course_data(self) -> List[Dict[str, Any]]:
         """
@@ -682,6 +682,10 @@ class NeptunStudentDataCollector:
                 download_results.append(result)
             
             self.logger.info(f"Download process completed. Successfully downloaded {len(self.downloaded_files)} course files.")
+            if self.course_timings:
+                total_time = sum(timer.total for timer in self.course_timings)
+                self.logger.info(f"Course downloads took {total_time:.1f}s "
+                                 f"({total_time / len(self.course_timings):.1f}s per course on average)")
             return download_results
             
         except Exception as e:
@@ -4,7 +4,6 @@ This module handles downloading and processing student topic data from the BME p
 """
 
 import os
-import time
 from pathlib import Path
 from typing import List, Dict, Any, Optional
 import pandas as pd
@@ -16,21 +15,25 @@ from selenium.common.exceptions import TimeoutException, WebDriverException
 import sys
 sys.path.append(str(Path(__file__).parent.parent))
 
-from shared import SeleniumUtils, ExcelHandler, setup_logging
+from shared import SeleniumUtils, WebScrapingUtils, ExcelHandler, StepTimer, setup_logging
+from shared.config import DOWNLOAD_TIMEOUT
 
 
 class BMETopicDataCollector:
     """Collector for student topic data from BME portal"""
     
-    def __init__(self, download_folder: Optional[Path] = None):
+    def __init__(self, download_folder: Optional[Path] = None, direct_download: bool = True):
         """
         Initialize the BME topic data collector
         
         Args:
             download_folder: Folder to save downloaded files (defaults to data folder)
+            direct_download: Fetch the export link directly with the browser's session
+                cookies (the UI click is the fallback)
         """
         self.logger = setup_logging(__name__)
         self.selenium_utils = SeleniumUtils(headless=False)
+        self.direct_download = direct_download
         
         # Set up download folder
         if download_folder is None:
@@ -70,6 +73,7 @@ class BMETopicDataCollector:
             "safebrowsing.enabled": True
         }
         chrome_options.add_experimental_option("prefs", prefs)
+        SeleniumUtils.enable_network_events(chrome_options)
         
         service = Service(ChromeDriverManager().install())
         driver = webdriver.Chrome(service=service, options=chrome_options)
@@ -99,8 +103,8 @@ class BMETopicDataCollector:
             self.logger.info(f"Navigating to workload page: {self.workload_url}")
             driver.get(self.workload_url)
             
-            # Wait a moment for page to load
-            time.sleep(3)
+            # Wait for the page to load
+            self.selenium_utils.wait_for_page_load()
             
             # Check if we're on the right page
             if "MyWorkload" in driver.current_url or "workload" in driver.title.lower():
@@ -180,29 +184,33 @@ class BMETopicDataCollector:
                 except Exception as e:
                     self.logger.warning(f"Could not remove old file {file.name}: {e}")
             
-            # Click the export link
-            self.logger.info("Clicking export link to download Excel file...")
-            export_link.click()
-            
-            # Wait for download to complete
-            self.logger.info("Waiting for download to complete...")
+            timer = StepTimer("Workload export")
             downloaded_file = None
-            max_wait_time = 30  # seconds
-            start_time = time.time()
-            
-            while time.time() - start_time < max_wait_time:
-                excel_files = list(self.download_folder.glob("*.xls*"))
-                if excel_files:
-                    # Check if file is still being downloaded (has .crdownload extension or is 0 bytes)
-                    for file in excel_files:
-                        if not file.name.endswith('.crdownload') and file.stat().st_size > 0:
-                            downloaded_file = file
-                            break
-                    
-                    if downloaded_file:
-                        break
-                
-                time.sleep(1)
+            
+            # Fetch a plain export URL directly with the browser's session cookies
+            # (postback links can only be followed in the browser)
+            href = export_link.get_attribute("href") or ""
+            if self.direct_download and href.startswith(("http://", "https://")):
+                self.logger.info(f"Downloading export directly: {href}")
+                with timer.step("direct download"):
+                    session = self.selenium_utils.create_http_session()
+                    downloaded_file = WebScrapingUtils.download_file(session, href, self.download_folder,
+                                                                     "MyWorkload.xlsx")
+                if not downloaded_file:
+                    self.logger.warning("Direct download failed, using the export link in the browser")
+            
+            if not downloaded_file:
+                # Click the export link, watching the download folder from before the click
+                self.logger.info("Clicking export link to download Excel file...")
+                with timer.step("download"):
+                    with self.selenium_utils.watch_downloads(self.download_folder, "*.xls*") as watcher:
+                        export_link.click()
+                        
+                        # Wait for download to complete (the browser renames the partial file when done)
+                        self.logger.info("Waiting for download to complete...")
+                        downloaded_file = watcher.wait(DOWNLOAD_TIMEOUT)
+            timer.stop()
+            self.logger.info(f"Download timing - {timer.summary()}")
             
             if downloaded_file:
                 self.logger.info(f"Successfully downloaded Excel file: {downloaded_file.name}")
@@ -8,6 +8,8 @@ from openpyxl.utils import get_column_letter
 from typing import Any
 import logging
 
+from fused_store import FusedStudentStore
+
 
 class ExcelStyler:
     """Responsible for Excel styling and formatting"""
@@ -178,12 +180,15 @@ class StatisticsCalculator:
         self.logger = logger
         self.statistics_course_codes = statistics_course_codes
     
-    def calculate_topic_statistics(self, fused_data: dict) -> dict:
+    def calculate_topic_statistics(self, store: FusedStudentStore) -> dict:
         """
-        Calculate topic category statistics from fused data
+        Calculate topic category statistics from the fused student store
+        
+        Only students enrolled in the statistics course codes and having a
+        categorized topic are counted (an index lookup by course code).
         
         Args:
-            fused_data: The fused student data dictionary
+            store: The indexed fused student data
             
         Returns:
             Dictionary containing statistics
@@ -191,27 +196,9 @@ class StatisticsCalculator:
         hungarian_topic_categories = {}
         english_student_count = 0
         
-        if fused_data and 'students' in fused_data:
-            for student in fused_data['students']:
-                # Check if student is enrolled in any of the statistics course codes
-                enrolled_courses = student.get('enrolled_courses', [])
-                has_relevant_course = any(
-                    course.get('course_code') in self.statistics_course_codes 
-                    for course in enrolled_courses
-                )
-                
-                # Only count students who are enrolled in relevant courses and have topics
-                if has_relevant_course and student.get('has_topic') and student.get('topic_category'):
-                    # Check if this is an English topic (Z-ENG prefix)
-                    is_english_topic = student.get('is_english_topic', False)
-                    
-                    if is_english_topic:
-                        # Count English topics separately
-                        english_student_count += 1
-                    else:
-                        # Count Hungarian topics by category
-                        category = student['topic_category']
-                        hungarian_topic_categories[category] = hungarian_topic_categories.get(category, 0) + 1
+        if store is not None:
+            hungarian_topic_categories, english_student_count = \
+                store.topic_category_counts(self.statistics_course_codes)
         
         return {
             'hungarian_topic_categories': hungarian_topic_categories,
@@ -238,13 +225,13 @@ class StatisticsTableCreator:
         self.logger = logger
         self.session_types = ["SW", "HW", "ENG", "GEN", "ONLINE", "SPARE", "NONE", "ROBONAUT", "AI"]
     
-    def create_statistics_section(self, start_row: int, fused_data: dict) -> int:
+    def create_statistics_section(self, start_row: int, store: FusedStudentStore) -> int:
         """
         Create the statistics section with topic and session type statistics
         
         Args:
             start_row: Starting row for statistics section
-            fused_data: The fused student data
+            store: The indexed fused student data
             
         Returns:
             Next available row after statistics section
@@ -254,7 +241,7 @@ class StatisticsTableCreator:
             current_row = start_row
             
             # Section 1: Topic Category Statistics
-            current_row = self._create_topic_statistics_table(current_row, fused_data)
+            current_row = self._create_topic_statistics_table(current_row, store)
             current_row += 2  # Gap between sections
             
             # Section 2: Session Type Statistics
@@ -267,7 +254,7 @@ class StatisticsTableCreator:
             self.logger.error(f"Error creating statistics section: {e}")
             return start_row
     
-    def _create_topic_statistics_table(self, start_row: int, fused_data: dict) -> int:
+    def _create_topic_statistics_table(self, start_row: int, store: FusedStudentStore) -> int:
         """Create the topic category statistics table"""
         current_row = start_row
         
@@ -282,7 +269,7 @@ class StatisticsTableCreator:
         current_row += 1
         
         # Calculate statistics
-        stats = self.stats_calculator.calculate_topic_statistics(fused_data)
+        stats = self.stats_calculator.calculate_topic_statistics(store)
         
         # Add rows for each Hungarian topic category
         for category, count in stats['hungarian_topic_categories'].items():
@@ -0,0 +1,258 @@
+"""
+Indexed store of the fused student data
+Separated according to SRP
+
+The fused dataset is kept in a local SQLite database next to the JSON export
+(data/fused_student_data.sqlite). Enrollments are stored one row per course,
+with indexes by course code, topic category, supervisor and language, so the
+planner statistics and ad-hoc counts are index lookups instead of scans of
+every student's course list.
+
+The JSON export stays the exchange format. The store records the size and
+modification time (in ns) of the JSON file it was built from; a store that is
+missing or whose recorded size or time differ from the JSON file is rebuilt
+from it on open.
+"""
+
+import json
+import logging
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Bump when the schema changes; stores of other versions are rebuilt
+STORE_SCHEMA_VERSION = 2
+
+SCHEMA = """
+CREATE TABLE metadata (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE source (size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL);
+CREATE TABLE students (
+    neptun TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    name TEXT,
+    has_topic INTEGER NOT NULL,
+    supervisor TEXT,
+    topic_category TEXT,
+    topic_title TEXT,
+    is_english_topic INTEGER NOT NULL,
+    is_enrolled_in_english_course INTEGER NOT NULL
+);
+CREATE TABLE enrollments (
+    neptun TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    course_code TEXT NOT NULL,
+    is_english_course INTEGER NOT NULL,
+    schedule_type TEXT,
+    entry TEXT,
+    partial_result TEXT,
+    PRIMARY KEY (neptun, position)
+);
+CREATE INDEX enrollments_by_course ON enrollments (course_code, neptun);
+CREATE INDEX enrollments_by_language ON enrollments (is_english_course, neptun);
+CREATE INDEX students_by_category ON students (is_english_topic, topic_category);
+CREATE INDEX students_by_supervisor ON students (supervisor);
+"""
+
+
+def default_store_path(json_file: Path) -> Path:
+    """Store file belonging to a fused JSON export"""
+    return json_file.with_suffix('.sqlite')
+
+
+def file_stamp(path: Path) -> Tuple[int, int]:
+    """(size, modification time in ns) of a file, to detect that it changed"""
+    stat = Path(path).stat()
+    return stat.st_size, stat.st_mtime_ns
+
+
+class FusedStudentStore:
+    """
+    Query API over the indexed fused student data
+
+    Filters shared by the queries:
+        course_codes: only students enrolled in any of these courses
+        has_topic: only students with (True) or without (False) a topic
+    """
+
+    def __init__(self, db_file: Path, logger: Optional[logging.Logger] = None):
+        self.db_file = Path(db_file)
+        self.logger = logger or logging.getLogger(__name__)
+        self.connection = sqlite3.connect(str(self.db_file))
+
+    @classmethod
+    def write(cls, db_file: Path, students: Iterable[Dict[str, Any]], metadata: Dict[str, Any],
+              logger: Optional[logging.Logger] = None, source_file: Optional[Path] = None) -> 'FusedStudentStore':
+        """
+        (Re)create a store from fused student records
+
+        Args:
+            db_file: Path of the SQLite file
+            students: Fused student records (in output order)
+            metadata: Metadata of the fused dataset
+            source_file: JSON export holding the same data; its size and time are recorded
+                         so open_for_json() can tell whether the store is still current
+
+        Returns:
+            The opened store
+        """
+        db_file = Path(db_file)
+        db_file.parent.mkdir(parents=True, exist_ok=True)
+        # Build next to the target and swap it in, so readers never see a half-written store
+        temp_file = db_file.with_name(db_file.name + '.tmp')
+        temp_file.unlink(missing_ok=True)
+
+        connection = sqlite3.connect(str(temp_file))
+        try:
+            with connection:
+                connection.executescript(SCHEMA)
+                student_rows = []
+                enrollment_rows = []
+                for position, student in enumerate(students):
+                    neptun = student['student_neptun']
+                    student_rows.append((
+                        neptun, position, student.get('student_name'), bool(student.get('has_topic')),
+                        student.get('supervisor'), student.get('topic_category'), student.get('topic_title'),
+                        bool(student.get('is_english_topic')), bool(student.get('is_enrolled_in_english_course'))
+                    ))
+                    for course_position, course in enumerate(student.get('enrolled_courses', [])):
+                        enrollment_rows.append((
+                            neptun, course_position, course.get('course_code'), bool(course.get('is_english_course')),
+                            course.get('schedule_type'), course.get('entry'), course.get('partial_result')
+                        ))
+                connection.executemany("INSERT INTO students VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", student_rows)
+                connection.executemany("INSERT INTO enrollments VALUES (?, ?, ?, ?, ?, ?, ?)", enrollment_rows)
+                connection.executemany("INSERT INTO metadata VALUES (?, ?)",
+                                       [(key, json.dumps(value, ensure_ascii=False)) for key, value in metadata.items()])
+                if source_file is not None:
+                    connection.execute("INSERT INTO source VALUES (?, ?)", file_stamp(source_file))
+                connection.execute(f"PRAGMA user_version = {STORE_SCHEMA_VERSION}")
+        finally:
+            connection.close()
+        temp_file.replace(db_file)
+
+        store = cls(db_file, logger)
+        store.logger.info(f"Fused student store written: {db_file} ({len(student_rows)} students, "
+                          f"{len(enrollment_rows)} course enrollments)")
+        return store
+
+    @classmethod
+    def open_for_json(cls, json_file: Path, logger: Optional[logging.Logger] = None) -> 'FusedStudentStore':
+        """
+        Open the store of a fused JSON export, rebuilding it if it is missing or stale
+
+        The store is current if it has the current schema and was built from a JSON file of
+        the same size and modification time (in ns). Comparing for equality also catches a
+        JSON file replaced by an older copy or rewritten within the timestamp resolution.
+
+        Args:
+            json_file: Path to the fused JSON file
+
+        Returns:
+            The opened store
+        """
+        json_file = Path(json_file)
+        db_file = default_store_path(json_file)
+        if db_file.exists():
+            store = cls(db_file, logger)
+            if store.schema_version() == STORE_SCHEMA_VERSION and store.source_stamp() == file_stamp(json_file):
+                return store
+            store.close()
+
+        stamp = file_stamp(json_file)
+        with open(json_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if file_stamp(json_file) != stamp:
+            # Changed while reading: record no source, so the next open rebuilds again
+            json_file = None
+        return cls.write(db_file, data.get('students', []), data.get('metadata', {}), logger, json_file)
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def schema_version(self) -> int:
+        return self.connection.execute("PRAGMA user_version").fetchone()[0]
+
+    def source_stamp(self) -> Optional[Tuple[int, int]]:
+        """(size, modification time in ns) of the JSON file the store was built from, if recorded"""
+        row = self.connection.execute("SELECT size, mtime_ns FROM source").fetchone()
+        return tuple(row) if row else None
+
+    def metadata(self) -> Dict[str, Any]:
+        """Metadata of the fused dataset"""
+        rows = self.connection.execute("SELECT key, value FROM metadata")
+        return {key: json.loads(value) for key, value in rows}
+
+    def _where(self, course_codes: Optional[Iterable[str]], has_topic: Optional[bool],
+               conditions: Tuple[str, ...] = ()) -> Tuple[str, List[Any]]:
+        """WHERE clause (over students s) and parameters of the common filters"""
+        clauses = list(conditions)
+        params: List[Any] = []
+        if course_codes is not None:
+            course_codes = sorted(set(course_codes))
+            placeholders = ', '.join('?' * len(course_codes))
+            clauses.append(f"s.neptun IN (SELECT neptun FROM enrollments WHERE course_code IN ({placeholders}))")
+            params.extend(course_codes)
+        if has_topic is not None:
+            clauses.append("s.has_topic = ?")
+            params.append(has_topic)
+        return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', params
+
+    def count_students(self, course_codes: Optional[Iterable[str]] = None, has_topic: Optional[bool] = None) -> int:
+        """Number of students matching the filters"""
+        where, params = self._where(course_codes, has_topic)
+        return self.connection.execute(f"SELECT COUNT(*) FROM students s{where}", params).fetchone()[0]
+
+    def student_neptun_codes(self, course_codes: Optional[Iterable[str]] = None, has_topic: Optional[bool] = None,
+                             supervisor: Optional[str] = None, category: Optional[str] = None) -> List[str]:
+        """Neptun codes of the students matching the filters, in output order"""
+        conditions = []
+        extra: List[Any] = []
+        if supervisor is not None:
+            conditions.append("s.supervisor = ?")
+            extra.append(supervisor)
+        if category is not None:
+            conditions.append("s.topic_category = ?")
+            extra.append(category)
+        where, params = self._where(course_codes, has_topic, tuple(conditions))
+        rows = self.connection.execute(f"SELECT s.neptun FROM students s{where} ORDER BY s.position",
+                                       extra + params)
+        return [neptun for neptun, in rows]
+
+    def count_by_supervisor(self, course_codes: Optional[Iterable[str]] = None) -> Dict[str, int]:
+        """Students with a topic per supervisor"""
+        where, params = self._where(course_codes, None, ("s.supervisor IS NOT NULL",))
+        rows = self.connection.execute(
+            f"SELECT s.supervisor, COUNT(*) FROM students s{where} GROUP BY s.supervisor ORDER BY s.supervisor", params)
+        return dict(rows)
+
+    def count_by_course(self, english: Optional[bool] = None) -> Dict[str, int]:
+        """Enrolled students per course code (optionally only English or Hungarian courses)"""
+        where = " WHERE is_english_course = ?" if english is not None else ""
+        params = [english] if english is not None else []
+        rows = self.connection.execute(
+            f"SELECT course_code, COUNT(*) FROM enrollments{where} GROUP BY course_code ORDER BY course_code", params)
+        return dict(rows)
+
+    def topic_category_counts(self, course_codes: Optional[Iterable[str]] = None) -> Tuple[Dict[str, int], int]:
+        """
+        Students with a categorized topic, Hungarian topics per category and English topics in total
+
+        Args:
+            course_codes: Only count students enrolled in any of these courses
+
+        Returns:
+            (Hungarian category -> students, in order of first appearance; number of English topic students)
+        """
+        where, params = self._where(course_codes, True, ("s.topic_category IS NOT NULL", "s.topic_category != ''"))
+        rows = self.connection.execute(
+            f"SELECT s.is_english_topic, s.topic_category, COUNT(*) FROM students s{where}"
+            " GROUP BY s.is_english_topic, s.topic_category ORDER BY MIN(s.position)", params)
+
+        hungarian_topic_categories: Dict[str, int] = {}
+        english_student_count = 0
+        for is_english, category, count in rows:
+            if is_english:
+                english_student_count += count
+            else:
+                hungarian_topic_categories[category] = count
+        return hungarian_topic_categories, english_student_count
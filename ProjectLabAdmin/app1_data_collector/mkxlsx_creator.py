@@ -3,7 +3,6 @@ MKXLSX - Excel table creation for session planning
 This module creates an Excel table using DLFUSION data for session schedule planning.
 """
 
-import json
 import pandas as pd
 from pathlib import Path
 from typing import Dict, List, Any, Optional
@@ -14,6 +13,8 @@ import math
 import sys
 import logging
 
+from fused_store import FusedStudentStore
+
 # Simple logging setup to avoid heavy dependencies
 def setup_logging(name: str) -> logging.Logger:
     logger = logging.getLogger(name)
@@ -32,7 +33,7 @@ class SessionPlannerExcelCreator:
     def __init__(self):
         """Initialize the Excel creator"""
         self.logger = setup_logging(__name__)
-        self.fused_data = None
+        self.store: Optional[FusedStudentStore] = None
         self.workbook = None
         self.worksheet = None
         
@@ -66,7 +67,7 @@ class SessionPlannerExcelCreator:
     
     def load_fused_data(self, json_file: Optional[Path] = None) -> bool:
         """
-        Load fused data from JSON file
+        Open the indexed store of the fused data (rebuilt from the JSON file if missing or outdated)
         
         Args:
             json_file: Path to fused JSON file (defaults to data/fused_student_data.json)
@@ -84,11 +85,10 @@ class SessionPlannerExcelCreator:
             
             self.logger.info(f"Loading fused data from: {json_file}")
             
-            with open(json_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            self.fused_data = data
-            self.logger.info(f"Loaded fused data with {len(data['students'])} students")
+            if self.store is not None:
+                self.store.close()
+            self.store = FusedStudentStore.open_for_json(json_file, self.logger)
+            self.logger.info(f"Loaded fused data with {self.store.count_students()} students")
             return True
             
         except Exception as e:
@@ -190,32 +190,14 @@ class SessionPlannerExcelCreator:
             
             current_row += 1
             
-            # Calculate topic category statistics from fused data
+            # Calculate topic category statistics from the store indexes
             # Only count students enrolled in STATISTICS_COURSE_CODES courses
             hungarian_topic_categories = {}
             english_student_count = 0
             
-            if self.fused_data and 'students' in self.fused_data:
-                for student in self.fused_data['students']:
-                    # Check if student is enrolled in any of the statistics course codes
-                    enrolled_courses = student.get('enrolled_courses', [])
-                    has_relevant_course = any(
-                        course.get('course_code') in self.STATISTICS_COURSE_CODES 
-                        for course in enrolled_courses
-                    )
-                    
-                    # Only count students who are enrolled in relevant courses and have topics
-                    if has_relevant_course and student.get('has_topic') and student.get('topic_category'):
-                        # Check if this is an English topic (Z-ENG prefix)
-                        is_english_topic = student.get('is_english_topic', False)
-                        
-                        if is_english_topic:
-                            # Count English topics separately
-                            english_student_count += 1
-                        else:
-                            # Count Hungarian topics by category
-                            category = student['topic_category']
-                            hungarian_topic_categories[category] = hungarian_topic_categories.get(category, 0) + 1
+            if self.store is not None:
+                hungarian_topic_categories, english_student_count = \
+                    self.store.topic_category_counts(self.STATISTICS_COURSE_CODES)
             
             self.logger.info(f"Hungarian categories: {hungarian_topic_categories}")
             self.logger.info(f"English student count: {english_student_count}")
@@ -359,8 +341,8 @@ class SessionPlannerExcelCreator:
             
             self.logger.info(f"Creating session planning Excel file: {output_file}")
             
-            # Load fused data first
-            if not self.load_fused_data():
+            # Load fused data first (unless already loaded)
+            if self.store is None and not self.load_fused_data():
                 self.logger.error("Failed to load fused data")
                 return False
             
@@ -395,37 +377,15 @@ class SessionPlannerExcelCreator:
         Returns:
             Dictionary with planning statistics
         """
-        if not self.fused_data:
+        if self.store is None:
             return {'error': 'No fused data available'}
         
         # Calculate topic category statistics (separate Hungarian and English)
         # Only consider students enrolled in the specified statistics course codes
-        hungarian_topic_categories = {}
-        english_student_count = 0
-        students_with_topics = 0
-        total_students = len(self.fused_data.get('students', []))
-        
-        for student in self.fused_data.get('students', []):
-            # Check if student is enrolled in any of the statistics course codes
-            enrolled_courses = student.get('enrolled_courses', [])
-            has_relevant_course = any(
-                course.get('course_code') in self.STATISTICS_COURSE_CODES 
-                for course in enrolled_courses
-            )
-            
-            # Only count students who are enrolled in relevant courses and have topics
-            if has_relevant_course and student.get('has_topic') and student.get('topic_category'):
-                students_with_topics += 1
-                # Check if this is an English topic (Z-ENG prefix)
-                is_english_topic = student.get('is_english_topic', False)
-                
-                if is_english_topic:
-                    # Count English topics separately
-                    english_student_count += 1
-                else:
-                    # Count Hungarian topics by category
-                    category = student['topic_category']
-                    hungarian_topic_categories[category] = hungarian_topic_categories.get(category, 0) + 1
+        hungarian_topic_categories, english_student_count = \
+            self.store.topic_category_counts(self.STATISTICS_COURSE_CODES)
+        students_with_topics = sum(hungarian_topic_categories.values()) + english_student_count
+        total_students = self.store.count_students()
         
         # Calculate required sessions
         total_sessions_needed = math.ceil(students_with_topics / 9) if students_with_topics > 0 else 0
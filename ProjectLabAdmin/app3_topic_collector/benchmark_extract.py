@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+HTML Extraction Benchmark
+
+Runs the fast lxml extraction (html_extract) and the reference BeautifulSoup
+parser of TopicScraperSimple on a corpus of saved pages. It checks that both
+give the same result on every page and reports the time each needs.
+
+The corpus is the HTTP cache of the scraper (every scrape with the cache
+enabled saves the fetched pages there):
+
+    python benchmark_extract.py [--cache-dir ../data/http_cache] [--repeat 5]
+
+Exits with status 1 if the two parsers disagree on any page.
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+from typing import Callable, Dict, List, Tuple
+from urllib.parse import urlsplit
+
+from bs4 import BeautifulSoup
+
+from config import HTTP_CACHE_DIR
+from html_extract import extract_category_entries, extract_topic_details
+from http_cache import HttpCache
+from topic_scraper_simple import TopicScraperSimple
+
+
+def load_corpus(cache_dir: str) -> List[Tuple[str, str, bytes]]:
+    """Saved pages of an HTTP cache as (url, kind, body); kind is 'details' for topic pages, else 'topics'."""
+    cache = HttpCache(cache_dir)
+    corpus = []
+    for url, entry in sorted(cache.entries.items()):
+        body_path = os.path.join(cache.bodies_dir, entry['content_hash'])
+        if not os.path.exists(body_path):
+            continue
+        with open(body_path, 'rb') as f:
+            content = f.read()
+        corpus.append((url, 'details' if '/Task/' in url else 'topics', content))
+    return corpus
+
+
+def parsers(scraper: TopicScraperSimple) -> Dict[str, Callable[[str, str, bytes], object]]:
+    """Extraction functions of both backends: (url, kind, content) -> extracted data."""
+    def base_url(url: str) -> str:
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}"
+
+    def bs4_parse(url, kind, content):
+        soup = BeautifulSoup(content, 'html.parser')
+        if kind == 'details':
+            return scraper._parse_topic_details(soup, url)
+        scraper.base_url = base_url(url)
+        return scraper._extract_topic_links_and_courses(soup, url)
+
+    def lxml_parse(url, kind, content):
+        if kind == 'details':
+            return extract_topic_details(content, url)
+        return extract_category_entries(content, url, base_url(url))
+
+    return {'bs4': bs4_parse, 'lxml': lxml_parse}
+
+
+def main():
+    """Benchmark entry point."""
+    parser = argparse.ArgumentParser(description='Compare and time the HTML extraction backends')
+    parser.add_argument(
+        '--cache-dir',
+        default=HTTP_CACHE_DIR,
+        help='HTTP cache holding the saved pages (default: ../data/http_cache)'
+    )
+    parser.add_argument(
+        '--repeat',
+        type=int, default=5,
+        help='Passes over the corpus per backend (default: 5)'
+    )
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.cache_dir)
+    if not corpus:
+        print(f"No saved pages in {args.cache_dir} - run main_simple.py with the HTTP cache first")
+        return 1
+
+    scraper = TopicScraperSimple(output_file=os.devnull)
+    # Both backends log the same messages; keep the output to the report
+    logging.getLogger('topic_scraper').setLevel(logging.ERROR)
+    backends = parsers(scraper)
+
+    results = {}
+    timings = {}
+    for name, parse in backends.items():
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            results[name] = [parse(url, kind, content) for url, kind, content in corpus]
+        timings[name] = (time.perf_counter() - start) / args.repeat
+
+    mismatches = [url for (url, _, _), expected, actual in zip(corpus, results['bs4'], results['lxml'])
+                  if expected != actual]
+
+    size = sum(len(content) for _, _, content in corpus)
+    print(f"Corpus: {len(corpus)} pages ({size / 1024:.0f} KB) from {args.cache_dir}")
+    for name, seconds in timings.items():
+        print(f"  {name:5s} {seconds * 1000:8.1f} ms per pass  ({seconds * 1000 / len(corpus):.2f} ms per page)")
+    print(f"Speedup: {timings['bs4'] / timings['lxml']:.1f}x")
+
+    if mismatches:
+        print(f"\n{len(mismatches)} pages extracted differently:")
+        for url in mismatches:
+            print(f"  {url}")
+        return 1
+    print("Both parsers extracted identical data from every page")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
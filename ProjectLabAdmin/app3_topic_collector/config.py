@@ -32,6 +32,7 @@ SELENIUM_CONFIG = {
 # File paths
 OUTPUT_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
 OUTPUT_FILE = "topics.json"
+HTTP_CACHE_DIR = os.path.join(OUTPUT_DIR, "http_cache")
 
 # Base URL
 BASE_URL = "https://www.aut.bme.hu"
@@ -42,11 +43,23 @@ EXTERNAL_PARTNER_TEXT = "Külső partner:"
 STUDENT_LIMIT_TEXT = "Maximális létszám:"
 ADVISORS_TEXT = "Konzulensek"
 
+# HTML extraction: 'lxml' (fast, html_extract) or 'bs4' (reference BeautifulSoup parser)
+HTML_PARSER = "lxml"
+
 # HTTP settings
 HTTP_TIMEOUT = 30
 REQUEST_DELAY = 0.5
 USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
 
+# Concurrent (async) scraping: the token bucket keeps the request rate of the
+# sequential scraper (one request per REQUEST_DELAY seconds per host)
+ASYNC_MAX_CONCURRENCY_PER_HOST = 4
+ASYNC_REQUESTS_PER_SECOND = 1 / REQUEST_DELAY
+ASYNC_RATE_BURST = 1
+HTTP_MAX_RETRIES = 3
+HTTP_RETRY_BACKOFF = 1.0  # seconds, doubled on every retry
+HTTP_RETRY_STATUSES = (429, 500, 502, 503, 504)
+
 # HTML element IDs
 COURSE_GROUP_DROPDOWN_ID = "ddlCourseGroup"
 COURSE_DROPDOWN_ID = "ddlCourse"
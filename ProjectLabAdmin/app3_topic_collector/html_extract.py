@@ -0,0 +1,203 @@
+"""
+Fast HTML Extraction for the Topic Scraper
+
+lxml based extraction of category and topic pages. Each page is parsed once
+into an lxml tree, and the headings, containers and links are found with
+precompiled XPath expressions and regexes. This replaces walking a
+BeautifulSoup tree.
+
+The results are the same as those of the BeautifulSoup parser of
+TopicScraperSimple, which stays available as the reference implementation
+(HTML_PARSER = 'bs4'). benchmark_extract.py compares the two on the pages
+saved in the HTTP cache.
+"""
+
+import logging
+import re
+from typing import Dict, List, Optional
+from urllib.parse import urljoin
+
+import lxml.html
+from bs4.dammit import EncodingDetector, UnicodeDammit
+from lxml import etree
+
+from config import (
+    TOPICS_HEADING,
+    EXTERNAL_PARTNER_TEXT,
+    STUDENT_LIMIT_TEXT
+)
+
+# Bump EXTRACTOR_VERSION whenever the data extracted by either backend changes;
+# results memoized in the HTTP cache by an older extractor are then parsed again
+EXTRACTOR_VERSION = 1
+
+RELATED_COURSES_HEADING = "Kapcsolódó tárgyak"
+ADVISOR_TITLES = ('Dr.', 'Prof.', 'PhD')
+
+# Regexes shared with the BeautifulSoup parser
+COURSE_CODE_RE = re.compile(r'\(([A-Z]{2,}[A-Z0-9]+)\)')
+EXTERNAL_PARTNER_RE = re.compile(rf'{re.escape(EXTERNAL_PARTNER_TEXT)}\s*([^\n\r]+)')
+STUDENT_LIMIT_RE = re.compile(rf'{re.escape(STUDENT_LIMIT_TEXT)}\s*(\d+)')
+STAFF_LINK_RE = re.compile(r'/Staff/')
+
+# Elements whose text BeautifulSoup's get_text() leaves out
+NON_TEXT_TAGS = ('script', 'style', 'template')
+
+HEADINGS = etree.XPath('//*[self::h1 or self::h2 or self::h3 or self::h4]')
+# Equivalents of BeautifulSoup's heading.find_next([...]): the first such element after
+# the start of the heading in document order (its own descendants included)
+NEXT_LIST = etree.XPath('(descendant::*[self::div or self::ul or self::ol]'
+                        ' | following::*[self::div or self::ul or self::ol])[1]')
+NEXT_TOPICS_CONTAINER = etree.XPath('(descendant::*[self::div or self::ul or self::table]'
+                                    ' | following::*[self::div or self::ul or self::table])[1]')
+LINKS = etree.XPath('.//a[@href]')
+STAFF_LINKS = etree.XPath("//a[contains(@href, '/Staff/')]")
+
+logger = logging.getLogger('topic_scraper')
+
+
+def empty_details() -> Dict:
+    """Topic details used when the topic page cannot be read."""
+    return {
+        'is_external': False,
+        'external_partner': None,
+        'student_limit': None,
+        'advisors': []
+    }
+
+
+def _encoding(content: bytes) -> str:
+    """Encoding of a page, chosen the way BeautifulSoup does for real pages (declaration, then UTF-8)."""
+    declared = EncodingDetector.find_declared_encoding(content, is_html=True)
+    for encoding in (declared, 'utf-8'):
+        if encoding:
+            try:
+                content.decode(encoding)
+                return encoding
+            except (UnicodeDecodeError, LookupError):
+                pass
+    return UnicodeDammit(content, is_html=True).original_encoding or 'windows-1252'
+
+
+def parse_html(content: bytes) -> lxml.html.HtmlElement:
+    """Parse a page into an lxml tree without the elements that hold no page text."""
+    parser = lxml.html.HTMLParser(encoding=_encoding(content))
+    root = lxml.html.document_fromstring(content, parser=parser)
+    etree.strip_elements(root, *NON_TEXT_TAGS, with_tail=False)
+    return root
+
+
+def _text(element) -> str:
+    return ''.join(element.itertext())
+
+
+def extract_category_entries(content: bytes, category_url: str, base_url: str) -> List[Dict]:
+    """
+    Extract topic links and the related course codes from a category page.
+
+    Args:
+        content: Category page body
+        category_url: URL of the page
+        base_url: Site root that absolute paths are resolved against
+
+    Returns:
+        Topic entries (title, url, course_codes, source_category_url)
+    """
+    topics = []
+
+    try:
+        root = parse_html(content)
+
+        # One pass over the headings for both the "Kapcsolódó tárgyak" and the "Kiírt témák" section
+        category_course_codes: Optional[List[str]] = None
+        topics_section = None
+        for heading in HEADINGS(root):
+            heading_text = _text(heading)
+            if category_course_codes is None and RELATED_COURSES_HEADING in heading_text:
+                container = NEXT_LIST(heading)
+                if container:
+                    raw_codes = COURSE_CODE_RE.findall(_text(container[0]))
+                    category_course_codes = ['BME' + code for code in set(raw_codes)]
+                    logger.info(f"Found category course codes: {category_course_codes}")
+            if topics_section is None and TOPICS_HEADING in heading_text:
+                topics_section = heading
+            if category_course_codes is not None and topics_section is not None:
+                break
+        category_course_codes = category_course_codes or []
+
+        if topics_section is None:
+            logger.warning(f"Topics section not found on {category_url}")
+            return topics
+
+        container = NEXT_TOPICS_CONTAINER(topics_section)
+        if not container:
+            logger.warning(f"Topics container not found on {category_url}")
+            return topics
+
+        for link in LINKS(container[0]):
+            href = link.get('href')
+            if not href or href.startswith('#'):
+                continue
+
+            # Skip advisor links (names with titles, staff pages)
+            link_text = _text(link).strip()
+            if any(title in link_text for title in ADVISOR_TITLES) or '/Staff/' in href:
+                continue
+
+            full_url = urljoin(base_url if href.startswith('/') else category_url, href)
+            if '/Task/' in full_url:
+                topics.append({
+                    'title': link_text,
+                    'url': full_url,
+                    'course_codes': category_course_codes,
+                    'source_category_url': category_url
+                })
+                logger.debug(f"Found topic: {link_text} with {len(category_course_codes)} course codes")
+
+        logger.info(f"Found {len(topics)} topics on {category_url}")
+        return topics
+
+    except Exception as e:
+        logger.error(f"Error extracting topics from {category_url}: {e}")
+        return topics
+
+
+def extract_topic_details(content: bytes, topic_url: str) -> Dict:
+    """
+    Extract external partner, student limit and advisors from a topic page.
+
+    Args:
+        content: Topic page body
+        topic_url: URL of the page (for error messages)
+
+    Returns:
+        Topic details (is_external, external_partner, student_limit, advisors)
+    """
+    details = empty_details()
+
+    try:
+        root = parse_html(content)
+        page_text = _text(root)
+
+        match = EXTERNAL_PARTNER_RE.search(page_text)
+        if match:
+            partner = match.group(1).strip()
+            if partner and partner.lower() not in ['nincs', 'n/a', '-']:
+                details['is_external'] = True
+                details['external_partner'] = partner
+
+        match = STUDENT_LIMIT_RE.search(page_text)
+        if match:
+            details['student_limit'] = int(match.group(1))
+
+        advisors = []
+        for link in STAFF_LINKS(root):
+            advisor_name = _text(link).strip()
+            if advisor_name and advisor_name not in advisors:
+                advisors.append(advisor_name)
+        details['advisors'] = advisors
+
+    except Exception as e:
+        logger.error(f"Error extracting details from {topic_url}: {e}")
+
+    return details
@@ -0,0 +1,157 @@
+"""
+Persistent HTTP Cache for the Topic Scraper
+
+On-disk response cache keyed by URL. For every page the cache keeps the ETag
+and Last-Modified validators, the SHA-256 hash of the body and the body itself
+(content-addressed, so identical pages are stored once). Re-scrapes send
+conditional GETs (If-None-Match / If-Modified-Since); a 304 answer is served
+from the stored body.
+
+The data extracted from a page (topic details, category topic lists) is kept
+with the entry, tagged with the extractor that produced it (backend and
+EXTRACTOR_VERSION). It is reused as long as the content hash and the extractor
+do not change, so unchanged pages are neither downloaded nor parsed again.
+
+Layout:
+    <cache_dir>/index.json          URL -> validators, content hash, extracted data
+    <cache_dir>/bodies/<sha256>     page bodies
+"""
+
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Any, Dict, Mapping, Optional
+
+INDEX_FILE = "index.json"
+BODIES_DIR = "bodies"
+
+
+class HttpCache:
+    """URL keyed response cache with validators, content hashes and memoized extraction results."""
+
+    def __init__(self, cache_dir: str, refresh: bool = False):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir: Cache directory (created on first save)
+            refresh: Forced refresh - send unconditional requests and re-parse every page,
+                while still updating the cache
+        """
+        self.cache_dir = cache_dir
+        self.refresh = refresh
+        self.index_path = os.path.join(cache_dir, INDEX_FILE)
+        self.bodies_dir = os.path.join(cache_dir, BODIES_DIR)
+        self.logger = logging.getLogger('topic_scraper')
+        self.entries: Dict[str, Dict[str, Any]] = self._load_index()
+        self.stats = {'not_modified': 0, 'unchanged': 0, 'changed': 0, 'new': 0, 'parse_skipped': 0}
+
+    def _load_index(self) -> Dict[str, Dict[str, Any]]:
+        if not os.path.exists(self.index_path):
+            return {}
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            self.logger.warning(f"Ignoring unreadable HTTP cache index {self.index_path}: {e}")
+            return {}
+
+    def _body_path(self, content_hash: str) -> str:
+        return os.path.join(self.bodies_dir, content_hash)
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """Validator headers for a conditional GET of a cached URL (empty if not cached)."""
+        entry = self.entries.get(url)
+        if self.refresh or not entry or not os.path.exists(self._body_path(entry['content_hash'])):
+            return {}
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def not_modified(self, url: str) -> bytes:
+        """Body of a cached URL after the server answered 304 Not Modified."""
+        entry = self.entries[url]
+        entry['checked'] = datetime.now().isoformat()
+        self.stats['not_modified'] += 1
+        with open(self._body_path(entry['content_hash']), 'rb') as f:
+            return f.read()
+
+    def store(self, url: str, content: bytes, headers: Mapping[str, str]) -> None:
+        """
+        Record a full (200) response.
+
+        Extracted data of the URL is kept if the body did not change, and dropped otherwise.
+        """
+        content_hash = hashlib.sha256(content).hexdigest()
+        body_path = self._body_path(content_hash)
+        if not os.path.exists(body_path):
+            os.makedirs(self.bodies_dir, exist_ok=True)
+            with open(body_path, 'wb') as f:
+                f.write(content)
+
+        previous = self.entries.get(url)
+        if previous is None:
+            self.stats['new'] += 1
+            parsed = {}
+        elif previous['content_hash'] == content_hash:
+            self.stats['unchanged'] += 1
+            parsed = previous.get('parsed', {})
+        else:
+            self.stats['changed'] += 1
+            parsed = {}
+
+        now = datetime.now().isoformat()
+        self.entries[url] = {
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+            'content_hash': content_hash,
+            'fetched': now,
+            'checked': now,
+            'parsed': parsed
+        }
+
+    def parsed(self, url: str, kind: str, extractor: str) -> Optional[Any]:
+        """
+        Data of the given kind previously extracted from the current body of a URL, or None.
+
+        Args:
+            url: Page URL
+            kind: Kind of extracted data ('topics', 'details')
+            extractor: Extractor identifier; data extracted by any other extractor is not returned
+        """
+        if self.refresh:
+            return None
+        stored = self.entries.get(url, {}).get('parsed', {}).get(kind)
+        if not isinstance(stored, dict) or stored.get('extractor') != extractor:
+            return None
+        self.stats['parse_skipped'] += 1
+        return stored['value']
+
+    def store_parsed(self, url: str, kind: str, value: Any, extractor: str) -> None:
+        """Remember data extracted from the current body of a URL by the given extractor."""
+        if url in self.entries:
+            self.entries[url].setdefault('parsed', {})[kind] = {'extractor': extractor, 'value': value}
+
+    def save(self) -> None:
+        """Write the index and remove bodies no URL refers to any more."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.index_path)
+
+        if os.path.isdir(self.bodies_dir):
+            referenced = {entry['content_hash'] for entry in self.entries.values()}
+            for name in os.listdir(self.bodies_dir):
+                if name not in referenced:
+                    os.remove(os.path.join(self.bodies_dir, name))
+
+        stats = self.stats
+        self.logger.info(f"HTTP cache: {stats['not_modified']} not modified, {stats['unchanged']} unchanged, "
+                         f"{stats['changed']} changed, {stats['new']} new pages; "
+                         f"parsing skipped for {stats['parse_skipped']} pages")
@@ -11,6 +11,8 @@ import logging
 import os
 import sys
 
+from config import ASYNC_MAX_CONCURRENCY_PER_HOST, ASYNC_REQUESTS_PER_SECOND, HTML_PARSER, HTTP_CACHE_DIR
+from http_cache import HttpCache
 from topic_scraper_simple import TopicScraperSimple
 
 
@@ -38,6 +40,42 @@ def main():
         action='store_true',
         help='Enable verbose logging'
     )
+    parser.add_argument(
+        '--async', dest='use_async',
+        action='store_true',
+        help='Fetch pages concurrently (asyncio + aiohttp) with the same request rate limit'
+    )
+    parser.add_argument(
+        '--concurrency',
+        type=int, default=ASYNC_MAX_CONCURRENCY_PER_HOST,
+        help=f'Requests in flight per host in --async mode (default: {ASYNC_MAX_CONCURRENCY_PER_HOST})'
+    )
+    parser.add_argument(
+        '--rate',
+        type=float, default=ASYNC_REQUESTS_PER_SECOND,
+        help=f'Requests per second per host in --async mode (default: {ASYNC_REQUESTS_PER_SECOND:g})'
+    )
+    parser.add_argument(
+        '--cache-dir',
+        default=HTTP_CACHE_DIR,
+        help='HTTP cache directory for conditional re-scrapes (default: ../data/http_cache)'
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Download and parse every page without the HTTP cache'
+    )
+    parser.add_argument(
+        '--refresh',
+        action='store_true',
+        help='Forced refresh: ignore cached validators and extracted data, then update the cache'
+    )
+    parser.add_argument(
+        '--parser',
+        choices=['lxml', 'bs4'], default=HTML_PARSER,
+        help=f'HTML extraction backend: fast lxml extraction or the reference BeautifulSoup parser '
+             f'(default: {HTML_PARSER})'
+    )
     
     args = parser.parse_args()
     
@@ -52,7 +90,14 @@ def main():
     
     try:
         print("Initializing scraper...")
-        scraper = TopicScraperSimple(output_file=args.output)
+        cache = None if args.no_cache else HttpCache(args.cache_dir, refresh=args.refresh)
+        if args.use_async:
+            from topic_scraper_async import AsyncTopicScraper
+            scraper = AsyncTopicScraper(output_file=args.output, cache=cache, html_parser=args.parser,
+                                        max_concurrency_per_host=args.concurrency,
+                                        requests_per_second=args.rate)
+        else:
+            scraper = TopicScraperSimple(output_file=args.output, cache=cache, html_parser=args.parser)
         
         print("Starting topic scraping process...")
         print("This process is much faster than the previous Selenium-based approach...")
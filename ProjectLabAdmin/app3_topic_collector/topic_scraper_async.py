@@ -0,0 +1,187 @@
+"""
+BME AUT Topic Scraper - Concurrent Version
+
+Asyncio variant of TopicScraperSimple. All category and topic pages are fetched
+through one shared aiohttp connection pool with a bounded number of concurrent
+requests per host. A token bucket per host keeps the politeness guarantee of the
+sequential scraper (at most one request per REQUEST_DELAY seconds), so the time
+saved is the waiting on slow responses and the pauses between categories, not
+extra load on the server. Failed requests are retried with exponential backoff.
+
+Parsing, crawl planning, the HTTP cache and the assembled topic objects are
+those of TopicScraperSimple, and topics are collected in category and page
+order, so topics.json is identical to the one written by the sequential scraper.
+"""
+
+import asyncio
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import aiohttp
+
+from config import (
+    ASYNC_MAX_CONCURRENCY_PER_HOST,
+    ASYNC_RATE_BURST,
+    ASYNC_REQUESTS_PER_SECOND,
+    BASE_URL,
+    HTML_PARSER,
+    HTTP_MAX_RETRIES,
+    HTTP_RETRY_BACKOFF,
+    HTTP_RETRY_STATUSES,
+    HTTP_TIMEOUT,
+    USER_AGENT
+)
+from http_cache import HttpCache
+from topic_scraper_simple import TopicScraperSimple
+
+
+class TokenBucket:
+    """Token bucket rate limiter: `rate` requests per second with bursts of up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: int = 1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Wait until a request may be sent."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class AsyncTopicScraper(TopicScraperSimple):
+    """
+    Topic scraper that fetches pages concurrently with asyncio and aiohttp.
+    """
+
+    def __init__(self, output_file: Optional[str] = None, category_urls: Optional[Dict[str, str]] = None,
+                 base_url: str = BASE_URL, cache: Optional[HttpCache] = None,
+                 html_parser: str = HTML_PARSER,
+                 max_concurrency_per_host: int = ASYNC_MAX_CONCURRENCY_PER_HOST,
+                 requests_per_second: float = ASYNC_REQUESTS_PER_SECOND,
+                 retry_backoff: float = HTTP_RETRY_BACKOFF):
+        """
+        Initialize the scraper with configuration.
+
+        Args:
+            output_file: Output JSON file (default: data/topics.json)
+            category_urls: Category name -> URL to scrape (default: CATEGORY_URLS)
+            base_url: Site root that relative links are resolved against (e.g. a local test server)
+            cache: Optional HTTP cache for conditional requests and skipping unchanged pages
+            html_parser: 'lxml' (fast extraction) or 'bs4' (reference BeautifulSoup parser)
+            max_concurrency_per_host: Requests in flight per host
+            requests_per_second: Request rate limit per host
+            retry_backoff: Delay before the first retry in seconds (doubled on every retry)
+        """
+        super().__init__(output_file, category_urls, base_url, cache, html_parser)
+        self.max_concurrency_per_host = max_concurrency_per_host
+        self.requests_per_second = requests_per_second
+        self.retry_backoff = retry_backoff
+        self._host_limits: Dict[str, Tuple[asyncio.Semaphore, TokenBucket]] = {}
+
+    def _limits_for(self, url: str) -> Tuple[asyncio.Semaphore, TokenBucket]:
+        """Concurrency limit and rate limiter of the host of a URL."""
+        host = urlparse(url).netloc
+        if host not in self._host_limits:
+            self._host_limits[host] = (asyncio.Semaphore(self.max_concurrency_per_host),
+                                       TokenBucket(self.requests_per_second, ASYNC_RATE_BURST))
+        return self._host_limits[host]
+
+    async def _fetch_content_async(self, session: aiohttp.ClientSession, url: str) -> Optional[bytes]:
+        """Fetch a web page politely, retrying transient failures with exponential backoff."""
+        semaphore, bucket = self._limits_for(url)
+        error = None
+
+        for attempt in range(HTTP_MAX_RETRIES + 1):
+            if attempt:
+                delay = self.retry_backoff * 2 ** (attempt - 1)
+                self.logger.warning(f"Retrying {url} in {delay:.1f}s ({error})")
+                await asyncio.sleep(delay)
+
+            async with semaphore:
+                await bucket.acquire()
+                try:
+                    self.logger.info(f"Fetching page: {url}")
+                    headers = self.cache.conditional_headers(url) if self.cache else {}
+                    async with session.get(url, headers=headers) as response:
+                        if headers and response.status == 304:
+                            return self.cache.not_modified(url)
+                        if response.status in HTTP_RETRY_STATUSES:
+                            error = f"HTTP {response.status}"
+                            continue
+                        response.raise_for_status()
+                        content = await response.read()
+                        if self.cache:
+                            self.cache.store(url, content, response.headers)
+                        return content
+                except aiohttp.ClientResponseError as e:
+                    # Client errors (404 etc.) are not retried
+                    self.logger.error(f"Error fetching {url}: {e}")
+                    return None
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    error = str(e) or type(e).__name__
+
+        self.logger.error(f"Error fetching {url}: {error} (gave up after {HTTP_MAX_RETRIES} retries)")
+        return None
+
+    async def _extract_topic_details_async(self, session: aiohttp.ClientSession, topic_url: str) -> Dict:
+        """Extract detailed information from a topic page."""
+        return self._topic_details(topic_url, await self._fetch_content_async(session, topic_url))
+
+    async def _collect_category_entries_async(self, session: aiohttp.ClientSession,
+                                              category_name: str, category_url: str) -> List[Dict]:
+        """Fetch a category page and return its topic entries."""
+        self.logger.info(f"Processing category: {category_name}")
+
+        content = await self._fetch_content_async(session, category_url)
+        if content is None:
+            return []
+        return self._category_entries(category_url, content)
+
+    async def scrape_all_topics_async(self) -> List[Dict]:
+        """Scrape all topics from all categories concurrently, fetching every topic page once."""
+        self.logger.info("Starting concurrent topic scraping process...")
+        self.logger.info(f"Processing {len(self.category_urls)} categories...")
+
+        # The limits belong to the event loop of this run
+        self._host_limits = {}
+        connector = aiohttp.TCPConnector(limit_per_host=self.max_concurrency_per_host)
+        timeout = aiohttp.ClientTimeout(total=HTTP_TIMEOUT)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout,
+                                         headers={'User-Agent': USER_AGENT}) as session:
+            # Collect the topic links of every category first
+            results = await asyncio.gather(*(
+                self._collect_category_entries_async(session, name, url)
+                for name, url in self.category_urls.items()
+            ), return_exceptions=True)
+
+            category_entries: Dict[str, List[Dict]] = {}
+            for category_name, result in zip(self.category_urls, results):
+                if isinstance(result, Exception):
+                    self.logger.error(f"Error processing category {category_name}: {result}")
+                    continue
+                category_entries[category_name] = result
+
+            # Then fetch each distinct topic page exactly once
+            topic_urls = self._plan_topic_fetches(category_entries)
+            details = await asyncio.gather(*(
+                self._extract_topic_details_async(session, url) for url in topic_urls.values()
+            ))
+
+        all_topics = self._assemble_topics(category_entries, dict(zip(topic_urls, details)))
+        self.logger.info(f"Scraping completed. Total topics found: {len(all_topics)}")
+        return all_topics
+
+    def scrape_all_topics(self) -> List[Dict]:
+        """Scrape all topics from all categories."""
+        return asyncio.run(self.scrape_all_topics_async())
@@ -8,10 +8,9 @@ using static HTML parsing for improved performance and reliability.
 import json
 import logging
 import os
-import re
 import time
-from typing import Dict, List, Optional
-from urllib.parse import urljoin, urlparse
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import urljoin, urlparse, urlsplit, urlunsplit
 
 import requests
 from bs4 import BeautifulSoup
@@ -25,10 +24,36 @@ from config import (
     STUDENT_LIMIT_TEXT,
     ADVISORS_TEXT,
     BASE_URL,
+    HTML_PARSER,
     HTTP_TIMEOUT,
     REQUEST_DELAY,
     USER_AGENT
 )
+from html_extract import (
+    ADVISOR_TITLES,
+    COURSE_CODE_RE,
+    EXTERNAL_PARTNER_RE,
+    EXTRACTOR_VERSION,
+    RELATED_COURSES_HEADING,
+    STAFF_LINK_RE,
+    STUDENT_LIMIT_RE,
+    empty_details,
+    extract_category_entries,
+    extract_topic_details
+)
+from http_cache import HttpCache
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form of a URL for deduplication (lower-case scheme and host, no default port,
+    trailing slash or fragment)."""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc.lower()
+    if (scheme == 'http' and netloc.endswith(':80')) or (scheme == 'https' and netloc.endswith(':443')):
+        netloc = netloc.rsplit(':', 1)[0]
+    path = parts.path.rstrip('/') or '/'
+    return urlunsplit((scheme, netloc, path, parts.query, ''))
 
 
 class TopicScraperSimple:
@@ -36,9 +61,26 @@ class TopicScraperSimple:
     Simplified topic scraper that uses static HTML parsing instead of browser automation.
     """
     
-    def __init__(self, output_file: Optional[str] = None):
-        """Initialize the scraper with configuration."""
+    def __init__(self, output_file: Optional[str] = None, category_urls: Optional[Dict[str, str]] = None,
+                 base_url: str = BASE_URL, cache: Optional[HttpCache] = None,
+                 html_parser: str = HTML_PARSER):
+        """
+        Initialize the scraper with configuration.
+        
+        Args:
+            output_file: Output JSON file (default: data/topics.json)
+            category_urls: Category name -> URL to scrape (default: CATEGORY_URLS)
+            base_url: Site root that relative links are resolved against (e.g. a local test server)
+            cache: Optional HTTP cache; pages are then fetched with conditional requests and
+                unchanged pages are not parsed again
+            html_parser: 'lxml' (fast extraction, see html_extract) or 'bs4' (reference BeautifulSoup parser)
+        """
         self.output_file = output_file or os.path.join(OUTPUT_DIR, OUTPUT_FILE)
+        self.category_urls = category_urls or CATEGORY_URLS
+        self.base_url = base_url
+        self.cache = cache
+        self.html_parser = html_parser
+        self.crawl_stats = {'topic_links': 0, 'topic_pages': 0, 'fetches_avoided': 0}
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': USER_AGENT
@@ -49,44 +91,86 @@ class TopicScraperSimple:
         # Don't add handlers if basicConfig was already called
         self.logger.setLevel(logging.INFO)
     
-    def _fetch_page(self, url: str) -> Optional[BeautifulSoup]:
-        """Fetch a web page and return parsed HTML."""
+    def _fetch_content(self, url: str) -> Optional[bytes]:
+        """Fetch a web page (conditionally if it is cached) and return its body."""
         try:
             self.logger.info(f"Fetching page: {url}")
-            response = self.session.get(url, timeout=HTTP_TIMEOUT)
+            headers = self.cache.conditional_headers(url) if self.cache else {}
+            response = self.session.get(url, timeout=HTTP_TIMEOUT, headers=headers)
+            if headers and response.status_code == 304:
+                return self.cache.not_modified(url)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
-            return soup
+            if self.cache:
+                self.cache.store(url, response.content, response.headers)
+            return response.content
             
         except requests.RequestException as e:
             self.logger.error(f"Error fetching {url}: {e}")
             return None
     
+    def _fetch_page(self, url: str) -> Optional[BeautifulSoup]:
+        """Fetch a web page and return parsed HTML."""
+        content = self._fetch_content(url)
+        if content is None:
+            return None
+        return BeautifulSoup(content, 'html.parser')
+    
+    def _parse_cached(self, url: str, kind: str, parse: Callable[[], Any]) -> Any:
+        """Parse a fetched page, reusing the data extracted from the same content by the same
+        extractor (backend and EXTRACTOR_VERSION) in an earlier run."""
+        extractor = f"{self.html_parser}-v{EXTRACTOR_VERSION}"
+        if self.cache:
+            cached = self.cache.parsed(url, kind, extractor)
+            if cached is not None:
+                return cached
+        
+        value = parse()
+        if self.cache:
+            self.cache.store_parsed(url, kind, value, extractor)
+        return value
+    
+    def _category_entries(self, category_url: str, content: bytes) -> List[Dict]:
+        """Topic entries of a fetched category page."""
+        if self.html_parser == 'bs4':
+            parse = lambda: self._extract_topic_links_and_courses(BeautifulSoup(content, 'html.parser'), category_url)
+        else:
+            parse = lambda: extract_category_entries(content, category_url, self.base_url)
+        return self._parse_cached(category_url, 'topics', parse)
+    
+    def _topic_details(self, topic_url: str, content: Optional[bytes]) -> Dict:
+        """Topic details of a fetched topic page."""
+        if content is None:
+            return self._empty_details()
+        if self.html_parser == 'bs4':
+            parse = lambda: self._parse_topic_details(BeautifulSoup(content, 'html.parser'), topic_url)
+        else:
+            parse = lambda: extract_topic_details(content, topic_url)
+        return self._parse_cached(topic_url, 'details', parse)
+    
     def _extract_course_codes_from_text(self, text: str) -> List[str]:
         """Extract BME course codes from text using regex."""
         # Look for patterns like (VIAUAL01), (VIAUM039), etc. in parentheses
         # and add BME prefix
-        course_codes = re.findall(r'\(([A-Z]{2,}[A-Z0-9]+)\)', text)
+        course_codes = COURSE_CODE_RE.findall(text)
         # Add BME prefix and return
         return ['BME' + code for code in set(course_codes)]  # Remove duplicates and add BME prefix
     
     def _extract_topic_links_and_courses(self, soup: BeautifulSoup, category_url: str) -> List[Dict]:
-        """Extract topic links and associated course codes from category page."""
+        """Extract topic links and associated course codes from category page (reference
+        implementation of html_extract.extract_category_entries)."""
         topics = []
         
         try:
             # First, extract course codes from "Kapcsolódó tárgyak" section
             category_course_codes = []
-            related_courses_heading = "Kapcsolódó tárgyak"
-            
             for heading in soup.find_all(['h1', 'h2', 'h3', 'h4']):
-                if related_courses_heading in heading.get_text():
+                if RELATED_COURSES_HEADING in heading.get_text():
                     container = heading.find_next(['div', 'ul', 'ol'])
                     if container:
                         container_text = container.get_text()
                         # Extract course codes in parentheses and add BME prefix
-                        raw_codes = re.findall(r'\(([A-Z]{2,}[A-Z0-9]+)\)', container_text)
+                        raw_codes = COURSE_CODE_RE.findall(container_text)
                         category_course_codes = ['BME' + code for code in set(raw_codes)]
                         self.logger.info(f"Found category course codes: {category_course_codes}")
                         break
@@ -123,7 +207,7 @@ class TopicScraperSimple:
                 
                 # Skip advisor links (they usually contain names with titles)
                 link_text = link.get_text().strip()
-                if any(title in link_text for title in ['Dr.', 'Prof.', 'PhD']):
+                if any(title in link_text for title in ADVISOR_TITLES):
                     continue
                 
                 # Skip links that go to staff pages
@@ -132,7 +216,7 @@ class TopicScraperSimple:
                 
                 # Build full URL
                 if href_str.startswith('/'):
-                    full_url = urljoin(BASE_URL, href_str)
+                    full_url = urljoin(self.base_url, href_str)
                 else:
                     full_url = urljoin(category_url, href_str)
                 
@@ -154,18 +238,19 @@ class TopicScraperSimple:
             self.logger.error(f"Error extracting topics from {category_url}: {e}")
             return topics
     
+    @staticmethod
+    def _empty_details() -> Dict:
+        """Topic details used when the topic page cannot be read."""
+        return empty_details()
+    
     def _extract_topic_details(self, topic_url: str) -> Dict:
         """Extract detailed information from a topic page."""
-        details = {
-            'is_external': False,
-            'external_partner': None,
-            'student_limit': None,
-            'advisors': []
-        }
-        
-        soup = self._fetch_page(topic_url)
-        if not soup:
-            return details
+        return self._topic_details(topic_url, self._fetch_content(topic_url))
+    
+    def _parse_topic_details(self, soup: BeautifulSoup, topic_url: str) -> Dict:
+        """Extract the topic details from a parsed topic page (reference implementation of
+        html_extract.extract_topic_details)."""
+        details = self._empty_details()
         
         try:
             page_text = soup.get_text()
@@ -173,8 +258,7 @@ class TopicScraperSimple:
             # Extract external partner information
             if EXTERNAL_PARTNER_TEXT in page_text:
                 # Find the text after "Külső partner:"
-                pattern = rf'{re.escape(EXTERNAL_PARTNER_TEXT)}\s*([^\n\r]+)'
-                match = re.search(pattern, page_text)
+                match = EXTERNAL_PARTNER_RE.search(page_text)
                 if match:
                     partner = match.group(1).strip()
                     if partner and partner.lower() not in ['nincs', 'n/a', '-']:
@@ -183,14 +267,13 @@ class TopicScraperSimple:
             
             # Extract student limit
             if STUDENT_LIMIT_TEXT in page_text:
-                pattern = rf'{re.escape(STUDENT_LIMIT_TEXT)}\s*(\d+)'
-                match = re.search(pattern, page_text)
+                match = STUDENT_LIMIT_RE.search(page_text)
                 if match:
                     details['student_limit'] = int(match.group(1))
             
             # Extract advisors - they are in <a> tags with href="/Staff/"
             advisors = []
-            advisor_links = soup.find_all('a', href=re.compile(r'/Staff/'))
+            advisor_links = soup.find_all('a', href=STAFF_LINK_RE)
             for link in advisor_links:
                 advisor_name = link.get_text().strip()
                 if advisor_name and advisor_name not in advisors:
@@ -203,71 +286,116 @@ class TopicScraperSimple:
         
         return details
     
-    def _process_category(self, category_name: str, category_url: str) -> List[Dict]:
-        """Process a single category and extract all topics."""
+    def _collect_category_entries(self, category_name: str, category_url: str) -> List[Dict]:
+        """Fetch a category page and return its topic entries."""
         self.logger.info(f"Processing category: {category_name}")
         
-        soup = self._fetch_page(category_url)
-        if not soup:
+        content = self._fetch_content(category_url)
+        if content is None:
             return []
         
         # Extract topics and course codes from category page
-        topic_entries = self._extract_topic_links_and_courses(soup, category_url)
+        return self._category_entries(category_url, content)
+    
+    def _plan_topic_fetches(self, category_entries: Dict[str, List[Dict]]) -> Dict[str, str]:
+        """
+        Plan the topic page requests of the whole crawl.
         
-        processed_topics = []
+        The same topic is often linked from several categories; every topic
+        page is fetched once, under the first URL it was linked with.
         
-        for entry in topic_entries:
-            # Add delay between requests to be respectful
-            time.sleep(REQUEST_DELAY)
-            
-            # Extract detailed information from topic page
-            details = self._extract_topic_details(entry['url'])
-            
-            # Prepare courses array
-            courses = []
-            for course_code in entry['course_codes']:
-                courses.append({
-                    'course_code': course_code,
-                    'course_name': course_code  # Use code as name since we don't have full names
-                })
-            
-            # Assemble final topic object
-            topic = {
-                'title': entry['title'],
-                'url': entry['url'],
-                'is_external': details['is_external'],
-                'external_partner': details['external_partner'],
-                'student_limit': details['student_limit'],
-                'advisors': details['advisors'],
-                'courses': courses,
-                'source_category_url': entry['source_category_url']
-            }
-            
-            processed_topics.append(topic)
-            self.logger.info(f"Successfully processed topic: {entry['title']}")
+        Returns:
+            Normalized topic URL -> URL to fetch
+        """
+        topic_urls: Dict[str, str] = {}
+        links = 0
+        for entries in category_entries.values():
+            for entry in entries:
+                links += 1
+                topic_urls.setdefault(normalize_url(entry['url']), entry['url'])
         
-        self.logger.info(f"Completed category: {category_name}")
-        return processed_topics
+        self.crawl_stats = {
+            'topic_links': links,
+            'topic_pages': len(topic_urls),
+            'fetches_avoided': links - len(topic_urls)
+        }
+        self.logger.info(f"Crawl plan: {links} topic links, {len(topic_urls)} distinct topic pages "
+                         f"({links - len(topic_urls)} duplicate fetches avoided)")
+        return topic_urls
     
-    def scrape_all_topics(self) -> List[Dict]:
-        """Scrape all topics from all categories."""
+    def _assemble_topics(self, category_entries: Dict[str, List[Dict]], details: Dict[str, Dict]) -> List[Dict]:
+        """
+        Fan the fetched topic details back out to every category that links the topic.
+        
+        A topic listed in several categories gets the course codes of all of them.
+        
+        Args:
+            category_entries: Category name -> topic entries of the category page
+            details: Normalized topic URL -> topic details
+        
+        Returns:
+            Topic objects in category and page order
+        """
+        course_codes: Dict[str, List[str]] = {}
+        for entries in category_entries.values():
+            for entry in entries:
+                merged = course_codes.setdefault(normalize_url(entry['url']), [])
+                merged.extend(code for code in entry['course_codes'] if code not in merged)
+        
         all_topics = []
+        for category_name, entries in category_entries.items():
+            for entry in entries:
+                key = normalize_url(entry['url'])
+                all_topics.append(self._build_topic(entry, details[key], course_codes[key]))
+                self.logger.debug(f"Successfully processed topic: {entry['title']}")
+            self.logger.info(f"Completed category: {category_name}")
+        return all_topics
+    
+    @staticmethod
+    def _build_topic(entry: Dict, details: Dict, course_codes: Optional[List[str]] = None) -> Dict:
+        """Assemble the output topic object from a category entry and its topic details."""
+        # Prepare courses array
+        courses = []
+        for course_code in (entry['course_codes'] if course_codes is None else course_codes):
+            courses.append({
+                'course_code': course_code,
+                'course_name': course_code  # Use code as name since we don't have full names
+            })
         
+        return {
+            'title': entry['title'],
+            'url': entry['url'],
+            'is_external': details['is_external'],
+            'external_partner': details['external_partner'],
+            'student_limit': details['student_limit'],
+            'advisors': details['advisors'],
+            'courses': courses,
+            'source_category_url': entry['source_category_url']
+        }
+    
+    def scrape_all_topics(self) -> List[Dict]:
+        """Scrape all topics from all categories, fetching every topic page once."""
         self.logger.info("Starting topic scraping process...")
-        self.logger.info(f"Processing {len(CATEGORY_URLS)} categories...")
+        self.logger.info(f"Processing {len(self.category_urls)} categories...")
         
-        for category_name, category_url in CATEGORY_URLS.items():
+        # Collect the topic links of every category first
+        category_entries: Dict[str, List[Dict]] = {}
+        for category_name, category_url in self.category_urls.items():
             try:
-                topics = self._process_category(category_name, category_url)
-                all_topics.extend(topics)
-                
-                # Add delay between categories
-                time.sleep(1)
-                
+                category_entries[category_name] = self._collect_category_entries(category_name, category_url)
             except Exception as e:
                 self.logger.error(f"Error processing category {category_name}: {e}")
-                continue
+            
+            # Add delay between requests to be respectful
+            time.sleep(REQUEST_DELAY)
+        
+        # Then fetch each distinct topic page exactly once
+        details: Dict[str, Dict] = {}
+        for key, topic_url in self._plan_topic_fetches(category_entries).items():
+            time.sleep(REQUEST_DELAY)
+            details[key] = self._extract_topic_details(topic_url)
         
+        all_topics = self._assemble_topics(category_entries, details)
         self.logger.info(f"Scraping completed. Total topics found: {len(all_topics)}")
         return all_topics
     
@@ -290,10 +418,14 @@ class TopicScraperSimple:
         """Run the complete scraping process."""
         try:
             topics = self.scrape_all_topics()
+            if self.cache:
+                self.cache.save()
             self.save_topics(topics)
             
             print(f"\nScraping completed successfully!")
             print(f"Total topics scraped: {len(topics)}")
+            print(f"Topic pages fetched: {self.crawl_stats['topic_pages']} "
+                  f"({self.crawl_stats['fetches_avoided']} duplicate fetches avoided)")
             print(f"Output saved to: {self.output_file}")
             
         except KeyboardInterrupt:
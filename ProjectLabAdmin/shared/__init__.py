@@ -3,12 +3,14 @@ Shared package for ProjectLabAdmin utilities
 """
 
 from .config import *
-from .utils import WebScrapingUtils, SeleniumUtils, setup_logging
+from .utils import WebScrapingUtils, SeleniumUtils, DownloadWatcher, StepTimer, setup_logging
 from .excel_utils import ExcelHandler
 
 __all__ = [
     'WebScrapingUtils',
     'SeleniumUtils', 
+    'DownloadWatcher',
+    'StepTimer',
     'ExcelHandler',
     'setup_logging'
 ]
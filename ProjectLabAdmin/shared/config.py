@@ -16,6 +16,16 @@ SELENIUM_TIMEOUT = 30
 WEBDRIVER_IMPLICIT_WAIT = 10
 LOGIN_WAIT_MESSAGE = "Please complete the login process in the browser, then press Enter to continue..."
 
+# Event-driven waits (SeleniumUtils)
+WAIT_POLL_INTERVAL = 0.1      # seconds between condition checks
+NETWORK_IDLE_TIME = 0.5       # seconds without network activity that count as idle
+NETWORK_IDLE_MAX_REQUEST_AGE = 5  # seconds after which a request in flight is ignored (long polls, beacons)
+NETWORK_IDLE_MAX_IN_FLIGHT = 0    # requests in flight that still count as idle
+DOWNLOAD_TIMEOUT = 30         # seconds to wait for a download to complete
+
+# Direct export downloads with the browser session (SeleniumUtils.create_http_session)
+HTTP_POOL_SIZE = 4            # pooled connections per host
+
 # Web scraping settings
 REQUEST_TIMEOUT = 30
 MAX_RETRIES = 3
@@ -1,9 +1,17 @@
 """
 Shared utilities for web scraping and Selenium operations
 """
+import fnmatch
+import json
+import os
+import threading
 import time
 import logging
-from typing import Optional, Dict, Any
+from contextlib import contextmanager
+from importlib.util import find_spec
+from pathlib import Path
+from typing import Optional, Dict, Any, Callable, Iterator, Tuple
+from urllib.parse import unquote
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
@@ -13,11 +21,34 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, WebDriverException
 from webdriver_manager.chrome import ChromeDriverManager
 import requests
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
-from .config import SELENIUM_TIMEOUT, REQUEST_TIMEOUT, USER_AGENT, LOGIN_WAIT_MESSAGE
+from .config import (
+    SELENIUM_TIMEOUT, REQUEST_TIMEOUT, USER_AGENT, LOGIN_WAIT_MESSAGE,
+    WAIT_POLL_INTERVAL, NETWORK_IDLE_TIME, NETWORK_IDLE_MAX_REQUEST_AGE, NETWORK_IDLE_MAX_IN_FLIGHT,
+    DOWNLOAD_TIMEOUT, HTTP_POOL_SIZE
+)
 
 logger = logging.getLogger(__name__)
 
+# Folder change notifications for DownloadWatcher (polling is used without watchdog)
+WATCHDOG_AVAILABLE = find_spec('watchdog') is not None
+
+# Files of downloads that are still in progress (Chrome, Firefox, Edge)
+PARTIAL_DOWNLOAD_SUFFIXES = ('.crdownload', '.part', '.tmp')
+
+# Leading bytes of Excel files: .xlsx (ZIP archive) and .xls (OLE2 compound file)
+EXCEL_SIGNATURES = (b"PK\x03\x04", b"\xd0\xcf\x11\xe0")
+
+# Checked when the DevTools performance log is not available: page loaded and no
+# jQuery or ASP.NET AJAX request in progress
+PAGE_IDLE_SCRIPT = """
+return document.readyState === 'complete'
+    && !(window.jQuery && window.jQuery.active > 0)
+    && !(window.Sys && Sys.WebForms && Sys.WebForms.PageRequestManager
+         && Sys.WebForms.PageRequestManager.getInstance().get_isInAsyncPostBack());
+"""
+
 
 class WebScrapingUtils:
     """Utilities for web scraping with requests and BeautifulSoup"""
@@ -45,6 +76,48 @@ class WebScrapingUtils:
             logger.error(f"Failed to fetch {url}: {e}")
             return None
     
+    @staticmethod
+    def download_file(session: requests.Session, url: str, folder: Path, default_name: str,
+                      signatures: Tuple[bytes, ...] = EXCEL_SIGNATURES) -> Optional[Path]:
+        """
+        Download a file directly with an (authenticated) session
+        
+        Args:
+            session: HTTP session, e.g. from SeleniumUtils.create_http_session
+            url: URL of the file
+            folder: Folder to save the file in
+            default_name: File name if the response does not name the file
+            signatures: Accepted leading bytes of the content; other responses
+                (e.g. a login or error page) are rejected
+            
+        Returns:
+            Path of the saved file or None if failed
+        """
+        try:
+            response = session.get(url, timeout=REQUEST_TIMEOUT)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            logger.warning(f"Direct download of {url} failed: {e}")
+            return None
+        
+        if not response.content.startswith(signatures):
+            logger.warning(f"Direct download of {url} returned no file ({response.headers.get('Content-Type')})")
+            return None
+        
+        # File name from Content-Disposition (filename*=UTF-8''... or filename="...")
+        filename = default_name
+        for part in response.headers.get("Content-Disposition", "").split(";"):
+            key, _, value = part.strip().partition("=")
+            if key.lower() == "filename*" and "''" in value:
+                filename = unquote(value.split("''", 1)[1])
+                break
+            if key.lower() == "filename" and value:
+                filename = value.strip('"')
+        
+        path = Path(folder) / Path(filename).name
+        path.write_bytes(response.content)
+        return path
+    
     @staticmethod
     def extract_text_by_selector(soup: BeautifulSoup, selector: str) -> list:
         """
@@ -61,6 +134,127 @@ class WebScrapingUtils:
         return [elem.get_text(strip=True) for elem in elements]
 
 
+class StepTimer:
+    """Measures the duration of named steps of one task (e.g. one course download)"""
+    
+    def __init__(self, name: str):
+        self.name = name
+        self.steps: Dict[str, float] = {}
+        self.started = time.perf_counter()
+        self.stopped: Optional[float] = None
+    
+    @contextmanager
+    def step(self, label: str) -> Iterator[None]:
+        """Time the enclosed block as step `label` (repeated steps are summed)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.steps[label] = self.steps.get(label, 0.0) + time.perf_counter() - start
+    
+    def stop(self) -> None:
+        """End the task; the total no longer grows"""
+        self.stopped = time.perf_counter()
+    
+    @property
+    def total(self) -> float:
+        return (self.stopped or time.perf_counter()) - self.started
+    
+    def summary(self) -> str:
+        steps = ", ".join(f"{label} {seconds:.1f}s" for label, seconds in self.steps.items())
+        return f"{self.name}: {steps} (total {self.total:.1f}s)"
+
+
+class DownloadWatcher:
+    """
+    Waits for a download to complete in a folder
+    
+    Start it before triggering the download. A completed download is a file
+    matching the pattern that is new or changed since the start, is not a
+    partial download (.crdownload etc.) and is not empty. Browsers give the
+    file its final name only when it is complete. With watchdog installed the
+    folder is re-checked on every file system event, otherwise it is polled.
+    """
+    
+    def __init__(self, folder: Path, pattern: str = "*"):
+        self.folder = Path(folder)
+        self.pattern = pattern
+        self._changed = threading.Event()
+        self._observer = None
+        self._before = self._snapshot()
+    
+    def _snapshot(self) -> Dict[str, Tuple[int, int]]:
+        """(modification time, size) of the matching files of the folder"""
+        files = {}
+        with os.scandir(self.folder) as entries:
+            for entry in entries:
+                if entry.is_file() and fnmatch.fnmatch(entry.name, self.pattern):
+                    stat = entry.stat()
+                    files[entry.name] = (stat.st_mtime_ns, stat.st_size)
+        return files
+    
+    def start(self) -> 'DownloadWatcher':
+        if WATCHDOG_AVAILABLE:
+            from watchdog.events import FileSystemEventHandler
+            from watchdog.observers import Observer
+            
+            changed = self._changed
+            
+            class Handler(FileSystemEventHandler):
+                def on_any_event(self, event):
+                    changed.set()
+            
+            self._observer = Observer()
+            self._observer.schedule(Handler(), str(self.folder), recursive=False)
+            self._observer.start()
+        return self
+    
+    def stop(self) -> None:
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+    
+    def __enter__(self) -> 'DownloadWatcher':
+        return self.start()
+    
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+    
+    def completed_file(self) -> Optional[Path]:
+        """A download completed since the start, if any"""
+        for name, (mtime, size) in self._snapshot().items():
+            if name.endswith(PARTIAL_DOWNLOAD_SUFFIXES) or size == 0:
+                continue
+            if self._before.get(name) != (mtime, size):
+                return self.folder / name
+        return None
+    
+    def wait(self, timeout: float = DOWNLOAD_TIMEOUT) -> Optional[Path]:
+        """
+        Wait until a download completes
+        
+        Args:
+            timeout: Maximum wait time in seconds
+            
+        Returns:
+            Path of the downloaded file or None on timeout
+        """
+        deadline = time.monotonic() + timeout
+        # Without watchdog the folder is polled; with it a missed event costs one poll interval at most
+        interval = 1.0 if self._observer is not None else WAIT_POLL_INTERVAL * 2
+        while True:
+            self._changed.clear()
+            downloaded = self.completed_file()
+            if downloaded:
+                return downloaded
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                logger.warning(f"No download matching {self.pattern} in {self.folder} after {timeout}s")
+                return None
+            self._changed.wait(min(interval, remaining))
+
+
 class SeleniumUtils:
     """Utilities for Selenium web automation"""
     
@@ -87,6 +281,7 @@ class SeleniumUtils:
         chrome_options.add_argument("--no-sandbox")
         chrome_options.add_argument("--disable-dev-shm-usage")
         chrome_options.add_argument(f"--user-agent={USER_AGENT}")
+        self.enable_network_events(chrome_options)
         
         service = Service(ChromeDriverManager().install())
         self.driver = webdriver.Chrome(service=service, options=chrome_options)
@@ -185,6 +380,137 @@ class SeleniumUtils:
             logger.error(f"Error sending keys to element {by}={value}: {e}")
             return False
     
+    @staticmethod
+    def enable_network_events(chrome_options: Options) -> None:
+        """Record the DevTools network events of the browser (used by wait_for_network_idle)"""
+        chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    
+    def wait_until(self, condition: Callable[[Any], Any], timeout: float = SELENIUM_TIMEOUT,
+                   description: str = "condition") -> Any:
+        """
+        Wait until a condition on the driver holds (polled every WAIT_POLL_INTERVAL seconds)
+        
+        Args:
+            condition: Function of the driver, e.g. an expected_conditions instance
+            timeout: Maximum wait time in seconds
+            description: What is waited for (for the log)
+            
+        Returns:
+            The truthy result of the condition, or None on timeout
+        """
+        try:
+            return WebDriverWait(self.driver, timeout, poll_frequency=WAIT_POLL_INTERVAL).until(condition)
+        except TimeoutException:
+            logger.warning(f"Timed out after {timeout}s waiting for {description}")
+            return None
+    
+    def wait_for_visible(self, by: By, value: str, timeout: float = SELENIUM_TIMEOUT) -> Optional[Any]:
+        """Wait for an element to be visible and return it (None on timeout)"""
+        return self.wait_until(EC.visibility_of_element_located((by, value)), timeout, f"visible {by}={value}")
+    
+    def wait_for_clickable(self, by: By, value: str, timeout: float = SELENIUM_TIMEOUT) -> Optional[Any]:
+        """Wait for an element to be clickable and return it (None on timeout)"""
+        return self.wait_until(EC.element_to_be_clickable((by, value)), timeout, f"clickable {by}={value}")
+    
+    def wait_for_staleness(self, element: Any, timeout: float = SELENIUM_TIMEOUT) -> bool:
+        """Wait for an element to be detached from the page (e.g. replaced by a postback)"""
+        return bool(self.wait_until(EC.staleness_of(element), timeout, "element to be replaced"))
+    
+    def wait_for_page_load(self, timeout: float = SELENIUM_TIMEOUT) -> bool:
+        """Wait for the document to be completely loaded"""
+        return bool(self.wait_until(
+            lambda d: d.execute_script("return document.readyState") == "complete", timeout, "page load"))
+    
+    def drain_network_log(self) -> None:
+        """
+        Discard the network events recorded so far
+        
+        Call it before the action that wait_for_network_idle waits for, so that
+        requests of earlier pages (whose end may never be logged) are not tracked.
+        """
+        try:
+            self.driver.get_log("performance")
+        except WebDriverException:
+            pass
+    
+    def wait_for_network_idle(self, idle_time: float = NETWORK_IDLE_TIME, timeout: float = SELENIUM_TIMEOUT,
+                              max_request_age: float = NETWORK_IDLE_MAX_REQUEST_AGE,
+                              max_in_flight: int = NETWORK_IDLE_MAX_IN_FLIGHT) -> bool:
+        """
+        Wait until the browser has at most `max_in_flight` requests in flight for `idle_time` seconds
+        
+        Requests are tracked from the DevTools network events of the performance
+        log (see enable_network_events). A request still in flight `max_request_age`
+        seconds after it was seen is ignored: long polls, beacons and requests whose
+        end was not logged would otherwise hold the wait until the timeout. Without
+        that log the page itself is checked: loaded and no jQuery or ASP.NET AJAX
+        request in progress.
+        
+        Args:
+            idle_time: Seconds without network activity that count as idle
+            timeout: Maximum wait time in seconds
+            max_request_age: Seconds after which a request in flight is ignored
+            max_in_flight: Requests in flight that still count as idle
+        
+        Returns:
+            True if the network became idle, False on timeout
+        """
+        try:
+            entries = self.driver.get_log("performance")
+        except WebDriverException:
+            return bool(self.wait_until(lambda d: d.execute_script(PAGE_IDLE_SCRIPT), timeout, "page idle"))
+        
+        in_flight: Dict[str, float] = {}  # request id -> time it was seen
+        deadline = time.monotonic() + timeout
+        last_activity = time.monotonic()
+        while True:
+            for entry in entries:
+                message = json.loads(entry["message"])["message"]
+                method = message.get("method", "")
+                if method == "Network.requestWillBeSent":
+                    # Redirects are sent again with the same id
+                    in_flight.setdefault(message["params"]["requestId"], time.monotonic())
+                    last_activity = time.monotonic()
+                elif method in ("Network.loadingFinished", "Network.loadingFailed"):
+                    in_flight.pop(message["params"]["requestId"], None)
+                    last_activity = time.monotonic()
+            
+            now = time.monotonic()
+            for request_id in [r for r, seen in in_flight.items() if now - seen > max_request_age]:
+                logger.debug(f"Ignoring request {request_id} in flight for more than {max_request_age}s")
+                del in_flight[request_id]
+            if len(in_flight) <= max_in_flight and now - last_activity >= idle_time:
+                return True
+            if now >= deadline:
+                logger.warning(f"Network not idle after {timeout}s ({len(in_flight)} requests in flight)")
+                return False
+            time.sleep(WAIT_POLL_INTERVAL)
+            entries = self.driver.get_log("performance")
+    
+    def create_http_session(self, pool_size: int = HTTP_POOL_SIZE) -> requests.Session:
+        """
+        Pooled HTTP session that carries the cookies and user agent of the browser session
+        
+        After the interactive login, export URLs can be fetched with it directly
+        (and in parallel) instead of through the browser UI.
+        OnlabSokFelevesLetszamStat/downloader.py has its own copy (session_from_driver),
+        as that project does not depend on this package.
+        """
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers["User-Agent"] = self.driver.execute_script("return navigator.userAgent")
+        for cookie in self.driver.get_cookies():
+            session.cookies.set(cookie["name"], cookie["value"],
+                                domain=cookie.get("domain", ""), path=cookie.get("path", "/"))
+        return session
+    
+    @staticmethod
+    def watch_downloads(folder: Path, pattern: str = "*") -> DownloadWatcher:
+        """Download watcher for a folder; use as `with ... as watcher:` around the click that starts the download"""
+        return DownloadWatcher(folder, pattern)
+    
     def close_driver(self):
         """Close the WebDriver"""
         if self.driver:
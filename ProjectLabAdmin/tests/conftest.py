@@ -0,0 +1,141 @@
+"""
+Shared fixtures for the unit tests.
+"""
+
+import hashlib
+import re
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from types import SimpleNamespace
+from urllib.parse import urlsplit
+
+import pytest
+
+# Recorded pages of the topic site and the paths they are served at
+PAGES_DIR = Path(__file__).parent / 'pages'
+CATEGORY_PAGES = {
+    '/Education/BScInfo/Onlab': 'category_bsc_info_onlab.html',
+    '/Education/MScInfo/Diploma': 'category_msc_info_diploma.html',
+}
+TASK_PATH_RE = re.compile(r'/Task/(\d+)$')
+SITE_URL = 'https://www.aut.bme.hu'
+
+
+def site_page(path: str):
+    """Recorded page served at a URL path, or None."""
+    path = urlsplit(path).path.rstrip('/')
+    name = CATEGORY_PAGES.get(path)
+    match = TASK_PATH_RE.search(path)
+    if name is None and match:
+        name = f"task_{match.group(1)}.html"
+    if name is None or not (PAGES_DIR / name).exists():
+        return None
+    return (PAGES_DIR / name).read_bytes()
+
+
+@contextmanager
+def serve(handler_class):
+    """Run a local HTTP server with the handler class in a thread; yields its base URL."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler_class)
+    thread = threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_port}"
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+
+@pytest.fixture
+def recorded_pages():
+    """Recorded pages as (url, kind, body) at their site URLs; kind as in benchmark_extract.load_corpus()."""
+    pages = [(SITE_URL + path, 'topics', (PAGES_DIR / name).read_bytes()) for path, name in CATEGORY_PAGES.items()]
+    for page in sorted(PAGES_DIR.glob('task_*.html')):
+        pages.append((f"{SITE_URL}/Task/{page.stem.split('_')[1]}", 'details', page.read_bytes()))
+    return pages
+
+
+@pytest.fixture
+def topic_site():
+    """
+    Local HTTP server with the recorded category and topic pages.
+
+    Pages are sent with an ETag and conditional requests are answered with 304.
+    Attributes of the returned namespace:
+        base_url, category_urls: Site root and category name -> URL
+        requests: Paths requested so far
+        fail_once: Paths answered with 503 on their next request
+    """
+    site = SimpleNamespace(requests=[], fail_once=set())
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            site.requests.append(self.path)
+            if self.path in site.fail_once:
+                site.fail_once.discard(self.path)
+                self.send_response(503)
+                self.end_headers()
+                return
+
+            body = site_page(self.path)
+            if body is None:
+                self.send_response(404)
+                self.end_headers()
+                return
+
+            etag = '"%s"' % hashlib.sha256(body).hexdigest()[:16]
+            if self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html')
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('ETag', etag)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    with serve(Handler) as base_url:
+        site.base_url = base_url
+        site.category_urls = {
+            'BSc_Info_Onlab': f"{base_url}/Education/BScInfo/Onlab",
+            'MSc_Info_Diploma': f"{base_url}/Education/MScInfo/Diploma",
+        }
+        yield site
+
+
+@pytest.fixture
+def export_server():
+    """
+    Local HTTP server for direct export downloads.
+
+    Attributes of the returned namespace:
+        base_url: Server root
+        files: Path -> (status, headers, body) of the responses; other paths are answered with 404
+        requests: (path, request headers) of the requests so far
+    """
+    exports = SimpleNamespace(files={}, requests=[])
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            exports.requests.append((self.path, dict(self.headers)))
+            status, headers, body = exports.files.get(self.path, (404, {}, b''))
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    with serve(Handler) as base_url:
+        exports.base_url = base_url
+        yield exports
@@ -0,0 +1,187 @@
+"""
+Unit tests for the DLNEP course export loader and the sheet cache.
+"""
+
+import logging
+import os
+from pathlib import Path
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Add project root to path (app1_data_collector/config.py would shadow the topic collector's config)
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app1_data_collector.data_loaders import (CourseCodeValidator, DLNEPDataLoader, SheetCache,
+                                              read_excel_files)
+
+ALLOWED_COURSES = {'BMEVIAUAL00', 'BMEVIAUAL01'}
+
+
+def _write_exports(folder):
+    """Generated Neptun exports: text, numeric and empty cells, a missing column, a row without Neptun code"""
+    folder.mkdir()
+    exports = {
+        'jegyimport_BMEVIAUAL00_H1_2024.xlsx': pd.DataFrame({
+            'Neptunkód': ['ABC123', ' DEF456 ', np.nan, 'GHI789'],
+            'Név': ['Kiss Anna', 'Nagy Béla ', 'Üres Sor', np.nan],
+            'Tanrend típus': ['Nappali', 'Nappali', 'Nappali', 'Levelező'],
+            'Bejegyzések (Aktuális félév)': [1, 2, np.nan, 0],
+            'Bejegyzés': ['Aláírva', '', 'Megtagadva', np.nan],
+            'Részeredmény': [5, np.nan, 3, 4],
+        }),
+        'jegyimport_BMEVIAUAL01_A1_2024.xlsx': pd.DataFrame({
+            'Neptunkód': ['XYZ999', 'ABC123'],
+            'Név': ['Smith John', 'Kiss Anna'],
+            'Tanrend típus': ['Full-time', 'Full-time'],
+            'Bejegyzés': ['Signed', 'Signed'],
+            'Részeredmény': ['A', 'B'],
+        }),
+        # Not an allowed course: read, but none of its records are kept
+        'jegyimport_BMEVIAUAL99_H1_2024.xlsx': pd.DataFrame({'Neptunkód': ['QQQ000'], 'Név': ['Other']}),
+    }
+    for name, frame in exports.items():
+        frame.to_excel(folder / name, index=False)
+    return sorted(folder.glob('*.xlsx'))
+
+
+def _row_wise_records(file_path, course_code, is_english_course):
+    """Student records as the processor extracted them row by row before the column-wise loader"""
+    records = []
+    for _, row in pd.read_excel(file_path).iterrows():
+        record = {
+            'course_code': course_code,
+            'is_english_course': is_english_course,
+            'student_neptun': str(row.get('Neptunkód', '')).strip(),
+            'student_name': str(row.get('Név', '')).strip(),
+            'schedule_type': str(row.get('Tanrend típus', '')).strip(),
+            'current_semester_entries': str(row.get('Bejegyzések (Aktuális félév)', '')).strip(),
+            'entry': str(row.get('Bejegyzés', '')).strip(),
+            'partial_result': str(row.get('Részeredmény', '')).strip(),
+            'source_file': file_path.name
+        }
+        if record['student_neptun'] not in ('', 'nan'):
+            records.append(record)
+    return records
+
+
+def _loader(max_workers):
+    return DLNEPDataLoader(logging.getLogger(__name__), CourseCodeValidator(ALLOWED_COURSES),
+                           max_workers=max_workers)
+
+
+class TestDLNEPDataLoader:
+    """Test cases for reading the DLNEP exports."""
+
+    def test_read_excel_files_in_parallel_matches_serial(self, tmp_path):
+        files = _write_exports(tmp_path / 'exports') + [tmp_path / 'exports' / 'missing.xlsx']
+
+        serial = read_excel_files(files, max_workers=1)
+        parallel = read_excel_files(files, max_workers=2)
+
+        assert [path for path, _, _ in parallel] == files
+        for (_, serial_df, serial_error), (_, parallel_df, parallel_error) in zip(serial, parallel):
+            if serial_error is None:
+                pd.testing.assert_frame_equal(parallel_df, serial_df)
+                assert parallel_error is None
+            else:
+                assert type(parallel_error) is type(serial_error)
+        assert isinstance(parallel[-1][2], FileNotFoundError)
+
+    def test_records_match_row_wise_extraction(self, tmp_path):
+        files = _write_exports(tmp_path / 'exports')
+        expected = (_row_wise_records(files[0], 'BMEVIAUAL00', False)
+                    + _row_wise_records(files[1], 'BMEVIAUAL01', True))
+        assert len(expected) == 5
+
+        assert _loader(max_workers=1).load_files(files) == expected
+        assert _loader(max_workers=2).load_files(files) == expected
+        assert _loader(max_workers=2).load_data(tmp_path / 'exports') == expected
+
+
+class TestSheetCache:
+    """Test cases for the parsed-sheet cache."""
+
+    @staticmethod
+    def _load(cache, file_path, parsed):
+        def parse():
+            parsed.append(file_path.name)
+            return pd.DataFrame({'text': [file_path.read_text()]})
+        return cache.load(file_path, 'test', parse)
+
+    def test_unchanged_file_is_a_hit(self, tmp_path):
+        source = tmp_path / 'export.xlsx'
+        source.write_text('first')
+        parsed = []
+
+        first = self._load(SheetCache(tmp_path / 'cache'), source, parsed)
+        cache = SheetCache(tmp_path / 'cache')
+        second = self._load(cache, source, parsed)
+
+        assert parsed == ['export.xlsx']
+        pd.testing.assert_frame_equal(second, first)
+        assert (cache.stats['hits'], cache.stats['misses']) == (1, 0)
+
+    def test_changed_file_is_parsed_again(self, tmp_path):
+        source = tmp_path / 'export.xlsx'
+        source.write_text('first')
+        cache = SheetCache(tmp_path / 'cache')
+        parsed = []
+        self._load(cache, source, parsed)
+        stat = source.stat()
+
+        # Same cache instance; different size, then same size with a new mtime
+        source.write_text('second version')
+        assert self._load(cache, source, parsed)['text'][0] == 'second version'
+        source.write_text('third version!')
+        os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        assert self._load(cache, source, parsed)['text'][0] == 'third version!'
+
+        assert len(parsed) == 3
+        assert (cache.stats['hits'], cache.stats['misses']) == (0, 3)
+
+    def test_touched_file_with_same_content_is_a_hit(self, tmp_path):
+        source = tmp_path / 'export.xlsx'
+        source.write_text('first')
+        cache = SheetCache(tmp_path / 'cache')
+        parsed = []
+        self._load(cache, source, parsed)
+
+        stat = source.stat()
+        os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        self._load(cache, source, parsed)
+
+        assert parsed == ['export.xlsx']
+        assert cache.stats['hits'] == 1
+
+    def test_clear_removes_cached_sheets(self, tmp_path):
+        source = tmp_path / 'export.xlsx'
+        source.write_text('first')
+        cache = SheetCache(tmp_path / 'cache')
+        parsed = []
+        self._load(cache, source, parsed)
+
+        cache.clear()
+
+        assert not (tmp_path / 'cache').exists()
+        assert cache.get(source, 'test') is None
+        self._load(cache, source, parsed)
+        assert len(parsed) == 2
+
+    def test_report_counts_hits_misses_and_stored_sheets(self, tmp_path):
+        source = tmp_path / 'export.xlsx'
+        source.write_text('first')
+        cache = SheetCache(tmp_path / 'cache')
+        parsed = []
+        self._load(cache, source, parsed)
+        self._load(cache, source, parsed)
+        self._load(cache, source, parsed)
+
+        report = cache.report()
+
+        assert report.startswith('Sheet cache: 2 hits (')
+        assert '1 misses (' in report and '1 stored;' in report
+        assert str(tmp_path / 'cache') in report
+        cache.clear()
+        assert '; 0 KB in ' in cache.report()
@@ -0,0 +1,161 @@
+"""
+Unit tests for the direct export downloads with the browser's session.
+"""
+
+import requests
+import pytest
+from pathlib import Path
+import sys
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from selenium.common.exceptions import NoSuchElementException
+
+from app1_data_collector.dlxls_collector import BMETopicDataCollector
+from shared.utils import SeleniumUtils, WebScrapingUtils
+
+XLSX = b'PK\x03\x04 workload export'
+LOGIN_PAGE = (200, {'Content-Type': 'text/html'}, b'<html><body>Bejelentkezes</body></html>')
+
+
+class FakeExportLink:
+    """Export link element; clicking it 'downloads' the file through the browser"""
+
+    def __init__(self, href, download_folder):
+        self.href = href
+        self.download_folder = download_folder
+        self.clicks = 0
+
+    def get_attribute(self, name):
+        return self.href if name == 'href' else None
+
+    def is_displayed(self):
+        return True
+
+    def is_enabled(self):
+        return True
+
+    def click(self):
+        self.clicks += 1
+        (self.download_folder / 'MyWorkload_browser.xlsx').write_bytes(XLSX)
+
+
+class FakeDriver:
+    """Logged-in browser with the export link on the page"""
+
+    def __init__(self, link):
+        self.link = link
+
+    def find_element(self, by, value):
+        if value != 'Terhelés exportálása':
+            raise NoSuchElementException(value)
+        return self.link
+
+    def find_elements(self, by, value):
+        return []
+
+    def execute_script(self, script):
+        return 'Mozilla/5.0 (test browser)'
+
+    def get_cookies(self):
+        return [{'name': 'ASP.NET_SessionId', 'value': 'session-42', 'domain': '127.0.0.1', 'path': '/'}]
+
+
+def _collector(tmp_path, href, direct_download=True):
+    collector = BMETopicDataCollector(download_folder=tmp_path, direct_download=direct_download)
+    link = FakeExportLink(href, tmp_path)
+    collector.selenium_utils.driver = FakeDriver(link)
+    return collector, link
+
+
+class TestDownloadFile:
+    """Test cases for WebScrapingUtils.download_file."""
+
+    def test_saves_file_named_by_content_disposition(self, tmp_path, export_server):
+        export_server.files['/Export'] = (200, {'Content-Disposition': "attachment; filename*=UTF-8''Terhel%C3%A9s.xlsx"},
+                                          XLSX)
+
+        path = WebScrapingUtils.download_file(requests.Session(), f"{export_server.base_url}/Export", tmp_path,
+                                              'default.xlsx')
+
+        assert path == tmp_path / 'Terhelés.xlsx'
+        assert path.read_bytes() == XLSX
+
+    def test_quoted_file_name_stays_in_the_folder(self, tmp_path, export_server):
+        export_server.files['/Export'] = (200, {'Content-Disposition': 'attachment; filename="../../export.xls"'},
+                                          b'\xd0\xcf\x11\xe0 legacy excel')
+
+        path = WebScrapingUtils.download_file(requests.Session(), f"{export_server.base_url}/Export", tmp_path,
+                                              'default.xlsx')
+
+        assert path == tmp_path / 'export.xls'
+
+    def test_default_name_without_content_disposition(self, tmp_path, export_server):
+        export_server.files['/Export'] = (200, {}, XLSX)
+
+        path = WebScrapingUtils.download_file(requests.Session(), f"{export_server.base_url}/Export", tmp_path,
+                                              'default.xlsx')
+
+        assert path == tmp_path / 'default.xlsx'
+
+    @pytest.mark.parametrize('response', [LOGIN_PAGE, (500, {}, XLSX)], ids=['login page', 'server error'])
+    def test_rejects_responses_that_are_not_files(self, tmp_path, export_server, response):
+        export_server.files['/Export'] = response
+
+        assert WebScrapingUtils.download_file(requests.Session(), f"{export_server.base_url}/Export", tmp_path,
+                                              'default.xlsx') is None
+        assert list(tmp_path.iterdir()) == []
+
+    def test_session_carries_browser_cookies_and_user_agent(self, tmp_path, export_server):
+        export_server.files['/Export'] = (200, {}, XLSX)
+        utils = SeleniumUtils()
+        utils.driver = FakeDriver(None)
+
+        WebScrapingUtils.download_file(utils.create_http_session(), f"{export_server.base_url}/Export", tmp_path,
+                                       'default.xlsx')
+
+        _, headers = export_server.requests[0]
+        assert headers['Cookie'] == 'ASP.NET_SessionId=session-42'
+        assert headers['User-Agent'] == 'Mozilla/5.0 (test browser)'
+
+
+class TestDlxlsDirectDownload:
+    """Test cases for the direct download path of BMETopicDataCollector.download_excel_file."""
+
+    def test_export_link_fetched_directly(self, tmp_path, export_server):
+        export_server.files['/MyWorkload.aspx?export=1'] = (200, {}, XLSX)
+        (tmp_path / 'old_export.xlsx').write_bytes(XLSX)
+        collector, link = _collector(tmp_path, f"{export_server.base_url}/MyWorkload.aspx?export=1")
+
+        downloaded = collector.download_excel_file()
+
+        assert downloaded == tmp_path / 'MyWorkload.xlsx'
+        assert downloaded.read_bytes() == XLSX
+        assert link.clicks == 0
+        assert not (tmp_path / 'old_export.xlsx').exists()
+        assert export_server.requests[0][1]['Cookie'] == 'ASP.NET_SessionId=session-42'
+
+    def test_login_page_falls_back_to_the_click(self, tmp_path, export_server):
+        export_server.files['/MyWorkload.aspx?export=1'] = LOGIN_PAGE
+        collector, link = _collector(tmp_path, f"{export_server.base_url}/MyWorkload.aspx?export=1")
+
+        downloaded = collector.download_excel_file()
+
+        assert downloaded == tmp_path / 'MyWorkload_browser.xlsx'
+        assert link.clicks == 1
+
+    def test_postback_link_is_clicked(self, tmp_path, export_server):
+        collector, link = _collector(tmp_path, "javascript:__doPostBack('ctl00$export','')")
+
+        assert collector.download_excel_file() == tmp_path / 'MyWorkload_browser.xlsx'
+        assert link.clicks == 1
+        assert export_server.requests == []
+
+    def test_direct_download_disabled(self, tmp_path, export_server):
+        export_server.files['/MyWorkload.aspx?export=1'] = (200, {}, XLSX)
+        collector, link = _collector(tmp_path, f"{export_server.base_url}/MyWorkload.aspx?export=1",
+                                     direct_download=False)
+
+        assert collector.download_excel_file() == tmp_path / 'MyWorkload_browser.xlsx'
+        assert export_server.requests == []
@@ -0,0 +1,79 @@
+"""
+Unit tests for the indexed store of the fused student data.
+"""
+
+import json
+import os
+from pathlib import Path
+import sys
+
+# Add project root to path (app1_data_collector/config.py would shadow the topic collector's config)
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app1_data_collector.fused_store import FusedStudentStore, default_store_path
+
+
+def _write_export(json_file, neptun_codes):
+    students = [{'student_neptun': neptun, 'student_name': neptun, 'has_topic': False,
+                 'enrolled_courses': [{'course_code': 'BMEVIAUAL00', 'is_english_course': False}]}
+                for neptun in neptun_codes]
+    json_file.write_text(json.dumps({'metadata': {'total_students': len(students)}, 'students': students}))
+
+
+def _open_count(json_file):
+    store = FusedStudentStore.open_for_json(json_file)
+    try:
+        return store.count_students()
+    finally:
+        store.close()
+
+
+class TestFusedStudentStore:
+    """Test cases for rebuilding the store when its JSON export changes."""
+
+    def test_store_is_reused_while_json_is_unchanged(self, tmp_path):
+        json_file = tmp_path / 'fused_student_data.json'
+        _write_export(json_file, ['AAA111', 'BBB222'])
+        assert _open_count(json_file) == 2
+        built = default_store_path(json_file).stat().st_mtime_ns
+
+        assert _open_count(json_file) == 2
+        assert default_store_path(json_file).stat().st_mtime_ns == built
+
+    def test_json_rewritten_with_the_same_timestamp_rebuilds(self, tmp_path):
+        json_file = tmp_path / 'fused_student_data.json'
+        _write_export(json_file, ['AAA111'])
+        stat = json_file.stat()
+        assert _open_count(json_file) == 1
+
+        # Rewritten within the timestamp resolution: only the size tells it apart
+        _write_export(json_file, ['AAA111', 'BBB222'])
+        os.utime(json_file, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+        assert _open_count(json_file) == 2
+
+    def test_json_replaced_by_an_older_copy_rebuilds(self, tmp_path):
+        json_file = tmp_path / 'fused_student_data.json'
+        _write_export(json_file, ['AAA111', 'BBB222'])
+        assert _open_count(json_file) == 2
+
+        # e.g. restored from a backup with its original (older) timestamp, same size
+        _write_export(json_file, ['CCC333', 'DDD444'])
+        os.utime(json_file, ns=(0, 1_000_000_000))
+
+        store = FusedStudentStore.open_for_json(json_file)
+        assert store.student_neptun_codes() == ['CCC333', 'DDD444']
+        store.close()
+
+    def test_store_written_with_its_json_is_current(self, tmp_path):
+        json_file = tmp_path / 'fused_student_data.json'
+        _write_export(json_file, ['AAA111'])
+        data = json.loads(json_file.read_text())
+        FusedStudentStore.write(default_store_path(json_file), data['students'], data['metadata'],
+                                source_file=json_file).close()
+        built = default_store_path(json_file).stat().st_mtime_ns
+
+        store = FusedStudentStore.open_for_json(json_file)
+        assert store.metadata() == {'total_students': 1}
+        store.close()
+        assert default_store_path(json_file).stat().st_mtime_ns == built
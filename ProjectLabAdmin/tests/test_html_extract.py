@@ -0,0 +1,60 @@
+"""
+Unit tests for the lxml extraction backend of the topic scraper.
+"""
+
+import logging
+import os
+import pytest
+from pathlib import Path
+import sys
+
+# Add app3_topic_collector directory to path
+sys.path.append(str(Path(__file__).parent.parent / 'app3_topic_collector'))
+
+from benchmark_extract import parsers
+from topic_scraper_simple import TopicScraperSimple
+
+
+@pytest.fixture
+def backends():
+    logging.getLogger('topic_scraper').setLevel(logging.ERROR)
+    return parsers(TopicScraperSimple(output_file=os.devnull))
+
+
+def _by_url(backends, recorded_pages, backend):
+    return {url: backends[backend](url, kind, content) for url, kind, content in recorded_pages}
+
+
+class TestHtmlExtract:
+    """Test cases comparing the lxml extraction with the BeautifulSoup reference parser."""
+
+    def test_backends_extract_identical_records(self, backends, recorded_pages):
+        assert len(recorded_pages) == 6
+        for url, kind, content in recorded_pages:
+            assert backends['lxml'](url, kind, content) == backends['bs4'](url, kind, content), url
+
+    def test_category_pages(self, backends, recorded_pages):
+        entries = _by_url(backends, recorded_pages, 'lxml')
+
+        bsc = entries['https://www.aut.bme.hu/Education/BScInfo/Onlab']
+        assert [e['title'] for e in bsc] == ['Beágyazott rendszerek tesztelése', 'Webes felület & REST API',
+                                             'Robotkar vezérlése ROS 2 alatt']
+        assert [e['url'] for e in bsc] == ['https://www.aut.bme.hu/Task/701', 'https://www.aut.bme.hu/Task/702/',
+                                           'https://www.aut.bme.hu/Education/Task/703']
+        assert sorted(bsc[0]['course_codes']) == ['BMEVIAUAL00', 'BMEVIAUAL01']
+
+        msc = entries['https://www.aut.bme.hu/Education/MScInfo/Diploma']
+        assert [e['url'] for e in msc] == ['https://www.aut.bme.hu/Task/701', 'https://www.aut.bme.hu/Task/704']
+        assert sorted(msc[0]['course_codes']) == ['BMEVIAUMA09', 'BMEVIAUMA10']
+
+    def test_topic_pages(self, backends, recorded_pages):
+        details = _by_url(backends, recorded_pages, 'lxml')
+
+        assert details['https://www.aut.bme.hu/Task/701'] == {
+            'is_external': True, 'external_partner': 'Bosch Kft.', 'student_limit': 2,
+            'advisors': ['Dr. Kovács Péter', 'Tóth Márton']}
+        assert details['https://www.aut.bme.hu/Task/702']['student_limit'] == 3
+        assert details['https://www.aut.bme.hu/Task/702']['is_external'] is False
+        # Page without a charset declaration in ISO-8859-2
+        assert details['https://www.aut.bme.hu/Task/703']['external_partner'] == 'Ericsson Magyarország'
+        assert details['https://www.aut.bme.hu/Task/704']['advisors'] == ['Nagy Anna', 'Lakatos   Bence']
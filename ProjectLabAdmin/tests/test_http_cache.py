@@ -0,0 +1,79 @@
+"""
+Unit tests for the HTTP cache of the topic scraper.
+"""
+
+from pathlib import Path
+import sys
+
+# Add app3_topic_collector directory to path
+sys.path.append(str(Path(__file__).parent.parent / 'app3_topic_collector'))
+
+import topic_scraper_simple
+from http_cache import HttpCache
+from topic_scraper_simple import TopicScraperSimple
+
+
+URL = 'https://www.aut.bme.hu/Task/701'
+
+
+class TestHttpCache:
+    """Test cases for HttpCache."""
+
+    def test_memoized_data_belongs_to_its_extractor(self, tmp_path):
+        cache = HttpCache(str(tmp_path))
+        cache.store(URL, b'<html>topic</html>', {'ETag': '"1"'})
+        cache.store_parsed(URL, 'details', {'advisors': ['A']}, 'lxml-v1')
+        cache.save()
+
+        reopened = HttpCache(str(tmp_path))
+        assert reopened.parsed(URL, 'details', 'lxml-v1') == {'advisors': ['A']}
+        assert reopened.parsed(URL, 'details', 'bs4-v1') is None
+        assert reopened.parsed(URL, 'details', 'lxml-v2') is None
+        assert HttpCache(str(tmp_path), refresh=True).parsed(URL, 'details', 'lxml-v1') is None
+
+    def test_changed_body_drops_memoized_data(self, tmp_path):
+        cache = HttpCache(str(tmp_path))
+        cache.store(URL, b'<html>topic</html>', {})
+        cache.store_parsed(URL, 'details', {'advisors': ['A']}, 'lxml-v1')
+
+        cache.store(URL, b'<html>topic</html>', {})
+        assert cache.parsed(URL, 'details', 'lxml-v1') == {'advisors': ['A']}
+        cache.store(URL, b'<html>changed</html>', {})
+        assert cache.parsed(URL, 'details', 'lxml-v1') is None
+        assert cache.stats['unchanged'] == 1 and cache.stats['changed'] == 1
+
+    def test_memoized_data_of_an_older_format_is_ignored(self, tmp_path):
+        cache = HttpCache(str(tmp_path))
+        cache.store(URL, b'<html>topic</html>', {})
+        cache.entries[URL]['parsed'] = {'details': {'advisors': ['A']}, 'topics': []}
+
+        assert cache.parsed(URL, 'details', 'lxml-v1') is None
+        assert cache.parsed(URL, 'topics', 'lxml-v1') is None
+
+
+class TestScraperWithCache:
+    """Test cases for the scraper's use of the cache."""
+
+    def _scrape(self, topic_site, tmp_path, html_parser):
+        cache = HttpCache(str(tmp_path / 'cache'))
+        scraper = TopicScraperSimple(str(tmp_path / 'topics.json'), topic_site.category_urls,
+                                     topic_site.base_url, cache, html_parser)
+        topics = scraper.scrape_all_topics()
+        cache.save()
+        return topics, cache.stats
+
+    def test_unchanged_pages_are_parsed_again_by_another_extractor(self, topic_site, tmp_path, monkeypatch):
+        monkeypatch.setattr(topic_scraper_simple, 'REQUEST_DELAY', 0)
+
+        topics, stats = self._scrape(topic_site, tmp_path, 'lxml')
+        assert stats['new'] == 6 and stats['parse_skipped'] == 0
+
+        # Same pages (304), other backend: parsed again
+        assert self._scrape(topic_site, tmp_path, 'bs4') == (topics, {**stats, 'new': 0, 'not_modified': 6})
+
+        # Same pages, same backend: memoized data reused
+        assert self._scrape(topic_site, tmp_path, 'bs4')[1]['parse_skipped'] == 6
+
+        # New extractor version: parsed again
+        monkeypatch.setattr(topic_scraper_simple, 'EXTRACTOR_VERSION', 2)
+        assert self._scrape(topic_site, tmp_path, 'bs4')[1]['parse_skipped'] == 0
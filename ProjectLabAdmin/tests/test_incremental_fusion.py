@@ -0,0 +1,86 @@
+"""
+Unit tests for updating the fused data after a change of one DLNEP course export.
+"""
+
+from pathlib import Path
+import sys
+
+import pandas as pd
+
+# dlfusion_processor and data_fusion import their sibling modules by name. Their directory is
+# only on the path while they are imported, so app1_data_collector/config.py cannot shadow the
+# topic collector's config
+APP1_DIR = str(Path(__file__).parent.parent / 'app1_data_collector')
+sys.path.insert(0, APP1_DIR)
+try:
+    from dlfusion_processor import DataFusionProcessor
+finally:
+    sys.path.remove(APP1_DIR)
+
+TOPICS = [{'student_neptun': 'N1', 'student_name': 'Kiss Anna', 'supervisor': 'Dr. Tóth',
+           'category': 'Önálló laboratórium', 'topic_title': 'Z-ENG Sensor networks'}]
+
+
+def _write_export(folder, course_code, students):
+    """Neptun export of a course; students are (Neptun code, name, entry) tuples"""
+    frame = pd.DataFrame(students, columns=['Neptunkód', 'Név', 'Bejegyzés'])
+    frame['Tanrend típus'] = 'Nappali'
+    path = folder / f'jegyimport_{course_code}_H1_2024.xlsx'
+    frame.to_excel(path, index=False)
+    return path
+
+
+def _fused(folder):
+    """Processor after a full load and fusion of the exports in folder"""
+    processor = DataFusionProcessor(use_sheet_cache=False)
+    processor.dlxls_data = TOPICS
+    assert processor.load_dlnep_data(folder)
+    assert processor.fuse_data()
+    return processor
+
+
+def _assert_same_as_full_fusion(processor, folder):
+    full = _fused(folder)
+    assert processor.dlnep_data == full.dlnep_data
+    assert processor.fused_data == full.fused_data
+    assert processor.fusion_engine.get_summary() == full.fusion_engine.get_summary()
+    assert processor.fusion_engine.course_students == full.fusion_engine.course_students
+
+
+class TestIncrementalFusion:
+    """Incremental updates must give the same result as a full fusion of the exports."""
+
+    def test_changed_export(self, tmp_path):
+        _write_export(tmp_path, 'BMEVIAUAL01', [('N1', 'Kiss Anna', 'Aláírva'), ('N2', 'Nagy Béla', '')])
+        changed = _write_export(tmp_path, 'BMEVIAUAL03', [('N1', 'Kiss A.', ''), ('N3', 'Szabó Cecil', '')])
+        processor = _fused(tmp_path)
+
+        _write_export(tmp_path, 'BMEVIAUAL03', [('N2', 'Nagy B.', 'Aláírva'), ('N4', 'Kovács Dóra', '')])
+        assert processor.update_course_export(changed)
+
+        _assert_same_as_full_fusion(processor, tmp_path)
+
+    def test_removed_export(self, tmp_path):
+        removed = _write_export(tmp_path, 'BMEVIAUAL01', [('N1', 'Kiss A.', ''), ('N2', 'Nagy Béla', '')])
+        _write_export(tmp_path, 'BMEVIAUAL03', [('N1', 'Kiss Anna', 'Aláírva')])
+        processor = _fused(tmp_path)
+
+        removed.unlink()
+        assert processor.update_course_export(removed)
+
+        _assert_same_as_full_fusion(processor, tmp_path)
+        assert [student['student_neptun'] for student in processor.fused_data] == ['N1']
+
+    def test_new_export_sorting_first(self, tmp_path):
+        _write_export(tmp_path, 'BMEVIAUAL03', [('N1', 'Kiss A.', '')])
+        _write_export(tmp_path, 'BMEVIAUAL04', [('N1', 'Kiss A.', ''), ('N2', 'Nagy Béla', '')])
+        processor = _fused(tmp_path)
+
+        added = _write_export(tmp_path, 'BMEVIAUAL01', [('N1', 'Kiss Anna', 'Aláírva')])
+        assert processor.update_course_export(added)
+
+        _assert_same_as_full_fusion(processor, tmp_path)
+        student = next(student for student in processor.fused_data if student['student_neptun'] == 'N1')
+        assert [course['course_code'] for course in student['enrolled_courses']] == \
+            ['BMEVIAUAL01', 'BMEVIAUAL03', 'BMEVIAUAL04']
+        assert student['student_name'] == 'Kiss Anna'
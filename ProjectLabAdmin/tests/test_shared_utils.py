@@ -0,0 +1,157 @@
+"""
+Unit tests for the event-driven waits of the shared Selenium utilities.
+"""
+
+import json
+import threading
+import time
+import pytest
+from pathlib import Path
+import sys
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from selenium.common.exceptions import WebDriverException
+
+import shared.utils
+from shared.utils import DownloadWatcher, SeleniumUtils
+
+
+def _event(method, request_id):
+    return {'message': json.dumps({'message': {'method': method, 'params': {'requestId': request_id}}})}
+
+
+def sent(request_id):
+    return _event('Network.requestWillBeSent', request_id)
+
+
+def finished(request_id):
+    return _event('Network.loadingFinished', request_id)
+
+
+class StubDriver:
+    """Driver whose performance log returns the queued batches of events, one batch per read"""
+
+    def __init__(self, *batches, log_available=True):
+        self.batches = list(batches)
+        self.log_available = log_available
+        self.scripts = []
+
+    def get_log(self, log_type):
+        assert log_type == 'performance'
+        if not self.log_available:
+            raise WebDriverException('log type performance not found')
+        return self.batches.pop(0) if self.batches else []
+
+    def execute_script(self, script):
+        self.scripts.append(script)
+        return True
+
+
+def _utils(driver):
+    utils = SeleniumUtils()
+    utils.driver = driver
+    return utils
+
+
+class TestWaitForNetworkIdle:
+    """Test cases for SeleniumUtils.wait_for_network_idle."""
+
+    def test_idle_after_requests_finished(self):
+        driver = StubDriver([sent('1'), sent('2')], [finished('1')], [finished('2')])
+
+        assert _utils(driver).wait_for_network_idle(idle_time=0.05, timeout=2)
+        assert driver.batches == []
+
+    def test_timeout_while_request_in_flight(self):
+        driver = StubDriver([sent('1')])
+
+        started = time.monotonic()
+        assert not _utils(driver).wait_for_network_idle(idle_time=0.05, timeout=0.3, max_request_age=10)
+        assert time.monotonic() - started >= 0.3
+
+    def test_request_without_end_is_ignored_after_max_age(self):
+        # e.g. a long poll: its loadingFinished never arrives
+        driver = StubDriver([sent('poll'), sent('1')], [finished('1')])
+
+        started = time.monotonic()
+        assert _utils(driver).wait_for_network_idle(idle_time=0.05, timeout=5, max_request_age=0.3)
+        assert time.monotonic() - started < 2
+
+    def test_max_in_flight_requests_count_as_idle(self):
+        driver = StubDriver([sent('1'), sent('2'), sent('3')], [finished('3')])
+
+        assert _utils(driver).wait_for_network_idle(idle_time=0.05, timeout=0.5, max_request_age=10,
+                                                    max_in_flight=2)
+
+    def test_drained_requests_are_not_tracked(self):
+        driver = StubDriver([sent('earlier page')], [sent('1')], [finished('1')])
+        utils = _utils(driver)
+
+        utils.drain_network_log()
+
+        assert utils.wait_for_network_idle(idle_time=0.05, timeout=1, max_request_age=10)
+
+    def test_page_state_checked_without_performance_log(self):
+        driver = StubDriver(log_available=False)
+        utils = _utils(driver)
+
+        utils.drain_network_log()
+        assert utils.wait_for_network_idle(idle_time=0.05, timeout=1)
+        assert driver.scripts == [shared.utils.PAGE_IDLE_SCRIPT]
+
+
+@pytest.fixture(params=[True, False], ids=['watchdog', 'polling'])
+def watch_mode(request, monkeypatch):
+    if request.param and not shared.utils.WATCHDOG_AVAILABLE:
+        pytest.skip('watchdog not installed')
+    monkeypatch.setattr(shared.utils, 'WATCHDOG_AVAILABLE', request.param)
+
+
+def _later(delay, action):
+    timer = threading.Timer(delay, action)
+    timer.start()
+    return timer
+
+
+class TestDownloadWatcher:
+    """Test cases for DownloadWatcher, with watchdog and with polling."""
+
+    def test_existing_files_are_not_downloads(self, tmp_path, watch_mode):
+        (tmp_path / 'earlier.xlsx').write_bytes(b'PK\x03\x04 earlier')
+
+        with DownloadWatcher(tmp_path, '*.xlsx') as watcher:
+            assert watcher.wait(timeout=0.3) is None
+
+    def test_completed_download_after_partial_file(self, tmp_path, watch_mode):
+        partial = tmp_path / 'export.xlsx.crdownload'
+
+        def finish():
+            partial.rename(tmp_path / 'export.xlsx')
+
+        with DownloadWatcher(tmp_path) as watcher:
+            partial.write_bytes(b'PK\x03\x04 data')
+            assert watcher.completed_file() is None
+            timer = _later(0.2, finish)
+            downloaded = watcher.wait(timeout=5)
+            timer.join()
+
+        assert downloaded == tmp_path / 'export.xlsx'
+
+    def test_empty_and_unmatched_files_are_skipped(self, tmp_path, watch_mode):
+        with DownloadWatcher(tmp_path, '*.xlsx') as watcher:
+            (tmp_path / 'export.xlsx').touch()
+            (tmp_path / 'notes.txt').write_text('not an export')
+            assert watcher.completed_file() is None
+
+    def test_overwritten_file_is_a_download(self, tmp_path, watch_mode):
+        export = tmp_path / 'export.xlsx'
+        export.write_bytes(b'PK\x03\x04 old')
+
+        with DownloadWatcher(tmp_path, '*.xlsx') as watcher:
+            timer = _later(0.1, lambda: export.write_bytes(b'PK\x03\x04 new export'))
+            downloaded = watcher.wait(timeout=5)
+            timer.join()
+
+        assert downloaded == export
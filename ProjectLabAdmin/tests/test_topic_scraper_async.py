@@ -0,0 +1,84 @@
+"""
+Unit tests for the concurrent topic scraper.
+"""
+
+import asyncio
+import time
+import pytest
+from pathlib import Path
+import sys
+
+# Add app3_topic_collector directory to path
+sys.path.append(str(Path(__file__).parent.parent / 'app3_topic_collector'))
+
+import topic_scraper_simple
+from topic_scraper_async import AsyncTopicScraper, TokenBucket
+from topic_scraper_simple import TopicScraperSimple
+
+
+@pytest.fixture
+def sequential_topics(topic_site, tmp_path, monkeypatch):
+    monkeypatch.setattr(topic_scraper_simple, 'REQUEST_DELAY', 0)
+    scraper = TopicScraperSimple(str(tmp_path / 'sequential.json'), topic_site.category_urls, topic_site.base_url)
+    topics = scraper.scrape_all_topics()
+    topic_site.requests.clear()
+    return topics
+
+
+class TestAsyncTopicScraper:
+    """Test cases for AsyncTopicScraper against a local copy of the topic site."""
+
+    def test_output_matches_sequential_scraper(self, topic_site, sequential_topics, tmp_path):
+        scraper = AsyncTopicScraper(str(tmp_path / 'async.json'), topic_site.category_urls, topic_site.base_url,
+                                    requests_per_second=1000)
+
+        topics = scraper.scrape_all_topics()
+
+        assert topics == sequential_topics
+        assert [t['url'].rsplit('/Task/', 1)[1] for t in topics] == ['701', '702/', '703', '701', '704']
+        assert topics[0]['external_partner'] == 'Bosch Kft.'
+        assert topics[0]['advisors'] == ['Dr. Kovács Péter', 'Tóth Márton']
+        # A topic listed in both categories gets the course codes of both
+        assert sorted(c['course_code'] for c in topics[0]['courses']) == [
+            'BMEVIAUAL00', 'BMEVIAUAL01', 'BMEVIAUMA09', 'BMEVIAUMA10']
+        # The topic linked from both categories is fetched once
+        assert sorted(topic_site.requests) == sorted(set(topic_site.requests))
+        assert scraper.crawl_stats == {'topic_links': 5, 'topic_pages': 4, 'fetches_avoided': 1}
+
+    def test_transient_errors_are_retried(self, topic_site, sequential_topics, tmp_path):
+        topic_site.fail_once.update({'/Education/MScInfo/Diploma', '/Task/704'})
+        scraper = AsyncTopicScraper(str(tmp_path / 'async.json'), topic_site.category_urls, topic_site.base_url,
+                                    requests_per_second=1000, retry_backoff=0.01)
+
+        assert scraper.scrape_all_topics() == sequential_topics
+        assert topic_site.requests.count('/Task/704') == 2
+
+    def test_requests_are_rate_limited_per_host(self, topic_site, tmp_path):
+        scraper = AsyncTopicScraper(str(tmp_path / 'async.json'), topic_site.category_urls, topic_site.base_url,
+                                    requests_per_second=20)
+
+        start = time.monotonic()
+        scraper.scrape_all_topics()
+
+        # 6 requests at 20 per second with a burst of 1: at least 5 intervals of 50 ms
+        assert len(topic_site.requests) == 6
+        assert time.monotonic() - start >= 0.25
+
+
+class TestTokenBucket:
+    """Test cases for the token bucket rate limiter."""
+
+    def test_burst_then_rate(self):
+        async def acquire_times():
+            bucket = TokenBucket(rate=50, capacity=2)
+            start = time.monotonic()
+            times = []
+            for _ in range(4):
+                await bucket.acquire()
+                times.append(time.monotonic() - start)
+            return times
+
+        times = asyncio.run(acquire_times())
+
+        assert times[1] < 0.01
+        assert times[3] >= 0.035
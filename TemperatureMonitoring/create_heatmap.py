@@ -1,161 +1,337 @@
 #!/usr/bin/env python3
 """
 Create temperature difference heatmap visualization for ventilation analysis.
-Shows the temperature difference between T3_Kek (room) and T1_BE (intake).
+Shows the hour x day temperature difference between a room device and a
+reference device (by default T3_Kek (room) and T1_BE (intake)).
+
+The heatmap is built straight from the as-stored device series: the reference
+series is aligned onto the room timestamps with a sorted-array join and the
+differences are aggregated per (day, hour) cell with NumPy, so any device pair
+and any time span can be rendered without running STAT002 first.
 """
 
+import argparse
 import json
-import matplotlib.pyplot as plt
-import pandas as pd
+import sys
 import numpy as np
 from datetime import datetime
 from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# Add src directory to path for imports
+sys.path.append(str(Path(__file__).parent / "src"))
+
+from sensor_store import load_database as load_store_or_json
+from timeseries import AGGREGATIONS, align_nearest, hour_day_matrix, records_to_arrays
+# matplotlib and pandas are imported by the functions that use them (fast `tempmon` start-up)
+
+DATABASE_PATH = "data/temperature_database.json"
+DEFAULT_PAIR = ('T3_Kek', 'T1_BE')
+SYNC_TOLERANCE_MINUTES = 15
+
 
 def load_ventilation_data():
     """Load STAT002 results from JSON file."""
     results_path = Path("output/STAT002_ventilation_analysis.json")
-    
+
     if not results_path.exists():
         print(f"Error: {results_path} not found. Please run temperature_statistics.py first.")
         return None
-    
+
     with open(results_path, 'r') as f:
         data = json.load(f)
-    
+
     return data
 
-def create_temperature_difference_heatmap(data, output_path="output/ventilation_temperature_difference_heatmap.png"):
+
+def load_database(db_path: str = DATABASE_PATH) -> Optional[Dict]:
+    """Load the temperature database."""
+    path = Path(db_path)
+
+    if not path.exists():
+        print(f"Error: {path} not found. Please run the data importer first.")
+        return None
+
+    return load_store_or_json(path)
+
+
+def compute_pair_difference(database: Dict, room_device: str, reference_device: str,
+                            tolerance_minutes: float = SYNC_TOLERANCE_MINUTES) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Compute room - reference temperature differences from the stored series.
+
+    Args:
+        database: Temperature database dictionary
+        room_device: Device whose timestamps define the difference series
+        reference_device: Device subtracted from the room device
+        tolerance_minutes: Maximum time distance for matching reference samples
+
+    Returns:
+        Tuple of (timestamps, differences) restricted to matched samples
+    """
+    devices = database.get('devices', {})
+    missing = [d for d in (room_device, reference_device) if d not in devices]
+    if missing:
+        raise ValueError(f"Devices not found in database: {missing}")
+
+    room_times, room_temps = records_to_arrays(devices[room_device].get('records', []))
+    ref_times, ref_temps = records_to_arrays(devices[reference_device].get('records', []))
+
+    aligned_ref = align_nearest(room_times, ref_times, ref_temps, tolerance_minutes)
+    differences = room_temps - aligned_ref
+    matched = ~np.isnan(differences)
+
+    return room_times[matched], differences[matched]
+
+
+def build_heatmap_matrix(timestamps: np.ndarray, values: np.ndarray,
+                         agg: str = 'mean') -> Tuple[np.ndarray, 'pd.DatetimeIndex']:
+    """
+    Build the days x 24 hours heatmap matrix.
+
+    Args:
+        timestamps: Sample timestamps
+        values: Sample values
+        agg: Cell aggregation ('mean', 'min', 'max' or 'count')
+
+    Returns:
+        Tuple of (matrix, date range of the matrix rows)
+    """
+    import pandas as pd
+    matrix, first_day = hour_day_matrix(np.asarray(timestamps, dtype='datetime64[s]'), values, agg)
+    date_range = pd.date_range(start=pd.Timestamp(first_day), periods=matrix.shape[0], freq='D')
+    return matrix, date_range
+
+
+def create_temperature_difference_heatmap(data, output_path="output/ventilation_temperature_difference_heatmap.png",
+                                          agg: str = 'mean'):
     """
     Create a heatmap showing temperature difference between T3_Kek (room) and T1_BE (intake).
-    
+
     Args:
         data: STAT002 analysis results
         output_path: Path to save the temperature difference heatmap image
+        agg: Cell aggregation ('mean', 'min', 'max' or 'count')
     """
+    import pandas as pd
     results = data['detailed_results']
-    
-    # Convert to DataFrame
-    df = pd.DataFrame(results)
-    df['timestamp'] = pd.to_datetime(df['timestamp'], format='ISO8601')
-    
-    # Calculate temperature difference (Room - Intake)
-    df['temp_difference'] = df['T3_Kek'] - df['T1_BE']
-    
-    # Extract date and hour
-    df['date'] = df['timestamp'].dt.date
-    df['hour'] = df['timestamp'].dt.hour
-    
-    # Get date range
-    start_date = df['date'].min()
-    end_date = df['date'].max()
-    
-    # Create a complete date range
-    date_range = pd.date_range(start=start_date, end=end_date, freq='D')
-    
-    # Initialize the temperature difference matrix (days x 24 hours)
-    temp_diff_matrix = np.full((len(date_range), 24), np.nan)
-    
-    # Fill the matrix with temperature difference values
-    for _, row in df.iterrows():
-        date_idx = (row['date'] - start_date).days
-        hour_idx = row['hour']
-        
-        if 0 <= date_idx < len(date_range) and 0 <= hour_idx < 24:
-            temp_diff_matrix[date_idx, hour_idx] = row['temp_difference']
-    
+
+    timestamps = pd.to_datetime([r['timestamp'] for r in results], format='ISO8601').values
+    differences = np.array([r['T3_Kek'] - r['T1_BE'] for r in results], dtype=np.float64)
+
+    matrix, date_range = build_heatmap_matrix(timestamps, differences, agg)
+    return render_heatmap(matrix, date_range, 'T3_Kek', 'T1_BE', output_path, agg)
+
+
+def render_heatmap(temp_diff_matrix: np.ndarray, date_range: 'pd.DatetimeIndex',
+                   room_device: str, reference_device: str, output_path, agg: str = 'mean'):
+    """
+    Render and save a precomputed days x 24 hours difference matrix.
+
+    Args:
+        temp_diff_matrix: Matrix from build_heatmap_matrix()
+        date_range: Dates of the matrix rows
+        room_device: Room device name (for labels)
+        reference_device: Reference device name (for labels)
+        output_path: Path to save the heatmap image
+        agg: Aggregation used to build the matrix (for labels)
+    """
+    import matplotlib.pyplot as plt
+    start_date = date_range[0].date()
+    end_date = date_range[-1].date()
+
     # Create the visualization
     fig, ax = plt.subplots(figsize=(20, 12))
-    
+
     # Calculate color scale limits for better visualization
     # Use percentiles to avoid extreme outliers affecting the scale
     valid_data = temp_diff_matrix[~np.isnan(temp_diff_matrix)]
-    if len(valid_data) > 0:
+    if agg == 'count':
+        cmap = 'viridis'
+        vmin, vmax = 0, (valid_data.max() if len(valid_data) > 0 else 1)
+    elif len(valid_data) > 0:
+        cmap = 'RdBu_r'
         vmin = np.percentile(valid_data, 1)  # 1st percentile
         vmax = np.percentile(valid_data, 99)  # 99th percentile
         # Make scale symmetric around zero for better interpretation
         abs_max = max(abs(vmin), abs(vmax))
         vmin, vmax = -abs_max, abs_max
     else:
+        cmap = 'RdBu_r'
         vmin, vmax = -5, 5  # Default range
-    
+
     # Create the heatmap with thermal colormap
-    im = ax.imshow(temp_diff_matrix, cmap='RdBu_r', vmin=vmin, vmax=vmax,
+    im = ax.imshow(temp_diff_matrix, cmap=cmap, vmin=vmin, vmax=vmax,
                    aspect='auto', origin='upper')
-    
+
     # Configure x-axis (hours)
     ax.set_xlim(-0.5, 23.5)
     ax.set_xticks(range(0, 24, 2))
     ax.set_xticklabels([f"{h:02d}:00" for h in range(0, 24, 2)])
     ax.set_xlabel('Hour of Day')
-    
+
     # Configure y-axis (dates)
     date_ticks = range(0, len(date_range), 7)
     ax.set_yticks(date_ticks)
     ax.set_yticklabels([date_range[i].strftime('%Y-%m-%d') for i in date_ticks])
     ax.set_ylabel('Date')
-    
+
     # Add grid
     ax.set_xticks(np.arange(-0.5, 24, 1), minor=True)
     ax.set_yticks(np.arange(-0.5, len(date_range), 1), minor=True)
     ax.grid(which='minor', color='white', linestyle='-', linewidth=0.5, alpha=0.3)
-    
+
     # Add colorbar
     cbar = plt.colorbar(im, ax=ax)
-    cbar.set_label('Temperature Difference (T3_Kek - T1_BE) [°C]', rotation=270, labelpad=20)
-    
+    if agg == 'count':
+        cbar.set_label('Matched samples per hour', rotation=270, labelpad=20)
+    else:
+        cbar.set_label(f'Temperature Difference ({room_device} - {reference_device}) [°C], hourly {agg}',
+                       rotation=270, labelpad=20)
+
     # Add title with interpretation guide
-    ax.set_title('Temperature Difference: Room (T3_Kek) - Intake (T1_BE)\n'
+    ax.set_title(f'Temperature Difference: Room ({room_device}) - Reference ({reference_device})\n'
                  f'From {start_date} to {end_date}\n'
-                 'Red = Room warmer than intake | Blue = Intake warmer than room',
+                 'Red = Room warmer than reference | Blue = Reference warmer than room',
                  fontsize=14, pad=20)
-    
+
     # Add interpretation text
     interpretation_text = (
         "Interpretation:\n"
-        "• Red areas: Room temperature > Intake temperature (likely ventilation OFF)\n"
-        "• Blue areas: Intake temperature > Room temperature (possible ventilation ON or external influence)\n"
-        "• White areas: Similar temperatures between room and intake"
+        "• Red areas: Room temperature > Reference temperature (likely ventilation OFF)\n"
+        "• Blue areas: Reference temperature > Room temperature (possible ventilation ON or external influence)\n"
+        "• White areas: Similar temperatures between room and reference"
     )
-    
-    ax.text(0.02, 0.98, interpretation_text, transform=ax.transAxes,
-            ha='left', va='top', fontsize=10,
-            bbox=dict(boxstyle='round,pad=0.5', facecolor='lightyellow', alpha=0.8))
-    
+
+    if agg != 'count':
+        ax.text(0.02, 0.98, interpretation_text, transform=ax.transAxes,
+                ha='left', va='top', fontsize=10,
+                bbox=dict(boxstyle='round,pad=0.5', facecolor='lightyellow', alpha=0.8))
+
     # Add statistics
     if len(valid_data) > 0:
         stats_text = (f"Statistics: Mean: {np.mean(valid_data):.1f}°C | "
                      f"Std: {np.std(valid_data):.1f}°C | "
                      f"Range: {np.min(valid_data):.1f}°C to {np.max(valid_data):.1f}°C")
-        
+
         ax.text(0.5, -0.08, stats_text, transform=ax.transAxes,
                 ha='center', va='top', fontsize=10,
                 bbox=dict(boxstyle='round,pad=0.5', facecolor='lightblue', alpha=0.7))
-    
+
     plt.tight_layout()
     plt.savefig(output_path, dpi=300, bbox_inches='tight')
+    plt.close(fig)
     print(f"Temperature difference heatmap saved to: {output_path}")
-    
+
     return fig
 
-def main():
-    """Main function to create temperature difference heatmap."""
+
+def create_pair_heatmaps(database: Dict, pairs: List[Tuple[str, str]], agg: str = 'mean',
+                         per_year: bool = False, output_dir: str = "output") -> List[str]:
+    """
+    Create difference heatmaps for several device pairs in one run.
+
+    Args:
+        database: Temperature database dictionary
+        pairs: List of (room_device, reference_device) tuples
+        agg: Cell aggregation ('mean', 'min', 'max' or 'count')
+        per_year: Write one heatmap per calendar year instead of one per pair
+        output_dir: Directory for the generated images
+
+    Returns:
+        List of generated image paths
+    """
+    output = Path(output_dir)
+    output.mkdir(exist_ok=True)
+    generated = []
+
+    for room_device, reference_device in pairs:
+        try:
+            timestamps, differences = compute_pair_difference(database, room_device, reference_device)
+        except ValueError as e:
+            print(f"Skipping {room_device} - {reference_device}: {e}")
+            continue
+
+        if len(timestamps) == 0:
+            print(f"Skipping {room_device} - {reference_device}: no synchronized samples")
+            continue
+
+        if per_year:
+            years = timestamps.astype('datetime64[Y]')
+            segments = [(f"_{str(year)}", years == year) for year in np.unique(years)]
+        else:
+            segments = [("", slice(None))]
+
+        for suffix, selection in segments:
+            matrix, date_range = build_heatmap_matrix(timestamps[selection], differences[selection], agg)
+            output_path = output / f"heatmap_{room_device}_vs_{reference_device}_{agg}{suffix}.png"
+            render_heatmap(matrix, date_range, room_device, reference_device, output_path, agg)
+            generated.append(str(output_path))
+
+    return generated
+
+
+def _parse_pair(value: str) -> Tuple[str, str]:
+    """Parse a ROOM:REFERENCE command line pair."""
+    if ':' not in value:
+        raise argparse.ArgumentTypeError(f"Expected ROOM:REFERENCE, got '{value}'")
+    room, reference = value.split(':', 1)
+    return room, reference
+
+
+def main(argv: Optional[List[str]] = None):
+    """Main function to create temperature difference heatmaps."""
+    parser = argparse.ArgumentParser(description='Create hour x day temperature difference heatmaps')
+    parser.add_argument('--pair', action='append', type=_parse_pair, metavar='ROOM:REFERENCE',
+                        help='Device pair to render (repeatable, default: T3_Kek:T1_BE)')
+    parser.add_argument('--all-rooms', metavar='REFERENCE',
+                        help='Render every other device against the given reference device')
+    parser.add_argument('--agg', choices=AGGREGATIONS, default='mean',
+                        help='Aggregation per (day, hour) cell (default: mean)')
+    parser.add_argument('--per-year', action='store_true',
+                        help='Write one heatmap per calendar year')
+    parser.add_argument('--from-stat002', action='store_true',
+                        help='Use the STAT002 JSON results instead of the database')
+    parser.add_argument('--db', default=DATABASE_PATH, help='Path to the temperature database')
+    args = parser.parse_args(argv)
+
     print("Creating Temperature Difference Heatmap...")
-    
-    # Load data
-    data = load_ventilation_data()
-    if data is None:
+
+    if args.from_stat002:
+        data = load_ventilation_data()
+        if data is None:
+            return
+
+        print(f"\nLoaded {data['total_data_points']:,} data points")
+        print(f"Time range: {data['time_range']['start']} to {data['time_range']['end']}")
+
+        print("\nCreating temperature difference heatmap...")
+        create_temperature_difference_heatmap(data, agg=args.agg)
+
+        print("\nVisualization completed!")
+        print("Generated file:")
+        print("- ventilation_temperature_difference_heatmap.png: Room-Intake temperature difference")
+        return
+
+    database = load_database(args.db)
+    if database is None:
         return
-    
-    print(f"\nLoaded {data['total_data_points']:,} data points")
-    print(f"Time range: {data['time_range']['start']} to {data['time_range']['end']}")
-    
-    # Create temperature difference heatmap
-    print("\nCreating temperature difference heatmap...")
-    create_temperature_difference_heatmap(data)
-    
+
+    pairs = list(args.pair or [])
+    if args.all_rooms:
+        pairs.extend((device, args.all_rooms) for device in database.get('devices', {})
+                     if device != args.all_rooms)
+    if not pairs:
+        pairs = [DEFAULT_PAIR]
+
+    print(f"\nRendering {len(pairs)} device pair(s) with hourly {args.agg}...")
+    generated = create_pair_heatmaps(database, pairs, agg=args.agg, per_year=args.per_year)
+
     print("\nVisualization completed!")
-    print("Generated file:")
-    print("- ventilation_temperature_difference_heatmap.png: Room-Intake temperature difference")
+    print("Generated files:")
+    for path in generated:
+        print(f"- {Path(path).name}")
+
 
 if __name__ == "__main__":
     main()
@@ -10,16 +10,31 @@ Heating detection logic:
 - Heating starts when temperature rises +5°C above the daily minimum
 - Heating ends when temperature drops 1°C below the cycle maximum
 - Gaps shorter than 15 minutes between cycles are merged into a single cycle
+
+Use --sweep to evaluate a grid of thresholds in parallel, e.g.
+    python detect_heating.py --sweep --rise 3:7:0.5 --drop -0.5,-1,-1.5 --gap 5,15,30
 """
 
+import argparse
+import csv
 import json
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
-import pandas as pd
+import time
+import numpy as np
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Dict, List, Tuple, Optional
 import logging
+import sys
+
+# Add src directory to path for imports
+sys.path.append(str(Path(__file__).parent / "src"))
+
+from sensor_store import load_database
+from timeseries import records_to_arrays
+from heating_cycles import detect_cycles, parameter_grid, sweep_parameters
+from gasmeter import load_gas_series
+# pandas and the matplotlib templates are imported by the methods that use them,
+# so importing this module (tempmon, the tests) stays light
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -39,165 +54,64 @@ class HeatingDetector:
     """Detects heating cycles from temperature monitoring data using daily min/cycle max heuristics."""
     
     def __init__(self, json_db_path: str = "data/temperature_database.json", 
-                 output_dir: str = "output"):
+                 output_dir: str = "output",
+                 rise_above_min: float = TEMP_RISE_ABOVE_MIN,
+                 drop_below_max: float = TEMP_DROP_BELOW_MAX,
+                 min_gap_minutes: float = MIN_GAP_MINUTES,
+                 memory_budget_mb: Optional[float] = None):
         self.json_db_path = Path(json_db_path)
         self.output_dir = Path(output_dir)
+        self.rise_above_min = rise_above_min
+        self.drop_below_max = drop_below_max
+        self.min_gap_minutes = min_gap_minutes
         self.output_dir.mkdir(exist_ok=True)
+        from figure_templates import FigureTemplateCache
+        self.templates = FigureTemplateCache()
         
         self.database = self._load_database()
         
+        # Out-of-core mode: stream the zone devices from the memory-mapped store in chunks
+        self.out_of_core = None
+        if memory_budget_mb:
+            from out_of_core import OutOfCoreRunner
+            self.out_of_core = OutOfCoreRunner(str(self.json_db_path), memory_budget_mb)
+        
     def _load_database(self) -> Dict:
-        """Load the JSON database."""
+        """Load the JSON database (or a sensor store directory)."""
         if not self.json_db_path.exists():
             raise FileNotFoundError(f"Database not found: {self.json_db_path}")
         
-        with open(self.json_db_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return load_database(self.json_db_path)
     
-    def _get_device_data(self, device_name: str) -> pd.DataFrame:
-        """Get device data as a sorted DataFrame."""
+    def _get_device_series(self, device_name: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Get device timestamps and temperatures as arrays sorted by time."""
         if device_name not in self.database.get('devices', {}):
             raise ValueError(f"Device '{device_name}' not found in database")
         
         records = self.database['devices'][device_name].get('records', [])
         if not records:
             logger.warning(f"No data found for device '{device_name}'")
-            return pd.DataFrame()
-        
-        # Convert to DataFrame
-        df_data = []
-        for record in records:
-            df_data.append({
-                'timestamp': pd.to_datetime(record['timestamp']),
-                'temperature': record['temperature']
-            })
-        
-        df = pd.DataFrame(df_data)
-        df = df.sort_values('timestamp').reset_index(drop=True)
-        
-        # Add date column for daily grouping
-        df['date'] = df['timestamp'].dt.date
         
-        logger.info(f"Loaded {len(df)} records for device {device_name}")
-        return df
+        times, temperatures = records_to_arrays(records)
+        logger.info(f"Loaded {len(times)} records for device {device_name}")
+        return times, temperatures
     
-    def _calculate_daily_minimums(self, df: pd.DataFrame) -> Dict[str, float]:
-        """Calculate minimum temperature for each day."""
-        daily_mins = {}
-        
-        for date, group in df.groupby('date'):
-            if not group.empty:
-                daily_mins[str(date)] = group['temperature'].min()
-                logger.debug(f"Daily minimum for {date}: {daily_mins[str(date)]:.1f}°C")
-        
-        return daily_mins
-    
-    def _detect_raw_cycles(self, df: pd.DataFrame) -> List[Dict]:
-        """Detect raw heating cycles using daily minimum and cycle maximum heuristics."""
-        if df.empty or len(df) < 2:
-            return []
-        
-        logger.info(f"Processing {len(df)} temperature readings with daily min/cycle max detection")
-        
-        # Calculate daily minimums
-        daily_mins = self._calculate_daily_minimums(df)
-        
-        cycles = []
-        in_cycle = False
-        cycle_start = None
-        cycle_max_temp = None
-        cycle_start_temp = None
-        
-        for i in range(len(df)):
-            current_timestamp = df.iloc[i]['timestamp']
-            current_temp = df.iloc[i]['temperature']
-            current_date = str(df.iloc[i]['date'])
-            
-            daily_min = daily_mins.get(current_date)
-            if daily_min is None:
-                logger.warning(f"No daily minimum found for {current_date}, skipping")
-                continue
-            
-            if not in_cycle:
-                # Check for heating start: temp >= daily_min + 5°C
-                heating_threshold = daily_min + TEMP_RISE_ABOVE_MIN
-                if current_temp >= heating_threshold:
-                    cycle_start = current_timestamp
-                    cycle_start_temp = current_temp
-                    cycle_max_temp = current_temp
-                    in_cycle = True
-                    logger.debug(f"Heating start at {current_timestamp}: {current_temp:.1f}°C "
-                               f"(daily min: {daily_min:.1f}°C, threshold: {heating_threshold:.1f}°C)")
-            else:
-                # Update cycle maximum
-                if cycle_max_temp is not None and current_temp > cycle_max_temp:
-                    cycle_max_temp = current_temp
-                    logger.debug(f"New cycle max at {current_timestamp}: {cycle_max_temp:.1f}°C")
-                
-                # Check for heating end: temp <= cycle_max - 1°C
-                if cycle_max_temp is not None:
-                    end_threshold = cycle_max_temp + TEMP_DROP_BELOW_MAX
-                    if current_temp <= end_threshold:
-                        if cycle_start:
-                            duration_minutes = (current_timestamp - cycle_start).total_seconds() / 60
-                            cycle_data = {
-                                'start': cycle_start,
-                                'end': current_timestamp,
-                                'max_temp': cycle_max_temp,
-                                'duration_minutes': duration_minutes
-                            }
-                            cycles.append(cycle_data)
-                            logger.debug(f"Heating end at {current_timestamp}: {current_temp:.1f}°C "
-                                       f"(cycle max: {cycle_max_temp:.1f}°C, threshold: {end_threshold:.1f}°C, "
-                                       f"duration: {duration_minutes:.1f}min)")
-                        
-                        in_cycle = False
-                        cycle_start = None
-                        cycle_max_temp = None
-                        cycle_start_temp = None
-        
-        # Handle case where data ends while in a cycle
-        if in_cycle and cycle_start:
-            duration_minutes = (df.iloc[-1]['timestamp'] - cycle_start).total_seconds() / 60
-            cycle_data = {
-                'start': cycle_start,
-                'end': df.iloc[-1]['timestamp'],
-                'max_temp': cycle_max_temp,
-                'duration_minutes': duration_minutes
-            }
-            cycles.append(cycle_data)
-            logger.debug(f"Heating cycle ended at data end: duration {duration_minutes:.1f}min")
-        
-        logger.info(f"Detected {len(cycles)} raw heating cycles")
-        return cycles
+    def zone_series(self) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        """Timestamps and temperatures of every configured zone device found in the database."""
+        series = {}
+        for device_name in ZONE_DEVICES.keys():
+            try:
+                series[device_name] = self._get_device_series(device_name)
+            except ValueError as e:
+                logger.warning(str(e))
+        return series
     
-    def _merge_cycles_with_gaps(self, raw_cycles: List[Dict]) -> List[Dict]:
-        """Merge cycles with gaps shorter than MIN_GAP_MINUTES."""
-        if not raw_cycles:
-            return []
-        
-        merged_cycles = []
-        current_cycle = raw_cycles[0].copy()
-        
-        for i in range(1, len(raw_cycles)):
-            next_cycle = raw_cycles[i]
-            gap_duration = (next_cycle['start'] - current_cycle['end']).total_seconds() / 60  # minutes
-            
-            if gap_duration <= MIN_GAP_MINUTES:
-                # Merge cycles - extend current cycle to include the next one
-                current_cycle['end'] = next_cycle['end']
-                current_cycle['max_temp'] = max(current_cycle['max_temp'], next_cycle['max_temp'])
-                current_cycle['duration_minutes'] = (current_cycle['end'] - current_cycle['start']).total_seconds() / 60
-                logger.debug(f"Merged cycles with {gap_duration:.1f}min gap, new duration: {current_cycle['duration_minutes']:.1f}min")
-            else:
-                # Gap is too large, finalize current cycle and start new one
-                merged_cycles.append(current_cycle)
-                current_cycle = next_cycle.copy()
-        
-        # Add the final cycle
-        merged_cycles.append(current_cycle)
-        
-        return merged_cycles
+    def gas_series(self) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """Gas meter reading times and values, or None if no gas meter data is loaded."""
+        gas = load_gas_series(self.json_db_path, self.database)
+        if gas is None:
+            return None
+        return gas['timestamp'], gas['value']
     
     def detect_heating_cycles(self, device_name: str) -> List[Dict[str, str]]:
         """
@@ -208,26 +122,28 @@ class HeatingDetector:
         """
         logger.info(f"Detecting heating cycles for {device_name}...")
         
-        df = self._get_device_data(device_name)
-        if df.empty:
-            return []
-        
-        # Step 1: Detect raw cycles
-        raw_cycles = self._detect_raw_cycles(df)
-        logger.info(f"Found {len(raw_cycles)} raw cycles for {device_name}")
-        
-        # Step 2: Merge cycles with short gaps
-        merged_cycles = self._merge_cycles_with_gaps(raw_cycles)
-        logger.info(f"After merging gaps <= {MIN_GAP_MINUTES}min: {len(merged_cycles)} cycles for {device_name}")
+        if self.out_of_core is not None:
+            starts, ends, max_temps = self.out_of_core.heating_cycles(
+                device_name, self.rise_above_min, self.drop_below_max, self.min_gap_minutes)
+        else:
+            times, temperatures = self._get_device_series(device_name)
+            if len(times) == 0:
+                return []
+            
+            # Detect raw cycles and merge cycles with short gaps
+            starts, ends, max_temps = detect_cycles(times, temperatures, self.rise_above_min,
+                                                    self.drop_below_max, self.min_gap_minutes)
+        logger.info(f"After merging gaps <= {self.min_gap_minutes}min: {len(starts)} cycles for {device_name}")
         
-        # Step 3: Convert to required format
+        # Convert to required format
+        durations = (ends - starts) / np.timedelta64(1, 's') / 60
         cycles = []
-        for cycle in merged_cycles:
+        for start, end, max_temp, duration in zip(starts, ends, max_temps, durations):
             cycles.append({
-                'start': cycle['start'].isoformat(),
-                'end': cycle['end'].isoformat(),
-                'maxtemp': f"{cycle['max_temp']:.1f}",
-                'durationMinutes': f"{cycle['duration_minutes']:.0f}"
+                'start': str(start),
+                'end': str(end),
+                'maxtemp': f"{max_temp:.1f}",
+                'durationMinutes': f"{duration:.0f}"
             })
         
         return cycles
@@ -264,8 +180,9 @@ class HeatingDetector:
         logger.info(f"Saved heating cycles to: {output_path}")
         return str(output_path)
     
-    def _get_full_date_range(self, cycles: List[Dict[str, str]]) -> pd.DatetimeIndex:
+    def _get_full_date_range(self, cycles: List[Dict[str, str]]) -> 'pd.DatetimeIndex':
         """Get complete date range from first to last cycle date."""
+        import pandas as pd
         if not cycles:
             return pd.DatetimeIndex([])
         
@@ -277,6 +194,7 @@ class HeatingDetector:
     
     def _calculate_cycles_per_day(self, cycles: List[Dict[str, str]]) -> Dict[str, int]:
         """Calculate number of cycles per day."""
+        import pandas as pd
         cycles_per_day = {}
         
         for cycle in cycles:
@@ -287,8 +205,9 @@ class HeatingDetector:
         
         return cycles_per_day
     
-    def _calculate_cycles_per_day_complete(self, cycles: List[Dict[str, str]]) -> pd.DataFrame:
+    def _calculate_cycles_per_day_complete(self, cycles: List[Dict[str, str]]) -> 'pd.DataFrame':
         """Calculate number of cycles per day with complete date range (including zeros)."""
+        import pandas as pd
         if not cycles:
             return pd.DataFrame(columns=['date', 'cycles'])
         
@@ -312,6 +231,7 @@ class HeatingDetector:
     
     def _calculate_duration_per_day(self, cycles: List[Dict[str, str]]) -> Dict[str, float]:
         """Calculate total heating duration per day in hours."""
+        import pandas as pd
         duration_per_day = {}
         
         for cycle in cycles:
@@ -324,8 +244,9 @@ class HeatingDetector:
         
         return duration_per_day
         
-    def _calculate_duration_per_day_complete(self, cycles: List[Dict[str, str]]) -> pd.DataFrame:
+    def _calculate_duration_per_day_complete(self, cycles: List[Dict[str, str]]) -> 'pd.DataFrame':
         """Calculate total heating duration per day with complete date range (including zeros)."""
+        import pandas as pd
         if not cycles:
             return pd.DataFrame(columns=['date', 'duration'])
         
@@ -349,36 +270,21 @@ class HeatingDetector:
     
     def create_daily_cycle_chart(self, device_name: str, cycles: List[Dict[str, str]]) -> str:
         """Create a chart showing cycles per day for a device."""
+        from figure_templates import PointChartTemplate
         df_plot = self._calculate_cycles_per_day_complete(cycles)
         
         if df_plot.empty:
             logger.warning(f"No cycles to plot for {device_name}")
             return ""
         
-        # Create the plot
-        plt.figure(figsize=(14, 6))
-        plt.plot(df_plot['date'], df_plot['cycles'], 'b.', markersize=5)
-        
-        plt.title(f'Heating Cycles Per Day - {device_name} ({ZONE_DEVICES.get(device_name, "Unknown Zone")})')
-        plt.xlabel('Date')
-        plt.ylabel('Number of Cycles')
-        plt.grid(True, alpha=0.3)
-        
-        # Format x-axis
-        plt.xticks(rotation=45)
-        plt.gca().xaxis.set_major_locator(mdates.WeekdayLocator(interval=7))  # Weekly ticks
-        plt.gca().xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m-%d'))
-        
-        # Set y-axis to start from 0
-        plt.ylim(bottom=0)
-        
-        plt.tight_layout()
-        
-        # Save the plot
+        # Create the plot (weekly date ticks, y-axis starting from 0)
         zone_id = device_name.split('_')[-1]  # Extract Z1 or Z2
         save_path = self.output_dir / f"heating_cycle_per_day_{zone_id}.png"
-        plt.savefig(save_path, dpi=300, bbox_inches='tight')
-        plt.close()
+        template = self.templates.get('cycles_per_day', lambda: PointChartTemplate(
+            (14, 6), 'b.', 'Date', 'Number of Cycles', date_axis=True))
+        template.render(df_plot['date'], df_plot['cycles'],
+                        f'Heating Cycles Per Day - {device_name} ({ZONE_DEVICES.get(device_name, "Unknown Zone")})',
+                        save_path)
         
         # Save CSV data
         csv_path = self.output_dir / f"heating_cycle_per_day_{zone_id}.csv"
@@ -390,36 +296,21 @@ class HeatingDetector:
     
     def create_daily_duration_chart(self, device_name: str, cycles: List[Dict[str, str]]) -> str:
         """Create a chart showing heating duration per day for a device."""
+        from figure_templates import PointChartTemplate
         df_plot = self._calculate_duration_per_day_complete(cycles)
         
         if df_plot.empty:
             logger.warning(f"No duration data to plot for {device_name}")
             return ""
         
-        # Create the plot
-        plt.figure(figsize=(14, 6))
-        plt.plot(df_plot['date'], df_plot['duration'], 'r.', markersize=5)
-        
-        plt.title(f'Heating Duration Per Day - {device_name} ({ZONE_DEVICES.get(device_name, "Unknown Zone")})')
-        plt.xlabel('Date')
-        plt.ylabel('Heating Duration (hours)')
-        plt.grid(True, alpha=0.3)
-        
-        # Format x-axis
-        plt.xticks(rotation=45)
-        plt.gca().xaxis.set_major_locator(mdates.WeekdayLocator(interval=7))  # Weekly ticks
-        plt.gca().xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m-%d'))
-        
-        # Set y-axis to start from 0
-        plt.ylim(bottom=0)
-        
-        plt.tight_layout()
-        
-        # Save the plot
+        # Create the plot (weekly date ticks, y-axis starting from 0)
         zone_id = device_name.split('_')[-1]  # Extract Z1 or Z2
         save_path = self.output_dir / f"heating_duration_per_day_{zone_id}.png"
-        plt.savefig(save_path, dpi=300, bbox_inches='tight')
-        plt.close()
+        template = self.templates.get('duration_per_day', lambda: PointChartTemplate(
+            (14, 6), 'r.', 'Date', 'Heating Duration (hours)', date_axis=True))
+        template.render(df_plot['date'], df_plot['duration'],
+                        f'Heating Duration Per Day - {device_name} ({ZONE_DEVICES.get(device_name, "Unknown Zone")})',
+                        save_path)
         
         # Save CSV data
         csv_path = self.output_dir / f"heating_duration_per_day_{zone_id}.csv"
@@ -434,9 +325,9 @@ class HeatingDetector:
         report_lines = []
         report_lines.append("HEATING DETECTION ANALYSIS SUMMARY")
         report_lines.append("=" * 50)
-        report_lines.append(f"Heating start: temperature >= daily_min + {TEMP_RISE_ABOVE_MIN}°C")
-        report_lines.append(f"Heating end: temperature <= cycle_max {TEMP_DROP_BELOW_MAX}°C")
-        report_lines.append(f"Gap merging threshold: <= {MIN_GAP_MINUTES} minutes")
+        report_lines.append(f"Heating start: temperature >= daily_min + {self.rise_above_min}°C")
+        report_lines.append(f"Heating end: temperature <= cycle_max {self.drop_below_max}°C")
+        report_lines.append(f"Gap merging threshold: <= {self.min_gap_minutes} minutes")
         report_lines.append("")
         
         for device_name, cycles in cycles_data.items():
@@ -483,16 +374,106 @@ class HeatingDetector:
         return str(report_path)
 
 
+def _parse_values(text: str) -> List[float]:
+    """Parse a comma separated list of numbers or a start:stop:step range (stop included)."""
+    if ':' in text:
+        start, stop, step = (float(part) for part in text.split(':'))
+        return [float(v) for v in np.round(np.arange(start, stop + step / 2, step), 6)]
+    return [float(part) for part in text.split(',') if part.strip()]
+
+
+def _load_reference_cycles(path: Path) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+    """Load labelled cycles in the heating_cycles.json format (zone -> list of start/end)."""
+    with open(path, 'r', encoding='utf-8') as f:
+        labels = json.load(f)
+    
+    references = {}
+    for zone, cycles in labels.items():
+        cycles = sorted(cycles, key=lambda c: c['start'])
+        references[zone] = (np.array([c['start'] for c in cycles], dtype='datetime64[s]'),
+                            np.array([c['end'] for c in cycles], dtype='datetime64[s]'))
+    return references
+
+
+def run_parameter_sweep(detector: HeatingDetector, args) -> str:
+    """Evaluate a grid of detection thresholds and save the results as CSV."""
+    grid = parameter_grid(_parse_values(args.rise), _parse_values(args.drop), _parse_values(args.gap))
+    series = detector.zone_series()
+    gas = detector.gas_series()
+    references = _load_reference_cycles(Path(args.reference)) if args.reference else None
+    
+    print(f"Parameter sweep: {len(grid)} combinations over {', '.join(series)}")
+    if gas is None:
+        print("⚠ No gas meter data in database, gas agreement not computed")
+    
+    started = time.perf_counter()
+    results = sweep_parameters(series, grid, gas=gas, references=references, max_workers=args.workers)
+    print(f"✓ Evaluated {len(results)} combinations in {time.perf_counter() - started:.1f}s")
+    
+    # Rank by agreement with the reference labels, otherwise with the gas consumption
+    score = 'reference_f1' if references else ('gas_correlation' if gas is not None else None)
+    if score:
+        def rank(row):
+            value = row.get(score)
+            return -value if value is not None and not np.isnan(value) else float('inf')
+        results.sort(key=rank)
+    
+    output_path = detector.output_dir / "heating_parameter_sweep.csv"
+    with open(output_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=list(results[0].keys()) if results else [])
+        writer.writeheader()
+        writer.writerows(results)
+    
+    print()
+    print(f"{'rise':>6} {'drop':>6} {'gap':>6} " + " ".join(f"{zone + ' cycles':>14}" for zone in series)
+          + (f" {score:>16}" if score else ""))
+    for row in results[:args.top]:
+        line = f"{row['rise_above_min']:>6.2f} {row['drop_below_max']:>6.2f} {row['min_gap_minutes']:>6.0f} "
+        line += " ".join(f"{row[zone + '_cycles']:>14}" for zone in series)
+        if score:
+            line += f" {row.get(score, float('nan')):>16.3f}"
+        print(line)
+    
+    print(f"\n✓ Saved sweep results: {output_path}")
+    return str(output_path)
+
+
 def main():
     """Main function to run heating detection analysis."""
+    parser = argparse.ArgumentParser(description='Detect heating cycles from temperature data')
+    parser.add_argument('--db', default="data/temperature_database.json",
+                        help='JSON database or sensor store directory')
+    parser.add_argument('--output-dir', default="output", help='Output directory')
+    parser.add_argument('--rise', default=str(TEMP_RISE_ABOVE_MIN),
+                        help='Rise above daily minimum (°C); list "3,4,5" or range "3:7:0.5" with --sweep')
+    parser.add_argument('--drop', default=str(TEMP_DROP_BELOW_MAX),
+                        help='Drop below cycle maximum (°C, negative); list or range with --sweep')
+    parser.add_argument('--gap', default=str(MIN_GAP_MINUTES),
+                        help='Gap merging threshold (minutes); list or range with --sweep')
+    parser.add_argument('--sweep', action='store_true',
+                        help='Evaluate all threshold combinations instead of a single detection run')
+    parser.add_argument('--reference', help='Labelled cycles (heating_cycles.json format) to score the sweep against')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes for the sweep')
+    parser.add_argument('--top', type=int, default=10, help='Number of sweep results to print')
+    parser.add_argument('--memory-budget', type=float, metavar='MB',
+                        help='Detect out-of-core on a sensor store using at most this much memory')
+    args = parser.parse_args()
+    
     try:
-        detector = HeatingDetector()
+        if args.sweep:
+            detector = HeatingDetector(args.db, args.output_dir)
+            run_parameter_sweep(detector, args)
+            return
+        
+        detector = HeatingDetector(args.db, args.output_dir, rise_above_min=float(args.rise),
+                                   drop_below_max=float(args.drop), min_gap_minutes=float(args.gap),
+                                   memory_budget_mb=args.memory_budget)
         
         print("Heating Detection Analysis")
         print("=" * 40)
-        print(f"Heating start: temp >= daily_min + {TEMP_RISE_ABOVE_MIN}°C")
-        print(f"Heating end: temp <= cycle_max {TEMP_DROP_BELOW_MAX}°C") 
-        print(f"Gap merging: <= {MIN_GAP_MINUTES} minutes")
+        print(f"Heating start: temp >= daily_min + {detector.rise_above_min}°C")
+        print(f"Heating end: temp <= cycle_max {detector.drop_below_max}°C") 
+        print(f"Gap merging: <= {detector.min_gap_minutes} minutes")
         print(f"Zones: {', '.join(f'{k} ({v})' for k, v in ZONE_DEVICES.items())}")
         print()
         
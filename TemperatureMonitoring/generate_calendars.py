@@ -6,16 +6,21 @@ Creates calendar heatmap visualizations for temperature data and heating activit
 Each row represents a day, each column represents a 5-minute interval within the day.
 """
 
+import argparse
 import json
 import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib.colors as mcolors
-from matplotlib.patches import Rectangle
 from datetime import datetime, timedelta
 from pathlib import Path
-import pandas as pd
 from typing import Dict, List, Tuple, Optional
 import logging
+import sys
+
+# Add src directory to path for imports
+sys.path.append(str(Path(__file__).parent / "src"))
+
+from sensor_store import load_database
+from out_of_core import CalendarAccumulator, OutOfCoreRunner
+from timeseries import records_to_arrays
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -38,35 +43,53 @@ class CalendarImageGenerator:
     def __init__(self, 
                  temperature_db_path: str = "data/temperature_database.json",
                  heating_cycles_path: str = "output/heating_cycles.json",
-                 output_dir: str = "output"):
+                 output_dir: str = "output",
+                 memory_budget_mb: Optional[float] = None):
         self.temperature_db_path = Path(temperature_db_path)
         self.heating_cycles_path = Path(heating_cycles_path)
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(exist_ok=True)
         
-        self.temperature_db = self._load_json(self.temperature_db_path)
+        self.temperature_db = self._load_json(self.temperature_db_path, load=load_database)
         self.heating_cycles = self._load_json(self.heating_cycles_path)
+        from figure_templates import FigureTemplateCache  # matplotlib, only loaded to draw
+        self.templates = FigureTemplateCache()
         
-    def _load_json(self, path: Path) -> Dict:
-        """Load JSON file."""
+        # Calendar matrices per device; in out-of-core mode they are streamed from the memory-mapped store
+        self.out_of_core = None
+        self._calendars = {}
+        if memory_budget_mb:
+            self.out_of_core = OutOfCoreRunner(str(self.temperature_db_path), memory_budget_mb)
+        
+    def _load_json(self, path: Path, load=None) -> Dict:
+        """Load JSON file (or, with a custom loader, a sensor store)."""
         if not path.exists():
             raise FileNotFoundError(f"File not found: {path}")
         
+        if load is not None:
+            return load(path)
+        
         with open(path, 'r', encoding='utf-8') as f:
             return json.load(f)
     
+    def _calendar(self, device_name: str):
+        """Calendar accumulator of a device (streamed from the store in out-of-core mode)."""
+        if device_name not in self._calendars:
+            if self.out_of_core is not None:
+                calendar = self.out_of_core.calendar(device_name, SAMPLE_INTERVAL_MINUTES)
+            else:
+                records = self.temperature_db.get('devices', {}).get(device_name, {}).get('records', [])
+                calendar = CalendarAccumulator(SAMPLE_INTERVAL_MINUTES)
+                calendar.update(*records_to_arrays(records))
+            self._calendars[device_name] = calendar
+        return self._calendars[device_name]
+    
     def _get_date_range(self, device_name: str) -> Tuple[datetime, datetime]:
         """Get the full date range for a device."""
-        records = self.temperature_db.get('devices', {}).get(device_name, {}).get('records', [])
-        
-        if not records:
+        start_date, end_date = self._calendar(device_name).date_range
+        if start_date is None:
             raise ValueError(f"No records found for device {device_name}")
-        
-        timestamps = [pd.to_datetime(r['timestamp']) for r in records]
-        min_date = min(timestamps).date()
-        max_date = max(timestamps).date()
-        
-        return min_date, max_date
+        return start_date, end_date
     
     def _create_empty_calendar_matrix(self, start_date: datetime.date, end_date: datetime.date) -> np.ndarray:
         """Create an empty calendar matrix filled with NaN."""
@@ -85,23 +108,25 @@ class CalendarImageGenerator:
         
         return day_index, sample_index
     
+    def _temperature_matrix(self, device_name: str, start_date: datetime.date, end_date: datetime.date) -> np.ndarray:
+        """Calendar matrix of a device's temperatures for the given date range."""
+        matrix = self._create_empty_calendar_matrix(start_date, end_date)
+        
+        calendar = self._calendar(device_name)
+        first_date, _ = calendar.date_range
+        if first_date is not None:
+            offset = (first_date - start_date).days
+            rows = slice(max(offset, 0), min(offset + calendar.matrix.shape[0], matrix.shape[0]))
+            matrix[rows] = calendar.matrix[rows.start - offset:rows.stop - offset]
+        return matrix
+    
     def generate_temperature_calendar(self, device_name: str) -> str:
         """Generate calendar heatmap for temperature data."""
         logger.info(f"Generating temperature calendar for {device_name}...")
         
-        # Get date range and create matrix
+        # Get date range and fill the matrix with temperature data
         start_date, end_date = self._get_date_range(device_name)
-        matrix = self._create_empty_calendar_matrix(start_date, end_date)
-        
-        # Fill matrix with temperature data
-        records = self.temperature_db['devices'][device_name]['records']
-        for record in records:
-            timestamp = pd.to_datetime(record['timestamp'])
-            temperature = record['temperature']
-            
-            day_idx, sample_idx = self._get_day_and_sample_index(timestamp, start_date)
-            if 0 <= day_idx < matrix.shape[0] and 0 <= sample_idx < matrix.shape[1]:
-                matrix[day_idx, sample_idx] = temperature
+        matrix = self._temperature_matrix(device_name, start_date, end_date)
         
         # Create the heatmap
         zone_id = device_name.split('_')[-1]  # Extract Z1 or Z2
@@ -123,6 +148,7 @@ class CalendarImageGenerator:
     
     def generate_heating_calendar(self, device_name: str) -> str:
         """Generate calendar heatmap for heating activity (binary)."""
+        import pandas as pd
         logger.info(f"Generating heating calendar for {device_name}...")
         
         # Get date range and create matrix (filled with 0 = no heating)
@@ -178,29 +204,9 @@ class CalendarImageGenerator:
         start_date = min(start_date1, start_date2)
         end_date = max(end_date1, end_date2)
         
-        # Create matrices for both devices
-        matrix1 = self._create_empty_calendar_matrix(start_date, end_date)
-        matrix2 = self._create_empty_calendar_matrix(start_date, end_date)
-        
-        # Fill matrix1 with T3_Kek data
-        records1 = self.temperature_db['devices'][device1_name]['records']
-        for record in records1:
-            timestamp = pd.to_datetime(record['timestamp'])
-            temperature = record['temperature']
-            
-            day_idx, sample_idx = self._get_day_and_sample_index(timestamp, start_date)
-            if 0 <= day_idx < matrix1.shape[0] and 0 <= sample_idx < matrix1.shape[1]:
-                matrix1[day_idx, sample_idx] = temperature
-        
-        # Fill matrix2 with T2_Terasz data
-        records2 = self.temperature_db['devices'][device2_name]['records']
-        for record in records2:
-            timestamp = pd.to_datetime(record['timestamp'])
-            temperature = record['temperature']
-            
-            day_idx, sample_idx = self._get_day_and_sample_index(timestamp, start_date)
-            if 0 <= day_idx < matrix2.shape[0] and 0 <= sample_idx < matrix2.shape[1]:
-                matrix2[day_idx, sample_idx] = temperature
+        # Create matrices for both devices (T3_Kek, T2_Terasz)
+        matrix1 = self._temperature_matrix(device1_name, start_date, end_date)
+        matrix2 = self._temperature_matrix(device2_name, start_date, end_date)
         
         # Calculate difference: T3_Kek - T2_Terasz
         # Only calculate where both values are present
@@ -231,19 +237,9 @@ class CalendarImageGenerator:
         
         device_name = OUTSIDE_DEVICE
         
-        # Get date range and create matrix
+        # Get date range and fill the matrix with temperature data
         start_date, end_date = self._get_date_range(device_name)
-        matrix = self._create_empty_calendar_matrix(start_date, end_date)
-        
-        # Fill matrix with temperature data
-        records = self.temperature_db['devices'][device_name]['records']
-        for record in records:
-            timestamp = pd.to_datetime(record['timestamp'])
-            temperature = record['temperature']
-            
-            day_idx, sample_idx = self._get_day_and_sample_index(timestamp, start_date)
-            if 0 <= day_idx < matrix.shape[0] and 0 <= sample_idx < matrix.shape[1]:
-                matrix[day_idx, sample_idx] = temperature
+        matrix = self._temperature_matrix(device_name, start_date, end_date)
         
         # Create the heatmap
         output_path = self.output_dir / "Temp_Outside.png"
@@ -261,7 +257,6 @@ class CalendarImageGenerator:
         
         logger.info(f"Saved outside temperature calendar: {output_path}")
         return str(output_path)
-        return str(output_path)
     
     def _create_heatmap(self,
                        matrix: np.ndarray,
@@ -273,92 +268,18 @@ class CalendarImageGenerator:
                        output_path: Path,
                        value_label: str,
                        is_binary: bool = False):
-        """Create and save a calendar heatmap image."""
+        """
+        Create and save a calendar heatmap image.
         
+        Figures are reused per calendar type and size (see figure_templates.py);
+        only the matrix, the date labels and the title change between images.
+        """
+        from figure_templates import CalendarTemplate
         num_days, num_samples = matrix.shape
-        
-        # Create figure with appropriate size
-        fig_width = 14
-        fig_height = max(8, num_days * 0.1)  # Scale height with number of days
-        fig, ax = plt.subplots(figsize=(fig_width, fig_height))
-        
-        # Create custom colormap with missing value color
-        if colormap == 'heating':
-            # Custom colormap: white for 0 (no heating), red for 1 (heating active)
-            colors = ['white', 'red']
-            cmap = mcolors.ListedColormap(colors)
-        else:
-            cmap = plt.get_cmap(colormap)
-            if is_binary:
-                # For other binary data, use discrete colors
-                cmap = plt.get_cmap(colormap, 2)
-        
-        # Set color for missing values (NaN)
-        cmap.set_bad(color=missing_color)
-        
-        # Create the heatmap
-        if is_binary:
-            im = ax.imshow(matrix, aspect='auto', cmap=cmap, 
-                          interpolation='nearest', vmin=0, vmax=1)
-        else:
-            im = ax.imshow(matrix, aspect='auto', cmap=cmap, 
-                          interpolation='nearest')
-        
-        # Set up x-axis (time of day)
-        # Show labels every 4 hours (48 samples = 4 hours)
-        num_time_labels = 7  # 00:00, 04:00, 08:00, 12:00, 16:00, 20:00, 24:00
-        time_tick_indices = np.linspace(0, num_samples - 1, num_time_labels, dtype=int)
-        time_labels = [f"{(i * SAMPLE_INTERVAL_MINUTES) // 60:02d}:00" 
-                      for i in time_tick_indices]
-        ax.set_xticks(time_tick_indices)
-        ax.set_xticklabels(time_labels)
-        ax.set_xlabel('Time of Day')
-        
-        # Set up y-axis (dates)
-        # Show date labels for reasonable intervals
-        if num_days <= 31:
-            # Show all days for one month or less
-            date_tick_interval = 1
-        elif num_days <= 90:
-            # Show every 3 days for up to 3 months
-            date_tick_interval = 3
-        elif num_days <= 180:
-            # Show weekly for up to 6 months
-            date_tick_interval = 7
-        else:
-            # Show every 2 weeks for longer periods
-            date_tick_interval = 14
-        
-        date_tick_indices = list(range(0, num_days, date_tick_interval))
-        if date_tick_indices[-1] != num_days - 1:
-            date_tick_indices.append(num_days - 1)
-        
-        date_labels = [(start_date + timedelta(days=i)).strftime('%Y-%m-%d') 
-                      for i in date_tick_indices]
-        ax.set_yticks(date_tick_indices)
-        ax.set_yticklabels(date_labels)
-        ax.set_ylabel('Date')
-        
-        # Invert y-axis so earliest date is at top
-        ax.invert_yaxis()
-        
-        # Add colorbar
-        if is_binary:
-            cbar = plt.colorbar(im, ax=ax, ticks=[0, 1])
-            cbar.ax.set_yticklabels(['Off', 'On'])
-        else:
-            cbar = plt.colorbar(im, ax=ax)
-        cbar.set_label(value_label)
-        
-        # Set title
-        ax.set_title(title, fontsize=14, pad=20)
-        
-        # Tight layout
-        plt.tight_layout()
-        
-        # Save the figure
-        plt.savefig(output_path, dpi=300, bbox_inches='tight')
-        plt.close(fig)
+        key = ('calendar', num_days, num_samples, colormap, missing_color, value_label, is_binary)
+        template = self.templates.get(key, lambda: CalendarTemplate(
+            num_days, num_samples, SAMPLE_INTERVAL_MINUTES, colormap, missing_color, value_label, is_binary))
+        template.render(matrix, start_date, title, output_path)
     
     def generate_all_calendars(self):
         """Generate all calendar images for all zones."""
@@ -414,8 +335,15 @@ class CalendarImageGenerator:
 
 def main():
     """Main function to generate all calendar images."""
+    parser = argparse.ArgumentParser(description='Generate calendar images')
+    parser.add_argument('--db', default="data/temperature_database.json",
+                        help='JSON database or sensor store directory')
+    parser.add_argument('--memory-budget', type=float, metavar='MB',
+                        help='Stream the devices out-of-core from a sensor store using at most this much memory')
+    args = parser.parse_args()
+    
     try:
-        generator = CalendarImageGenerator()
+        generator = CalendarImageGenerator(args.db, memory_budget_mb=args.memory_budget)
         generator.generate_all_calendars()
         
     except FileNotFoundError as e:
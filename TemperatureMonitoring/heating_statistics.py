@@ -8,13 +8,17 @@ Generates plots and statistics for heating cycle patterns.
 
 import json
 import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Tuple
 import logging
+import sys
+
+# Add src directory to path for imports
+sys.path.append(str(Path(__file__).parent / "src"))
+
+from gasmeter import load_gas_series
+# pandas and matplotlib are imported by the methods that use them (fast `tempmon` start-up)
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -40,6 +44,9 @@ class HeatingStatisticsAnalyzer:
         
         self.temperature_db = self._load_json(self.temperature_db_path)
         self.heating_cycles = self._load_json(self.heating_cycles_path)
+        self.gas = load_gas_series(self.temperature_db_path, self.temperature_db)
+        from figure_templates import FigureTemplateCache
+        self.templates = FigureTemplateCache()
         
     def _load_json(self, path: Path) -> Dict:
         """Load JSON file with error handling."""
@@ -55,8 +62,9 @@ class HeatingStatisticsAnalyzer:
         with open(path, 'r', encoding='utf-8') as f:
             return json.load(f)
     
-    def _get_device_data_by_day(self, device_name: str) -> pd.DataFrame:
+    def _get_device_data_by_day(self, device_name: str) -> 'pd.DataFrame':
         """Get device temperature data grouped by day."""
+        import pandas as pd
         if device_name not in self.temperature_db.get('devices', {}):
             raise ValueError(f"Device '{device_name}' not found in database")
         
@@ -78,8 +86,9 @@ class HeatingStatisticsAnalyzer:
         
         return df
     
-    def _calculate_daily_mean_temp_difference(self) -> pd.DataFrame:
+    def _calculate_daily_mean_temp_difference(self) -> 'pd.DataFrame':
         """Calculate daily mean temperature difference: mean(T3_Kek - T2_Terasz)."""
+        import pandas as pd
         logger.info(f"Calculating daily mean temperature difference: {INTERNAL_TEMP_DEVICE} - {EXTERNAL_TEMP_DEVICE}")
         
         # Get data for both devices
@@ -120,8 +129,9 @@ class HeatingStatisticsAnalyzer:
         logger.info(f"Calculated temperature differences for {len(daily_stats)} days")
         return daily_stats
     
-    def _calculate_daily_heating_cycle_count(self) -> pd.DataFrame:
+    def _calculate_daily_heating_cycle_count(self) -> 'pd.DataFrame':
         """Calculate number of heating cycles per day from heating_cycles.json."""
+        import pandas as pd
         logger.info(f"Calculating daily heating cycle count for {HEATING_ZONE_DEVICE}")
         
         cycles = self.heating_cycles.get(HEATING_ZONE_DEVICE, [])
@@ -147,8 +157,9 @@ class HeatingStatisticsAnalyzer:
         logger.info(f"Calculated cycle counts for {len(df)} days")
         return df
     
-    def _merge_daily_data(self) -> pd.DataFrame:
+    def _merge_daily_data(self) -> 'pd.DataFrame':
         """Merge temperature difference and heating cycle count data."""
+        import pandas as pd
         df_temp_diff = self._calculate_daily_mean_temp_difference()
         df_cycles = self._calculate_daily_heating_cycle_count()
         
@@ -176,6 +187,8 @@ class HeatingStatisticsAnalyzer:
     
     def generate_dual_axis_plot(self) -> Tuple[str, str]:
         """Generate dual-axis plot: temperature difference and heating cycle count over time."""
+        import matplotlib.pyplot as plt
+        import matplotlib.dates as mdates
         logger.info("Generating dual-axis plot...")
         
         df = self._merge_daily_data()
@@ -240,6 +253,7 @@ class HeatingStatisticsAnalyzer:
     
     def generate_xy_plot(self) -> Tuple[str, str]:
         """Generate X-Y scatter plot: temperature difference vs heating cycle count."""
+        from figure_templates import PointChartTemplate
         logger.info("Generating X-Y scatter plot...")
         
         df = self._merge_daily_data()
@@ -247,23 +261,12 @@ class HeatingStatisticsAnalyzer:
             logger.error("No data available for plotting")
             return "", ""
         
-        # Create figure
-        fig, ax = plt.subplots(figsize=(10, 8))
-        
-        # Plot scatter
-        ax.plot(df['mean_temp_diff'], df['cycle_count'], '.', markersize=8, color='tab:purple')
-        
-        ax.set_xlabel(f'Mean Temperature Difference (°C)\n({INTERNAL_TEMP_DEVICE} - {EXTERNAL_TEMP_DEVICE})')
-        ax.set_ylabel(f'Number of Heating Cycles\n({HEATING_ZONE_DEVICE})')
-        ax.set_title('Heating Cycles vs Temperature Difference')
-        ax.grid(True, alpha=0.3)
-        
-        plt.tight_layout()
-        
-        # Save plot
+        # Create and save the scatter plot
         plot_path = self.output_dir / "MeanDiff_And_HeatingCycleCount_XY.png"
-        plt.savefig(plot_path, dpi=300, bbox_inches='tight')
-        plt.close(fig)
+        template = self.templates.get('xy', lambda: PointChartTemplate(
+            (10, 8), '.', f'Mean Temperature Difference (°C)\n({INTERNAL_TEMP_DEVICE} - {EXTERNAL_TEMP_DEVICE})',
+            f'Number of Heating Cycles\n({HEATING_ZONE_DEVICE})', markersize=8, color='tab:purple', zero_origin=()))
+        template.render(df['mean_temp_diff'], df['cycle_count'], 'Heating Cycles vs Temperature Difference', plot_path)
         logger.info(f"Saved X-Y plot: {plot_path}")
         
         # Save CSV (same data as dual-axis plot)
@@ -273,22 +276,39 @@ class HeatingStatisticsAnalyzer:
         
         return str(plot_path), str(csv_path)
     
+    def _gas_intervals(self, cycles: List[Dict]) -> 'pd.DataFrame':
+        """
+        Gas consumption and heating cycle count of every interval between two gas meter readings.
+        
+        Intervals with a negative consumption (meter reset) are left out. A cycle
+        is counted in the interval its start falls into.
+        """
+        import pandas as pd
+        times = self.gas['timestamp']
+        cycle_starts = np.sort(pd.to_datetime([c['start'] for c in cycles]).values.astype('datetime64[s]'))
+        cycles_before = np.searchsorted(cycle_starts, times, side='left')
+        
+        consumption = self.gas['consumption'][1:]
+        valid = ~np.isnan(consumption) & (consumption >= 0)
+        return pd.DataFrame({
+            'timestamp': times[1:][valid],
+            'gas_consumption': consumption[valid],
+            'cycle_count': np.diff(cycles_before)[valid],
+            'days_between': self.gas['interval_hours'][1:][valid] / 24
+        })
+    
     def generate_gas_vs_cycle_count_plot(self) -> Tuple[str, str]:
         """Generate scatter plot: gas consumption vs heating cycle count."""
+        from figure_templates import PointChartTemplate
         logger.info("Generating gas consumption vs heating cycle count plot...")
         
         # Check if gas meter data is available
-        if 'gasmeter' not in self.temperature_db:
+        if self.gas is None:
             logger.error("Gas meter data not found in database")
             logger.error("Please run 'loadGasmeterValuesIntoDatabase.py' first to load gas meter data.")
             return "", ""
         
-        gasmeter_records = self.temperature_db['gasmeter'].get('records', [])
-        if not gasmeter_records:
-            logger.error("No gas meter records found in database")
-            return "", ""
-        
-        logger.info(f"Found {len(gasmeter_records)} gas meter records")
+        logger.info(f"Found {len(self.gas['timestamp'])} gas meter records")
         
         # Get heating cycles for the zone
         cycles = self.heating_cycles.get(HEATING_ZONE_DEVICE, [])
@@ -296,74 +316,24 @@ class HeatingStatisticsAnalyzer:
             logger.warning(f"No heating cycles found for {HEATING_ZONE_DEVICE}")
             return "", ""
         
-        # Convert gas meter records to DataFrame
-        df_gas = pd.DataFrame(gasmeter_records)
-        df_gas['timestamp'] = pd.to_datetime(df_gas['timestamp'])
-        df_gas = df_gas.sort_values('timestamp').reset_index(drop=True)
-        
-        # Calculate gas consumption (difference from previous reading)
-        df_gas['gas_consumption'] = df_gas['value'].diff()
-        
-        # Calculate time since last measurement
-        df_gas['time_since_last'] = df_gas['timestamp'].diff()
-        
         # For each gas meter measurement, count heating cycles since last measurement
-        data_points = []
-        
-        for i in range(1, len(df_gas)):  # Start from 1 since we need previous measurement
-            current_time = df_gas.iloc[i]['timestamp']
-            previous_time = df_gas.iloc[i-1]['timestamp']
-            gas_consumption = df_gas.iloc[i]['gas_consumption']
-            
-            # Skip if gas consumption is negative or NaN (could be meter reset)
-            if pd.isna(gas_consumption) or gas_consumption < 0:
-                logger.debug(f"Skipping invalid gas consumption at {current_time}")
-                continue
-            
-            # Count heating cycles between previous and current gas meter reading
-            cycle_count = 0
-            for cycle in cycles:
-                cycle_start = pd.to_datetime(cycle['start'])
-                # Count cycle if it started in this time period
-                if previous_time <= cycle_start < current_time:
-                    cycle_count += 1
-            
-            data_points.append({
-                'timestamp': current_time,
-                'gas_consumption': gas_consumption,
-                'cycle_count': cycle_count,
-                'days_between': (current_time - previous_time).total_seconds() / (24 * 3600)
-            })
+        data_points = self._gas_intervals(cycles)
         
-        if not data_points:
+        if data_points.empty:
             logger.error("No valid data points for gas vs cycle count plot")
             return "", ""
         
-        df_plot = pd.DataFrame(data_points)
+        df_plot = data_points
         logger.info(f"Generated {len(df_plot)} data points for gas vs cycle count analysis")
         
-        # Create the scatter plot
-        fig, ax = plt.subplots(figsize=(10, 8))
-        
-        # Plot scatter
-        ax.plot(df_plot['gas_consumption'], df_plot['cycle_count'], '.', 
-                markersize=8, color='tab:green', alpha=0.7)
-        
-        ax.set_xlabel('Gas Consumption (m³)\n(Change since last measurement)')
-        ax.set_ylabel(f'Number of Heating Cycles\n({HEATING_ZONE_DEVICE})\n(Since last gas meter reading)')
-        ax.set_title('Gas Consumption vs Heating Cycle Count')
-        ax.grid(True, alpha=0.3)
-        
-        # Set axes to start from 0
-        ax.set_xlim(left=0)
-        ax.set_ylim(bottom=0)
-        
-        plt.tight_layout()
-        
-        # Save plot
+        # Create and save the scatter plot (axes starting from 0)
         plot_path = self.output_dir / "GasVsCycleCount.png"
-        plt.savefig(plot_path, dpi=300, bbox_inches='tight')
-        plt.close(fig)
+        template = self.templates.get('gas_vs_cycles', lambda: PointChartTemplate(
+            (10, 8), '.', 'Gas Consumption (m³)\n(Change since last measurement)',
+            f'Number of Heating Cycles\n({HEATING_ZONE_DEVICE})\n(Since last gas meter reading)',
+            markersize=8, color='tab:green', alpha=0.7, zero_origin=('x', 'y')))
+        template.render(df_plot['gas_consumption'], df_plot['cycle_count'],
+                        'Gas Consumption vs Heating Cycle Count', plot_path)
         logger.info(f"Saved gas vs cycle count plot: {plot_path}")
         
         # Save CSV
@@ -375,6 +345,7 @@ class HeatingStatisticsAnalyzer:
     
     def generate_summary_statistics(self) -> str:
         """Generate summary statistics report."""
+        import pandas as pd
         logger.info("Generating summary statistics...")
         
         df = self._merge_daily_data()
@@ -448,15 +419,11 @@ class HeatingStatisticsAnalyzer:
         report_lines.append("")
         
         # Gas consumption statistics (if available)
-        if 'gasmeter' in self.temperature_db and self.temperature_db['gasmeter'].get('records'):
-            gasmeter_records = self.temperature_db['gasmeter']['records']
-            df_gas = pd.DataFrame(gasmeter_records)
-            df_gas['timestamp'] = pd.to_datetime(df_gas['timestamp'])
-            df_gas = df_gas.sort_values('timestamp').reset_index(drop=True)
-            df_gas['gas_consumption'] = df_gas['value'].diff()
+        if self.gas is not None:
+            consumption = pd.Series(self.gas['consumption'])
             
             # Filter out negative values (meter resets)
-            valid_consumption = df_gas[df_gas['gas_consumption'] > 0]['gas_consumption']
+            valid_consumption = consumption[consumption > 0]
             
             if len(valid_consumption) > 0:
                 # Calculate gas consumption per heating cycle
@@ -469,35 +436,17 @@ class HeatingStatisticsAnalyzer:
                 gas_per_cycle = total_gas / total_cycles if total_cycles > 0 else 0
                 
                 # Also calculate from the GasVsCycleCount data for more accurate correlation
-                gas_cycle_data = []
-                for i in range(1, len(df_gas)):
-                    current_time = df_gas.iloc[i]['timestamp']
-                    previous_time = df_gas.iloc[i-1]['timestamp']
-                    gas_consumption = df_gas.iloc[i]['gas_consumption']
-                    
-                    if pd.isna(gas_consumption) or gas_consumption < 0:
-                        continue
-                    
-                    # Count heating cycles between readings
-                    cycle_count = 0
-                    for cycle in cycles:
-                        cycle_start = pd.to_datetime(cycle['start'])
-                        if previous_time <= cycle_start < current_time:
-                            cycle_count += 1
-                    
-                    if cycle_count > 0:  # Only include periods with heating
-                        gas_cycle_data.append({
-                            'gas_consumption': gas_consumption,
-                            'cycle_count': cycle_count,
-                            'gas_per_cycle': gas_consumption / cycle_count
-                        })
-                
-                df_gas_cycle = pd.DataFrame(gas_cycle_data)
+                # (only periods with heating)
+                df_gas_cycle = self._gas_intervals(cycles)
+                df_gas_cycle = df_gas_cycle[df_gas_cycle['cycle_count'] > 0]
+                df_gas_cycle = df_gas_cycle.assign(
+                    gas_per_cycle=df_gas_cycle['gas_consumption'] / df_gas_cycle['cycle_count'])
                 
                 report_lines.append("GAS CONSUMPTION STATISTICS")
                 report_lines.append("-" * 60)
-                report_lines.append(f"Total Gas Meter Readings: {len(gasmeter_records)}")
-                report_lines.append(f"Date Range: {df_gas['timestamp'].min().strftime('%Y-%m-%d')} to {df_gas['timestamp'].max().strftime('%Y-%m-%d')}")
+                gas_times = pd.to_datetime(self.gas['timestamp'])
+                report_lines.append(f"Total Gas Meter Readings: {len(gas_times)}")
+                report_lines.append(f"Date Range: {gas_times.min().strftime('%Y-%m-%d')} to {gas_times.max().strftime('%Y-%m-%d')}")
                 report_lines.append(f"Total Gas Consumed: {valid_consumption.sum():.2f} m³")
                 report_lines.append(f"Mean Consumption Per Reading: {valid_consumption.mean():.2f} m³")
                 report_lines.append(f"Median Consumption Per Reading: {valid_consumption.median():.2f} m³")
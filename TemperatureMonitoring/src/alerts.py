@@ -0,0 +1,406 @@
+"""
+Alert Rules
+
+Evaluates declarative alert rules while data is imported, so problems such as
+a draining sensor battery, a heating zone stuck on or frost risk outside are
+reported right away instead of after the next batch report. Rules are
+evaluated incrementally: per device only the readings newer than the last
+evaluated one are looked at, and a small rolling state (open conditions, last
+reading, daily battery means) is kept in a JSON file between imports.
+
+Rule types:
+- threshold: field above/below a limit, optionally for at least for_minutes
+- rate: change of a field faster than max_change_per_hour between readings
+- gap: no reading for longer than max_gap_minutes
+- battery_trend: battery voltage falling faster than max_drop_mv_per_day
+  over the last window_days days
+"""
+
+import fnmatch
+import json
+import logging
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from data_quality import QF_BATTERY, QF_OK
+
+logger = logging.getLogger(__name__)
+
+ALERT_STATE_PATH = "data/alerts/alert_state.json"
+ALERT_LOG_PATH = "data/alerts/alerts.jsonl"
+
+# Default rules; 'devices' holds fnmatch patterns (default: all devices)
+ALERT_RULES = [
+    {'name': 'battery_low', 'type': 'threshold', 'field': 'battery_mv', 'below': 2400,
+     'severity': 'warning'},
+    {'name': 'battery_draining', 'type': 'battery_trend', 'window_days': 7, 'max_drop_mv_per_day': 15,
+     'severity': 'warning'},
+    {'name': 'sensor_silent', 'type': 'gap', 'max_gap_minutes': 60, 'severity': 'warning'},
+    {'name': 'frost_risk', 'type': 'threshold', 'field': 'temperature', 'below': 3.0, 'for_minutes': 30,
+     'devices': ['T2_Terasz'], 'severity': 'critical'},
+    {'name': 'heating_stuck_on', 'type': 'threshold', 'field': 'temperature', 'above': 35.0,
+     'for_minutes': 360, 'devices': ['T*_Z*'], 'severity': 'critical'},
+    {'name': 'temperature_jump', 'type': 'rate', 'field': 'temperature', 'max_change_per_hour': 20.0,
+     'severity': 'info'},
+]
+
+RULE_TYPES = {
+    'threshold': ('field',),
+    'rate': ('field', 'max_change_per_hour'),
+    'gap': ('max_gap_minutes',),
+    'battery_trend': ('max_drop_mv_per_day',),
+}
+
+VALUE_FIELDS = ('temperature', 'humidity', 'battery_mv')
+
+# Quality flags that do not make a field unusable: a low battery voltage is a
+# valid battery reading (it is exactly what the battery rules look for)
+IGNORED_QUALITY_FLAGS = {'battery_mv': QF_BATTERY}
+
+# Rates are only computed between readings at most this far apart
+RATE_MAX_INTERVAL_MINUTES = 60
+
+
+def validate_rules(rules: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Check rule definitions and fill in defaults.
+
+    Raises:
+        ValueError: For unknown rule types, missing settings or duplicate names
+    """
+    validated = []
+    names = set()
+    for rule in rules:
+        rule_type = rule.get('type')
+        if rule_type not in RULE_TYPES:
+            raise ValueError(f"Unknown alert rule type '{rule_type}', expected one of {sorted(RULE_TYPES)}")
+        missing = [key for key in ('name',) + RULE_TYPES[rule_type] if key not in rule]
+        if missing:
+            raise ValueError(f"Alert rule {rule.get('name', rule_type)!r} is missing {missing}")
+        if rule_type == 'threshold' and 'above' not in rule and 'below' not in rule:
+            raise ValueError(f"Threshold rule '{rule['name']}' needs 'above' or 'below'")
+        if rule.get('field', 'battery_mv') not in VALUE_FIELDS:
+            raise ValueError(f"Alert rule '{rule['name']}' uses unknown field '{rule['field']}'")
+        if rule['name'] in names:
+            raise ValueError(f"Duplicate alert rule name '{rule['name']}'")
+        names.add(rule['name'])
+        validated.append({'severity': 'warning', 'devices': ['*'], **rule})
+    return validated
+
+
+def load_rules(rules_path: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Load rules from a JSON file (a list of rule dictionaries), or the default rules."""
+    if rules_path is None:
+        return validate_rules(ALERT_RULES)
+    with open(rules_path, 'r', encoding='utf-8') as f:
+        return validate_rules(json.load(f))
+
+
+def _records_to_columns(records: List[Dict]) -> Dict[str, np.ndarray]:
+    """Time-sorted column arrays (timestamps as int64 seconds) of processed or stored records."""
+    import pandas as pd  # not needed to import the importer, only once rules are evaluated
+    times = pd.to_datetime([r['timestamp'] for r in records], format='ISO8601')
+    columns = {'timestamp': times.values.astype('datetime64[s]').astype(np.int64)}
+    for field in VALUE_FIELDS:
+        columns[field] = np.array([r.get(field, np.nan) for r in records], dtype=np.float64)
+    columns['quality'] = np.array([r.get('quality', QF_OK) for r in records], dtype=np.int64)
+
+    order = np.argsort(columns['timestamp'], kind='stable')
+    return {name: values[order] for name, values in columns.items()}
+
+
+def _usable(columns: Dict[str, np.ndarray], field: str) -> np.ndarray:
+    """Readings whose field is present and not made unreliable by a quality flag."""
+    flags = columns['quality'] & ~IGNORED_QUALITY_FLAGS.get(field, QF_OK)
+    return (flags == QF_OK) & ~np.isnan(columns[field])
+
+
+def _iso(seconds: int) -> str:
+    return np.datetime64(int(seconds), 's').item().isoformat()
+
+
+def _sustained_onsets(times: np.ndarray, condition: np.ndarray, state: Dict[str, Any],
+                      hold_seconds: int) -> List[int]:
+    """
+    Indices at which a run of a true condition has lasted hold_seconds (once per run).
+
+    A run still open at the end of the previous batch continues with the
+    start time and fired flag kept in state; state is updated for the next batch.
+    """
+    if len(times) == 0:
+        return []
+
+    previous = np.r_[False, condition[:-1]]
+    following = np.r_[condition[1:], False]
+    starts = np.flatnonzero(condition & ~previous)
+    stops = np.flatnonzero(condition & ~following) + 1
+
+    run_since = times[starts].copy()
+    fired = np.zeros(len(starts), dtype=bool)
+    if len(starts) and starts[0] == 0 and state.get('since') is not None:
+        run_since[0] = state['since']
+        fired[0] = state.get('fired', False)
+
+    onsets = []
+    for k, (start, stop) in enumerate(zip(starts, stops)):
+        if fired[k]:
+            continue
+        index = start + int(np.searchsorted(times[start:stop], run_since[k] + hold_seconds))
+        if index < stop:
+            onsets.append(index)
+            fired[k] = True
+
+    if condition[-1]:
+        state['since'], state['fired'] = int(run_since[-1]), bool(fired[-1])
+    else:
+        state['since'], state['fired'] = None, False
+    return onsets
+
+
+class JsonlAlertSink:
+    """Appends alert events as JSON lines to a local log file."""
+
+    def __init__(self, path: str = ALERT_LOG_PATH):
+        self.path = Path(path)
+
+    def emit(self, events: List[Dict[str, Any]]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for event in events:
+                f.write(json.dumps(event, ensure_ascii=False) + '\n')
+
+
+class WebhookAlertSink:
+    """
+    Webhook stub: logs the JSON payload that would be posted to the URL.
+
+    The payloads are kept in `sent`, so a real HTTP delivery can be added later
+    without touching the rule engine.
+    """
+
+    def __init__(self, url: str):
+        self.url = url
+        self.sent: List[Dict[str, Any]] = []
+
+    def emit(self, events: List[Dict[str, Any]]) -> None:
+        payload = {'source': 'temperature-monitoring', 'alerts': events}
+        self.sent.append(payload)
+        logger.info(f"Webhook stub: would POST {len(events)} alert(s) to {self.url}")
+
+
+class AlertEngine:
+    """Evaluates the alert rules on newly imported readings."""
+
+    def __init__(self, rules: Optional[List[Dict[str, Any]]] = None, state_path: Optional[str] = ALERT_STATE_PATH,
+                 sinks: Optional[List[Any]] = None):
+        """
+        Args:
+            rules: Rule dictionaries (default: ALERT_RULES)
+            state_path: JSON file with the rolling per-device state (None keeps it in memory only)
+            sinks: Objects with an emit(events) method (default: a JsonlAlertSink)
+        """
+        self.rules = validate_rules(rules if rules is not None else ALERT_RULES)
+        self.state_path = Path(state_path) if state_path else None
+        self.sinks = sinks if sinks is not None else [JsonlAlertSink()]
+        self.state: Dict[str, Dict[str, Any]] = self._load_state()
+
+    def _load_state(self) -> Dict[str, Dict[str, Any]]:
+        if self.state_path and self.state_path.exists():
+            try:
+                with open(self.state_path, 'r', encoding='utf-8') as f:
+                    return json.load(f).get('devices', {})
+            except json.JSONDecodeError as e:
+                logger.warning(f"Could not read alert state {self.state_path}: {e}. Starting fresh.")
+        return {}
+
+    def save_state(self) -> None:
+        """Write the rolling state so the next import continues where this one stopped."""
+        if not self.state_path:
+            return
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.state_path, 'w', encoding='utf-8') as f:
+            json.dump({'updated': datetime.now().isoformat(), 'devices': self.state}, f, indent=2)
+
+    def _rules_for(self, device_name: str) -> List[Dict[str, Any]]:
+        return [rule for rule in self.rules
+                if any(fnmatch.fnmatchcase(device_name, pattern) for pattern in rule['devices'])]
+
+    def _event(self, rule: Dict[str, Any], device_name: str, seconds: int, value: float,
+               message: str) -> Dict[str, Any]:
+        return {
+            'timestamp': _iso(seconds),
+            'device': device_name,
+            'rule': rule['name'],
+            'type': rule['type'],
+            'severity': rule['severity'],
+            'value': round(float(value), 3),
+            'message': message,
+            'detected_at': datetime.now().isoformat(timespec='seconds')
+        }
+
+    def evaluate(self, device_name: str, records: List[Dict]) -> List[Dict[str, Any]]:
+        """
+        Evaluate the rules on the readings of one device that are newer than the last evaluated one.
+
+        Args:
+            device_name: Device name
+            records: Processed or stored records (any order, may overlap earlier imports)
+
+        Returns:
+            List of alert events, in time order
+        """
+        rules = self._rules_for(device_name)
+        if not records or not rules:
+            return []
+
+        device_state = self.state.setdefault(device_name, {'last_time': None, 'last_values': {}, 'rules': {}})
+        columns = _records_to_columns(records)
+        if device_state['last_time'] is not None:
+            newer = columns['timestamp'] > device_state['last_time']
+            columns = {name: values[newer] for name, values in columns.items()}
+        if len(columns['timestamp']) == 0:
+            return []
+
+        events = []
+        for rule in rules:
+            rule_state = device_state['rules'].setdefault(rule['name'], {})
+            handler = getattr(self, f"_evaluate_{rule['type']}")
+            events.extend(handler(rule, rule_state, device_name, columns, device_state))
+
+        for field in VALUE_FIELDS:
+            valid = np.flatnonzero(_usable(columns, field))
+            if len(valid):
+                device_state['last_values'][field] = [int(columns['timestamp'][valid[-1]]),
+                                                      float(columns[field][valid[-1]])]
+        device_state['last_time'] = int(columns['timestamp'][-1])
+        return sorted(events, key=lambda e: e['timestamp'])
+
+    def _evaluate_threshold(self, rule, rule_state, device_name, columns, device_state):
+        usable = _usable(columns, rule['field'])
+        times, values = columns['timestamp'][usable], columns[rule['field']][usable]
+
+        condition = np.zeros(len(values), dtype=bool)
+        if 'above' in rule:
+            condition |= values > rule['above']
+        if 'below' in rule:
+            condition |= values < rule['below']
+
+        hold = int(rule.get('for_minutes', 0) * 60)
+        events = []
+        for index in _sustained_onsets(times, condition, rule_state, hold):
+            limit = f"above {rule['above']}" if 'above' in rule and values[index] > rule['above'] \
+                else f"below {rule['below']}"
+            duration = f" for {rule['for_minutes']} minutes" if hold else ""
+            events.append(self._event(rule, device_name, times[index], values[index],
+                                      f"{rule['field']} {values[index]:g} {limit}{duration}"))
+        return events
+
+    def _evaluate_rate(self, rule, rule_state, device_name, columns, device_state):
+        field = rule['field']
+        usable = _usable(columns, field)
+        times, values = columns['timestamp'][usable], columns[field][usable]
+        if len(times) == 0:
+            return []
+
+        # Rates against the previous reading, including the last one of the previous import
+        last = device_state['last_values'].get(field)
+        previous_times = np.r_[last[0] if last else times[0], times[:-1]]
+        previous_values = np.r_[last[1] if last else values[0], values[:-1]]
+        interval = times - previous_times
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            rates = (values - previous_values) / (interval / 3600.0)
+        condition = ((interval > 0) & (interval <= RATE_MAX_INTERVAL_MINUTES * 60)
+                     & (np.abs(rates) > rule['max_change_per_hour']))
+
+        return [self._event(rule, device_name, times[i], rates[i],
+                            f"{field} changed {values[i] - previous_values[i]:+g} in "
+                            f"{interval[i] // 60} minutes ({rates[i]:+.1f}/h)")
+                for i in _sustained_onsets(times, condition, rule_state, 0)]
+
+    def _evaluate_gap(self, rule, rule_state, device_name, columns, device_state):
+        times = columns['timestamp']
+        previous = np.r_[device_state['last_time'] if device_state['last_time'] is not None else times[0],
+                         times[:-1]]
+        gaps = np.flatnonzero(times - previous > rule['max_gap_minutes'] * 60)
+        return [self._event(rule, device_name, times[i], (times[i] - previous[i]) / 60,
+                            f"No readings from {_iso(previous[i])} to {_iso(times[i])} "
+                            f"({(times[i] - previous[i]) / 60:.0f} minutes)")
+                for i in gaps]
+
+    def _evaluate_battery_trend(self, rule, rule_state, device_name, columns, device_state):
+        usable = _usable(columns, 'battery_mv')
+        if not usable.any():
+            return []
+        seconds = columns['timestamp'][usable]
+        days = seconds // 86400
+        unique_days, inverse = np.unique(days, return_inverse=True)
+        sums = np.bincount(inverse, weights=columns['battery_mv'][usable])
+        counts = np.bincount(inverse)
+
+        daily = rule_state.setdefault('daily', {})
+        for day, total, count in zip(unique_days.tolist(), sums.tolist(), counts.tolist()):
+            entry = daily.setdefault(str(day), [0.0, 0])
+            entry[0] += total
+            entry[1] += count
+
+        window = rule.get('window_days', 7)
+        newest = max(int(day) for day in daily)
+        for day in [day for day in daily if int(day) <= newest - window]:
+            del daily[day]
+        if len(daily) < 3:
+            return []
+
+        day_index = np.array([int(day) for day in daily], dtype=np.float64)
+        means = np.array([total / count for total, count in daily.values()])
+        slope = np.polyfit(day_index, means, 1)[0]
+
+        draining = slope <= -rule['max_drop_mv_per_day']
+        fire = draining and not rule_state.get('fired', False)
+        rule_state['fired'] = bool(draining)
+        if not fire:
+            return []
+        return [self._event(rule, device_name, seconds[-1], slope,
+                            f"battery falling {-slope:.1f} mV/day over the last {len(daily)} days "
+                            f"(now {means[np.argmax(day_index)]:.0f} mV)")]
+
+    def process(self, device_data_list: List[Dict]) -> List[Dict[str, Any]]:
+        """
+        Evaluate the imported data of several devices and hand the events to the sinks.
+
+        Args:
+            device_data_list: Processed device data ({'device_name', 'data'} dictionaries)
+
+        Returns:
+            List of all alert events
+        """
+        started = time.perf_counter()
+        events = []
+        for device_data in device_data_list:
+            events.extend(self.evaluate(device_data['device_name'], device_data.get('data', [])))
+
+        for event in events:
+            logger.warning(f"ALERT [{event['severity']}] {event['device']} {event['rule']}: {event['message']}")
+        if events:
+            for sink in self.sinks:
+                try:
+                    sink.emit(events)
+                except Exception as e:
+                    logger.error(f"Alert sink {type(sink).__name__} failed: {e}")
+
+        logger.info(f"Alert rules evaluated for {len(device_data_list)} devices in "
+                    f"{(time.perf_counter() - started) * 1000:.1f} ms ({len(events)} alerts)")
+        return events
+
+
+def create_alert_engine(rules_path: Optional[str] = None, log_path: str = ALERT_LOG_PATH,
+                        state_path: str = ALERT_STATE_PATH, webhook_url: Optional[str] = None) -> AlertEngine:
+    """Alert engine with the JSONL log sink and optionally the webhook stub."""
+    sinks: List[Any] = [JsonlAlertSink(log_path)]
+    if webhook_url:
+        sinks.append(WebhookAlertSink(webhook_url))
+    return AlertEngine(load_rules(rules_path), state_path=state_path, sinks=sinks)
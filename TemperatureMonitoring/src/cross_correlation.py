@@ -0,0 +1,261 @@
+"""
+Fleet Cross-Correlation Analysis
+
+Correlates every device with every other device over a range of time lags in
+one pass. All series are resampled onto one common grid matrix (devices x
+time, float32, NaN for missing cells); lagged Pearson correlations are then
+computed with FFT based cross-correlation for blocks of device pairs. Missing
+cells are handled exactly by cross-correlating the validity masks as well, so
+every lag uses only the cells where both devices have data.
+"""
+
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from timeseries import build_grid_matrix, records_to_arrays
+
+logger = logging.getLogger(__name__)
+
+# Pairs need at least this many overlapping grid cells at a lag to be correlated
+MIN_OVERLAP_CELLS = 96
+
+
+def _fft_length(num_cells: int, max_lag: int) -> int:
+    """Smallest power of two that avoids circular wrap-around up to max_lag."""
+    return 1 << int(np.ceil(np.log2(max(num_cells + max_lag, 2))))
+
+
+def _spectra(rows: np.ndarray, nfft: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Spectra of the validity mask, the centered values and the squared centered values."""
+    valid = ~np.isnan(rows)
+    counts = np.maximum(valid.sum(axis=1, keepdims=True), 1)
+    values = np.where(valid, rows, 0.0).astype(np.float64)
+    values = np.where(valid, values - values.sum(axis=1, keepdims=True) / counts, 0.0)
+    return (np.fft.rfft(valid.astype(np.float64), nfft),
+            np.fft.rfft(values, nfft),
+            np.fft.rfft(values * values, nfft))
+
+
+def lagged_correlation_block(left: Tuple[np.ndarray, ...], right: Tuple[np.ndarray, ...], nfft: int,
+                             lag_index: np.ndarray, min_overlap: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Masked Pearson correlation of every left row with every right row at the given lags.
+
+    The correlation at lag L pairs left[t] with right[t + L], i.e. a positive
+    lag means the right device follows the left device.
+
+    Args:
+        left: _spectra() of the left block (rows a)
+        right: _spectra() of the right block (rows b)
+        nfft: FFT length used for the spectra
+        lag_index: Positions of the wanted lags in the circular correlation
+        min_overlap: Minimum number of cells both devices have data for
+
+    Returns:
+        Tuple of (a x b x lags correlations with NaN where undefined, a x b x lags overlap counts)
+    """
+    left_mask, left_x, left_xx = (np.conj(s)[:, None, :] for s in left)
+    right_mask, right_x, right_xx = (s[None, :, :] for s in right)
+
+    def correlate(a, b):
+        return np.fft.irfft(a * b, nfft)[..., lag_index]
+
+    n = np.rint(correlate(left_mask, right_mask))
+    sum_x = correlate(left_x, right_mask)
+    sum_y = correlate(left_mask, right_x)
+    sum_xx = correlate(left_xx, right_mask)
+    sum_yy = correlate(left_mask, right_xx)
+    sum_xy = correlate(left_x, right_x)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cov = sum_xy - sum_x * sum_y / n
+        var_x = sum_xx - sum_x * sum_x / n
+        var_y = sum_yy - sum_y * sum_y / n
+        corr = cov / np.sqrt(var_x * var_y)
+
+    # Rounding noise of the FFT shows up as tiny variances for constant overlaps
+    undefined = (n < min_overlap) | (var_x <= 1e-9 * np.maximum(sum_xx, 1)) | (var_y <= 1e-9 * np.maximum(sum_yy, 1))
+    corr[undefined] = np.nan
+    return np.clip(corr, -1.0, 1.0), n.astype(np.int64)
+
+
+class FleetCorrelationAnalyzer:
+    """Computes the pairwise correlation and lag matrix of all devices."""
+
+    def __init__(self, database: Dict, step_minutes: int = 15, max_lag_hours: float = 12.0,
+                 block_size: int = 8, differenced: bool = False, min_overlap: int = MIN_OVERLAP_CELLS):
+        """
+        Args:
+            database: Temperature database dictionary
+            step_minutes: Width of the common time grid cells
+            max_lag_hours: Largest lag (in both directions) that is evaluated
+            block_size: Devices per block side; bounds the size of the intermediate spectra products
+            differenced: Correlate the changes per grid cell instead of the temperatures
+                (removes the shared daily cycle, so responses to heating stand out)
+            min_overlap: Minimum overlapping grid cells for a correlation value
+        """
+        self.database = database
+        self.step_minutes = step_minutes
+        self.max_lag = int(round(max_lag_hours * 60 / step_minutes))
+        self.block_size = max(1, block_size)
+        self.differenced = differenced
+        self.min_overlap = min_overlap
+
+    def _load_grid(self, device_names: List[str], field: str) -> Tuple[List[str], np.ndarray, np.ndarray]:
+        """Resample the given devices onto the common time grid."""
+        devices = self.database.get('devices', {})
+        series = {name: records_to_arrays(devices[name].get('records', []), field) for name in device_names}
+        return build_grid_matrix(series, self.step_minutes)
+
+    def analyze(self, device_names: Optional[List[str]] = None, field: str = 'temperature') -> Dict[str, Any]:
+        """
+        Correlate all devices with each other over lags of -max_lag..+max_lag grid cells.
+
+        Args:
+            device_names: Devices to include (default: all devices)
+            field: Record field to correlate
+
+        Returns:
+            Dictionary with the device list, lags and devices x devices matrices of the
+            peak correlation, the lag of the peak (minutes; positive when the column
+            device follows the row device) and the zero-lag correlation
+        """
+        devices = self.database.get('devices', {})
+        if device_names is None:
+            device_names = sorted(devices.keys())
+        missing = sorted(d for d in device_names if d not in devices)
+        if missing:
+            return {
+                "error": f"Missing devices for correlation analysis: {missing}",
+                "available_devices": list(devices.keys())
+            }
+
+        names, grid_times, matrix = self._load_grid(device_names, field)
+        if len(names) < 2:
+            return {"error": "At least two devices with records are needed for correlation analysis"}
+
+        if self.differenced:
+            matrix = np.diff(matrix, axis=1, prepend=np.float32(np.nan))
+
+        lags = np.arange(-self.max_lag, self.max_lag + 1)
+        nfft = _fft_length(matrix.shape[1], self.max_lag)
+        lag_index = lags % nfft
+        zero = self.max_lag
+
+        count = len(names)
+        peak = np.full((count, count), np.nan)
+        peak_lag = np.zeros((count, count), dtype=np.int64)
+        zero_lag = np.full((count, count), np.nan)
+        overlap = np.zeros((count, count), dtype=np.int64)
+
+        # Spectra of all devices once, then the upper triangle in block x block tiles;
+        # the lower triangle follows by symmetry
+        spectra = _spectra(matrix, nfft)
+        for row_start in range(0, count, self.block_size):
+            rows = slice(row_start, min(row_start + self.block_size, count))
+            for col_start in range(row_start, count, self.block_size):
+                cols = slice(col_start, min(col_start + self.block_size, count))
+                corr, n = lagged_correlation_block(tuple(s[rows] for s in spectra), tuple(s[cols] for s in spectra),
+                                                   nfft, lag_index, self.min_overlap)
+
+                has_value = ~np.isnan(corr).all(axis=2)
+                best = np.where(has_value, np.argmax(np.where(np.isnan(corr), -np.inf, corr), axis=2), zero)
+                peak[rows, cols] = np.take_along_axis(corr, best[..., None], axis=2)[..., 0]
+                peak_lag[rows, cols] = lags[best]
+                zero_lag[rows, cols] = corr[..., zero]
+                overlap[rows, cols] = n[..., zero]
+
+        lower = np.tril_indices(count, -1)
+        peak[lower] = peak.T[lower]
+        peak_lag[lower] = -peak_lag.T[lower]
+        zero_lag[lower] = zero_lag.T[lower]
+        overlap[lower] = overlap.T[lower]
+
+        logger.info(f"Correlated {count} devices over {len(lags)} lags on a {matrix.shape[1]} cell grid")
+        return {
+            'analysis_method': 'FFT Cross-Correlation',
+            'field': field,
+            'grid_step_minutes': self.step_minutes,
+            'differenced': self.differenced,
+            'devices': names,
+            'grid_start': str(grid_times[0]),
+            'grid_end': str(grid_times[-1]),
+            'lags_minutes': lags * self.step_minutes,
+            'peak_correlation': peak,
+            'peak_lag_minutes': peak_lag * self.step_minutes,
+            'zero_lag_correlation': zero_lag,
+            'overlap_cells': overlap
+        }
+
+    @staticmethod
+    def responses(results: Dict[str, Any], device: str, min_correlation: float = 0.0) -> List[Dict[str, Any]]:
+        """
+        Devices responding to one device, strongest first.
+
+        Args:
+            results: Result of analyze()
+            device: Driving device (e.g. a heating zone sensor)
+            min_correlation: Smallest peak correlation that is reported
+
+        Returns:
+            List of dictionaries with 'device', 'correlation' and 'lag_minutes'
+            (positive when the device follows the driving device)
+        """
+        if device not in results['devices']:
+            raise ValueError(f"Device '{device}' not in correlation results")
+
+        row = results['devices'].index(device)
+        responses = []
+        for col, name in enumerate(results['devices']):
+            value = results['peak_correlation'][row, col]
+            if col == row or np.isnan(value) or value < min_correlation:
+                continue
+            responses.append({
+                'device': name,
+                'correlation': round(float(value), 3),
+                'lag_minutes': int(results['peak_lag_minutes'][row, col])
+            })
+        return sorted(responses, key=lambda r: -r['correlation'])
+
+    def write_results(self, results: Dict[str, Any], output_dir: str = "output/correlation") -> List[str]:
+        """
+        Write the correlation and lag matrices as CSV plus a JSON summary.
+
+        Args:
+            results: Result of analyze()
+            output_dir: Target directory
+
+        Returns:
+            List of written file paths
+        """
+        import pandas as pd
+        output = Path(output_dir)
+        output.mkdir(parents=True, exist_ok=True)
+        names = results['devices']
+        written = []
+
+        for key, decimals in (('peak_correlation', 3), ('peak_lag_minutes', 0), ('zero_lag_correlation', 3)):
+            table = pd.DataFrame(np.round(results[key], decimals), index=names, columns=names)
+            path = output / f"{key}.csv"
+            table.to_csv(path)
+            written.append(str(path))
+
+        summary_path = output / "summary.json"
+        with open(summary_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'analysis_method': results['analysis_method'],
+                'grid_step_minutes': results['grid_step_minutes'],
+                'differenced': results['differenced'],
+                'grid_start': results['grid_start'],
+                'grid_end': results['grid_end'],
+                'max_lag_minutes': int(results['lags_minutes'][-1]),
+                'devices': names
+            }, f, indent=2, ensure_ascii=False)
+        written.append(str(summary_path))
+
+        logger.info(f"Wrote correlation matrices for {len(names)} devices to {output}")
+        return written
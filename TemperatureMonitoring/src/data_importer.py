@@ -3,20 +3,29 @@ Data Import Module (IN001) - Importing new data
 
 This module handles importing temperature data from multiple ZIP files into a central JSON database.
 It uses the TemperatureDataProcessor for CSV processing and focuses on database operations.
+When a sensor store path is given, data is written to the sharded store instead and
+devices are merged in parallel. An optional alert engine (see alerts.py) evaluates
+the alert rules on every imported batch. Every import run is recorded in the
+import log next to the database (see import_log.py), not in the database itself.
 """
 
+import argparse
 import json
 import os
 import logging
 import sys
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, List, Set, Tuple, Any
+from typing import Dict, List, Optional, Set, Tuple, Any
 
 # Add src directory to path for imports
 sys.path.append(str(Path(__file__).parent))
 
 from temperature_processor import TemperatureDataProcessor
+from sensor_store import SensorStore
+from db_metadata import write_sidecar
+from alerts import AlertEngine, create_alert_engine
+from import_log import ImportLog, open_import_log
 
 logger = logging.getLogger(__name__)
 
@@ -24,10 +33,22 @@ logger = logging.getLogger(__name__)
 class TemperatureDataImporter:
     """Handles importing and merging temperature data from multiple ZIP files."""
     
-    def __init__(self, json_db_path: str = "data/temperature_database.json"):
+    def __init__(self, json_db_path: str = "data/temperature_database.json", store_path: str = None,
+                 memory_budget_mb: float = None, alerts: Optional[AlertEngine] = None):
+        """
+        Args:
+            json_db_path: Path of the JSON database
+            store_path: Optional sensor store directory; when given, the store is used instead of the JSON file
+            memory_budget_mb: Merge into the store shards in bounded chunks (out-of-core mode, store only)
+            alerts: Optional alert engine evaluated on the new readings of every import
+        """
         self.json_db_path = Path(json_db_path)
         self.processor = TemperatureDataProcessor()
-        self.database: Dict = self._load_database()
+        self.store = SensorStore(store_path, memory_budget_mb=memory_budget_mb) if store_path else None
+        self.alerts = alerts
+        self.database: Dict = self.store.as_database() if self.store else self._load_database()
+        log = ImportLog.for_store(self.store.root) if self.store else ImportLog.for_database(self.json_db_path)
+        self.import_log = open_import_log(log, None if self.store else self.database)
         
     def _load_database(self) -> Dict:
         """Load existing JSON database or create new empty one."""
@@ -36,6 +57,10 @@ class TemperatureDataImporter:
                 with open(self.json_db_path, 'r', encoding='utf-8') as f:
                     data = json.load(f)
                     logger.info(f"Loaded existing database with {len(data.get('devices', {}))} devices")
+                    metadata = data.setdefault('metadata', {})
+                    if 'total_records' not in metadata:
+                        metadata['total_records'] = sum(len(d.get('records', []))
+                                                        for d in data.get('devices', {}).values())
                     return data
             except (json.JSONDecodeError, FileNotFoundError) as e:
                 logger.warning(f"Could not load existing database: {e}. Creating new one.")
@@ -48,12 +73,19 @@ class TemperatureDataImporter:
                 "version": "1.0.0",
                 "total_records": 0
             },
-            "devices": {},
-            "import_history": []
+            "devices": {}
         }
     
     def _save_database(self) -> None:
-        """Save database to JSON file."""
+        """Save database to JSON file (or the store manifest in store mode)."""
+        if self.alerts:
+            self.alerts.save_state()
+        
+        if self.store:
+            self.store.save_manifest()
+            logger.info(f"Sensor store manifest saved to {self.store.manifest_path}")
+            return
+        
         self.database["metadata"]["last_updated"] = datetime.now().isoformat()
         
         # Ensure directory exists
@@ -63,6 +95,9 @@ class TemperatureDataImporter:
         with open(self.json_db_path, 'w', encoding='utf-8') as f:
             json.dump(self.database, f, indent=2, default=str, ensure_ascii=False)
         
+        # Precomputed device metadata for the fast summary commands
+        write_sidecar(self.database, self.json_db_path)
+        
         logger.info(f"Database saved to {self.json_db_path}")
     
     def _process_device_data(self, device_data: Dict) -> Tuple[int, int]:
@@ -89,9 +124,9 @@ class TemperatureDataImporter:
             }
         
         device_db = self.database['devices'][device_name]
-        existing_records = set()
+        existing_records = {}
         
-        # Build set of existing records for duplicate detection
+        # Index existing records for duplicate detection
         for existing_record in device_db['records']:
             record_key = (
                 existing_record['timestamp'],
@@ -99,7 +134,7 @@ class TemperatureDataImporter:
                 existing_record['humidity'],
                 existing_record['battery_mv']
             )
-            existing_records.add(record_key)
+            existing_records.setdefault(record_key, existing_record)
         
         new_records = 0
         duplicates = 0
@@ -122,17 +157,23 @@ class TemperatureDataImporter:
                     "timestamp": timestamp_str,
                     "temperature": record['temperature'],
                     "humidity": record['humidity'],
-                    "battery_mv": record['battery_mv']
+                    "battery_mv": record['battery_mv'],
+                    "quality": record.get('quality', 0)
                 }
                 
                 device_db['records'].append(json_record)
-                existing_records.add(record_key)
+                existing_records[record_key] = json_record
                 new_records += 1
             else:
+                # A clean copy of a reading clears the flags raised on an earlier one
+                existing_record = existing_records[record_key]
+                if record.get('quality', 0) < existing_record.get('quality', 0):
+                    existing_record['quality'] = record['quality']
                 duplicates += 1
         
-        # Update device metadata
+        # Update device metadata and the database record counter
         device_db['total_records'] = len(device_db['records'])
+        self.database['metadata']['total_records'] += new_records
         device_db['last_updated'] = datetime.now().isoformat()
         
         # Sort records by timestamp for better organization
@@ -141,6 +182,40 @@ class TemperatureDataImporter:
         logger.info(f"Device {device_name}: {new_records} new records, {duplicates} duplicates skipped")
         return new_records, duplicates
     
+    def import_device_data(self, device_data_list: List[Dict]) -> List[Dict[str, Any]]:
+        """
+        Merge the processed data of several devices into the database.
+        
+        In store mode every device is merged into its own shard in parallel.
+        The alert rules are evaluated afterwards on the readings newer than the
+        last evaluated ones. A device whose data cannot be merged is logged and
+        skipped; the other devices are still imported.
+        
+        Returns:
+            Per-device statistics with 'name', 'new_records' and 'duplicates'
+            (failed devices are left out)
+        """
+        if self.store:
+            device_stats = self.store.import_device_data(device_data_list)
+        else:
+            device_stats = []
+            for device_data in device_data_list:
+                try:
+                    new_records, duplicates = self._process_device_data(device_data)
+                except Exception as e:
+                    logger.error(f"Error saving data for device {device_data['device_name']}: {e}")
+                    continue
+                device_stats.append({
+                    "name": device_data['device_name'],
+                    "new_records": new_records,
+                    "duplicates": duplicates
+                })
+        
+        if self.alerts:
+            imported = {stats['name'] for stats in device_stats}
+            self.alerts.process([d for d in device_data_list if d['device_name'] in imported])
+        return device_stats
+    
     def import_zip_files(self, data_folder: str = "data") -> Dict[str, Any]:
         """
         Import all TempLogs*.zip files from the specified folder.
@@ -191,17 +266,10 @@ class TemperatureDataImporter:
                 }
                 
                 # Process each device's data
-                for device_data in all_device_data:
-                    new_records, duplicates = self._process_device_data(device_data)
-                    
-                    file_stats["devices"].append({
-                        "name": device_data['device_name'],
-                        "new_records": new_records,
-                        "duplicates": duplicates
-                    })
-                    
-                    file_stats["new_records"] += new_records
-                    file_stats["duplicates"] += duplicates
+                for device_stats in self.import_device_data(all_device_data):
+                    file_stats["devices"].append(device_stats)
+                    file_stats["new_records"] += device_stats["new_records"]
+                    file_stats["duplicates"] += device_stats["duplicates"]
                 
                 import_stats["files_processed"].append(file_stats)
                 import_stats["zip_files_processed"] += 1
@@ -217,15 +285,9 @@ class TemperatureDataImporter:
         import_stats["devices_found"] = len(self.database['devices'])
         import_stats["end_time"] = datetime.now().isoformat()
         
-        # Update total records count
-        total_records = sum(len(device['records']) for device in self.database['devices'].values())
-        self.database["metadata"]["total_records"] = total_records
-        
-        # Add import to history
-        self.database["import_history"].append(import_stats)
-        
-        # Save updated database
+        # Save the data first; the run is logged once it is stored
         self._save_database()
+        self.import_log.append(import_stats, self.database["metadata"]["total_records"])
         
         logger.info(f"Import completed: {import_stats['total_new_records']} new records, "
                    f"{import_stats['total_duplicates']} duplicates from {import_stats['zip_files_processed']} files")
@@ -237,6 +299,23 @@ class TemperatureDataImporter:
         if not self.database['devices']:
             return {"message": "Database is empty"}
         
+        if self.store:
+            # Answered from the manifest without opening any shard
+            return {
+                "total_devices": len(self.store.device_names()),
+                "total_records": self.store.manifest["metadata"]["total_records"],
+                "last_updated": self.store.manifest["metadata"]["last_updated"],
+                "devices": [
+                    {
+                        "name": name,
+                        "total_records": info['record_count'],
+                        "first_record": info['first_record'],
+                        "last_record": info['last_record']
+                    }
+                    for name, info in self.store.manifest['devices'].items()
+                ]
+            }
+        
         summary = {
             "total_devices": len(self.database['devices']),
             "total_records": self.database["metadata"]["total_records"],
@@ -265,7 +344,21 @@ def main():
     """Main function for data import."""
     logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
     
-    importer = TemperatureDataImporter()
+    parser = argparse.ArgumentParser(description="Import TempLogs*.zip files into the temperature database")
+    parser.add_argument('--store', help="Import into a sharded sensor store directory instead of the JSON database")
+    parser.add_argument('--memory-budget', type=float, metavar='MB',
+                        help="Merge into the store in bounded chunks using at most this much memory")
+    parser.add_argument('--alerts', action='store_true',
+                        help="Evaluate the alert rules on the imported data (log: data/alerts/alerts.jsonl)")
+    parser.add_argument('--alert-rules', metavar='JSON', help="Alert rules file (default: built-in rules)")
+    parser.add_argument('--alert-webhook', metavar='URL', help="Also hand the alerts to the webhook stub")
+    args = parser.parse_args()
+    
+    alerts = None
+    if args.alerts or args.alert_rules:
+        alerts = create_alert_engine(args.alert_rules, webhook_url=args.alert_webhook)
+    importer = TemperatureDataImporter(store_path=args.store, memory_budget_mb=args.memory_budget,
+                                       alerts=alerts)
     
     print("Temperature Data Importer (IN001)")
     print("=" * 50)
@@ -0,0 +1,165 @@
+"""
+Data Quality Checks
+
+Vectorized validation of sensor readings at ingest time. Every reading gets a
+quality bitmask (0 = good) that is stored next to the data, so glitches such as
+spikes, stuck sensors, battery brown-outs and clock jumps are detected once and
+filtered when the database is loaded instead of in every analysis.
+"""
+
+import logging
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Quality flag bits
+QF_OK = 0
+QF_RANGE = 1        # temperature or humidity outside the physical range
+QF_SPIKE = 2        # deviates strongly from the rolling median
+QF_FLATLINE = 4     # temperature and humidity stuck for a long run
+QF_CLOCK = 8        # clock jumped backwards or repeated a timestamp with other values
+QF_BATTERY = 16     # battery voltage too low for reliable readings
+
+FLAG_NAMES = {
+    QF_RANGE: 'range',
+    QF_SPIKE: 'spike',
+    QF_FLATLINE: 'flatline',
+    QF_CLOCK: 'clock',
+    QF_BATTERY: 'battery',
+}
+
+# Default thresholds (can be overridden per call with a partial dictionary)
+QUALITY_CONFIG = {
+    'temperature_min': -40.0,
+    'temperature_max': 85.0,
+    'humidity_min': 0.0,
+    'humidity_max': 100.0,
+    'spike_window': 7,                  # samples in the centered rolling median
+    'spike_threshold_celsius': 5.0,
+    'flatline_min_samples': 72,         # 6 hours at the 5 minute logging interval
+    'battery_min_mv': 2200,
+    'clock_tolerance_seconds': 3600,    # backward jumps up to this are out-of-order rows, not faults
+}
+
+
+def _merged_config(config: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    merged = dict(QUALITY_CONFIG)
+    if config:
+        unknown = set(config) - set(QUALITY_CONFIG)
+        if unknown:
+            raise ValueError(f"Unknown quality settings: {sorted(unknown)}")
+        merged.update(config)
+    return merged
+
+
+def _run_lengths(changed: np.ndarray) -> np.ndarray:
+    """Length of the constant run each element belongs to (changed[i]: value i differs from i-1)."""
+    run_ids = np.cumsum(changed)
+    lengths = np.bincount(run_ids)
+    return lengths[run_ids]
+
+
+def compute_quality_mask(timestamps: np.ndarray, temperature: np.ndarray, humidity: np.ndarray,
+                         battery_mv: np.ndarray, config: Optional[Dict[str, Any]] = None) -> np.ndarray:
+    """
+    Compute the quality bitmask of a series of readings in file order.
+
+    Args:
+        timestamps: datetime64 array in the order the readings were logged
+        temperature: Temperature values (°C)
+        humidity: Relative humidity values (%)
+        battery_mv: Battery voltage values (mV)
+        config: Optional overrides of QUALITY_CONFIG
+
+    Returns:
+        uint8 array of QF_* flags, one per reading
+    """
+    cfg = _merged_config(config)
+    n = len(timestamps)
+    mask = np.zeros(n, dtype=np.uint8)
+    if n == 0:
+        return mask
+
+    temperature = np.asarray(temperature, dtype=np.float64)
+    humidity = np.asarray(humidity, dtype=np.float64)
+    battery_mv = np.asarray(battery_mv, dtype=np.float64)
+    times = np.asarray(timestamps, dtype='datetime64[s]').astype(np.int64)
+
+    # Range checks
+    out_of_range = ((temperature < cfg['temperature_min']) | (temperature > cfg['temperature_max']) |
+                    (humidity < cfg['humidity_min']) | (humidity > cfg['humidity_max']) |
+                    np.isnan(temperature) | np.isnan(humidity))
+    mask[out_of_range] |= QF_RANGE
+
+    # Spikes: distance from the centered rolling median of the in-range readings
+    import pandas as pd  # only needed here; keeps the ingest import path light
+    clean_temperature = np.where(out_of_range, np.nan, temperature)
+    median = pd.Series(clean_temperature).rolling(
+        cfg['spike_window'], center=True, min_periods=1).median().to_numpy()
+    with np.errstate(invalid='ignore'):
+        spikes = np.abs(temperature - median) > cfg['spike_threshold_celsius']
+    mask[spikes & ~out_of_range] |= QF_SPIKE
+
+    # Flat lines: temperature and humidity both unchanged for a long run
+    changed = np.ones(n, dtype=bool)
+    changed[1:] = (temperature[1:] != temperature[:-1]) | (humidity[1:] != humidity[:-1])
+    mask[_run_lengths(changed) >= cfg['flatline_min_samples']] |= QF_FLATLINE
+
+    # Clock: a jump back behind the latest reading by more than the tolerance is a clock
+    # fault; smaller steps back are rows that are merely out of order in the file and get
+    # sorted on load. A timestamp repeated with different values is a fault as well.
+    if n > 1:
+        previous_max = np.maximum.accumulate(times)[:-1]
+        mask[1:][previous_max - times[1:] > cfg['clock_tolerance_seconds']] |= QF_CLOCK
+
+        order = np.lexsort((np.arange(n), times))
+        same_time = times[order][1:] == times[order][:-1]
+        same_values = ((temperature[order][1:] == temperature[order][:-1]) &
+                       (humidity[order][1:] == humidity[order][:-1]))
+        mask[order[1:][same_time & ~same_values]] |= QF_CLOCK
+
+    # Battery brown-out
+    mask[battery_mv < cfg['battery_min_mv']] |= QF_BATTERY
+
+    return mask
+
+
+def annotate_records(records: List[Dict], config: Optional[Dict[str, Any]] = None) -> List[Dict]:
+    """
+    Add a 'quality' field to processor records (in place).
+
+    Args:
+        records: Records with 'timestamp', 'temperature', 'humidity' and 'battery_mv', in file order
+        config: Optional overrides of QUALITY_CONFIG
+
+    Returns:
+        The same list of records
+    """
+    if not records:
+        return records
+
+    mask = compute_quality_mask(
+        np.array([np.datetime64(r['timestamp'], 's') for r in records], dtype='datetime64[s]'),
+        np.array([r['temperature'] for r in records]),
+        np.array([r['humidity'] for r in records]),
+        np.array([r['battery_mv'] for r in records]),
+        config
+    )
+    for record, flags in zip(records, mask.tolist()):
+        record['quality'] = flags
+    return records
+
+
+def filter_records(records: List[Dict]) -> List[Dict]:
+    """Keep only records without quality flags (records without a 'quality' field count as good)."""
+    return [r for r in records if not r.get('quality', QF_OK)]
+
+
+def summarize_flags(mask: np.ndarray) -> Dict[str, int]:
+    """Count readings per quality flag."""
+    mask = np.asarray(mask, dtype=np.uint8)
+    summary = {name: int(np.count_nonzero(mask & bit)) for bit, name in FLAG_NAMES.items()}
+    summary['flagged'] = int(np.count_nonzero(mask))
+    return summary
@@ -0,0 +1,126 @@
+"""
+Database Metadata
+
+Precomputed per-device metadata (record counts and first/last timestamps) so
+that summary commands can answer without loading the full database. Sensor
+stores keep this information in their manifest; JSON databases get a small
+sidecar file next to them that is refreshed on every save.
+
+Only the standard library is used here to keep the summary commands fast.
+"""
+
+import json
+import logging
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+SIDECAR_SUFFIX = ".meta.json"
+
+
+def sidecar_path(db_path) -> Path:
+    """Path of the metadata sidecar belonging to a JSON database."""
+    db_path = Path(db_path)
+    return db_path.with_name(db_path.stem + SIDECAR_SUFFIX)
+
+
+def summarize_database(database: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build the metadata summary of a loaded JSON database.
+
+    Returns:
+        Dictionary with 'total_records', 'last_updated' and per-device 'devices' entries
+    """
+    devices = {}
+    for device_name, device_data in database.get('devices', {}).items():
+        records = device_data.get('records', [])
+        timestamps = [r['timestamp'] for r in records]
+        devices[device_name] = {
+            'record_count': len(records),
+            'first_record': min(timestamps) if timestamps else None,
+            'last_record': max(timestamps) if timestamps else None
+        }
+
+    return {
+        'total_records': sum(info['record_count'] for info in devices.values()),
+        'last_updated': database.get('metadata', {}).get('last_updated'),
+        'devices': devices
+    }
+
+
+def write_sidecar(database: Dict[str, Any], db_path) -> Path:
+    """
+    Write the metadata sidecar of a JSON database that has just been saved.
+
+    Args:
+        database: The saved database dictionary
+        db_path: Path of the JSON database file
+
+    Returns:
+        Path of the sidecar file
+    """
+    db_path = Path(db_path)
+    metadata = summarize_database(database)
+    metadata['source_mtime_ns'] = os.stat(db_path).st_mtime_ns
+    metadata['generated'] = datetime.now().isoformat()
+
+    path = sidecar_path(db_path)
+    tmp_path = path.with_suffix('.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_metadata(db_path) -> Dict[str, Any]:
+    """
+    Read the device metadata of a JSON database or sensor store.
+
+    Sensor stores are answered from their manifest. JSON databases are answered
+    from the sidecar if it matches the database file; otherwise the database is
+    loaded once and the sidecar is regenerated.
+
+    Args:
+        db_path: JSON database file or sensor store directory
+
+    Returns:
+        Dictionary with 'total_records', 'last_updated' and per-device 'devices' entries
+    """
+    db_path = Path(db_path)
+    if not db_path.exists():
+        raise FileNotFoundError(f"Database not found: {db_path}")
+
+    manifest_path = db_path if db_path.name == MANIFEST_NAME else db_path / MANIFEST_NAME
+    if manifest_path.exists():
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        return {
+            'total_records': manifest['metadata']['total_records'],
+            'last_updated': manifest['metadata']['last_updated'],
+            'devices': {
+                name: {
+                    'record_count': info['record_count'],
+                    'first_record': info['first_record'],
+                    'last_record': info['last_record']
+                }
+                for name, info in manifest['devices'].items()
+            }
+        }
+
+    path = sidecar_path(db_path)
+    if path.exists():
+        with open(path, 'r', encoding='utf-8') as f:
+            metadata = json.load(f)
+        if metadata.get('source_mtime_ns') == os.stat(db_path).st_mtime_ns:
+            return metadata
+
+    logger.info(f"Metadata sidecar missing or outdated, rebuilding from {db_path}")
+    with open(db_path, 'r', encoding='utf-8') as f:
+        database = json.load(f)
+    write_sidecar(database, db_path)
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
@@ -0,0 +1,279 @@
+"""
+Gas Meter Series
+
+Gas meter readings are kept as their own small indexed series instead of a
+'gasmeter' section inside the temperature JSON database, so loading meter
+readings never rewrites the temperature data and gas analyses only read a few
+KB. The series is a versioned directory of NumPy column files with the
+interval consumption and consumption rate precomputed at load time:
+
+    <series>/series.json
+    <series>/v<version>/{timestamp,value,consumption,interval_hours,rate}.npy
+
+Sensor stores keep the series in <store>/gasmeter/, JSON databases in a
+<database>.gasmeter/ directory next to the JSON file.
+"""
+
+import json
+import logging
+import os
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from sensor_store import MANIFEST_NAME, SensorStore
+
+logger = logging.getLogger(__name__)
+
+SERIES_FORMAT = "gasmeter-series"
+SERIES_MANIFEST = "series.json"
+STORE_SERIES_DIR = "gasmeter"
+SIDECAR_SUFFIX = ".gasmeter"
+
+# CSV columns: date (MM/DD/YYYY), time (HH:MM), meter value
+CSV_DATETIME_FORMAT = "%m/%d/%Y %H:%M"
+HEADER_KEYWORDS = ('date', 'time', 'meter', 'value', 'gas')
+
+SERIES_COLUMNS = {
+    'timestamp': 'datetime64[s]',
+    'value': np.float64,
+    'consumption': np.float64,      # m³ since the previous reading (NaN for the first)
+    'interval_hours': np.float64,   # hours since the previous reading
+    'rate': np.float64,             # m³/h over the interval (NaN for meter resets)
+}
+
+
+def gas_series_path(db_path) -> Path:
+    """Directory of the gas meter series belonging to a JSON database or sensor store."""
+    db_path = Path(db_path)
+    if SensorStore.is_store(db_path):
+        root = db_path.parent if db_path.name == MANIFEST_NAME else db_path
+        return root / STORE_SERIES_DIR
+    return db_path.with_name(db_path.stem + SIDECAR_SUFFIX)
+
+
+def parse_gasmeter_csv(csv_path: str) -> Tuple[np.ndarray, np.ndarray, int]:
+    """
+    Parse a gas meter CSV file in one vectorized pass.
+
+    Rows with missing columns, unparsable dates or values are skipped. A
+    header row is detected by its keywords.
+
+    Args:
+        csv_path: CSV file with date (MM/DD/YYYY), time (HH:MM) and meter value columns
+
+    Returns:
+        Tuple of (datetime64[s] timestamps, float64 values, number of skipped rows), in file order
+
+    Raises:
+        FileNotFoundError: If the file does not exist
+    """
+    csv_path = Path(csv_path)
+    if not csv_path.exists():
+        raise FileNotFoundError(f"CSV file not found: {csv_path}")
+
+    with open(csv_path, 'r', encoding='utf-8') as f:
+        first_line = f.readline().strip().lower()
+    has_header = any(keyword in first_line for keyword in HEADER_KEYWORDS)
+    if has_header:
+        logger.info("Detected header row, skipping it")
+
+    import pandas as pd  # only the CSV loader and legacy sections need pandas
+    frame = pd.read_csv(csv_path, header=None, skiprows=1 if has_header else 0,
+                        names=['date', 'time', 'value'], usecols=[0, 1, 2], index_col=False,
+                        dtype=str, keep_default_na=False, skip_blank_lines=True, encoding='utf-8')
+
+    dates = frame['date'].str.strip()
+    times = frame['time'].str.strip()
+    timestamps = pd.to_datetime(dates + ' ' + times, format=CSV_DATETIME_FORMAT, errors='coerce')
+    values = pd.to_numeric(frame['value'].str.strip(), errors='coerce')
+
+    valid = timestamps.notna().to_numpy() & values.notna().to_numpy()
+    skipped = int((~valid).sum())
+    if skipped:
+        logger.warning(f"Skipped {skipped} invalid lines in {csv_path.name}")
+
+    return (timestamps.to_numpy()[valid].astype('datetime64[s]'),
+            values.to_numpy(dtype=np.float64)[valid],
+            skipped)
+
+
+def interval_consumption(timestamps: np.ndarray, values: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Consumption, interval length and consumption rate of every reading since the previous one.
+
+    Args:
+        timestamps: Sorted reading times
+        values: Meter values
+
+    Returns:
+        Dictionary with 'consumption', 'interval_hours' and 'rate' arrays (NaN for the
+        first reading; the rate is also NaN for negative consumption, i.e. meter resets)
+    """
+    consumption = np.diff(values, prepend=np.nan)
+    hours = np.diff(timestamps.astype(np.int64), prepend=0) / 3600.0
+    hours[:1] = np.nan
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rate = np.where((consumption >= 0) & (hours > 0), consumption / hours, np.nan)
+    return {'consumption': consumption, 'interval_hours': hours, 'rate': rate}
+
+
+class GasmeterSeries:
+    """Versioned, indexed gas meter readings with precomputed interval consumption."""
+
+    def __init__(self, path):
+        """
+        Args:
+            path: Series directory (see gas_series_path())
+        """
+        self.path = Path(path)
+        self.manifest_path = self.path / SERIES_MANIFEST
+        self.manifest = self._load_manifest()
+
+    @classmethod
+    def for_database(cls, db_path) -> 'GasmeterSeries':
+        """Series belonging to a JSON database or sensor store."""
+        return cls(gas_series_path(db_path))
+
+    def exists(self) -> bool:
+        return self.manifest_path.exists()
+
+    def _load_manifest(self) -> Dict[str, Any]:
+        if self.manifest_path.exists():
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest.get('format') != SERIES_FORMAT:
+                raise ValueError(f"Not a gas meter series: {self.manifest_path}")
+            return manifest
+        return {
+            "format": SERIES_FORMAT,
+            "description": "Gas meter readings",
+            "unit": "m³",
+            "version": 0,
+            "record_count": 0,
+            "first_record": None,
+            "last_record": None,
+            "last_updated": None
+        }
+
+    def read(self) -> Dict[str, np.ndarray]:
+        """Column arrays of the series (empty arrays if nothing is loaded yet)."""
+        if self.manifest['version'] == 0:
+            return {name: np.array([], dtype=dtype) for name, dtype in SERIES_COLUMNS.items()}
+        version_path = self.path / f"v{self.manifest['version']}"
+        return {name: np.load(version_path / f"{name}.npy") for name in SERIES_COLUMNS}
+
+    def merge(self, timestamps: np.ndarray, values: np.ndarray) -> Tuple[int, int]:
+        """
+        Dedup-merge readings into the series; readings at already known times are skipped.
+
+        Loading the same readings again is a no-op and does not write a new version.
+
+        Args:
+            timestamps: Reading times (any order)
+            values: Meter values
+
+        Returns:
+            Tuple of (new readings added, duplicate readings skipped)
+        """
+        timestamps = np.asarray(timestamps, dtype='datetime64[s]')
+        values = np.asarray(values, dtype=np.float64)
+
+        # First occurrence of every time in the new readings, then the ones not stored yet
+        unique_times, first = np.unique(timestamps, return_index=True)
+        existing = self.read()
+        is_new = ~np.isin(unique_times, existing['timestamp'])
+        new_times, new_values = unique_times[is_new], values[first][is_new]
+        duplicates = len(timestamps) - len(new_times)
+        if len(new_times) == 0:
+            return 0, duplicates
+
+        merged_times = np.concatenate([existing['timestamp'], new_times])
+        merged_values = np.concatenate([existing['value'], new_values])
+        order = np.argsort(merged_times, kind='stable')
+        self._write(merged_times[order], merged_values[order])
+        return len(new_times), duplicates
+
+    def _write(self, timestamps: np.ndarray, values: np.ndarray) -> None:
+        """Write a new version with the precomputed intervals and publish it atomically."""
+        columns = {'timestamp': timestamps, 'value': values, **interval_consumption(timestamps, values)}
+        new_version = self.manifest['version'] + 1
+
+        version_path = self.path / f"v{new_version}"
+        if version_path.exists():
+            shutil.rmtree(version_path)
+        version_path.mkdir(parents=True)
+        for name, dtype in SERIES_COLUMNS.items():
+            np.save(version_path / f"{name}.npy", np.ascontiguousarray(columns[name], dtype=dtype))
+
+        self.manifest.update({
+            "version": new_version,
+            "record_count": int(len(timestamps)),
+            "first_record": str(timestamps[0]),
+            "last_record": str(timestamps[-1]),
+            "last_updated": datetime.now().isoformat()
+        })
+        tmp_path = self.manifest_path.with_suffix('.json.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.manifest_path)
+
+        # Older versions, including ones an earlier write could not remove
+        for version_path in self.path.glob('v*'):
+            version = version_path.name[1:]
+            if not version.isdigit() or int(version) >= new_version:
+                continue
+            try:
+                shutil.rmtree(version_path)
+            except OSError as e:
+                logger.warning(f"Could not remove old gas meter version {version_path}, "
+                               f"retrying at the next load: {e}")
+
+
+def legacy_readings(database: Dict[str, Any]) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """Reading times and values of a legacy 'gasmeter' section in a JSON database, or None."""
+    records = database.get('gasmeter', {}).get('records', [])
+    if not records:
+        return None
+    import pandas as pd
+    timestamps = pd.to_datetime([r['timestamp'] for r in records], format='ISO8601')
+    return (timestamps.values.astype('datetime64[s]'),
+            np.array([r['value'] for r in records], dtype=np.float64))
+
+
+def load_gas_series(db_path, database: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, np.ndarray]]:
+    """
+    Gas meter columns for the analyses.
+
+    Reads the indexed series of the database. Databases that still carry a
+    legacy 'gasmeter' section (records with timestamp/value) contribute the
+    readings the series does not have yet; at equal times the series wins.
+
+    Args:
+        db_path: JSON database or sensor store
+        database: Already loaded database dictionary (for the legacy readings)
+
+    Returns:
+        Dictionary of SERIES_COLUMNS arrays, or None if no gas meter data is available
+    """
+    series = GasmeterSeries.for_database(db_path)
+    stored = series.read() if series.exists() and series.manifest['record_count'] else None
+
+    legacy = legacy_readings(database or {})
+    if legacy is None:
+        return stored
+
+    unique_times, first = np.unique(legacy[0], return_index=True)
+    timestamps, values = unique_times, legacy[1][first]
+    if stored is not None:
+        is_new = ~np.isin(timestamps, stored['timestamp'])
+        if not is_new.any():
+            return stored
+        timestamps = np.concatenate([stored['timestamp'], timestamps[is_new]])
+        values = np.concatenate([stored['value'], values[is_new]])
+        order = np.argsort(timestamps, kind='stable')
+        timestamps, values = timestamps[order], values[order]
+    return {'timestamp': timestamps, 'value': values, **interval_consumption(timestamps, values)}
@@ -0,0 +1,502 @@
+"""
+Heating Cycle Detection
+
+Array based implementation of the heating cycle heuristic used by
+detect_heating.py (start at daily minimum + rise, end at cycle maximum + drop,
+merge cycles separated by short gaps), plus a parameter sweep that evaluates a
+grid of thresholds in parallel. The zone series are placed in shared memory
+once, so the worker processes do not copy or reload the data per combination.
+"""
+
+import itertools
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Block size of the first end-of-cycle scan (doubled while no end is found)
+END_SCAN_BLOCK = 64
+
+
+def daily_minimums(times: np.ndarray, temperatures: np.ndarray) -> np.ndarray:
+    """
+    Minimum temperature of each sample's calendar day.
+
+    Args:
+        times: Sorted datetime64 timestamps
+        temperatures: Temperature values belonging to times
+
+    Returns:
+        float64 array with the daily minimum for every sample
+    """
+    temperatures = np.asarray(temperatures, dtype=np.float64)
+    if len(temperatures) == 0:
+        return temperatures.copy()
+
+    days = np.asarray(times, dtype='datetime64[D]').astype(np.int64)
+    starts = np.flatnonzero(np.r_[True, days[1:] != days[:-1]])
+    lengths = np.diff(np.r_[starts, len(days)])
+    return np.repeat(np.minimum.reduceat(temperatures, starts), lengths)
+
+
+def _find_cycle_end(temperatures: np.ndarray, pos: int, peak: float, drop_below_max: float) -> Tuple[int, float]:
+    """
+    Scan forward from pos for the first sample at or below the running maximum + drop.
+
+    Args:
+        temperatures: Temperatures sorted by time
+        pos: First sample to examine
+        peak: Cycle maximum before pos
+
+    Returns:
+        Tuple of (end index or -1 if the data ends inside the cycle, cycle maximum)
+    """
+    block = END_SCAN_BLOCK
+    n = len(temperatures)
+
+    while pos < n:
+        window = temperatures[pos:pos + block]
+        running = np.maximum(np.maximum.accumulate(window), peak)
+        hits = np.flatnonzero(window <= running + drop_below_max)
+        if len(hits):
+            return pos + int(hits[0]), float(running[hits[0]])
+        peak = running[-1]
+        pos += len(window)
+        block *= 2
+
+    return -1, float(peak)
+
+
+def scan_cycles(temperatures: np.ndarray, daily_min: np.ndarray, rise_above_min: float,
+                drop_below_max: float, open_peak: Optional[float] = None
+                ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, Optional[Tuple[int, float]]]:
+    """
+    Detect the cycles of one block of samples, continuing a cycle left open by an earlier block.
+
+    Args:
+        temperatures: Temperatures sorted by time
+        daily_min: Daily minimum per sample (see daily_minimums())
+        rise_above_min: Degrees above the daily minimum that start a cycle
+        drop_below_max: Degrees relative to the cycle maximum that end a cycle (negative)
+        open_peak: Maximum of a cycle still running at the end of the previous block
+
+    Returns:
+        Tuple of (start indices, end indices, cycle maxima, open cycle); a start index of -1
+        refers to the cycle continued from the previous block, and the open cycle is
+        (start index, maximum) of a cycle still running at the end of this block, or None
+    """
+    temperatures = np.asarray(temperatures, dtype=np.float64)
+    starts, ends, peaks = [], [], []
+    open_cycle = None
+    pos = 0
+
+    if open_peak is not None:
+        end, peak = _find_cycle_end(temperatures, 0, open_peak, drop_below_max)
+        if end < 0:
+            open_cycle = (-1, peak)
+        else:
+            starts.append(-1)
+            ends.append(end)
+            peaks.append(peak)
+            pos = end + 1
+
+    if open_cycle is None:
+        candidates = np.flatnonzero(temperatures >= np.asarray(daily_min) + rise_above_min)
+        next_candidate = int(np.searchsorted(candidates, pos))
+        while next_candidate < len(candidates):
+            start = int(candidates[next_candidate])
+            end, peak = _find_cycle_end(temperatures, start + 1, temperatures[start], drop_below_max)
+            if end < 0:
+                open_cycle = (start, peak)
+                break
+            starts.append(start)
+            ends.append(end)
+            peaks.append(peak)
+            next_candidate = int(np.searchsorted(candidates, end, side='right'))
+
+    return (np.array(starts, dtype=np.int64), np.array(ends, dtype=np.int64),
+            np.array(peaks, dtype=np.float64), open_cycle)
+
+
+def detect_raw_cycles(temperatures: np.ndarray, daily_min: np.ndarray, rise_above_min: float,
+                      drop_below_max: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Detect raw heating cycles as sample index ranges.
+
+    A cycle starts at the first sample with temperature >= daily minimum + rise
+    and ends at the first later sample with temperature <= cycle maximum + drop.
+    A cycle still running at the end of the data ends at the last sample.
+
+    Args:
+        temperatures: Temperatures sorted by time
+        daily_min: Daily minimum per sample (see daily_minimums())
+        rise_above_min: Degrees above the daily minimum that start a cycle
+        drop_below_max: Degrees relative to the cycle maximum that end a cycle (negative)
+
+    Returns:
+        Tuple of (start indices, end indices, cycle maximum temperatures)
+    """
+    starts, ends, peaks, open_cycle = scan_cycles(temperatures, daily_min, rise_above_min, drop_below_max)
+    if open_cycle is not None:
+        starts = np.r_[starts, open_cycle[0]]
+        ends = np.r_[ends, len(temperatures) - 1]
+        peaks = np.r_[peaks, open_cycle[1]]
+    return starts, ends, peaks
+
+
+def merge_cycles(starts: np.ndarray, ends: np.ndarray, max_temps: np.ndarray,
+                 min_gap_minutes: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Merge cycles separated by gaps of at most min_gap_minutes.
+
+    Args:
+        starts: Cycle start times (datetime64, sorted)
+        ends: Cycle end times (datetime64)
+        max_temps: Cycle maximum temperatures
+        min_gap_minutes: Longest gap that is still merged
+
+    Returns:
+        Tuple of (start times, end times, maximum temperatures) of the merged cycles
+    """
+    if len(starts) == 0:
+        return starts, ends, max_temps
+
+    gaps = (starts[1:] - ends[:-1]) / np.timedelta64(1, 's') / 60
+    first = np.flatnonzero(np.r_[True, gaps > min_gap_minutes])
+    last = np.r_[first[1:] - 1, len(starts) - 1]
+    return starts[first], ends[last], np.maximum.reduceat(max_temps, first)
+
+
+def detect_cycles(times: np.ndarray, temperatures: np.ndarray, rise_above_min: float,
+                  drop_below_max: float, min_gap_minutes: float,
+                  daily_min: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Detect and merge heating cycles of one device series.
+
+    Args:
+        times: Sorted datetime64 timestamps
+        temperatures: Temperature values belonging to times
+        rise_above_min: Degrees above the daily minimum that start a cycle
+        drop_below_max: Degrees relative to the cycle maximum that end a cycle (negative)
+        min_gap_minutes: Longest gap between cycles that is merged
+        daily_min: Precomputed daily minimums (computed when omitted)
+
+    Returns:
+        Tuple of (start times, end times, maximum temperatures)
+    """
+    times = np.asarray(times, dtype='datetime64[s]')
+    if len(times) < 2:
+        empty = np.array([], dtype='datetime64[s]')
+        return empty, empty.copy(), np.array([], dtype=np.float64)
+
+    if daily_min is None:
+        daily_min = daily_minimums(times, temperatures)
+
+    start_idx, end_idx, max_temps = detect_raw_cycles(temperatures, daily_min, rise_above_min, drop_below_max)
+    return merge_cycles(times[start_idx], times[end_idx], max_temps, min_gap_minutes)
+
+
+class StreamingCycleDetector:
+    """
+    Cycle detection over time-ordered chunks with bounded memory.
+
+    Samples of the last (possibly incomplete) day are held back until the next
+    chunk, so daily minimums always cover whole days; a cycle still running at
+    a block end is continued in the next block. The result of finish() is
+    identical to detect_cycles() on the concatenated series.
+    """
+
+    def __init__(self, rise_above_min: float, drop_below_max: float, min_gap_minutes: float):
+        self.rise_above_min = rise_above_min
+        self.drop_below_max = drop_below_max
+        self.min_gap_minutes = min_gap_minutes
+        self._carry_times = np.array([], dtype='datetime64[s]')
+        self._carry_temperatures = np.array([], dtype=np.float64)
+        self._open: Optional[Tuple[np.datetime64, float]] = None
+        self._last_time: Optional[np.datetime64] = None
+        self._sample_count = 0
+        self._starts: List[np.ndarray] = []
+        self._ends: List[np.ndarray] = []
+        self._peaks: List[np.ndarray] = []
+
+    def update(self, times: np.ndarray, temperatures: np.ndarray) -> None:
+        """Feed the next time-ordered chunk of one device."""
+        times = np.concatenate([self._carry_times, np.asarray(times, dtype='datetime64[s]')])
+        temperatures = np.concatenate([self._carry_temperatures, np.asarray(temperatures, dtype=np.float64)])
+        if len(times) == 0:
+            return
+
+        days = times.astype('datetime64[D]')
+        complete = int(np.searchsorted(days, days[-1]))
+        self._process(times[:complete], temperatures[:complete])
+        self._carry_times, self._carry_temperatures = times[complete:], temperatures[complete:]
+
+    def _process(self, times: np.ndarray, temperatures: np.ndarray) -> None:
+        if len(times) == 0:
+            return
+        self._sample_count += len(times)
+
+        open_peak = self._open[1] if self._open is not None else None
+        starts, ends, peaks, open_cycle = scan_cycles(temperatures, daily_minimums(times, temperatures),
+                                                      self.rise_above_min, self.drop_below_max, open_peak)
+
+        start_times = times[np.maximum(starts, 0)]
+        if len(starts) and starts[0] < 0:
+            start_times[0] = self._open[0]
+        self._starts.append(start_times)
+        self._ends.append(times[ends])
+        self._peaks.append(peaks)
+
+        if open_cycle is None:
+            self._open = None
+        elif open_cycle[0] >= 0:
+            self._open = (times[open_cycle[0]], open_cycle[1])
+        else:
+            self._open = (self._open[0], open_cycle[1])
+        self._last_time = times[-1]
+
+    def finish(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Process the held back samples and return the merged cycles.
+
+        Returns:
+            Tuple of (start times, end times, maximum temperatures)
+        """
+        self._process(self._carry_times, self._carry_temperatures)
+        self._carry_times = self._carry_times[:0]
+        self._carry_temperatures = self._carry_temperatures[:0]
+
+        empty = np.array([], dtype='datetime64[s]')
+        if self._sample_count < 2:
+            return empty, empty.copy(), np.array([], dtype=np.float64)
+
+        starts = np.concatenate(self._starts + [empty])
+        ends = np.concatenate(self._ends + [empty])
+        peaks = np.concatenate(self._peaks + [np.array([], dtype=np.float64)])
+        if self._open is not None:
+            starts = np.r_[starts, self._open[0]]
+            ends = np.r_[ends, self._last_time]
+            peaks = np.r_[peaks, self._open[1]]
+        return merge_cycles(starts, ends, peaks, self.min_gap_minutes)
+
+
+# ----------------------------------------------------------------------
+# Agreement measures
+# ----------------------------------------------------------------------
+
+def interval_mask(times: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """Boolean mask of the samples lying inside any of the sorted, disjoint [start, end] intervals."""
+    times = np.asarray(times, dtype='datetime64[s]')
+    if len(starts) == 0:
+        return np.zeros(len(times), dtype=bool)
+    idx = np.searchsorted(np.asarray(starts, dtype='datetime64[s]'), times, side='right') - 1
+    inside = idx >= 0
+    inside[inside] = times[inside] <= np.asarray(ends, dtype='datetime64[s]')[idx[inside]]
+    return inside
+
+
+def reference_agreement(times: np.ndarray, starts: np.ndarray, ends: np.ndarray,
+                        ref_starts: np.ndarray, ref_ends: np.ndarray) -> Dict[str, float]:
+    """
+    Sample based agreement between detected and reference (labelled) cycles.
+
+    Returns:
+        Dictionary with 'precision', 'recall' and 'f1' of the heating samples
+    """
+    detected = interval_mask(times, starts, ends)
+    reference = interval_mask(times, ref_starts, ref_ends)
+    both = np.count_nonzero(detected & reference)
+    precision = both / np.count_nonzero(detected) if detected.any() else 0.0
+    recall = both / np.count_nonzero(reference) if reference.any() else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {'precision': precision, 'recall': recall, 'f1': f1}
+
+
+def heating_minutes_per_interval(starts: np.ndarray, ends: np.ndarray, boundaries: np.ndarray) -> np.ndarray:
+    """
+    Heating minutes of the cycles starting in each interval between consecutive boundaries.
+
+    Cycles are attributed to the interval they start in, as in heating_statistics.py.
+    """
+    boundaries = np.asarray(boundaries, dtype='datetime64[s]')
+    minutes = np.zeros(max(len(boundaries) - 1, 0), dtype=np.float64)
+    if len(starts) == 0 or len(minutes) == 0:
+        return minutes
+    bins = np.searchsorted(boundaries, starts, side='right') - 1
+    valid = (bins >= 0) & (bins < len(minutes))
+    durations = (ends - starts) / np.timedelta64(1, 's') / 60
+    np.add.at(minutes, bins[valid], durations[valid])
+    return minutes
+
+
+def gas_consumption_intervals(gas_times: np.ndarray, gas_values: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Consumption between consecutive gas meter readings.
+
+    Returns:
+        Tuple of (sorted reading times, consumption per interval, mask of valid intervals);
+        intervals with negative consumption (meter reset) are invalid
+    """
+    gas_times = np.asarray(gas_times, dtype='datetime64[s]')
+    gas_values = np.asarray(gas_values, dtype=np.float64)
+    order = np.argsort(gas_times, kind='stable')
+    gas_times, gas_values = gas_times[order], gas_values[order]
+    consumption = np.diff(gas_values)
+    return gas_times, consumption, ~np.isnan(consumption) & (consumption >= 0)
+
+
+def _correlation(x: np.ndarray, y: np.ndarray) -> float:
+    """Pearson correlation, NaN when undefined."""
+    if len(x) < 2 or np.std(x) == 0 or np.std(y) == 0:
+        return float('nan')
+    return float(np.corrcoef(x, y)[0, 1])
+
+
+# ----------------------------------------------------------------------
+# Parameter sweep
+# ----------------------------------------------------------------------
+
+# Per worker process: zone -> (times, temperatures, daily minimums) views of shared memory
+_WORKER_SERIES: Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+_WORKER_CONTEXT: Dict[str, Any] = {}
+_WORKER_SEGMENTS: List[shared_memory.SharedMemory] = []
+
+
+def parameter_grid(rise_values: Sequence[float], drop_values: Sequence[float],
+                   gap_values: Sequence[float]) -> List[Tuple[float, float, float]]:
+    """All (rise_above_min, drop_below_max, min_gap_minutes) combinations."""
+    return list(itertools.product(rise_values, drop_values, gap_values))
+
+
+def _share_arrays(series: Dict[str, Tuple[np.ndarray, np.ndarray]]) -> Tuple[List, List[shared_memory.SharedMemory]]:
+    """Copy every zone's arrays into shared memory blocks; returns (layout, segments)."""
+    layout, segments = [], []
+    for zone, (times, temperatures) in series.items():
+        times = np.asarray(times, dtype='datetime64[s]').astype(np.int64)
+        temperatures = np.asarray(temperatures, dtype=np.float64)
+        arrays = (times, temperatures, daily_minimums(times.astype('datetime64[s]'), temperatures))
+
+        entry = [zone]
+        for array in arrays:
+            segment = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, dtype=array.dtype, buffer=segment.buf)[:] = array
+            segments.append(segment)
+            entry.append((segment.name, array.shape, array.dtype.str))
+        layout.append(tuple(entry))
+    return layout, segments
+
+
+def _init_worker(layout: List, context: Dict[str, Any]) -> None:
+    """Attach the worker process to the shared zone series."""
+    _WORKER_SERIES.clear()
+    for zone, *blocks in layout:
+        arrays = []
+        for name, shape, dtype in blocks:
+            segment = shared_memory.SharedMemory(name=name)
+            _WORKER_SEGMENTS.append(segment)
+            arrays.append(np.ndarray(shape, dtype=np.dtype(dtype), buffer=segment.buf))
+        times, temperatures, daily_min = arrays
+        _WORKER_SERIES[zone] = (times.view('datetime64[s]'), temperatures, daily_min)
+    _WORKER_CONTEXT.clear()
+    _WORKER_CONTEXT.update(context)
+
+
+def _release_worker() -> None:
+    """Drop the array views and detach from shared memory (in-process evaluation)."""
+    _WORKER_SERIES.clear()
+    _WORKER_CONTEXT.clear()
+    while _WORKER_SEGMENTS:
+        _WORKER_SEGMENTS.pop().close()
+
+
+def evaluate_parameters(params: Tuple[float, float, float]) -> Dict[str, Any]:
+    """
+    Evaluate one threshold combination on the series attached to this process.
+
+    Returns:
+        Flat result row with per-zone cycle counts, durations and agreement measures
+    """
+    rise, drop, gap = params
+    row: Dict[str, Any] = {'rise_above_min': rise, 'drop_below_max': drop, 'min_gap_minutes': gap}
+
+    gas = _WORKER_CONTEXT.get('gas')
+    references = _WORKER_CONTEXT.get('references') or {}
+    total_minutes = None
+    f1_scores = []
+
+    for zone, (times, temperatures, daily_min) in _WORKER_SERIES.items():
+        starts, ends, _ = detect_cycles(times, temperatures, rise, drop, gap, daily_min=daily_min)
+        durations = (ends - starts) / np.timedelta64(1, 's') / 60
+        row[f'{zone}_cycles'] = len(starts)
+        row[f'{zone}_total_hours'] = float(durations.sum() / 60)
+        row[f'{zone}_mean_duration_minutes'] = float(durations.mean()) if len(durations) else 0.0
+
+        if gas is not None:
+            gas_times, consumption, valid = gas
+            minutes = heating_minutes_per_interval(starts, ends, gas_times)
+            row[f'{zone}_gas_correlation'] = _correlation(consumption[valid], minutes[valid])
+            total_minutes = minutes if total_minutes is None else total_minutes + minutes
+
+        if zone in references:
+            ref_starts, ref_ends = references[zone]
+            agreement = reference_agreement(times, starts, ends, ref_starts, ref_ends)
+            row[f'{zone}_reference_f1'] = agreement['f1']
+            f1_scores.append(agreement['f1'])
+
+    if gas is not None and total_minutes is not None:
+        _, consumption, valid = gas
+        row['gas_correlation'] = _correlation(consumption[valid], total_minutes[valid])
+    if f1_scores:
+        row['reference_f1'] = float(np.mean(f1_scores))
+    return row
+
+
+def sweep_parameters(series: Dict[str, Tuple[np.ndarray, np.ndarray]],
+                     grid: Sequence[Tuple[float, float, float]],
+                     gas: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+                     references: Optional[Dict[str, Tuple[np.ndarray, np.ndarray]]] = None,
+                     max_workers: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Evaluate heating detection thresholds over a parameter grid.
+
+    Args:
+        series: Zone device name -> (sorted datetime64 timestamps, temperatures)
+        grid: (rise_above_min, drop_below_max, min_gap_minutes) combinations (see parameter_grid())
+        gas: Optional (reading times, meter values) of the gas meter
+        references: Optional zone -> (start times, end times) of labelled heating cycles
+        max_workers: Worker processes (1 evaluates in the current process)
+
+    Returns:
+        One result row per combination, in grid order
+    """
+    context: Dict[str, Any] = {
+        'gas': gas_consumption_intervals(*gas) if gas is not None else None,
+        'references': {
+            zone: (np.asarray(starts, dtype='datetime64[s]'), np.asarray(ends, dtype='datetime64[s]'))
+            for zone, (starts, ends) in (references or {}).items()
+        }
+    }
+
+    layout, segments = _share_arrays(series)
+    try:
+        if max_workers == 1:
+            _init_worker(layout, context)
+            try:
+                return [evaluate_parameters(params) for params in grid]
+            finally:
+                _release_worker()
+
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                 initargs=(layout, context)) as executor:
+            workers = max_workers or os.cpu_count() or 1
+            chunksize = max(1, len(grid) // (4 * workers))
+            return list(executor.map(evaluate_parameters, grid, chunksize=chunksize))
+    finally:
+        for segment in segments:
+            segment.close()
+            segment.unlink()
@@ -0,0 +1,274 @@
+"""
+Import Log
+
+Bookkeeping of the import runs, kept out of the temperature database so that
+loading the data never parses the history. Every run is one compact line of a
+fixed schema in an append-only JSON Lines file; a binary index of the byte
+offsets of the lines answers "what did import N add" with a single seek:
+
+    <log>.jsonl   one entry per import run (LOG_FIELDS)
+    <log>.idx     little-endian uint64 byte offset of every entry
+
+Sensor stores keep the log in <store>/imports.jsonl, JSON databases in a
+<database>.imports.jsonl file next to the JSON file. Databases that still
+carry an 'import_history' section (or a store with import_history.json) are
+moved into the log the first time it is opened.
+
+Only the standard library is used here to keep the summary commands fast.
+"""
+
+import json
+import logging
+import os
+import struct
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+STORE_LOG_NAME = "imports.jsonl"
+SIDECAR_SUFFIX = ".imports.jsonl"
+INDEX_SUFFIX = ".idx"
+LEGACY_STORE_HISTORY = "import_history.json"
+
+OFFSET_FORMAT = "<Q"
+OFFSET_SIZE = struct.calcsize(OFFSET_FORMAT)
+
+# Fields of every log entry, in this order
+LOG_FIELDS = (
+    'import_id',       # 0-based number of the import run
+    'start_time',
+    'end_time',
+    'files',           # ZIP files processed
+    'new_records',
+    'duplicates',
+    'errors',          # number of files that failed
+    'devices',         # devices in the database after the run
+    'total_records',   # records in the database after the run (None for migrated entries)
+    'added',           # device -> new records, only devices that got new records
+)
+
+
+def import_log_path(db_path) -> Path:
+    """Path of the import log belonging to a JSON database or sensor store."""
+    db_path = Path(db_path)
+    if db_path.name == MANIFEST_NAME:
+        return db_path.parent / STORE_LOG_NAME
+    if (db_path / MANIFEST_NAME).exists():
+        return db_path / STORE_LOG_NAME
+    return db_path.with_name(db_path.stem + SIDECAR_SUFFIX)
+
+
+def compact_entry(import_stats: Dict[str, Any], import_id: int,
+                  total_records: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Reduce the statistics of an import run to a log entry.
+
+    The per-file breakdown of the run is folded into the new records per device.
+
+    Args:
+        import_stats: Statistics returned by TemperatureDataImporter.import_zip_files()
+        import_id: Number of the run in the log
+        total_records: Records in the database after the run
+
+    Returns:
+        Dictionary with the LOG_FIELDS
+    """
+    added: Dict[str, int] = {}
+    for file_stats in import_stats.get('files_processed', []):
+        for device in file_stats.get('devices', []):
+            if device.get('new_records'):
+                added[device['name']] = added.get(device['name'], 0) + device['new_records']
+
+    return {
+        'import_id': import_id,
+        'start_time': import_stats.get('start_time'),
+        'end_time': import_stats.get('end_time'),
+        'files': import_stats.get('zip_files_processed', 0),
+        'new_records': import_stats.get('total_new_records', 0),
+        'duplicates': import_stats.get('total_duplicates', 0),
+        'errors': len(import_stats.get('errors', [])),
+        'devices': import_stats.get('devices_found', 0),
+        'total_records': total_records,
+        'added': added,
+    }
+
+
+class ImportLog:
+    """Append-only import log with an offset index."""
+
+    def __init__(self, path):
+        """
+        Args:
+            path: Log file (see import_log_path())
+        """
+        self.path = Path(path)
+        self.index_path = self.path.with_suffix(self.path.suffix + INDEX_SUFFIX)
+        self._checked = False
+
+    @classmethod
+    def for_database(cls, db_path) -> 'ImportLog':
+        """Import log belonging to a JSON database or sensor store."""
+        return cls(import_log_path(db_path))
+
+    @classmethod
+    def for_store(cls, root) -> 'ImportLog':
+        """Import log of a sensor store (which may not be saved yet)."""
+        return cls(Path(root) / STORE_LOG_NAME)
+
+    def _check_index(self) -> None:
+        """Rebuild the index if the log has entries it does not cover (interrupted append)."""
+        if self._checked:
+            return
+        self._checked = True
+        if not self.path.exists():
+            return
+
+        log_size = self.path.stat().st_size
+        count = self.index_path.stat().st_size // OFFSET_SIZE if self.index_path.exists() else 0
+        indexed_end = 0
+        if count:
+            with open(self.path, 'rb') as f:
+                f.seek(self._offset(count - 1))
+                f.readline()
+                indexed_end = f.tell()
+        if indexed_end == log_size:
+            return
+
+        logger.warning(f"Import log index out of date, rebuilding {self.index_path}")
+        offsets = []
+        with open(self.path, 'rb') as f:
+            offset = 0
+            for line in f:
+                if line.strip():
+                    offsets.append(offset)
+                offset += len(line)
+        tmp_path = self.index_path.with_suffix('.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(b''.join(struct.pack(OFFSET_FORMAT, o) for o in offsets))
+        os.replace(tmp_path, self.index_path)
+
+    def _offset(self, import_id: int) -> int:
+        with open(self.index_path, 'rb') as f:
+            f.seek(import_id * OFFSET_SIZE)
+            return struct.unpack(OFFSET_FORMAT, f.read(OFFSET_SIZE))[0]
+
+    def __len__(self) -> int:
+        self._check_index()
+        if not self.index_path.exists():
+            return 0
+        return self.index_path.stat().st_size // OFFSET_SIZE
+
+    def append(self, import_stats: Dict[str, Any], total_records: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Append an import run to the log.
+
+        Args:
+            import_stats: Statistics of the run (see compact_entry())
+            total_records: Records in the database after the run
+
+        Returns:
+            The written log entry
+        """
+        entry = compact_entry(import_stats, len(self), total_records)
+        self._write_entry(entry)
+        return entry
+
+    def _write_entry(self, entry: Dict[str, Any]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        line = json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + '\n'
+        with open(self.path, 'ab') as f:
+            offset = f.tell()
+            f.write(line.encode('utf-8'))
+        # The index is written second, so an interrupted append is repaired by _check_index()
+        with open(self.index_path, 'ab') as f:
+            f.write(struct.pack(OFFSET_FORMAT, offset))
+
+    def get(self, import_id: int) -> Dict[str, Any]:
+        """
+        Log entry of one import run.
+
+        Args:
+            import_id: Number of the run; negative numbers count from the end
+
+        Raises:
+            IndexError: If there is no such run
+        """
+        count = len(self)
+        if import_id < 0:
+            import_id += count
+        if not 0 <= import_id < count:
+            raise IndexError(f"No import {import_id} (the log has {count} entries)")
+
+        with open(self.path, 'rb') as f:
+            f.seek(self._offset(import_id))
+            return json.loads(f.readline())
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """All entries, oldest first."""
+        if not self.path.exists():
+            return []
+        with open(self.path, 'rb') as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def tail(self, count: int = 10) -> List[Dict[str, Any]]:
+        """The last count entries, oldest first."""
+        total = len(self)
+        return [self.get(import_id) for import_id in range(max(0, total - count), total)]
+
+    def extend(self, entries: List[Dict[str, Any]]) -> int:
+        """
+        Append log entries of another log (renumbered to follow this log).
+
+        Returns:
+            Number of entries written
+        """
+        for entry in entries:
+            self._write_entry({**entry, 'import_id': len(self)})
+        return len(entries)
+
+
+def _run_key(entry: Dict[str, Any]) -> str:
+    """Identity of a logged run, independent of its position in the log."""
+    return json.dumps({k: v for k, v in entry.items() if k != 'import_id'}, sort_keys=True)
+
+
+def open_import_log(log: ImportLog, database: Optional[Dict[str, Any]] = None) -> ImportLog:
+    """
+    Move any legacy import history of a database into its import log.
+
+    The 'import_history' section is removed from the given database dictionary
+    (it disappears from the file with the next save); a store's
+    import_history.json is deleted once its runs are in the log. Runs that
+    are already in the log are skipped, so a history is never added twice.
+
+    Args:
+        log: Import log of the database (ImportLog.for_database() / for_store())
+        database: Already loaded JSON database dictionary
+
+    Returns:
+        The import log
+    """
+    legacy = database.pop('import_history', None) if database is not None else None
+    legacy_path = log.path.parent / LEGACY_STORE_HISTORY if log.path.name == STORE_LOG_NAME else None
+    if legacy_path is not None and legacy_path.exists():
+        with open(legacy_path, 'r', encoding='utf-8') as f:
+            legacy = (legacy or []) + json.load(f)
+
+    if legacy:
+        logged = Counter(_run_key(entry) for entry in log.entries())
+        missing = []
+        for entry in (compact_entry(import_stats, 0) for import_stats in legacy):
+            key = _run_key(entry)
+            if logged[key]:
+                logged[key] -= 1
+            else:
+                missing.append(entry)
+        if missing:
+            log.extend(missing)
+            logger.info(f"Moved {len(missing)} import history entries to {log.path}")
+    if legacy_path is not None and legacy_path.exists():
+        legacy_path.unlink()
+    return log
@@ -4,6 +4,7 @@ Main application for Temperature Monitoring Data Processor
 
 import sys
 import argparse
+from functools import cached_property
 from pathlib import Path
 from typing import List, Dict
 import logging
@@ -12,9 +13,8 @@ import logging
 sys.path.append(str(Path(__file__).parent))
 
 from temperature_processor import TemperatureDataProcessor
-from visualizer import TemperatureVisualizer
-from excel_exporter import ExcelExporter
 from data_importer import TemperatureDataImporter
+from alerts import AlertEngine, create_alert_engine
 
 # Configure logging
 logging.basicConfig(
@@ -32,11 +32,21 @@ logger = logging.getLogger(__name__)
 class TemperatureMonitoringApp:
     """Main application class for temperature monitoring."""
     
-    def __init__(self):
+    def __init__(self, alerts: AlertEngine = None):
         self.processor = TemperatureDataProcessor()
-        self.visualizer = TemperatureVisualizer()
-        self.exporter = ExcelExporter()
-        self.importer = TemperatureDataImporter()
+        self.importer = TemperatureDataImporter(alerts=alerts)
+    
+    # The report generators pull in matplotlib, pandas and openpyxl; they are only
+    # imported when reports are generated
+    @cached_property
+    def visualizer(self):
+        from visualizer import TemperatureVisualizer
+        return TemperatureVisualizer()
+    
+    @cached_property
+    def exporter(self):
+        from excel_exporter import ExcelExporter
+        return ExcelExporter()
     
     def process_zip_file(self, zip_path: str, generate_reports: bool = True, generate_excel: bool = False, save_to_database: bool = True) -> List[Dict]:
         """
@@ -138,14 +148,14 @@ class TemperatureMonitoringApp:
         total_new_records = 0
         total_duplicates = 0
         
-        for device_data in device_data_list:
-            try:
-                new_records, duplicates = self.importer._process_device_data(device_data)
-                total_new_records += new_records
-                total_duplicates += duplicates
+        # A failing device is logged and skipped by the importer; the others are still saved
+        try:
+            for device_stats in self.importer.import_device_data(device_data_list):
+                total_new_records += device_stats['new_records']
+                total_duplicates += device_stats['duplicates']
                 
-            except Exception as e:
-                logger.error(f"Error saving data for device {device_data['device_name']}: {e}")
+        except Exception as e:
+            logger.error(f"Error saving device data: {e}")
         
         # Save the database
         try:
@@ -199,6 +209,10 @@ def main():
                        help='Generate Excel reports (time-consuming, off by default)')
     parser.add_argument('--no-database', action='store_true', 
                        help='Skip saving to JSON database (enabled by default)')
+    parser.add_argument('--alerts', action='store_true',
+                       help='Evaluate the alert rules on the new readings (log: data/alerts/alerts.jsonl)')
+    parser.add_argument('--alert-rules', metavar='JSON',
+                       help='Alert rules file (default: built-in rules)')
     parser.add_argument('--log-level', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'], 
                        default='INFO', help='Set logging level')
     
@@ -214,7 +228,8 @@ def main():
         return 1
     
     # Process the data
-    app = TemperatureMonitoringApp()
+    alerts = create_alert_engine(args.alert_rules) if args.alerts or args.alert_rules else None
+    app = TemperatureMonitoringApp(alerts=alerts)
     
     try:
         device_data_list = app.process_zip_file(
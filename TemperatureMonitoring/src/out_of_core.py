@@ -0,0 +1,247 @@
+"""
+Out-of-Core Processing
+
+Runs the analyses on sensor stores whose history does not fit into memory.
+Each device shard is memory-mapped and processed in bounded, time-ordered
+chunks; the accumulators below carry their state (open intervals, cycles,
+partial days) across chunk boundaries, so the results are identical to the
+in-memory implementations while the peak memory stays within the budget.
+"""
+
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from sensor_store import COLUMNS, SensorStore, chunk_rows_for_budget, iter_column_slices
+from data_quality import QF_OK
+from heating_cycles import StreamingCycleDetector
+from timeseries import AGGREGATIONS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MEMORY_BUDGET_MB = 256
+
+
+def iter_device_chunks(store: SensorStore, device_name: str, chunk_rows: int,
+                       drop_flagged: bool = True) -> Iterator[Dict[str, np.ndarray]]:
+    """
+    Yield a device shard as time-ordered in-memory chunks of at most chunk_rows rows.
+
+    Args:
+        store: Sensor store
+        device_name: Device to read
+        chunk_rows: Rows per chunk (see chunk_rows_for_budget())
+        drop_flagged: Leave out readings with a non-zero quality mask (as load_database() does)
+    """
+    columns = store.read_device(device_name, mmap=True)
+    for chunk in iter_column_slices(columns, 0, len(columns['timestamp']), chunk_rows):
+        if drop_flagged:
+            keep = chunk['quality'] == QF_OK
+            if not keep.all():
+                chunk = {name: values[keep] for name, values in chunk.items()}
+        yield chunk
+
+
+class ActiveIntervalTracker:
+    """STAT001 intervals of one device: runs of readings separated by at most max_gap_minutes."""
+
+    def __init__(self, max_gap_minutes: int = 35):
+        self.max_gap = np.timedelta64(max_gap_minutes * 60, 's')
+        self.intervals: List[Tuple[np.datetime64, np.datetime64, int]] = []
+        self._open: Optional[List] = None  # [start, end, record_count]
+
+    def update(self, times: np.ndarray) -> None:
+        """Feed the next time-ordered chunk of timestamps."""
+        times = np.asarray(times, dtype='datetime64[s]')
+        if len(times) == 0:
+            return
+
+        breaks = np.flatnonzero(np.diff(times) > self.max_gap) + 1
+        starts = np.r_[0, breaks]
+        stops = np.r_[breaks, len(times)]
+
+        segments = [[times[a], times[b - 1], int(b - a)] for a, b in zip(starts, stops)]
+        if self._open is not None:
+            if times[0] - self._open[1] <= self.max_gap:
+                segments[0] = [self._open[0], segments[0][1], self._open[2] + segments[0][2]]
+            else:
+                self.intervals.append(tuple(self._open))
+
+        self.intervals.extend(tuple(segment) for segment in segments[:-1])
+        self._open = segments[-1]
+
+    def finish(self) -> List[Tuple[datetime, datetime, int]]:
+        """Close the last interval and return all (start, end, record_count) tuples."""
+        if self._open is not None:
+            self.intervals.append(tuple(self._open))
+            self._open = None
+        return [(start.item(), end.item(), count) for start, end, count in self.intervals]
+
+
+class HourDayAccumulator:
+    """Days x 24 hours rollup built chunk by chunk; identical to timeseries.hour_day_matrix()."""
+
+    def __init__(self, agg: str = 'mean'):
+        if agg not in AGGREGATIONS:
+            raise ValueError(f"Unsupported aggregation '{agg}', expected one of {AGGREGATIONS}")
+        self.agg = agg
+        self.first_day: Optional[np.datetime64] = None
+        self._counts = np.zeros((0, 24), dtype=np.int64)
+        self._values = np.zeros((0, 24))
+
+    def _grow(self, num_days: int) -> None:
+        extra = num_days - len(self._counts)
+        if extra <= 0:
+            return
+        fill = {'mean': 0.0, 'count': 0.0, 'min': np.inf, 'max': -np.inf}[self.agg]
+        self._counts = np.vstack([self._counts, np.zeros((extra, 24), dtype=np.int64)])
+        self._values = np.vstack([self._values, np.full((extra, 24), fill)])
+
+    def update(self, times: np.ndarray, values: np.ndarray) -> None:
+        """Feed the next time-ordered chunk."""
+        values = np.asarray(values, dtype=np.float64)
+        valid = ~np.isnan(values)
+        times = np.asarray(times).astype('datetime64[s]')[valid]
+        values = values[valid]
+        if len(times) == 0:
+            return
+
+        days = times.astype('datetime64[D]')
+        if self.first_day is None:
+            self.first_day = days[0]
+        day_idx = (days - self.first_day).astype(np.int64)
+        hour_idx = ((times - days).astype('timedelta64[h]')).astype(np.int64)
+        self._grow(int(day_idx[-1]) + 1)
+
+        np.add.at(self._counts, (day_idx, hour_idx), 1)
+        if self.agg == 'mean':
+            np.add.at(self._values, (day_idx, hour_idx), values)
+        elif self.agg == 'min':
+            np.minimum.at(self._values, (day_idx, hour_idx), values)
+        elif self.agg == 'max':
+            np.maximum.at(self._values, (day_idx, hour_idx), values)
+
+    def result(self) -> Tuple[np.ndarray, np.datetime64]:
+        """Return (matrix, first day) like hour_day_matrix()."""
+        if self.first_day is None:
+            return np.full((0, 24), np.nan), np.datetime64('NaT', 'D')
+
+        if self.agg == 'count':
+            return self._counts.astype(np.float64), self.first_day
+        if self.agg == 'mean':
+            with np.errstate(invalid='ignore', divide='ignore'):
+                matrix = self._values / self._counts
+        else:
+            matrix = self._values.copy()
+        matrix[self._counts == 0] = np.nan
+        return matrix, self.first_day
+
+
+class CalendarAccumulator:
+    """Days x samples-per-day calendar matrix of one device, filled chunk by chunk."""
+
+    def __init__(self, sample_interval_minutes: int = 5):
+        self.sample_interval_minutes = sample_interval_minutes
+        self.samples_per_day = 24 * 60 // sample_interval_minutes
+        self.first_day: Optional[np.datetime64] = None
+        self.matrix = np.full((0, self.samples_per_day), np.nan)
+
+    def update(self, times: np.ndarray, values: np.ndarray) -> None:
+        """Feed the next time-ordered chunk; later readings overwrite earlier ones in the same cell."""
+        times = np.asarray(times, dtype='datetime64[s]')
+        if len(times) == 0:
+            return
+
+        days = times.astype('datetime64[D]')
+        if self.first_day is None:
+            self.first_day = days[0]
+        day_idx = (days - self.first_day).astype(np.int64)
+        minutes = ((times - days).astype('timedelta64[m]')).astype(np.int64)
+        sample_idx = minutes // self.sample_interval_minutes
+
+        num_days = int(day_idx[-1]) + 1
+        if num_days > len(self.matrix):
+            extra = np.full((num_days - len(self.matrix), self.samples_per_day), np.nan)
+            self.matrix = np.vstack([self.matrix, extra])
+
+        # Keep the last reading per cell, as the sequential fill does
+        cells = day_idx * self.samples_per_day + sample_idx
+        last = len(cells) - 1 - np.unique(cells[::-1], return_index=True)[1]
+        self.matrix.reshape(-1)[cells[last]] = np.asarray(values, dtype=np.float64)[last]
+
+    @property
+    def date_range(self) -> Tuple[Optional[datetime], Optional[datetime]]:
+        """First and last day covered by the matrix."""
+        if self.first_day is None:
+            return None, None
+        last_day = self.first_day + np.timedelta64(len(self.matrix) - 1, 'D')
+        return self.first_day.item(), last_day.item()
+
+
+class OutOfCoreRunner:
+    """Runs the chunked analyses on a sensor store within a memory budget."""
+
+    def __init__(self, store_path: str, memory_budget_mb: float = DEFAULT_MEMORY_BUDGET_MB,
+                 drop_flagged: bool = True):
+        """
+        Args:
+            store_path: Sensor store directory (or its manifest file)
+            memory_budget_mb: Peak memory allowed for the chunk data
+            drop_flagged: Leave out readings with a non-zero quality mask
+        """
+        store_path = Path(store_path)
+        if not SensorStore.is_store(store_path):
+            raise ValueError(f"Out-of-core processing needs a sensor store: {store_path}")
+        root = store_path.parent if store_path.name == 'manifest.json' else store_path
+        self.store = SensorStore(str(root), memory_budget_mb=memory_budget_mb)
+        self.memory_budget_mb = memory_budget_mb
+        self.chunk_rows = chunk_rows_for_budget(memory_budget_mb)
+        self.drop_flagged = drop_flagged
+
+    def device_names(self) -> List[str]:
+        return self.store.device_names()
+
+    def chunks(self, device_name: str) -> Iterator[Dict[str, np.ndarray]]:
+        """Time-ordered chunks of one device."""
+        if device_name not in self.store.manifest['devices']:
+            raise ValueError(f"Device '{device_name}' not found in database")
+        return iter_device_chunks(self.store, device_name, self.chunk_rows, self.drop_flagged)
+
+    def active_intervals(self, device_name: str, max_gap_minutes: int = 35) -> List[Tuple[datetime, datetime, int]]:
+        """STAT001 (start, end, record_count) intervals of one device."""
+        tracker = ActiveIntervalTracker(max_gap_minutes)
+        for chunk in self.chunks(device_name):
+            tracker.update(chunk['timestamp'])
+        return tracker.finish()
+
+    def hour_day_rollup(self, device_name: str, field: str = 'temperature',
+                        agg: str = 'mean') -> Tuple[np.ndarray, np.datetime64]:
+        """Days x 24 hours rollup of one device field."""
+        if field not in COLUMNS or field in ('timestamp', 'quality'):
+            raise ValueError(f"Unsupported field '{field}'")
+        accumulator = HourDayAccumulator(agg)
+        for chunk in self.chunks(device_name):
+            accumulator.update(chunk['timestamp'], chunk[field])
+        return accumulator.result()
+
+    def heating_cycles(self, device_name: str, rise_above_min: float, drop_below_max: float,
+                       min_gap_minutes: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Heating cycles of one device (see heating_cycles.detect_cycles())."""
+        detector = StreamingCycleDetector(rise_above_min, drop_below_max, min_gap_minutes)
+        for chunk in self.chunks(device_name):
+            detector.update(chunk['timestamp'], chunk['temperature'])
+        return detector.finish()
+
+    def calendar(self, device_name: str, sample_interval_minutes: int = 5) -> CalendarAccumulator:
+        """Calendar matrix of the temperatures of one device."""
+        accumulator = CalendarAccumulator(sample_interval_minutes)
+        for chunk in self.chunks(device_name):
+            accumulator.update(chunk['timestamp'], chunk['temperature'])
+        return accumulator
+
+    def import_device_data(self, device_data_list: List[Dict]) -> List[Dict[str, Any]]:
+        """Merge processed device data into the store in bounded chunks."""
+        return self.store.import_device_data(device_data_list)
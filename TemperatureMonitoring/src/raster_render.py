@@ -0,0 +1,179 @@
+"""
+Raster Rendering for Dense Time Series
+
+Fast alternative to drawing one matplotlib line per device with every sample.
+Each series is rasterized with NumPy into a pixel grid matching the output
+resolution: samples are binned into pixel columns, the min/max of every column
+(joined to the neighbouring columns) is filled in, and all series are
+composited into a single imshow layer. The cost depends on the image size, not
+on the number of samples.
+"""
+
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import matplotlib.colors as mcolors
+import matplotlib.dates as mdates
+from matplotlib.lines import Line2D
+
+RENDER_MODES = ('lines', 'raster')
+
+
+def check_render_mode(render_mode: str) -> None:
+    """Raise ValueError for unsupported render modes."""
+    if render_mode not in RENDER_MODES:
+        raise ValueError(f"Unsupported render mode '{render_mode}', expected one of {RENDER_MODES}")
+
+
+def _to_date_numbers(times) -> np.ndarray:
+    """Convert datetime-like values to matplotlib date numbers."""
+    return np.asarray(mdates.date2num(np.asarray(times, dtype='datetime64[s]')), dtype=np.float64)
+
+
+def column_spans(x: np.ndarray, y: np.ndarray, x_range: Tuple[float, float], y_range: Tuple[float, float],
+                 width: int, height: int, line_width: int = 1) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Reduce one sorted series to a vertical pixel span per pixel column.
+
+    Args:
+        x: Sorted x values (e.g. matplotlib date numbers)
+        y: Values belonging to x (NaN values are skipped)
+        x_range: (x_min, x_max) mapped onto the image width
+        y_range: (y_min, y_max) mapped onto the image height
+        width: Image width in pixels
+        height: Image height in pixels
+        line_width: Vertical line thickness in pixels
+
+    Returns:
+        Tuple of (used columns, lowest row, highest row); row 0 is the bottom of the plot
+    """
+    valid = ~np.isnan(y)
+    x, y = np.asarray(x)[valid], np.asarray(y, dtype=np.float64)[valid]
+    if len(x) == 0:
+        empty = np.array([], dtype=np.int64)
+        return empty, empty, empty
+
+    x_span = (x_range[1] - x_range[0]) or 1.0
+    y_span = (y_range[1] - y_range[0]) or 1.0
+    cols = np.clip(((x - x_range[0]) / x_span * width).astype(np.int64), 0, width - 1)
+    rows = np.clip(((y - y_range[0]) / y_span * height).astype(np.int64), 0, height - 1)
+
+    # Column groups: x is sorted, so every pixel column is a contiguous slice
+    starts = np.flatnonzero(np.r_[True, cols[1:] != cols[:-1]])
+    used_cols = cols[starts]
+    low = np.minimum.reduceat(rows, starts)
+    high = np.maximum.reduceat(rows, starts)
+
+    # Connect each column to its direct neighbour so the trace stays continuous
+    first_rows = rows[starts]
+    last_rows = rows[np.r_[starts[1:] - 1, len(rows) - 1]]
+    adjacent = used_cols[1:] - used_cols[:-1] == 1
+    low[1:] = np.where(adjacent, np.minimum(low[1:], last_rows[:-1]), low[1:])
+    high[1:] = np.where(adjacent, np.maximum(high[1:], last_rows[:-1]), high[1:])
+    low[:-1] = np.where(adjacent, np.minimum(low[:-1], first_rows[1:]), low[:-1])
+    high[:-1] = np.where(adjacent, np.maximum(high[:-1], first_rows[1:]), high[:-1])
+
+    half = max(line_width, 1) // 2
+    return used_cols, np.clip(low - half, 0, height - 1), np.clip(high + half, 0, height - 1)
+
+
+def _span_pixels(cols: np.ndarray, low: np.ndarray, high: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Expand column spans into (row, column) indices of the covered pixels."""
+    lengths = high - low + 1
+    offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return np.repeat(low, lengths) + offsets, np.repeat(cols, lengths)
+
+
+def rasterize_series(x: np.ndarray, y: np.ndarray, x_range: Tuple[float, float], y_range: Tuple[float, float],
+                     width: int, height: int, line_width: int = 1) -> np.ndarray:
+    """
+    Rasterize one sorted series into a boolean coverage mask.
+
+    Arguments are the same as for column_spans().
+
+    Returns:
+        Boolean array of shape (height, width); row 0 is the bottom of the plot
+    """
+    mask = np.zeros((height, width), dtype=bool)
+    rows, cols = _span_pixels(*column_spans(x, y, x_range, y_range, width, height, line_width))
+    mask[rows, cols] = True
+    return mask
+
+
+def _axes_pixel_size(ax, dpi: Optional[float]) -> Tuple[int, int]:
+    """Size of the axes area in output pixels."""
+    fig = ax.figure
+    dpi = dpi or fig.dpi
+    position = ax.get_position()
+    fig_width, fig_height = fig.get_size_inches()
+    return (max(int(position.width * fig_width * dpi), 1),
+            max(int(position.height * fig_height * dpi), 1))
+
+
+def draw_raster_series(ax, series: Sequence[Tuple[str, object, object, object]],
+                       dpi: Optional[float] = None, alpha: float = 0.8, line_width: int = 2,
+                       y_padding: float = 0.05) -> List[Line2D]:
+    """
+    Draw several time series as one raster image layer on an axes.
+
+    Args:
+        ax: Matplotlib axes
+        series: (label, timestamps, values, color) tuples; timestamps must be sorted
+        dpi: Output resolution the raster is sized for (defaults to the figure dpi)
+        alpha: Opacity of the traces
+        line_width: Trace thickness in output pixels
+        y_padding: Fraction of the value range added above and below
+
+    Returns:
+        Legend handles (empty lines carrying label and color, already added to the axes)
+    """
+    prepared = []
+    for label, times, values, color in series:
+        x = _to_date_numbers(times)
+        y = np.asarray(values, dtype=np.float64)
+        if len(x) and not np.isnan(y).all():
+            prepared.append((label, x, y, color))
+
+    handles = []
+    if not prepared:
+        return handles
+
+    x_min = min(x[0] for _, x, _, _ in prepared)
+    x_max = max(x[-1] for _, x, _, _ in prepared)
+    y_min = min(np.nanmin(y) for _, _, y, _ in prepared)
+    y_max = max(np.nanmax(y) for _, _, y, _ in prepared)
+    pad = (y_max - y_min) * y_padding or 1.0
+    y_min, y_max = y_min - pad, y_max + pad
+    if x_max == x_min:
+        x_max = x_min + 1.0
+
+    width, height = _axes_pixel_size(ax, dpi)
+
+    # Composite all traces in NumPy (premultiplied alpha, later series on top),
+    # touching only the covered pixels; matplotlib then resamples a single image
+    premultiplied = np.zeros((height, width, 3), dtype=np.float32)
+    coverage = np.zeros((height, width), dtype=np.float32)
+    keep = np.float32(1.0 - alpha)
+
+    for label, x, y, color in prepared:
+        rows, cols = _span_pixels(*column_spans(x, y, (x_min, x_max), (y_min, y_max),
+                                                width, height, line_width))
+        rgb = np.array(mcolors.to_rgb(color), dtype=np.float32)
+        premultiplied[rows, cols] = premultiplied[rows, cols] * keep + rgb * np.float32(alpha)
+        coverage[rows, cols] = coverage[rows, cols] * keep + np.float32(alpha)
+
+        # Empty line as legend entry, so ax.legend() works as for line plots
+        handles.extend(ax.plot([], [], color=color, alpha=alpha, label=label))
+
+    image = np.zeros((height, width, 4), dtype=np.uint8)
+    covered = coverage > 0
+    image[covered, :3] = np.round(premultiplied[covered] / coverage[covered, None] * 255).astype(np.uint8)
+    image[..., 3] = np.round(coverage * 255).astype(np.uint8)
+
+    ax.imshow(image, extent=(x_min, x_max, y_min, y_max), origin='lower',
+              aspect='auto', interpolation='nearest')
+
+    ax.set_xlim(x_min, x_max)
+    ax.set_ylim(y_min, y_max)
+    ax.xaxis_date()
+    return handles
@@ -0,0 +1,713 @@
+"""
+Sharded Sensor Store
+
+Stores the temperature database as a small JSON manifest plus one shard per
+device instead of a single JSON document. Each shard is a directory of NumPy
+column files (timestamp, temperature, humidity, battery_mv) written under its
+own version number, so a write to one device never touches the others and
+readers only open the shards they actually need.
+
+Layout:
+    <root>/manifest.json
+    <root>/devices/<device>/v<version>/<column>.npy
+    <root>/imports.jsonl (+ .idx)   import log, see import_log.py
+"""
+
+import itertools
+import json
+import logging
+import os
+import re
+import shutil
+import sys
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+# Add src directory to path for imports
+sys.path.append(str(Path(__file__).parent))
+
+from data_quality import QF_OK, filter_records
+
+logger = logging.getLogger(__name__)
+
+STORE_FORMAT = "sensor-store"
+STORE_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+
+# Column name -> dtype of the device shards
+COLUMNS = {
+    'timestamp': 'datetime64[s]',
+    'temperature': np.float64,
+    'humidity': np.float64,
+    'battery_mv': np.int64,
+    'quality': np.uint8,
+}
+
+# Columns that identify a reading when merging (quality is derived data)
+KEY_COLUMNS = ('timestamp', 'temperature', 'humidity', 'battery_mv')
+
+# Out-of-core processing: estimated bytes held per row of a chunk (the columns
+# themselves plus the temporaries of the analyses), and the smallest chunk
+WORKING_BYTES_PER_ROW = 256
+MIN_CHUNK_ROWS = 1024
+
+
+def _shard_dir_name(device_name: str) -> str:
+    """File system safe directory name for a device."""
+    return re.sub(r'[^A-Za-z0-9_.-]', '_', device_name)
+
+
+def _empty_columns() -> Dict[str, np.ndarray]:
+    return {name: np.array([], dtype=dtype) for name, dtype in COLUMNS.items()}
+
+
+def chunk_rows_for_budget(memory_budget_mb: float) -> int:
+    """Number of rows per chunk that keeps out-of-core processing within a memory budget."""
+    return max(MIN_CHUNK_ROWS, int(memory_budget_mb * 1024 * 1024 // WORKING_BYTES_PER_ROW))
+
+
+def iter_column_slices(columns: Dict[str, np.ndarray], start: int, stop: int,
+                       chunk_rows: int) -> Iterator[Dict[str, np.ndarray]]:
+    """Yield rows start..stop of (possibly memory-mapped) columns as in-memory chunks."""
+    for begin in range(start, stop, chunk_rows):
+        end = min(begin + chunk_rows, stop)
+        yield {name: np.array(columns[name][begin:end]) for name in COLUMNS}
+
+
+def _mapped_file(values: np.ndarray) -> Optional[Path]:
+    """File a column array is memory-mapped from (None for arrays in RAM)."""
+    while isinstance(values, np.ndarray):
+        if isinstance(values, np.memmap) and values.filename:
+            return Path(values.filename)
+        values = values.base
+    return None
+
+
+def _canonical_order(columns: Dict[str, np.ndarray]) -> np.ndarray:
+    """Row order of the shards: by timestamp, then by the remaining key columns (stable)."""
+    return np.lexsort(tuple(columns[name] for name in reversed(KEY_COLUMNS)))
+
+
+def records_to_columns(records: List[Dict]) -> Dict[str, np.ndarray]:
+    """
+    Convert processor or JSON records into column arrays.
+
+    Args:
+        records: Records with 'timestamp' (datetime or ISO string), 'temperature',
+            'humidity', 'battery_mv' and optionally 'quality'
+
+    Returns:
+        Dictionary of column arrays
+    """
+    if not records:
+        return _empty_columns()
+
+    timestamps = [r['timestamp'] for r in records]
+    if isinstance(timestamps[0], str):
+        times = np.array(timestamps, dtype='datetime64[s]')
+    else:
+        times = np.array([np.datetime64(ts, 's') for ts in timestamps], dtype='datetime64[s]')
+
+    return {
+        'timestamp': times,
+        'temperature': np.array([r['temperature'] for r in records], dtype=np.float64),
+        'humidity': np.array([r['humidity'] for r in records], dtype=np.float64),
+        'battery_mv': np.array([r['battery_mv'] for r in records], dtype=np.int64),
+        'quality': np.array([r.get('quality', QF_OK) for r in records], dtype=np.uint8),
+    }
+
+
+def columns_to_records(columns: Dict[str, np.ndarray], drop_flagged: bool = False) -> List[Dict]:
+    """
+    Convert column arrays back into JSON style records (ISO timestamp strings).
+
+    Args:
+        columns: Column arrays of one device
+        drop_flagged: Leave out readings with a non-zero quality mask
+    """
+    if drop_flagged:
+        keep = columns['quality'] == QF_OK
+        columns = {name: values[keep] for name, values in columns.items()}
+
+    timestamps = np.datetime_as_string(columns['timestamp'], unit='s')
+    return [
+        {
+            'timestamp': ts,
+            'temperature': temp,
+            'humidity': hum,
+            'battery_mv': batt,
+            'quality': quality
+        }
+        for ts, temp, hum, batt, quality in zip(timestamps.tolist(), columns['temperature'].tolist(),
+                                                columns['humidity'].tolist(), columns['battery_mv'].tolist(),
+                                                columns['quality'].tolist())
+    ]
+
+
+def merge_columns(existing: Dict[str, np.ndarray],
+                  new: Dict[str, np.ndarray]) -> Tuple[Dict[str, np.ndarray], int, int, int]:
+    """
+    Merge new rows into existing rows, dropping exact duplicates.
+
+    A row is a duplicate when timestamp, temperature, humidity and battery
+    are all equal to an existing row (same rule as the JSON importer). The
+    kept row gets the lowest quality mask of its duplicates, so a clean copy
+    clears flags raised on another one.
+
+    Returns:
+        Tuple of (merged columns sorted by timestamp, new rows added, duplicates skipped,
+        existing rows whose quality flags were cleared)
+    """
+    n_existing = len(existing['timestamp'])
+    combined = {name: np.concatenate([existing[name], new[name]]) for name in COLUMNS}
+
+    # Sort by the full row so that identical rows become adjacent; existing rows win ties
+    origin = np.concatenate([np.zeros(n_existing, dtype=np.int8), np.ones(len(new['timestamp']), dtype=np.int8)])
+    order = np.lexsort((origin, combined['battery_mv'], combined['humidity'],
+                        combined['temperature'], combined['timestamp']))
+    sorted_cols = {name: values[order] for name, values in combined.items()}
+    sorted_origin = origin[order]
+
+    keep = np.ones(len(order), dtype=bool)
+    cleared = 0
+    if len(order) > 1:
+        same = np.ones(len(order) - 1, dtype=bool)
+        for name in KEY_COLUMNS:
+            same &= sorted_cols[name][1:] == sorted_cols[name][:-1]
+        keep[1:] = ~same
+        group_starts = np.flatnonzero(keep)
+        lowest = np.minimum.reduceat(sorted_cols['quality'], group_starts)[np.cumsum(keep) - 1]
+        cleared = int(np.count_nonzero((lowest != sorted_cols['quality']) & (sorted_origin == 0)))
+        sorted_cols['quality'] = lowest
+
+    # Duplicates inside the existing data are kept as they are
+    keep |= sorted_origin == 0
+
+    merged = {name: values[keep] for name, values in sorted_cols.items()}
+    added = int(np.count_nonzero(keep & (sorted_origin == 1)))
+    duplicates = len(new['timestamp']) - added
+    return merged, added, duplicates, cleared
+
+
+class LazyDeviceMapping(Mapping):
+    """Read-only mapping of device name -> device dict that loads shards on first access."""
+
+    def __init__(self, store: 'SensorStore', drop_flagged: bool = False):
+        self._store = store
+        self._drop_flagged = drop_flagged
+        self._cache: Dict[str, Dict[str, Any]] = {}
+
+    def __getitem__(self, device_name: str) -> Dict[str, Any]:
+        if device_name not in self._cache:
+            info = self._store.device_info(device_name)
+            self._cache[device_name] = {
+                'device_name': device_name,
+                'first_seen': info.get('first_seen'),
+                'last_updated': info.get('last_updated'),
+                'total_records': info.get('record_count', 0),
+                'records': self._store.read_records(device_name, self._drop_flagged)
+            }
+        return self._cache[device_name]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._store.device_names())
+
+    def __len__(self) -> int:
+        return len(self._store.device_names())
+
+
+class SensorStore:
+    """Manifest + per-device shard storage for temperature data."""
+
+    def __init__(self, root: str = "data/temperature_store", memory_budget_mb: Optional[float] = None):
+        """
+        Args:
+            root: Store directory
+            memory_budget_mb: Merge imports into the shards in bounded chunks instead of
+                loading whole devices (out-of-core mode)
+        """
+        self.root = Path(root)
+        self.memory_budget_mb = memory_budget_mb
+        self._concurrent_merges = 1
+        self.manifest_path = self.root / MANIFEST_NAME
+        self.manifest = self._load_manifest()
+        self._columns_cache: Dict[str, Dict[str, np.ndarray]] = {}
+        self._stale_shards: List[Path] = []
+
+    # ------------------------------------------------------------------
+    # Manifest handling
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def is_store(path) -> bool:
+        """Check whether a path points to a sensor store (directory or manifest file)."""
+        path = Path(path)
+        if path.name == MANIFEST_NAME:
+            return path.exists()
+        return (path / MANIFEST_NAME).exists()
+
+    def exists(self) -> bool:
+        return self.manifest_path.exists()
+
+    def _load_manifest(self) -> Dict[str, Any]:
+        if self.manifest_path.exists():
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest.get('format') != STORE_FORMAT:
+                raise ValueError(f"Not a sensor store manifest: {self.manifest_path}")
+            return manifest
+
+        now = datetime.now().isoformat()
+        return {
+            "format": STORE_FORMAT,
+            "format_version": STORE_VERSION,
+            "metadata": {
+                "created": now,
+                "last_updated": now,
+                "version": "1.0.0",
+                "total_records": 0
+            },
+            "devices": {}
+        }
+
+    def save_manifest(self) -> None:
+        """Atomically write the manifest."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.manifest["metadata"]["last_updated"] = datetime.now().isoformat()
+        self.manifest["metadata"]["total_records"] = sum(
+            info.get('record_count', 0) for info in self.manifest['devices'].values()
+        )
+
+        tmp_path = self.manifest_path.with_suffix('.json.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.manifest_path)
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    def device_names(self) -> List[str]:
+        return list(self.manifest['devices'].keys())
+
+    def device_info(self, device_name: str) -> Dict[str, Any]:
+        if device_name not in self.manifest['devices']:
+            raise KeyError(device_name)
+        return self.manifest['devices'][device_name]
+
+    def _shard_path(self, device_name: str, version: int) -> Path:
+        shard = self.manifest['devices'][device_name]['shard']
+        return self.root / shard / f"v{version}"
+
+    def read_device(self, device_name: str, mmap: bool = False) -> Dict[str, np.ndarray]:
+        """
+        Load the column arrays of one device shard.
+
+        Args:
+            device_name: Device to read
+            mmap: Memory-map the column files instead of reading them into RAM
+
+        Returns:
+            Dictionary of column arrays (empty arrays if the device has no shard yet)
+        """
+        info = self.device_info(device_name)
+        if info.get('version', 0) == 0:
+            return _empty_columns()
+
+        if not mmap and device_name in self._columns_cache:
+            return self._columns_cache[device_name]
+
+        shard_path = self._shard_path(device_name, info['version'])
+        columns = {}
+        for name, dtype in COLUMNS.items():
+            column_path = shard_path / f"{name}.npy"
+            if column_path.exists():
+                columns[name] = np.load(column_path, mmap_mode='r' if mmap else None)
+            else:
+                # Shards written before the column existed
+                columns[name] = np.zeros(len(columns['timestamp']), dtype=dtype)
+        if not mmap:
+            self._columns_cache[device_name] = columns
+        return columns
+
+    def read_records(self, device_name: str, drop_flagged: bool = False) -> List[Dict]:
+        """Load one device as JSON style records (optionally without flagged readings)."""
+        return columns_to_records(self.read_device(device_name), drop_flagged)
+
+    def as_database(self, drop_flagged: bool = False) -> Dict[str, Any]:
+        """
+        Database dictionary view compatible with the JSON database layout.
+
+        Device records are only loaded when a device is accessed.
+
+        Args:
+            drop_flagged: Leave out readings with a non-zero quality mask
+        """
+        return {
+            "metadata": self.manifest['metadata'],
+            "devices": LazyDeviceMapping(self, drop_flagged)
+        }
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    def _ensure_device(self, device_name: str) -> Dict[str, Any]:
+        devices = self.manifest['devices']
+        if device_name not in devices:
+            used = {info['shard'] for info in devices.values()}
+            shard = f"devices/{_shard_dir_name(device_name)}"
+            suffix = 1
+            while shard in used:
+                suffix += 1
+                shard = f"devices/{_shard_dir_name(device_name)}_{suffix}"
+            devices[device_name] = {
+                "shard": shard,
+                "version": 0,
+                "record_count": 0,
+                "first_seen": datetime.now().isoformat(),
+                "last_updated": None,
+                "first_record": None,
+                "last_record": None
+            }
+        return devices[device_name]
+
+    def _new_shard_version(self, device_name: str) -> Tuple[Dict[str, Any], int, Path]:
+        """Prepare the directory of the next shard version of a device."""
+        info = self._ensure_device(device_name)
+        new_version = info['version'] + 1
+
+        shard_path = self.root / info['shard'] / f"v{new_version}"
+        if shard_path.exists():
+            shutil.rmtree(shard_path)
+        shard_path.mkdir(parents=True)
+        return info, new_version, shard_path
+
+    def _publish_shard_version(self, info: Dict[str, Any], new_version: int, record_count: int,
+                               first_record, last_record) -> None:
+        """Point the device entry at a newly written shard version."""
+        old_version = info['version']
+        info.update({
+            "version": new_version,
+            "record_count": int(record_count),
+            "last_updated": datetime.now().isoformat(),
+            "first_record": str(first_record) if record_count else None,
+            "last_record": str(last_record) if record_count else None
+        })
+        if old_version:
+            self._stale_shards.append(self.root / info['shard'] / f"v{old_version}")
+
+    def write_device(self, device_name: str, columns: Dict[str, np.ndarray]) -> int:
+        """
+        Write a new version of a device shard.
+
+        The new version is written next to the old one and only becomes visible
+        once the manifest is saved; the previous version is removed afterwards.
+
+        Returns:
+            The new shard version number
+        """
+        info, new_version, shard_path = self._new_shard_version(device_name)
+
+        for name, dtype in COLUMNS.items():
+            np.save(shard_path / f"{name}.npy", np.ascontiguousarray(columns[name], dtype=dtype))
+
+        timestamps = columns['timestamp']
+        count = len(timestamps)
+        self._publish_shard_version(info, new_version, count,
+                                    timestamps[0] if count else None, timestamps[-1] if count else None)
+        self._columns_cache[device_name] = {name: np.asarray(columns[name]) for name in COLUMNS}
+        return new_version
+
+    def write_device_chunks(self, device_name: str, chunks: Iterable[Dict[str, np.ndarray]],
+                            record_count: int) -> int:
+        """
+        Write a new shard version from time-ordered chunks without holding the device in memory.
+
+        Args:
+            device_name: Device to write
+            chunks: Column chunks in their final order
+            record_count: Total number of rows in all chunks
+
+        Returns:
+            The new shard version number
+        """
+        if record_count == 0:
+            return self.write_device(device_name, _empty_columns())
+
+        info, new_version, shard_path = self._new_shard_version(device_name)
+        outputs = {
+            name: np.lib.format.open_memmap(shard_path / f"{name}.npy", mode='w+',
+                                            dtype=dtype, shape=(record_count,))
+            for name, dtype in COLUMNS.items()
+        }
+
+        pos = 0
+        for chunk in chunks:
+            size = len(chunk['timestamp'])
+            for name in COLUMNS:
+                outputs[name][pos:pos + size] = chunk[name]
+            pos += size
+        if pos != record_count:
+            raise ValueError(f"Expected {record_count} rows for {device_name}, got {pos}")
+
+        first_record, last_record = outputs['timestamp'][0], outputs['timestamp'][-1]
+        for output in outputs.values():
+            output.flush()
+        del outputs
+
+        self._publish_shard_version(info, new_version, record_count, first_record, last_record)
+        self._columns_cache.pop(device_name, None)
+        return new_version
+
+    def _stale_versions_on_disk(self) -> List[Path]:
+        """Shard versions older than the published ones (left behind by earlier runs)."""
+        stale = []
+        for info in self.manifest['devices'].values():
+            shard_dir = self.root / info['shard']
+            if not shard_dir.is_dir():
+                continue
+            for version_path in shard_dir.glob('v*'):
+                version = version_path.name[1:]
+                if version.isdigit() and int(version) < info['version']:
+                    stale.append(version_path)
+        return stale
+
+    def _release_shard(self, shard_path: Path) -> None:
+        """Drop cached columns that are memory-mapped from files of a shard version."""
+        shard_path = shard_path.resolve()
+        for device_name, columns in list(self._columns_cache.items()):
+            mapped = (_mapped_file(values) for values in columns.values())
+            if any(path is not None and path.resolve().parent == shard_path for path in mapped):
+                del self._columns_cache[device_name]
+
+    def _remove_stale_versions(self) -> None:
+        """
+        Delete shard versions that are no longer referenced by the manifest.
+
+        Cached columns mapping an old version are released first. A version that
+        cannot be removed (e.g. a reader still maps it on Windows) is logged and
+        removed again by the next import.
+        """
+        stale = set(self._stale_shards) | set(self._stale_versions_on_disk())
+        self._stale_shards = []
+        for shard_path in sorted(stale):
+            self._release_shard(shard_path)
+            try:
+                shutil.rmtree(shard_path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"Could not remove old shard version {shard_path}, "
+                               f"retrying at the next import: {e}")
+                self._stale_shards.append(shard_path)
+
+    def merge_device_records(self, device_name: str, records: List[Dict]) -> Tuple[int, int]:
+        """
+        Merge new records into a device shard (duplicates are skipped).
+
+        Returns:
+            Tuple of (new_records_added, duplicate_records_skipped)
+        """
+        if not records:
+            logger.warning(f"No data records found for device {device_name}")
+            return 0, 0
+
+        self._ensure_device(device_name)
+        if self.memory_budget_mb:
+            added, duplicates = self._merge_out_of_core(device_name, records_to_columns(records),
+                                                        chunk_rows_for_budget(self.memory_budget_mb
+                                                                              / self._concurrent_merges))
+        else:
+            existing = self.read_device(device_name)
+            merged, added, duplicates, cleared = merge_columns(existing, records_to_columns(records))
+            if added or cleared:
+                self.write_device(device_name, merged)
+
+        logger.info(f"Device {device_name}: {added} new records, {duplicates} duplicates skipped")
+        return added, duplicates
+
+    def _merge_out_of_core(self, device_name: str, new: Dict[str, np.ndarray],
+                           chunk_rows: int) -> Tuple[int, int]:
+        """
+        Merge new rows into a memory-mapped shard.
+
+        Shards are kept in canonical row order, so only the existing rows inside the
+        time range of the new rows take part in the merge; the rows before and after
+        are copied over in chunks. The result is identical to merge_columns().
+
+        Returns:
+            Tuple of (new_records_added, duplicate_records_skipped)
+        """
+        existing = self.read_device(device_name, mmap=True)
+        times = existing['timestamp']
+        total = len(times)
+        low = int(np.searchsorted(times, new['timestamp'].min(), side='left'))
+        high = int(np.searchsorted(times, new['timestamp'].max(), side='right'))
+
+        window = {name: np.array(existing[name][low:high]) for name in COLUMNS}
+        merged, added, duplicates, cleared = merge_columns(window, new)
+
+        if added or cleared:
+            chunks = itertools.chain(iter_column_slices(existing, 0, low, chunk_rows),
+                                     iter_column_slices(merged, 0, len(merged['timestamp']), chunk_rows),
+                                     iter_column_slices(existing, high, total, chunk_rows))
+            self.write_device_chunks(device_name, chunks, total - (high - low) + len(merged['timestamp']))
+        return added, duplicates
+
+    def _import_device(self, device_data: Dict) -> Optional[Tuple[str, int, int]]:
+        """Merge one device of an import; a failing device is logged and skipped (None)."""
+        device_name = device_data['device_name']
+        try:
+            return (device_name, *self.merge_device_records(device_name, device_data['data']))
+        except Exception as e:
+            logger.error(f"Error saving data for device {device_name}: {e}")
+            return None
+
+    def import_device_data(self, device_data_list: List[Dict],
+                           max_workers: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Merge processed device data into the store, one device per worker.
+
+        A device whose data cannot be merged is logged and left out of the
+        statistics; the other devices are imported.
+
+        Args:
+            device_data_list: Output of TemperatureDataProcessor.process_zip_file()
+            max_workers: Thread pool size (defaults to the number of devices, max 8)
+
+        Returns:
+            Per-device statistics with 'name', 'new_records' and 'duplicates'
+        """
+        if not device_data_list:
+            return []
+
+        # Register devices up front so the workers never modify the device table concurrently
+        for device_data in device_data_list:
+            self._ensure_device(device_data['device_name'])
+
+        workers = max_workers or min(8, len(device_data_list))
+        # Every worker merges one device at a time, so they share the memory budget
+        self._concurrent_merges = workers
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(self._import_device, device_data_list))
+        self._concurrent_merges = 1
+
+        # Devices registered above whose first import failed are not kept
+        for device_data, result in zip(device_data_list, results):
+            if result is None and self.manifest['devices'].get(device_data['device_name'], {}).get('version') == 0:
+                del self.manifest['devices'][device_data['device_name']]
+
+        self.save_manifest()
+        self._remove_stale_versions()
+
+        return [
+            {"name": name, "new_records": added, "duplicates": duplicates}
+            for name, added, duplicates in filter(None, results)
+        ]
+
+    # ------------------------------------------------------------------
+    # Migration
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def from_json(cls, json_db_path: str, root: str) -> 'SensorStore':
+        """
+        Create a sharded store from an existing JSON database.
+
+        Args:
+            json_db_path: Path of temperature_database.json
+            root: Directory of the new store
+
+        Returns:
+            The populated store
+        """
+        with open(json_db_path, 'r', encoding='utf-8') as f:
+            database = json.load(f)
+
+        store = cls(root)
+        if 'created' in database.get('metadata', {}):
+            store.manifest['metadata']['created'] = database['metadata']['created']
+
+        for device_name, device_data in database.get('devices', {}).items():
+            info = store._ensure_device(device_name)
+            if device_data.get('first_seen'):
+                info['first_seen'] = device_data['first_seen']
+            columns = records_to_columns(device_data.get('records', []))
+            order = _canonical_order(columns)
+            store.write_device(device_name, {name: values[order] for name, values in columns.items()})
+
+        # Import log of the JSON database, or its legacy 'import_history' section
+        from import_log import ImportLog, open_import_log
+        json_log = ImportLog.for_database(json_db_path)
+        store_log = open_import_log(ImportLog.for_store(store.root), database)
+        if len(store_log) == 0:
+            store_log.extend(json_log.tail(len(json_log)))
+
+        # Gas meter readings (series next to the JSON file and legacy 'gasmeter' section)
+        from gasmeter import STORE_SERIES_DIR, GasmeterSeries, legacy_readings
+        gas_series = GasmeterSeries(store.root / STORE_SERIES_DIR)
+        sidecar = GasmeterSeries.for_database(json_db_path)
+        if sidecar.exists():
+            columns = sidecar.read()
+            gas_series.merge(columns['timestamp'], columns['value'])
+        legacy = legacy_readings(database)
+        if legacy is not None:
+            gas_series.merge(*legacy)
+
+        store.save_manifest()
+        store._remove_stale_versions()
+        logger.info(f"Migrated {len(store.device_names())} devices from {json_db_path} to {root}")
+        return store
+
+
+def load_database(path: str, drop_flagged: bool = True) -> Dict[str, Any]:
+    """
+    Load a temperature database from either a JSON file or a sensor store.
+
+    Sensor stores are returned as a lazy view whose devices are only read
+    when accessed. Readings flagged by the ingest quality checks are dropped
+    here, so the analyses never see them.
+
+    Args:
+        path: JSON database file or sensor store directory
+        drop_flagged: Leave out readings with a non-zero quality mask
+    """
+    path = Path(path)
+    if SensorStore.is_store(path):
+        root = path.parent if path.name == MANIFEST_NAME else path
+        return SensorStore(str(root)).as_database(drop_flagged)
+
+    with open(path, 'r', encoding='utf-8') as f:
+        database = json.load(f)
+
+    if drop_flagged:
+        for device in database.get('devices', {}).values():
+            device['records'] = filter_records(device.get('records', []))
+    return database
+
+
+def main():
+    """Command line entry point: migrate a JSON database into a sensor store."""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    json_path = sys.argv[1] if len(sys.argv) > 1 else "data/temperature_database.json"
+    store_path = sys.argv[2] if len(sys.argv) > 2 else "data/temperature_store"
+
+    if not Path(json_path).exists():
+        print(f"Error: database not found: {json_path}")
+        return 1
+
+    store = SensorStore.from_json(json_path, store_path)
+    print(f"Migrated {len(store.device_names())} devices "
+          f"({store.manifest['metadata']['total_records']} records) to {store_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -12,6 +12,13 @@ from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 import logging
+import sys
+
+# Add src directory to path for imports
+sys.path.append(str(Path(__file__).parent))
+
+from sensor_store import load_database
+from raster_render import check_render_mode, draw_raster_series
 
 logger = logging.getLogger(__name__)
 
@@ -118,12 +125,11 @@ class SimpleTemperatureVisualizer:
         return str(save_path)
         
     def _load_database(self) -> Dict:
-        """Load the JSON database."""
+        """Load the JSON database (or a sensor store directory)."""
         if not self.json_db_path.exists():
             raise FileNotFoundError(f"Database not found: {self.json_db_path}")
         
-        with open(self.json_db_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return load_database(self.json_db_path)
     
     def _get_device_dataframe(self, device_name: str) -> pd.DataFrame:
         """Get cached DataFrame for a device, creating it if needed."""
@@ -239,17 +245,20 @@ class SimpleTemperatureVisualizer:
         return str(save_path)
     
     def create_temperature_comparison(self, device_names: Optional[List[str]] = None,
-                                    days_limit: Optional[int] = None) -> str:
+                                    days_limit: Optional[int] = None,
+                                    render_mode: str = 'lines') -> str:
         """
         Create a temperature comparison plot for multiple devices.
         
         Args:
             device_names: List of device names (None for all devices)
             days_limit: Limit data to last N days (None for all data)
+            render_mode: 'lines' (one line per device) or 'raster' (fast pixel-grid rendering)
             
         Returns:
             Path to saved plot
         """
+        check_render_mode(render_mode)
         if device_names is None:
             device_names = list(self.database.get('devices', {}).keys())
         
@@ -260,6 +269,7 @@ class SimpleTemperatureVisualizer:
         
         # Use simple color cycling
         colors = ['blue', 'red', 'green', 'orange', 'purple', 'brown', 'pink', 'gray', 'olive', 'cyan'] * 2
+        raster_series = []
         
         for i, device_name in enumerate(device_names):
             try:
@@ -273,13 +283,19 @@ class SimpleTemperatureVisualizer:
                     cutoff_date = df['timestamp'].max() - timedelta(days=days_limit)
                     df = df[df['timestamp'] >= cutoff_date]
                 
-                if len(df) > 0:
+                if len(df) > 0 and render_mode == 'raster':
+                    raster_series.append((device_name, df['timestamp'].values, df['temperature'].values,
+                                          colors[i % len(colors)]))
+                elif len(df) > 0:
                     ax.plot(df['timestamp'], df['temperature'], 
-                           linewidth=1.5, label=device_name, color=colors[i], alpha=0.8)
+                           linewidth=1.5, label=device_name, color=colors[i % len(colors)], alpha=0.8)
             except ValueError:
                 logger.warning(f"Device '{device_name}' not found, skipping")
                 continue
         
+        if raster_series:
+            draw_raster_series(ax, raster_series, dpi=300)
+        
         ax.set_xlabel('Time')
         ax.set_ylabel('Temperature (°C)')
         title = f'Temperature Comparison - All Devices'
@@ -0,0 +1,329 @@
+"""
+Streaming Data Export
+
+Exports device readings and derived temperature difference series without
+building the whole result in memory. The requested time range is processed in
+windows: for every window the sorted runs of all devices (and the derived
+series, computed with the sorted-array nearest join) are merged into time
+order and appended to the output file, which can be CSV, Parquet or XLSX.
+
+The exporter reports progress through a callback and checks a cancel event
+between windows, so it can run on a worker thread of the GUI.
+"""
+
+import logging
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from timeseries import align_nearest
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = ('csv', 'parquet', 'xlsx')
+EXPORT_COLUMNS = ['timestamp', 'device', 'temperature', 'humidity', 'battery_mv']
+
+DEFAULT_CHUNK_DAYS = 7
+SYNC_TOLERANCE_MINUTES = 15
+XLSX_MAX_ROWS = 1048575  # Excel row limit minus the header row
+
+# Derived difference series offered by the GUI: (export label, room device, reference device)
+DERIVED_SERIES = {
+    'stat002': ('STAT002_Room_Intake_Diff', 'T3_Kek', 'T1_BE'),
+    'room_external': ('Room_External_Diff', 'T3_Kek', 'T2_Terasz'),
+}
+
+
+class ExportCancelled(Exception):
+    """Raised when an export is cancelled through its cancel event."""
+
+
+def export_format(path: str) -> str:
+    """Determine the export format from the file extension (defaults to CSV)."""
+    suffix = Path(path).suffix.lower().lstrip('.')
+    return suffix if suffix in EXPORT_FORMATS else 'csv'
+
+
+def _device_columns(records: List[Dict]) -> Tuple[np.ndarray, ...]:
+    """Sorted (timestamps, temperature, humidity, battery) arrays of one device."""
+    if not records:
+        empty = np.array([], dtype=np.float64)
+        return np.array([], dtype='datetime64[s]'), empty, empty, empty
+
+    times = pd.to_datetime([r['timestamp'] for r in records], format='ISO8601').values.astype('datetime64[s]')
+    order = np.argsort(times, kind='stable')
+    columns = [np.array([r.get(field, np.nan) for r in records], dtype=np.float64)[order]
+               for field in ('temperature', 'humidity', 'battery_mv')]
+    return (times[order], *columns)
+
+
+class _CsvWriter:
+    def __init__(self, path: str):
+        self.file = open(path, 'w', encoding='utf-8', newline='')
+        self.header = True
+
+    def write(self, frame: pd.DataFrame) -> None:
+        frame.to_csv(self.file, header=self.header, index=False)
+        self.header = False
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class _ParquetWriter:
+    def __init__(self, path: str):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Parquet export requires pyarrow (pip install pyarrow)")
+
+        self.pa = pa
+        self.schema = pa.schema([
+            ('timestamp', pa.timestamp('s')),
+            ('device', pa.string()),
+            ('temperature', pa.float64()),
+            ('humidity', pa.float64()),
+            ('battery_mv', pa.int64()),
+        ])
+        self.writer = pq.ParquetWriter(path, self.schema)
+
+    def write(self, frame: pd.DataFrame) -> None:
+        self.writer.write_table(self.pa.Table.from_pandas(frame, schema=self.schema, preserve_index=False))
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+class _XlsxWriter:
+    def __init__(self, path: str):
+        from openpyxl import Workbook
+
+        self.path = path
+        self.workbook = Workbook(write_only=True)
+        self.sheet = None
+        self.sheet_rows = 0
+        self._new_sheet()
+
+    def _new_sheet(self) -> None:
+        number = len(self.workbook.worksheets) + 1
+        self.sheet = self.workbook.create_sheet(title="Data" if number == 1 else f"Data_{number}")
+        self.sheet.append(EXPORT_COLUMNS)
+        self.sheet_rows = 0
+
+    def write(self, frame: pd.DataFrame) -> None:
+        rows = frame.astype(object).where(frame.notna(), None)
+        rows['timestamp'] = frame['timestamp'].dt.to_pydatetime()
+        for row in rows.itertuples(index=False, name=None):
+            if self.sheet_rows >= XLSX_MAX_ROWS:
+                self._new_sheet()
+            self.sheet.append(list(row))
+            self.sheet_rows += 1
+
+    def close(self) -> None:
+        self.workbook.save(self.path)
+
+
+WRITERS = {'csv': _CsvWriter, 'parquet': _ParquetWriter, 'xlsx': _XlsxWriter}
+
+
+class StreamingExporter:
+    """Time-ordered, windowed export of device and derived series."""
+
+    def __init__(self, database: Dict, devices: List[str],
+                 derived: Optional[List[Tuple[str, str, str]]] = None,
+                 start_date: Optional[datetime] = None, end_date: Optional[datetime] = None,
+                 chunk_days: int = DEFAULT_CHUNK_DAYS,
+                 tolerance_minutes: float = SYNC_TOLERANCE_MINUTES):
+        """
+        Args:
+            database: Temperature database dictionary (JSON or sensor store view)
+            devices: Devices whose readings are exported
+            derived: Difference series as (label, room_device, reference_device) tuples
+            start_date: First timestamp to export (inclusive)
+            end_date: Last timestamp to export (inclusive)
+            chunk_days: Width of the time windows written at once
+            tolerance_minutes: Maximum distance for matching room and reference samples
+        """
+        self.database = database
+        self.devices = list(devices)
+        self.derived = list(derived or [])
+        self.start = np.datetime64(start_date, 's') if start_date else None
+        self.end = np.datetime64(end_date, 's') if end_date else None
+        self.window = np.timedelta64(chunk_days * 86400, 's')
+        self.tolerance = np.timedelta64(int(tolerance_minutes * 60), 's')
+        self.tolerance_minutes = tolerance_minutes
+        self._columns: Dict[str, Tuple[np.ndarray, ...]] = {}
+
+    def _columns_of(self, device: str) -> Tuple[np.ndarray, ...]:
+        """Sorted arrays of a device, loaded once and shared by all windows."""
+        if device not in self._columns:
+            records = self.database.get('devices', {}).get(device, {}).get('records', [])
+            self._columns[device] = _device_columns(records)
+        return self._columns[device]
+
+    def _time_bounds(self) -> Optional[Tuple[np.datetime64, np.datetime64]]:
+        """First and last exported timestamp over all sources."""
+        involved = set(self.devices) | {d for _, room, ref in self.derived for d in (room, ref)}
+        firsts, lasts = [], []
+        for device in involved:
+            times = self._columns_of(device)[0]
+            if self.start is not None:
+                times = times[np.searchsorted(times, self.start, side='left'):]
+            if self.end is not None:
+                times = times[:np.searchsorted(times, self.end, side='right')]
+            if len(times):
+                firsts.append(times[0])
+                lasts.append(times[-1])
+        if not firsts:
+            return None
+        return min(firsts), max(lasts)
+
+    def _device_slice(self, device: str, w0: np.datetime64, w1: np.datetime64) -> Tuple[np.ndarray, ...]:
+        times, temperature, humidity, battery = self._columns_of(device)
+        i0, i1 = np.searchsorted(times, [w0, w1], side='left')
+        return times[i0:i1], temperature[i0:i1], humidity[i0:i1], battery[i0:i1]
+
+    def _derived_slice(self, room: str, reference: str,
+                       w0: np.datetime64, w1: np.datetime64) -> Tuple[np.ndarray, np.ndarray]:
+        """Room - reference difference for the room samples of one window."""
+        room_times, room_temp, _, _ = self._device_slice(room, w0, w1)
+        ref_times, ref_temp, _, _ = self._columns_of(reference)
+
+        # Only the reference samples that can be within tolerance of this window
+        j0, j1 = np.searchsorted(ref_times, [w0 - self.tolerance, w1 + self.tolerance], side='left')
+        aligned = align_nearest(room_times, ref_times[j0:j1], ref_temp[j0:j1], self.tolerance_minutes)
+
+        valid = ~np.isnan(aligned)
+        return room_times[valid], (room_temp - aligned)[valid]
+
+    def _merge_window(self, w0: np.datetime64, w1: np.datetime64) -> pd.DataFrame:
+        """K-way merge of all sorted source runs of one window into time order."""
+        times, labels, temperature, humidity, battery, source = [], [], [], [], [], []
+
+        for index, device in enumerate(self.devices):
+            t, temp, hum, batt = self._device_slice(device, w0, w1)
+            times.append(t)
+            labels.append(np.full(len(t), device, dtype=object))
+            temperature.append(temp)
+            humidity.append(hum)
+            battery.append(batt)
+            source.append(np.full(len(t), index))
+
+        for offset, (label, room, reference) in enumerate(self.derived, start=len(self.devices)):
+            t, diff = self._derived_slice(room, reference, w0, w1)
+            times.append(t)
+            labels.append(np.full(len(t), label, dtype=object))
+            temperature.append(diff)
+            humidity.append(np.full(len(t), np.nan))
+            battery.append(np.full(len(t), np.nan))
+            source.append(np.full(len(t), offset))
+
+        all_times = np.concatenate(times)
+        # Stable order by timestamp, ties keep the source order
+        order = np.lexsort((np.concatenate(source), all_times))
+
+        return pd.DataFrame({
+            'timestamp': all_times[order],
+            'device': np.concatenate(labels)[order],
+            'temperature': np.concatenate(temperature)[order],
+            'humidity': np.concatenate(humidity)[order],
+            'battery_mv': pd.array(np.concatenate(battery)[order], dtype='Int64')
+        }, columns=EXPORT_COLUMNS)
+
+    def iter_chunks(self, cancel_event: Optional[threading.Event] = None) -> Iterator[Tuple[pd.DataFrame, float]]:
+        """
+        Yield time-ordered export chunks.
+
+        Yields:
+            Tuples of (chunk DataFrame, fraction of the time range done)
+        """
+        bounds = self._time_bounds()
+        if bounds is None:
+            return
+
+        first, last = bounds
+        end_exclusive = last + np.timedelta64(1, 's')
+        total = (end_exclusive - first) / self.window
+
+        w0 = first
+        while w0 < end_exclusive:
+            if cancel_event is not None and cancel_event.is_set():
+                raise ExportCancelled()
+
+            w1 = min(w0 + self.window, end_exclusive)
+            chunk = self._merge_window(w0, w1)
+            yield chunk, min(1.0, ((w1 - first) / self.window) / total)
+            w0 = w1
+
+    def export(self, output_path: str, progress_callback: Optional[Callable[[float, str], None]] = None,
+               cancel_event: Optional[threading.Event] = None) -> Dict[str, Any]:
+        """
+        Stream the export to a file.
+
+        Args:
+            output_path: Target file (.csv, .parquet or .xlsx)
+            progress_callback: Called with (fraction done, status message) after every window
+            cancel_event: Set this event to stop the export; the partial file is removed
+
+        Returns:
+            Dictionary with 'path', 'format' and 'rows'
+        """
+        fmt = export_format(output_path)
+        writer = WRITERS[fmt](output_path)
+        rows = 0
+
+        try:
+            for chunk, fraction in self.iter_chunks(cancel_event):
+                if len(chunk):
+                    writer.write(chunk)
+                    rows += len(chunk)
+                if progress_callback:
+                    progress_callback(fraction, f"Exported {rows} rows")
+            writer.close()
+        except BaseException:
+            try:
+                writer.close()
+            finally:
+                if os.path.exists(output_path):
+                    os.remove(output_path)
+            raise
+
+        logger.info(f"Exported {rows} rows to {output_path}")
+        return {'path': output_path, 'format': fmt, 'rows': rows}
+
+
+def difference_frame(database: Dict, room: str, reference: str,
+                     start_date: Optional[datetime] = None, end_date: Optional[datetime] = None,
+                     tolerance_minutes: float = SYNC_TOLERANCE_MINUTES) -> pd.DataFrame:
+    """
+    Room - reference temperature difference as a DataFrame (for plotting).
+
+    Returns:
+        DataFrame with timestamp, room_temp, reference_temp and temperature_difference columns
+    """
+    devices = database.get('devices', {})
+    room_times, room_temp, _, _ = _device_columns(devices.get(room, {}).get('records', []))
+    ref_times, ref_temp, _, _ = _device_columns(devices.get(reference, {}).get('records', []))
+
+    keep = np.ones(len(room_times), dtype=bool)
+    if start_date:
+        keep &= room_times >= np.datetime64(start_date, 's')
+    if end_date:
+        keep &= room_times <= np.datetime64(end_date, 's')
+    room_times, room_temp = room_times[keep], room_temp[keep]
+
+    reference_temp = align_nearest(room_times, ref_times, ref_temp, tolerance_minutes)
+
+    valid = ~np.isnan(reference_temp)
+    return pd.DataFrame({
+        'timestamp': pd.to_datetime(room_times[valid]),
+        'room_temp': room_temp[valid],
+        'reference_temp': reference_temp[valid],
+        'temperature_difference': (room_temp - reference_temp)[valid]
+    })
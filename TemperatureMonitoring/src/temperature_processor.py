@@ -5,24 +5,33 @@ A Python application for processing temperature sensor data from CSV files
 packed in ZIP archives, generating visualizations and Excel reports.
 """
 
+import heapq
 import zipfile
 import csv
-import pandas as pd
 from datetime import datetime
-from typing import List, Dict, Tuple, Optional
+from typing import List, Dict, Iterator, Tuple, Optional
 from pathlib import Path
 import logging
+import sys
+
+# Add src directory to path for imports
+sys.path.append(str(Path(__file__).parent))
+
+from data_quality import annotate_records, summarize_flags
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 
 class TemperatureDataProcessor:
     """Main class for processing temperature monitoring data."""
     
-    def __init__(self):
+    def __init__(self, quality_config: Optional[Dict] = None):
+        """
+        Args:
+            quality_config: Optional overrides of data_quality.QUALITY_CONFIG
+        """
         self.data: List[Dict] = []
+        self.quality_config = quality_config
         
     def extract_zip_files(self, zip_path: str, extract_to: str = "data/extracted") -> List[str]:
         """
@@ -106,6 +115,13 @@ class TemperatureDataProcessor:
             
             if invalid_lines > 0:
                 logger.info(f"Skipped {invalid_lines} invalid lines in {csv_path}, processed {len(data_records)} valid records")
+            
+            # Flag sensor glitches on the whole file at once (records keep their file order here)
+            annotate_records(data_records, self.quality_config)
+            flags = summarize_flags([r['quality'] for r in data_records])
+            if flags['flagged']:
+                logger.info(f"Quality flags in {csv_path}: "
+                            f"{', '.join(f'{name}={count}' for name, count in flags.items() if count)}")
                         
             return {
                 'device_name': device_name,
@@ -142,6 +158,64 @@ class TemperatureDataProcessor:
         except (ValueError, OverflowError, OSError) as e:
             raise ValueError(f"Invalid timestamp {csv_timestamp}: {e}")
     
+    @staticmethod
+    def _record_key(record: Dict) -> Tuple:
+        """Sort and duplicate detection key of a record (timestamp first)."""
+        return (record['timestamp'], record['temperature'], record['humidity'], record['battery_mv'])
+    
+    def _sorted_runs(self, records: List[Dict]) -> List[Iterator[Dict]]:
+        """
+        Split records (in file order) into ascending runs.
+        
+        CSV files are nearly sorted by time, so this usually yields a single run.
+        The runs are lazy iterators over the original list, no records are copied.
+        """
+        if not records:
+            return []
+        
+        boundaries = [0]
+        previous = self._record_key(records[0])
+        for index in range(1, len(records)):
+            key = self._record_key(records[index])
+            if key < previous:
+                boundaries.append(index)
+            previous = key
+        boundaries.append(len(records))
+        
+        return [
+            (records[i] for i in range(start, end))
+            for start, end in zip(boundaries[:-1], boundaries[1:])
+        ]
+    
+    def _merge_runs(self, runs: List[Iterator[Dict]]) -> Tuple[List[Dict], int]:
+        """
+        Streaming k-way merge of sorted runs with adjacent duplicate removal.
+        
+        Identical records (same timestamp and values) become neighbours in the
+        merged order, so comparing each record with the previous one is enough.
+        For equal records the one with the fewest quality flags (lowest mask) is
+        kept, so a clean copy from any file wins over a flagged one; on a tie the
+        one from the earlier run is kept.
+        
+        Returns:
+            Tuple of (merged unique records, number of duplicates removed)
+        """
+        merged = []
+        duplicates = 0
+        previous = None
+        
+        for record in heapq.merge(*runs, key=self._record_key):
+            key = self._record_key(record)
+            if key == previous:
+                duplicates += 1
+                if record.get('quality', 0) < merged[-1].get('quality', 0):
+                    merged[-1] = record
+                continue
+            merged.append(record)
+            previous = key
+        
+        return merged, duplicates
+    
     def process_zip_file(self, zip_path: str) -> List[Dict]:
         """
         Process a complete ZIP file containing CSV files.
@@ -157,8 +231,9 @@ class TemperatureDataProcessor:
         # Extract CSV files
         extracted_files = self.extract_zip_files(zip_path)
         
-        # Dictionary to store merged device data
+        # Device name -> device data; the records of every CSV file are kept as a separate run
         device_data_map = {}
+        device_runs = {}
         
         # Process each CSV file
         for csv_file in extracted_files:
@@ -167,46 +242,23 @@ class TemperatureDataProcessor:
                 device_name = data['device_name']
                 
                 if device_name in device_data_map:
-                    # Merge data for existing device
-                    device_data_map[device_name]['data'].extend(data['data'])
                     logger.info(f"Merged {len(data['data'])} records into existing device {device_name}")
                 else:
                     # New device
                     device_data_map[device_name] = data
+                    device_runs[device_name] = []
                     logger.info(f"Processed {len(data['data'])} records from new device {device_name}")
+                
+                device_runs[device_name].extend(self._sorted_runs(data['data']))
                     
             except Exception as e:
                 logger.error(f"Failed to process {csv_file}: {e}")
         
-        # Convert to list and remove duplicates for each device
+        # Merge the sorted runs of each device and remove duplicates in the same pass
         processed_data = []
         for device_name, device_data in device_data_map.items():
-            # Remove duplicate records based on timestamp and data values
-            unique_records = []
-            seen_records = set()
-            duplicates_removed = 0
-            faulty_records = 0
-            
-            for record in device_data['data']:
-                # Create a unique key from timestamp and all data values
-                record_key = (
-                    record['timestamp'].isoformat(),
-                    record['temperature'],
-                    record['humidity'],
-                    record['battery_mv']
-                )
-                
-                if record_key not in seen_records:
-                    seen_records.add(record_key)
-                    unique_records.append(record)
-                else:
-                    duplicates_removed += 1
-            
-            # Update device data with unique records
+            unique_records, duplicates_removed = self._merge_runs(device_runs.pop(device_name))
             device_data['data'] = unique_records
-            
-            # Sort data by timestamp
-            device_data['data'].sort(key=lambda x: x['timestamp'])
             processed_data.append(device_data)
             
             # Comprehensive logging
@@ -220,6 +272,7 @@ class TemperatureDataProcessor:
 
 def main():
     """Main entry point for the application."""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
     processor = TemperatureDataProcessor()
     
     # Example usage
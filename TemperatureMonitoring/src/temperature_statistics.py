@@ -5,31 +5,66 @@ This module provides various statistics for temperature monitoring data,
 starting with STAT001 - Active time interval of devices.
 """
 
+import argparse
 import json
 import logging
+import sys
 import numpy as np
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Dict, List, Tuple, Any, Optional
 
+# Add src directory to path for imports
+sys.path.append(str(Path(__file__).parent))
+
+from sensor_store import load_database
+
 logger = logging.getLogger(__name__)
 
+# Reference (intake / external) devices used for the multi-pair STAT002 analysis
+STAT002_REFERENCE_DEVICES = ['T1_BE', 'T2_Terasz']
+
+
+def format_active_interval(start: datetime, end: datetime, record_count: int,
+                           expected_interval_minutes: int) -> Dict[str, Any]:
+    """Format one STAT001 interval (shared by the in-memory and the out-of-core mode)."""
+    duration = end - start
+    expected_records = int(duration.total_seconds() / (expected_interval_minutes * 60)) + 1
+    return {
+        'start_time': start.strftime('%Y-%m-%d %H:%M:%S'),
+        'end_time': end.strftime('%Y-%m-%d %H:%M:%S'),
+        'duration_hours': round(duration.total_seconds() / 3600, 2),
+        'duration_days': round(duration.total_seconds() / 86400, 1),
+        'record_count': record_count,
+        'expected_records': expected_records,
+        'completeness_percent': round((record_count / max(1, expected_records)) * 100, 1)
+    }
+
 
 class TemperatureStatistics:
     """Provides statistical analysis of temperature monitoring data."""
     
-    def __init__(self, json_db_path: str = "data/temperature_database.json"):
+    def __init__(self, json_db_path: str = "data/temperature_database.json",
+                 memory_budget_mb: Optional[float] = None):
+        """
+        Args:
+            json_db_path: JSON database or sensor store directory
+            memory_budget_mb: Run STAT001 out-of-core in bounded chunks (sensor stores only)
+        """
         self.json_db_path = Path(json_db_path)
         self.database = self._load_database()
+        self.out_of_core = None
+        if memory_budget_mb:
+            from out_of_core import OutOfCoreRunner
+            self.out_of_core = OutOfCoreRunner(str(self.json_db_path), memory_budget_mb)
         
     def _load_database(self) -> Dict:
-        """Load the JSON database."""
+        """Load the JSON database (or a sensor store directory)."""
         if not self.json_db_path.exists():
             raise FileNotFoundError(f"Database not found: {self.json_db_path}")
         
         try:
-            with open(self.json_db_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return load_database(self.json_db_path)
         except json.JSONDecodeError as e:
             raise ValueError(f"Invalid JSON database: {e}")
     
@@ -52,6 +87,15 @@ class TemperatureStatistics:
         if not self.database.get('devices'):
             return {}
         
+        if self.out_of_core is not None:
+            return {
+                device_name: [
+                    format_active_interval(start, end, count, expected_interval_minutes)
+                    for start, end, count in self.out_of_core.active_intervals(device_name, max_gap_minutes)
+                ]
+                for device_name in self.out_of_core.device_names()
+            }
+        
         results = {}
         max_gap = timedelta(minutes=max_gap_minutes)
         expected_interval = timedelta(minutes=expected_interval_minutes)
@@ -111,22 +155,11 @@ class TemperatureStatistics:
             })
             
             # Format intervals for output
-            formatted_intervals = []
-            for interval in intervals:
-                formatted_intervals.append({
-                    'start_time': interval['start'].strftime('%Y-%m-%d %H:%M:%S'),
-                    'end_time': interval['end'].strftime('%Y-%m-%d %H:%M:%S'),
-                    'duration_hours': round(interval['duration'].total_seconds() / 3600, 2),
-                    'duration_days': round(interval['duration'].total_seconds() / 86400, 1),
-                    'record_count': interval['record_count'],
-                    'expected_records': int(interval['duration'].total_seconds() / (expected_interval_minutes * 60)) + 1,
-                    'completeness_percent': round(
-                        (interval['record_count'] / max(1, int(interval['duration'].total_seconds() / (expected_interval_minutes * 60)) + 1)) * 100, 
-                        1
-                    )
-                })
-            
-            results[device_name] = formatted_intervals
+            results[device_name] = [
+                format_active_interval(interval['start'], interval['end'], interval['record_count'],
+                                       expected_interval_minutes)
+                for interval in intervals
+            ]
         
         return results
     
@@ -271,6 +304,41 @@ class TemperatureStatistics:
             'detailed_results': results
         }
     
+    def stat002_multi_pair_ventilation_analysis(self, pairs: Optional[List[Tuple[str, str]]] = None,
+                                                step_minutes: int = 15,
+                                                neutral_band_celsius: float = 0.5) -> Dict[str, Any]:
+        """
+        STAT002 (batch): Temperature difference analysis for many device pairs.
+
+        All series are aligned once on a common time grid; differences, statistics
+        and the ventilation classification are computed for all pairs together.
+
+        Args:
+            pairs: List of (room, reference) device pairs. Defaults to every device
+                against every available device in STAT002_REFERENCE_DEVICES.
+            step_minutes: Width of the common time grid cells
+            neutral_band_celsius: Differences within +/- this band are classified as uncertain
+
+        Returns:
+            Result dictionary of VentilationBatchAnalyzer.analyze()
+        """
+        from ventilation_analysis import VentilationBatchAnalyzer
+
+        if not self.database.get('devices'):
+            return {"error": "No device data available"}
+
+        if pairs is None:
+            pairs = self.default_ventilation_pairs()
+
+        analyzer = VentilationBatchAnalyzer(self.database, step_minutes, neutral_band_celsius)
+        return analyzer.analyze(pairs)
+
+    def default_ventilation_pairs(self) -> List[Tuple[str, str]]:
+        """Every device paired with every available reference device."""
+        devices = list(self.database.get('devices', {}).keys())
+        references = [ref for ref in STAT002_REFERENCE_DEVICES if ref in devices]
+        return [(room, ref) for ref in references for room in devices if room not in references]
+
     def _synchronize_device_data(self, device_names: List[str], tolerance_minutes: int = 15) -> List[Dict[str, Any]]:
         """
         Synchronize data from multiple devices by timestamp with tolerance.
@@ -397,8 +465,15 @@ def main():
     """Main function for statistics analysis."""
     logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
     
+    parser = argparse.ArgumentParser(description="STAT001/STAT002 statistics")
+    parser.add_argument('--db', default="data/temperature_database.json",
+                        help="JSON database or sensor store directory")
+    parser.add_argument('--memory-budget', type=float, metavar='MB',
+                        help="Run STAT001 out-of-core on a sensor store using at most this much memory")
+    args = parser.parse_args()
+    
     try:
-        stats = TemperatureStatistics()
+        stats = TemperatureStatistics(args.db, memory_budget_mb=args.memory_budget)
         
         print("Temperature Data Statistics")
         print("=" * 50)
@@ -460,6 +535,28 @@ def main():
             
             print(f"\nDetailed results saved to: {ventilation_report_path}")
             print("\nRun 'python visualize_ventilation.py' to create the temperature difference heatmap.")
+
+        # Run STAT002 for every room / reference combination
+        print("\n" + "=" * 50)
+        print("Running STAT002 (batch): All Room / Reference Pairs...")
+        batch_data = stats.stat002_multi_pair_ventilation_analysis()
+
+        if 'error' in batch_data:
+            print(f"STAT002 batch Error: {batch_data['error']}")
+        else:
+            from ventilation_analysis import VentilationBatchAnalyzer
+            written = VentilationBatchAnalyzer(stats.database).write_results(batch_data)
+
+            for pair in batch_data['pairs']:
+                diff_stats = pair['temperature_difference_statistics']
+                if diff_stats is None:
+                    print(f"  {pair['room_device']} - {pair['reference_device']}: no overlapping data")
+                    continue
+                print(f"  {pair['room_device']} - {pair['reference_device']}: "
+                      f"{pair['total_data_points']} points, mean {diff_stats['mean_celsius']}°C, "
+                      f"ventilation on {pair['ventilation_summary']['on_percentage']}%")
+
+            print(f"\nPair tables saved to: {Path(written[-1]).parent}")
         
     except FileNotFoundError as e:
         print(f"Error: {e}")
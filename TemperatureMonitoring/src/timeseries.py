@@ -0,0 +1,206 @@
+"""
+Time Series Helpers
+
+Vectorized building blocks for working with device series as NumPy arrays
+instead of per-record Python loops: record conversion, sorted-array joins
+between devices and hour-of-day x day aggregation.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Supported cell aggregations for hour x day matrices
+AGGREGATIONS = ('mean', 'min', 'max', 'count')
+
+
+def records_to_arrays(records: List[Dict], field: str = 'temperature') -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Convert stored JSON records into sorted timestamp and value arrays.
+
+    Args:
+        records: Device records as stored in the database (ISO timestamp strings)
+        field: Record field to extract as values
+
+    Returns:
+        Tuple of (datetime64[s] timestamps, float64 values), sorted by time
+    """
+    if not records:
+        return np.array([], dtype='datetime64[s]'), np.array([], dtype=np.float64)
+
+    import pandas as pd  # imported on first use, the entry points import this module at start-up
+    times = pd.to_datetime([r['timestamp'] for r in records], format='ISO8601')
+    times = times.values.astype('datetime64[s]')
+    values = np.array([r.get(field, np.nan) for r in records], dtype=np.float64)
+
+    order = np.argsort(times, kind='stable')
+    return times[order], values[order]
+
+
+def align_nearest(left_times: np.ndarray, right_times: np.ndarray, right_values: np.ndarray,
+                  tolerance_minutes: float = 15) -> np.ndarray:
+    """
+    Align a sorted right series onto left timestamps (nearest neighbour join).
+
+    Uses binary search on the sorted right timestamps, so the cost is
+    O(n log m) instead of scanning the whole right series per left sample.
+
+    Args:
+        left_times: Sorted datetime64 timestamps to align onto
+        right_times: Sorted datetime64 timestamps of the other series
+        right_values: Values belonging to right_times
+        tolerance_minutes: Maximum distance to the nearest right sample
+
+    Returns:
+        Array of right values aligned to left_times (NaN where nothing is within tolerance)
+    """
+    aligned = np.full(len(left_times), np.nan)
+    if len(left_times) == 0 or len(right_times) == 0:
+        return aligned
+
+    left = left_times.astype('datetime64[s]').astype(np.int64)
+    right = right_times.astype('datetime64[s]').astype(np.int64)
+
+    # Candidate neighbours: the sample at or after each left time and the one before it
+    after = np.clip(np.searchsorted(right, left, side='left'), 0, len(right) - 1)
+    before = np.clip(after - 1, 0, len(right) - 1)
+
+    dist_after = np.abs(right[after] - left)
+    dist_before = np.abs(left - right[before])
+    nearest = np.where(dist_before <= dist_after, before, after)
+    distance = np.minimum(dist_before, dist_after)
+
+    within = distance <= tolerance_minutes * 60
+    aligned[within] = np.asarray(right_values, dtype=np.float64)[nearest[within]]
+    return aligned
+
+
+def hour_day_matrix(times: np.ndarray, values: np.ndarray, agg: str = 'mean',
+                    start_date: Optional[np.datetime64] = None,
+                    end_date: Optional[np.datetime64] = None) -> Tuple[np.ndarray, np.datetime64]:
+    """
+    Aggregate a series into a days x 24 hours matrix.
+
+    Day and hour indexes are computed as integer arrays and the cells are
+    filled with unbuffered ufunc reductions (np.add.at / np.minimum.at /
+    np.maximum.at), so no Python loop runs per sample.
+
+    Args:
+        times: datetime64 timestamps
+        values: Values belonging to times (NaN values are ignored)
+        agg: Cell aggregation - one of 'mean', 'min', 'max', 'count'
+        start_date: First day of the matrix (defaults to the first sample's day)
+        end_date: Last day of the matrix (defaults to the last sample's day)
+
+    Returns:
+        Tuple of (matrix with NaN in empty cells or 0 for 'count', first day as datetime64[D])
+    """
+    if agg not in AGGREGATIONS:
+        raise ValueError(f"Unsupported aggregation '{agg}', expected one of {AGGREGATIONS}")
+
+    values = np.asarray(values, dtype=np.float64)
+    valid = ~np.isnan(values)
+    times = np.asarray(times).astype('datetime64[s]')[valid]
+    values = values[valid]
+
+    if len(times) == 0:
+        first_day = np.datetime64(start_date, 'D') if start_date is not None else np.datetime64('NaT', 'D')
+        return np.full((0, 24), np.nan), first_day
+
+    days = times.astype('datetime64[D]')
+    first_day = np.datetime64(start_date, 'D') if start_date is not None else days.min()
+    last_day = np.datetime64(end_date, 'D') if end_date is not None else days.max()
+    num_days = int((last_day - first_day).astype(np.int64)) + 1
+
+    day_idx = (days - first_day).astype(np.int64)
+    hour_idx = ((times - days).astype('timedelta64[h]')).astype(np.int64)
+
+    in_range = (day_idx >= 0) & (day_idx < num_days)
+    day_idx, hour_idx, values = day_idx[in_range], hour_idx[in_range], values[in_range]
+
+    counts = np.zeros((num_days, 24), dtype=np.int64)
+    np.add.at(counts, (day_idx, hour_idx), 1)
+    empty = counts == 0
+
+    if agg == 'count':
+        matrix = counts.astype(np.float64)
+    elif agg == 'mean':
+        sums = np.zeros((num_days, 24))
+        np.add.at(sums, (day_idx, hour_idx), values)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            matrix = sums / counts
+    elif agg == 'min':
+        matrix = np.full((num_days, 24), np.inf)
+        np.minimum.at(matrix, (day_idx, hour_idx), values)
+    else:
+        matrix = np.full((num_days, 24), -np.inf)
+        np.maximum.at(matrix, (day_idx, hour_idx), values)
+
+    if agg != 'count':
+        matrix[empty] = np.nan
+    return matrix, first_day
+
+
+def resample_to_grid(times: np.ndarray, values: np.ndarray, grid_start: np.datetime64,
+                     step_minutes: int, num_cells: int) -> np.ndarray:
+    """
+    Average a series into fixed-width cells of a common time grid.
+
+    Args:
+        times: datetime64 timestamps
+        values: Values belonging to times (NaN values are ignored)
+        grid_start: Start time of the first grid cell
+        step_minutes: Width of a grid cell in minutes
+        num_cells: Number of cells in the grid
+
+    Returns:
+        float64 array of length num_cells with the cell means (NaN for empty cells)
+    """
+    values = np.asarray(values, dtype=np.float64)
+    seconds = (np.asarray(times).astype('datetime64[s]') - np.datetime64(grid_start, 's')).astype(np.int64)
+    cells = seconds // (step_minutes * 60)
+
+    keep = (cells >= 0) & (cells < num_cells) & ~np.isnan(values)
+    cells, values = cells[keep], values[keep]
+
+    sums = np.bincount(cells, weights=values, minlength=num_cells)
+    counts = np.bincount(cells, minlength=num_cells)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+
+
+def build_grid_matrix(series: Dict[str, Tuple[np.ndarray, np.ndarray]], step_minutes: int = 15,
+                      dtype=np.float32) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    """
+    Resample several device series onto one common time grid.
+
+    The grid spans from the earliest to the latest sample of all series,
+    aligned to whole step boundaries.
+
+    Args:
+        series: Mapping of device name to (timestamps, values)
+        step_minutes: Width of a grid cell in minutes
+        dtype: dtype of the resulting matrix
+
+    Returns:
+        Tuple of (device names, grid cell start times, devices x cells matrix with NaN gaps)
+    """
+    names = [name for name, (times, _) in series.items() if len(times) > 0]
+    if not names:
+        return [], np.array([], dtype='datetime64[s]'), np.empty((0, 0), dtype=dtype)
+
+    step = np.timedelta64(step_minutes * 60, 's')
+    first = min(series[name][0].min() for name in names).astype('datetime64[s]')
+    last = max(series[name][0].max() for name in names).astype('datetime64[s]')
+
+    epoch = np.datetime64(0, 's')
+    grid_start = epoch + ((first - epoch) // step) * step
+    num_cells = int((last - grid_start) // step) + 1
+    grid_times = grid_start + np.arange(num_cells) * step
+
+    matrix = np.empty((len(names), num_cells), dtype=dtype)
+    for row, name in enumerate(names):
+        times, values = series[name]
+        matrix[row] = resample_to_grid(times, values, grid_start, step_minutes, num_cells)
+
+    return names, grid_times, matrix
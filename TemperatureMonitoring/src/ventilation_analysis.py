@@ -0,0 +1,206 @@
+"""
+Ventilation Analysis Engine (STAT002 batch mode)
+
+Analyzes temperature differences for many (room, reference) device pairs at
+once. All involved series are resampled onto one common time grid, after which
+differences, statistics and the ventilation classification are computed as
+matrix operations over the whole pairs x time matrix.
+"""
+
+import json
+import logging
+import warnings
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from timeseries import build_grid_matrix, records_to_arrays
+
+logger = logging.getLogger(__name__)
+
+# Ventilation states derived from the room - reference difference
+STATE_ON = 'on'              # reference warmer than room (air is being pulled in)
+STATE_OFF = 'off'            # room warmer than reference
+STATE_UNCERTAIN = 'uncertain'
+
+
+class VentilationBatchAnalyzer:
+    """Computes STAT002 style ventilation statistics for many device pairs."""
+
+    def __init__(self, database: Dict, step_minutes: int = 15, neutral_band_celsius: float = 0.5):
+        """
+        Args:
+            database: Temperature database dictionary
+            step_minutes: Width of the common time grid cells
+            neutral_band_celsius: Differences within +/- this band are classified as uncertain
+        """
+        self.database = database
+        self.step_minutes = step_minutes
+        self.neutral_band = neutral_band_celsius
+
+    def _load_grid(self, device_names: List[str]) -> Tuple[List[str], np.ndarray, np.ndarray]:
+        """Resample the given devices onto the common time grid."""
+        devices = self.database.get('devices', {})
+        series = {name: records_to_arrays(devices[name].get('records', [])) for name in device_names}
+        return build_grid_matrix(series, self.step_minutes)
+
+    def analyze(self, pairs: List[Tuple[str, str]]) -> Dict[str, Any]:
+        """
+        Analyze all (room, reference) pairs in one pass.
+
+        Args:
+            pairs: List of (room_device, reference_device) tuples
+
+        Returns:
+            Dictionary with per-pair summaries, the aligned grid and the difference matrix
+        """
+        devices = self.database.get('devices', {})
+        missing = sorted({d for pair in pairs for d in pair if d not in devices})
+        if missing:
+            return {
+                "error": f"Missing devices for ventilation analysis: {missing}",
+                "available_devices": list(devices.keys())
+            }
+
+        if not pairs:
+            return {"error": "No device pairs given"}
+
+        device_names = sorted({d for pair in pairs for d in pair})
+        names, grid_times, matrix = self._load_grid(device_names)
+        row_of = {name: row for row, name in enumerate(names)}
+
+        valid_pairs = [(room, ref) for room, ref in pairs if room in row_of and ref in row_of]
+        if len(valid_pairs) < len(pairs):
+            logger.warning(f"Skipping pairs without any records: "
+                           f"{[p for p in pairs if p not in valid_pairs]}")
+        if not valid_pairs:
+            return {"error": "No records found for any of the requested pairs"}
+
+        room_rows = np.array([row_of[room] for room, _ in valid_pairs])
+        ref_rows = np.array([row_of[ref] for _, ref in valid_pairs])
+
+        # pairs x time matrix of differences, NaN where either side has no sample
+        differences = (matrix[room_rows] - matrix[ref_rows]).astype(np.float64)
+        states = self._classify(differences)
+
+        summaries = self._summarize(valid_pairs, grid_times, differences, states)
+
+        return {
+            'analysis_method': 'Temperature Difference Analysis (Batch)',
+            'grid_step_minutes': self.step_minutes,
+            'neutral_band_celsius': self.neutral_band,
+            'pairs': summaries,
+            'grid_times': grid_times,
+            'room_values': matrix[room_rows],
+            'reference_values': matrix[ref_rows],
+            'differences': differences,
+            'states': states
+        }
+
+    def _classify(self, differences: np.ndarray) -> np.ndarray:
+        """Classify every grid cell of every pair (0=missing, 1=on, 2=off, 3=uncertain)."""
+        states = np.zeros(differences.shape, dtype=np.int8)
+        valid = ~np.isnan(differences)
+        with np.errstate(invalid='ignore'):
+            states[valid & (differences < -self.neutral_band)] = 1
+            states[valid & (differences > self.neutral_band)] = 2
+        states[valid & (states == 0)] = 3
+        return states
+
+    def _summarize(self, pairs: List[Tuple[str, str]], grid_times: np.ndarray,
+                   differences: np.ndarray, states: np.ndarray) -> List[Dict[str, Any]]:
+        """Compute per-pair statistics along the time axis of the matrices."""
+        valid = ~np.isnan(differences)
+        counts = valid.sum(axis=1)
+
+        # All-NaN rows (pairs without overlap) are reported with zero data points
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', category=RuntimeWarning)
+            means = np.nanmean(differences, axis=1)
+            stds = np.nanstd(differences, axis=1)
+            mins = np.nanmin(differences, axis=1)
+            maxs = np.nanmax(differences, axis=1)
+
+        state_counts = np.stack([(states == code).sum(axis=1) for code in (1, 2, 3)], axis=1)
+        first_valid = np.where(counts > 0, valid.argmax(axis=1), -1)
+        last_valid = np.where(counts > 0, valid.shape[1] - 1 - valid[:, ::-1].argmax(axis=1), -1)
+
+        summaries = []
+        for i, (room, ref) in enumerate(pairs):
+            total = int(counts[i])
+            on, off, uncertain = (int(c) for c in state_counts[i])
+            summary = {
+                'room_device': room,
+                'reference_device': ref,
+                'total_data_points': total,
+                'time_range': {
+                    'start': str(grid_times[first_valid[i]]) if total else None,
+                    'end': str(grid_times[last_valid[i]]) if total else None
+                },
+                'temperature_difference_statistics': None,
+                'ventilation_summary': None
+            }
+            if total:
+                summary['temperature_difference_statistics'] = {
+                    'mean_celsius': round(float(means[i]), 2),
+                    'std_celsius': round(float(stds[i]), 2),
+                    'min_celsius': round(float(mins[i]), 2),
+                    'max_celsius': round(float(maxs[i]), 2),
+                    'range_celsius': round(float(maxs[i] - mins[i]), 2)
+                }
+                summary['ventilation_summary'] = {
+                    'ventilation_on_periods': on,
+                    'ventilation_off_periods': off,
+                    'uncertain_periods': uncertain,
+                    'on_percentage': round(100 * on / total, 1),
+                    'off_percentage': round(100 * off / total, 1),
+                    'uncertain_percentage': round(100 * uncertain / total, 1)
+                }
+            summaries.append(summary)
+
+        return summaries
+
+    def write_results(self, results: Dict[str, Any], output_dir: str = "output/STAT002_pairs") -> List[str]:
+        """
+        Write one compact CSV table per pair plus a JSON summary.
+
+        Args:
+            results: Result of analyze()
+            output_dir: Target directory
+
+        Returns:
+            List of written file paths
+        """
+        output = Path(output_dir)
+        output.mkdir(parents=True, exist_ok=True)
+        state_names = np.array(['', STATE_ON, STATE_OFF, STATE_UNCERTAIN])
+        written = []
+
+        for i, summary in enumerate(results['pairs']):
+            valid = results['states'][i] > 0
+            table = pd.DataFrame({
+                'timestamp': results['grid_times'][valid],
+                'room': np.round(results['room_values'][i][valid], 2),
+                'reference': np.round(results['reference_values'][i][valid], 2),
+                'difference': np.round(results['differences'][i][valid], 2),
+                'state': state_names[results['states'][i][valid]]
+            })
+            table_path = output / f"{summary['room_device']}_vs_{summary['reference_device']}.csv"
+            table.to_csv(table_path, index=False)
+            summary['table'] = table_path.name
+            written.append(str(table_path))
+
+        summary_path = output / "summary.json"
+        with open(summary_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'analysis_method': results['analysis_method'],
+                'grid_step_minutes': results['grid_step_minutes'],
+                'neutral_band_celsius': results['neutral_band_celsius'],
+                'pairs': results['pairs']
+            }, f, indent=2, ensure_ascii=False)
+        written.append(str(summary_path))
+
+        logger.info(f"Wrote {len(results['pairs'])} pair tables to {output}")
+        return written
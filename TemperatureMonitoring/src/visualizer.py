@@ -8,6 +8,12 @@ import pandas as pd
 from typing import List, Dict, Optional
 from pathlib import Path
 import logging
+import sys
+
+# Add src directory to path for imports
+sys.path.append(str(Path(__file__).parent))
+
+from raster_render import check_render_mode, draw_raster_series
 
 logger = logging.getLogger(__name__)
 
@@ -82,7 +88,8 @@ class TemperatureVisualizer:
     
     def create_multi_device_comparison(self, all_device_data: List[Dict], 
                                      metric: str = 'temperature',
-                                     save_path: Optional[str] = None) -> str:
+                                     save_path: Optional[str] = None,
+                                     render_mode: str = 'lines') -> str:
         """
         Create a comparison plot for multiple devices.
         
@@ -90,16 +97,20 @@ class TemperatureVisualizer:
             all_device_data: List of device data dictionaries
             metric: Metric to compare ('temperature', 'humidity', 'battery_mv')
             save_path: Optional custom save path
+            render_mode: 'lines' (one line per device) or 'raster' (fast pixel-grid rendering)
             
         Returns:
             Path to the saved plot
         """
         if not all_device_data:
             raise ValueError("No device data provided")
+        check_render_mode(render_mode)
         
         fig, ax = plt.subplots(figsize=(14, 8))
+        color_cycle = plt.rcParams['axes.prop_cycle'].by_key()['color']
+        raster_series = []
         
-        for device_data in all_device_data:
+        for i, device_data in enumerate(all_device_data):
             device_name = device_data['device_name']
             data = device_data['data']
             
@@ -107,8 +118,16 @@ class TemperatureVisualizer:
                 continue
                 
             df = pd.DataFrame(data)
-            ax.plot(df['timestamp'], df[metric], linewidth=1.5, 
-                   label=device_name, alpha=0.8)
+            if render_mode == 'raster':
+                df = df.sort_values('timestamp')
+                raster_series.append((device_name, df['timestamp'].values, df[metric].values,
+                                      color_cycle[i % len(color_cycle)]))
+            else:
+                ax.plot(df['timestamp'], df[metric], linewidth=1.5, 
+                       label=device_name, alpha=0.8)
+        
+        if raster_series:
+            draw_raster_series(ax, raster_series, dpi=300)
         
         # Customize plot
         ax.set_xlabel('Time')
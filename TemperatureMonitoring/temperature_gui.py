@@ -14,20 +14,22 @@ Usage: python temperature_gui.py
 
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-from tkcalendar import DateEntry
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
-from matplotlib.figure import Figure
-import pandas as pd
 import json
 import numpy as np
 from datetime import datetime, timedelta
 from pathlib import Path
 import logging
+import queue
+import sys
+import threading
 from typing import Dict, List, Optional, Any
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+# Add src directory to path for imports
+sys.path.append(str(Path(__file__).parent / "src"))
+
+from sensor_store import load_database as load_store_or_json
+# matplotlib, pandas and the export helpers are imported where the plots and exports are made
+
 logger = logging.getLogger(__name__)
 
 class TemperatureDatabase:
@@ -44,8 +46,7 @@ class TemperatureDatabase:
             if not self.db_path.exists():
                 raise FileNotFoundError(f"Database file not found: {self.db_path}")
             
-            with open(self.db_path, 'r', encoding='utf-8') as f:
-                self.database = json.load(f)
+            self.database = load_store_or_json(self.db_path)
             
             logger.info(f"Database loaded: {len(self.database.get('devices', {}))} devices")
             
@@ -58,8 +59,9 @@ class TemperatureDatabase:
         return list(self.database.get('devices', {}).keys())
     
     def get_device_data(self, device_name: str, start_date: datetime = None, 
-                       end_date: datetime = None) -> pd.DataFrame:
+                       end_date: datetime = None) -> 'pd.DataFrame':
         """Get device data as pandas DataFrame with optional date filtering."""
+        import pandas as pd
         if device_name not in self.database.get('devices', {}):
             return pd.DataFrame()
         
@@ -109,18 +111,19 @@ class TemperatureDatabase:
 class TemperatureGUI:
     """Main GUI application for temperature monitoring visualization."""
     
-    def __init__(self, root):
+    def __init__(self, root, db_path: str = "data/temperature_database.json"):
         self.root = root
         self.root.title("Temperature Monitoring - Interactive Visualization")
         self.root.geometry("1400x900")
         
         # Data handlers
-        self.db = TemperatureDatabase()
+        self.db = TemperatureDatabase(db_path)
         
         # GUI variables
         self.device_vars = {}
         self.data_type_var = tk.StringVar(value="temperature")
         self.show_stat002_var = tk.BooleanVar(value=False)
+        self.raster_render_var = tk.BooleanVar(value=False)
         self.show_room_external_diff_var = tk.BooleanVar(value=False)
         
         # Initialize date range
@@ -214,6 +217,11 @@ class TemperatureGUI:
                                command=self.refresh_plot)
             rb.pack(anchor=tk.W, pady=2)
         
+        # Pixel-grid rendering for many devices / long ranges
+        ttk.Checkbutton(data_type_frame, text="Fast raster rendering",
+                        variable=self.raster_render_var,
+                        command=self.refresh_plot).pack(anchor=tk.W, pady=(8, 0))
+        
         # STAT002 checkbox
         stat002_frame = ttk.LabelFrame(parent, text="Derived Statistics", padding=10)
         stat002_frame.pack(fill=tk.X, pady=(0, 20))
@@ -230,7 +238,9 @@ class TemperatureGUI:
                                          command=self.refresh_plot)
         room_external_cb.pack(anchor=tk.W)
         
-        # Date range selection
+        # Date range selection (tkcalendar is only needed once the window is built)
+        from tkcalendar import DateEntry
+        
         date_frame = ttk.LabelFrame(parent, text="Date Range", padding=10)
         date_frame.pack(fill=tk.X, pady=(0, 20))
         
@@ -278,6 +288,8 @@ class TemperatureGUI:
     
     def create_plot_area(self):
         """Create the matplotlib plot area."""
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+        from matplotlib.figure import Figure
         self.fig = Figure(figsize=(12, 8), dpi=100)
         self.canvas = FigureCanvasTkAgg(self.fig, self.plot_frame)
         self.canvas.draw()
@@ -401,7 +413,10 @@ class TemperatureGUI:
     def plot_single_data_type(self, ax, devices: List[str], data_type: str, 
                              start_date: datetime, end_date: datetime):
         """Plot a single data type for selected devices."""
+        import matplotlib.pyplot as plt
+        from raster_render import draw_raster_series
         colors = plt.cm.tab10(np.linspace(0, 1, len(devices)))
+        raster_series = []
         
         for i, device in enumerate(devices):
             df = self.db.get_device_data(device, start_date, end_date)
@@ -409,8 +424,14 @@ class TemperatureGUI:
             if df.empty or data_type not in df.columns:
                 continue
             
-            ax.plot(df['timestamp'], df[data_type], 
-                   label=device, color=colors[i], alpha=0.8, linewidth=1.5)
+            if self.raster_render_var.get():
+                raster_series.append((device, df['timestamp'].values, df[data_type].values, colors[i]))
+            else:
+                ax.plot(df['timestamp'], df[data_type], 
+                       label=device, color=colors[i], alpha=0.8, linewidth=1.5)
+        
+        if raster_series:
+            draw_raster_series(ax, raster_series)
         
         # Formatting
         ax.set_xlabel('Time')
@@ -425,20 +446,29 @@ class TemperatureGUI:
     def plot_all_data_types(self, axes: List, devices: List[str], 
                            start_date: datetime, end_date: datetime):
         """Plot all data types in separate subplots."""
+        import matplotlib.pyplot as plt
+        from raster_render import draw_raster_series
         data_types = ['temperature', 'humidity', 'battery_mv']
         colors = plt.cm.tab10(np.linspace(0, 1, len(devices)))
         
         for ax_idx, data_type in enumerate(data_types):
             ax = axes[ax_idx]
             
+            raster_series = []
             for i, device in enumerate(devices):
                 df = self.db.get_device_data(device, start_date, end_date)
                 
                 if df.empty or data_type not in df.columns:
                     continue
                 
-                ax.plot(df['timestamp'], df[data_type], 
-                       label=device, color=colors[i], alpha=0.8, linewidth=1.5)
+                if self.raster_render_var.get():
+                    raster_series.append((device, df['timestamp'].values, df[data_type].values, colors[i]))
+                else:
+                    ax.plot(df['timestamp'], df[data_type], 
+                           label=device, color=colors[i], alpha=0.8, linewidth=1.5)
+            
+            if raster_series:
+                draw_raster_series(ax, raster_series)
             
             # Formatting
             ax.set_ylabel(self.get_data_type_label(data_type))
@@ -455,6 +485,7 @@ class TemperatureGUI:
     
     def plot_stat002_data(self, ax, start_date: datetime, end_date: datetime):
         """Plot STAT002 temperature difference data (calculated on-demand)."""
+        from streaming_export import difference_frame
         # Get data for required devices (Room - Intake difference)
         room_df = self.db.get_device_data('T3_Kek', start_date, end_date)  # Room
         intake_df = self.db.get_device_data('T1_BE', start_date, end_date)  # Intake
@@ -466,47 +497,16 @@ class TemperatureGUI:
             ax.set_title('Temperature Difference (STAT002)')
             return
         
-        # Synchronize the data by timestamp (simple approach)
-        # Create a merged dataframe on timestamp with tolerance
-        room_df = room_df[['timestamp', 'temperature']].rename(columns={'temperature': 'room_temp'})
-        intake_df = intake_df[['timestamp', 'temperature']].rename(columns={'temperature': 'intake_temp'})
-        
-        # Merge with tolerance (find nearest timestamps within 15 minutes)
-        tolerance = pd.Timedelta(minutes=15)
-        merged_data = []
+        # Synchronize the data by timestamp (nearest reading within 15 minutes)
+        diff_df = difference_frame(self.db.database, 'T3_Kek', 'T1_BE', start_date, end_date)
         
-        for _, room_row in room_df.iterrows():
-            room_time = room_row['timestamp']
-            room_temp = room_row['room_temp']
-            
-            # Find closest intake temperature reading within tolerance
-            time_diffs = abs(intake_df['timestamp'] - room_time)
-            if len(time_diffs) == 0:
-                continue
-                
-            closest_idx = time_diffs.idxmin()
-            
-            if time_diffs.loc[closest_idx] <= tolerance:
-                intake_temp = intake_df.loc[closest_idx, 'intake_temp']
-                temp_diff = room_temp - intake_temp
-                
-                merged_data.append({
-                    'timestamp': room_time,
-                    'room_temp': room_temp,
-                    'intake_temp': intake_temp,
-                    'temperature_difference': temp_diff
-                })
-        
-        if not merged_data:
+        if diff_df.empty:
             ax.text(0.5, 0.5, 'No synchronized data available\nfor Room vs Intake comparison', 
                    transform=ax.transAxes, ha='center', va='center',
                    bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.8))
             ax.set_title('Temperature Difference (STAT002)')
             return
         
-        # Convert to DataFrame for plotting
-        diff_df = pd.DataFrame(merged_data)
-        
         # Plot temperature difference
         ax.plot(diff_df['timestamp'], diff_df['temperature_difference'], 
                color='red', alpha=0.8, linewidth=1.5, 
@@ -545,6 +545,7 @@ class TemperatureGUI:
     
     def plot_room_external_diff(self, ax, start_date: datetime, end_date: datetime):
         """Plot Room (T3_Kek) vs External (T2_Terasz) temperature difference."""
+        from streaming_export import difference_frame
         # Get data for required devices
         room_df = self.db.get_device_data('T3_Kek', start_date, end_date)
         external_df = self.db.get_device_data('T2_Terasz', start_date, end_date)
@@ -556,44 +557,16 @@ class TemperatureGUI:
             ax.set_title('Temperature Difference: Room - External')
             return
         
-        # Synchronize the data by timestamp (simple approach)
-        # Create a merged dataframe on timestamp with tolerance
-        room_df = room_df[['timestamp', 'temperature']].rename(columns={'temperature': 'room_temp'})
-        external_df = external_df[['timestamp', 'temperature']].rename(columns={'temperature': 'external_temp'})
+        # Synchronize the data by timestamp (nearest reading within 15 minutes)
+        diff_df = difference_frame(self.db.database, 'T3_Kek', 'T2_Terasz', start_date, end_date)
         
-        # Merge with tolerance (find nearest timestamps within 15 minutes)
-        tolerance = pd.Timedelta(minutes=15)
-        merged_data = []
-        
-        for _, room_row in room_df.iterrows():
-            room_time = room_row['timestamp']
-            room_temp = room_row['room_temp']
-            
-            # Find closest external temperature reading within tolerance
-            time_diffs = abs(external_df['timestamp'] - room_time)
-            closest_idx = time_diffs.idxmin()
-            
-            if time_diffs.loc[closest_idx] <= tolerance:
-                external_temp = external_df.loc[closest_idx, 'external_temp']
-                temp_diff = room_temp - external_temp
-                
-                merged_data.append({
-                    'timestamp': room_time,
-                    'room_temp': room_temp,
-                    'external_temp': external_temp,
-                    'temperature_difference': temp_diff
-                })
-        
-        if not merged_data:
+        if diff_df.empty:
             ax.text(0.5, 0.5, 'No synchronized data available\nfor Room vs External comparison', 
                    transform=ax.transAxes, ha='center', va='center',
                    bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.8))
             ax.set_title('Temperature Difference: Room - External')
             return
         
-        # Convert to DataFrame for plotting
-        diff_df = pd.DataFrame(merged_data)
-        
         # Plot temperature difference
         ax.plot(diff_df['timestamp'], diff_df['temperature_difference'], 
                color='purple', alpha=0.8, linewidth=1.5, 
@@ -684,140 +657,116 @@ class TemperatureGUI:
             messagebox.showerror("Export Error", f"Failed to export plot:\n{str(e)}")
     
     def export_data(self):
-        """Export the current data as CSV."""
-        try:
-            filename = filedialog.asksaveasfilename(
-                defaultextension=".csv",
-                filetypes=[("CSV files", "*.csv"), ("Excel files", "*.xlsx"), 
-                          ("All files", "*.*")],
-                title="Export Data"
-            )
-            
-            if not filename:
-                return
-            
-            # Get current selections
-            selected_devices = self.get_selected_devices()
-            start_date = datetime.combine(self.start_date.get_date(), datetime.min.time())
-            end_date = datetime.combine(self.end_date.get_date(), datetime.max.time())
-            
-            # Combine all device data
-            all_data = []
-            for device in selected_devices:
-                df = self.db.get_device_data(device, start_date, end_date)
-                if not df.empty:
-                    df['device'] = device
-                    all_data.append(df)
-            
-            # Add STAT002 data if selected (calculate on-demand)
-            if self.show_stat002_var.get():
-                # Get data for T3_Kek and T1_BE
-                room_df = self.db.get_device_data('T3_Kek', start_date, end_date)
-                intake_df = self.db.get_device_data('T1_BE', start_date, end_date)
-                
-                if not room_df.empty and not intake_df.empty:
-                    # Create synchronized temperature difference data
-                    room_df = room_df[['timestamp', 'temperature']].rename(columns={'temperature': 'room_temp'})
-                    intake_df = intake_df[['timestamp', 'temperature']].rename(columns={'temperature': 'intake_temp'})
-                    
-                    # Merge with tolerance (find nearest timestamps within 15 minutes)
-                    tolerance = pd.Timedelta(minutes=15)
-                    merged_data = []
-                    
-                    for _, room_row in room_df.iterrows():
-                        room_time = room_row['timestamp']
-                        room_temp = room_row['room_temp']
-                        
-                        # Find closest intake temperature reading within tolerance
-                        time_diffs = abs(intake_df['timestamp'] - room_time)
-                        if len(time_diffs) == 0:
-                            continue
-                            
-                        closest_idx = time_diffs.idxmin()
-                        
-                        if time_diffs.loc[closest_idx] <= tolerance:
-                            intake_temp = intake_df.loc[closest_idx, 'intake_temp']
-                            temp_diff = room_temp - intake_temp
-                            
-                            merged_data.append({
-                                'timestamp': room_time,
-                                'device': 'STAT002_Room_Intake_Diff',
-                                'temperature': temp_diff,
-                                'humidity': None,
-                                'battery_mv': None
-                            })
-                    
-                    if merged_data:
-                        diff_df = pd.DataFrame(merged_data)
-                        all_data.append(diff_df)
-            
-            # Add Room vs External difference data if selected
-            if self.show_room_external_diff_var.get():
-                # Get data for T3_Kek and T2_Terasz
-                room_df = self.db.get_device_data('T3_Kek', start_date, end_date)
-                external_df = self.db.get_device_data('T2_Terasz', start_date, end_date)
-                
-                if not room_df.empty and not external_df.empty:
-                    # Create synchronized temperature difference data
-                    room_df = room_df[['timestamp', 'temperature']].rename(columns={'temperature': 'room_temp'})
-                    external_df = external_df[['timestamp', 'temperature']].rename(columns={'temperature': 'external_temp'})
-                    
-                    # Merge with tolerance (find nearest timestamps within 15 minutes)
-                    tolerance = pd.Timedelta(minutes=15)
-                    merged_data = []
-                    
-                    for _, room_row in room_df.iterrows():
-                        room_time = room_row['timestamp']
-                        room_temp = room_row['room_temp']
-                        
-                        # Find closest external temperature reading within tolerance
-                        time_diffs = abs(external_df['timestamp'] - room_time)
-                        closest_idx = time_diffs.idxmin()
-                        
-                        if time_diffs.loc[closest_idx] <= tolerance:
-                            external_temp = external_df.loc[closest_idx, 'external_temp']
-                            temp_diff = room_temp - external_temp
-                            
-                            merged_data.append({
-                                'timestamp': room_time,
-                                'device': 'Room_External_Diff',
-                                'temperature': temp_diff,
-                                'humidity': None,
-                                'battery_mv': None
-                            })
+        """Export the current data as CSV, Parquet or Excel on a background thread."""
+        from streaming_export import DERIVED_SERIES, StreamingExporter
+        filename = filedialog.asksaveasfilename(
+            defaultextension=".csv",
+            filetypes=[("CSV files", "*.csv"), ("Parquet files", "*.parquet"),
+                      ("Excel files", "*.xlsx"), ("All files", "*.*")],
+            title="Export Data"
+        )
+        
+        if not filename:
+            return
+        
+        # Get current selections
+        selected_devices = self.get_selected_devices()
+        start_date = datetime.combine(self.start_date.get_date(), datetime.min.time())
+        end_date = datetime.combine(self.end_date.get_date(), datetime.max.time())
+        
+        # Derived difference series are computed while streaming
+        derived = []
+        if self.show_stat002_var.get():
+            derived.append(DERIVED_SERIES['stat002'])
+        if self.show_room_external_diff_var.get():
+            derived.append(DERIVED_SERIES['room_external'])
+        
+        if not selected_devices and not derived:
+            messagebox.showwarning("No Data", "No data to export with current selections.")
+            return
+        
+        exporter = StreamingExporter(self.db.database, selected_devices, derived, start_date, end_date)
+        self.run_export(exporter, filename)
+    
+    def run_export(self, exporter: 'StreamingExporter', filename: str):
+        """Run an export on a worker thread with a progress dialog and a cancel button."""
+        from streaming_export import ExportCancelled
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Exporting Data")
+        dialog.transient(self.root)
+        dialog.resizable(False, False)
+        
+        progress_var = tk.DoubleVar(value=0)
+        ttk.Progressbar(dialog, variable=progress_var, maximum=100, length=320).pack(padx=20, pady=(20, 5))
+        status_label = ttk.Label(dialog, text="Starting export...")
+        status_label.pack(padx=20, pady=5)
+        
+        cancel_event = threading.Event()
+        cancel_button = ttk.Button(dialog, text="Cancel", command=cancel_event.set)
+        cancel_button.pack(pady=(5, 20))
+        dialog.protocol("WM_DELETE_WINDOW", cancel_event.set)
+        
+        # Tk widgets may only be touched from the UI thread: the worker reports through a queue
+        updates = queue.Queue()
+        
+        def worker():
+            try:
+                result = exporter.export(
+                    filename,
+                    progress_callback=lambda fraction, message: updates.put(('progress', fraction, message)),
+                    cancel_event=cancel_event
+                )
+                updates.put(('done', result, None))
+            except ExportCancelled:
+                updates.put(('cancelled', None, None))
+            except Exception as e:
+                logger.error(f"Error exporting data: {e}")
+                updates.put(('error', e, None))
+        
+        def poll():
+            try:
+                while True:
+                    kind, value, message = updates.get_nowait()
+                    if kind == 'progress':
+                        progress_var.set(value * 100)
+                        status_label.config(text=message)
+                        continue
                     
-                    if merged_data:
-                        diff_df = pd.DataFrame(merged_data)
-                        all_data.append(diff_df)
-            
-            if not all_data:
-                messagebox.showwarning("No Data", "No data to export with current selections.")
-                return
-            
-            # Combine and save
-            combined_df = pd.concat(all_data, ignore_index=True)
-            combined_df = combined_df.sort_values(['device', 'timestamp'])
-            
-            if filename.endswith('.xlsx'):
-                combined_df.to_excel(filename, index=False)
-            else:
-                combined_df.to_csv(filename, index=False)
-            
+                    dialog.destroy()
+                    self.finish_export(kind, value, filename)
+                    return
+            except queue.Empty:
+                pass
+            self.root.after(100, poll)
+        
+        self.update_status("Exporting data...")
+        threading.Thread(target=worker, daemon=True).start()
+        poll()
+    
+    def finish_export(self, kind: str, value: Any, filename: str):
+        """Report the outcome of a background export."""
+        if kind == 'cancelled':
+            self.update_status("Export cancelled")
+        elif kind == 'error':
+            self.update_status("Export failed")
+            messagebox.showerror("Export Error", f"Failed to export data:\n{str(value)}")
+        elif value['rows'] == 0:
+            Path(filename).unlink(missing_ok=True)
+            self.update_status("Nothing exported")
+            messagebox.showwarning("No Data", "No data to export with current selections.")
+        else:
             self.update_status(f"Data exported to {filename}")
             messagebox.showinfo("Export Successful", 
                               f"Data exported successfully:\n{filename}\n"
-                              f"Records: {len(combined_df)}")
-            
-        except Exception as e:
-            logger.error(f"Error exporting data: {e}")
-            messagebox.showerror("Export Error", f"Failed to export data:\n{str(e)}")
+                              f"Records: {value['rows']}")
 
 
-def main():
+def main(db_path: str = "data/temperature_database.json"):
     """Main application entry point."""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
     try:
         # Check if database exists
-        db_path = Path("data/temperature_database.json")
+        db_path = Path(db_path)
         if not db_path.exists():
             messagebox.showerror("Database Not Found", 
                                f"Temperature database not found at: {db_path}\n\n"
@@ -827,7 +776,7 @@ def main():
         
         # Create and run GUI
         root = tk.Tk()
-        app = TemperatureGUI(root)
+        app = TemperatureGUI(root, str(db_path))
         
         # Handle window closing
         def on_closing():
@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+tempmon - unified command line for Temperature Monitoring
+
+All tools of the project are available as subcommands. Heavy dependencies
+(pandas, matplotlib, numpy, tkinter) are only imported by the subcommands that
+need them, so --help and the summary commands start instantly:
+
+    python tempmon.py devices            # device list from precomputed metadata
+    python tempmon.py range T1_BE        # date range of one device
+    python tempmon.py history 3          # what import run 3 added
+    python tempmon.py import --store data/temperature_store
+    python tempmon.py heatmap --pair T3_Kek:T1_BE --agg max
+    python tempmon.py correlate --device T8_Z1 --diff   # sensors responding to zone 1
+    python tempmon.py bench-imports      # cold import time of every entry point
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add src directory to path for imports
+sys.path.append(str(Path(__file__).parent / "src"))
+
+DEFAULT_DB = "data/temperature_database.json"
+
+# Subcommands that forward their arguments to the wrapped script
+PASSTHROUGH_COMMANDS = {'process', 'heating', 'heatmap', 'stats', 'calendars'}
+
+# Modules measured by bench-imports (module name, description)
+BENCH_MODULES = [
+    ('db_metadata', 'summary commands'),
+    ('sensor_store', 'sensor store'),
+    ('data_importer', 'import'),
+    ('main', 'process'),
+    ('temperature_statistics', 'stats'),
+    ('detect_heating', 'heating'),
+    ('generate_calendars', 'calendars'),
+    ('heating_statistics', 'heating-stats'),
+    ('create_heatmap', 'heatmap'),
+    ('cross_correlation', 'correlate'),
+    ('temperature_gui', 'gui'),
+]
+
+
+def _run_with_argv(module_main, prog: str, args) -> int:
+    """Call a script main() that parses sys.argv itself."""
+    saved_argv = sys.argv
+    sys.argv = [prog] + list(args)
+    try:
+        result = module_main()
+    finally:
+        sys.argv = saved_argv
+    return result if isinstance(result, int) else 0
+
+
+# ----------------------------------------------------------------------
+# Summary commands (standard library only)
+# ----------------------------------------------------------------------
+
+def cmd_devices(args) -> int:
+    from db_metadata import read_metadata
+
+    metadata = read_metadata(args.db)
+    for name, info in sorted(metadata['devices'].items()):
+        print(f"{name:<20} {info['record_count']:>8} records")
+    print(f"{len(metadata['devices'])} devices, {metadata['total_records']} records")
+    return 0
+
+
+def cmd_range(args) -> int:
+    from db_metadata import read_metadata
+
+    metadata = read_metadata(args.db)
+    devices = metadata['devices']
+
+    if args.device:
+        if args.device not in devices:
+            print(f"Error: device '{args.device}' not found")
+            return 1
+        devices = {args.device: devices[args.device]}
+
+    for name, info in sorted(devices.items()):
+        print(f"{name:<20} {info['first_record']} .. {info['last_record']}")
+
+    starts = [info['first_record'] for info in devices.values() if info['first_record']]
+    ends = [info['last_record'] for info in devices.values() if info['last_record']]
+    if starts and not args.device:
+        print(f"{'(all devices)':<20} {min(starts)} .. {max(ends)}")
+    return 0
+
+
+def cmd_history(args) -> int:
+    from import_log import ImportLog
+
+    log = ImportLog.for_database(args.db)
+    if args.import_id is not None:
+        entry = log.get(args.import_id)
+        print(f"Import {entry['import_id']}: {entry['start_time']} .. {entry['end_time']}")
+        print(f"  {entry['files']} files, {entry['new_records']} new records, "
+              f"{entry['duplicates']} duplicates, {entry['errors']} errors")
+        for name, added in sorted(entry['added'].items()):
+            print(f"  {name:<20} +{added}")
+        return 0
+
+    for entry in log.tail(args.last):
+        print(f"{entry['import_id']:>5} {entry['start_time'] or '':<26} {entry['files']:>4} files "
+              f"{entry['new_records']:>9} new {entry['duplicates']:>9} dup")
+    print(f"{len(log)} imports")
+    return 0
+
+
+# ----------------------------------------------------------------------
+# Tool commands (imported on demand)
+# ----------------------------------------------------------------------
+
+def cmd_import(args) -> int:
+    import logging
+    from data_importer import TemperatureDataImporter
+    from alerts import create_alert_engine
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    alerts = None
+    if args.alerts or args.alert_rules:
+        alerts = create_alert_engine(args.alert_rules, webhook_url=args.alert_webhook)
+    importer = TemperatureDataImporter(json_db_path=args.db, store_path=args.store,
+                                       memory_budget_mb=args.memory_budget, alerts=alerts)
+    import_stats = importer.import_zip_files(args.data_folder)
+
+    if "error" in import_stats:
+        print(f"Error: {import_stats['error']}")
+        return 1
+
+    print(f"ZIP files processed: {import_stats['zip_files_processed']}")
+    print(f"New records added: {import_stats['total_new_records']}")
+    print(f"Duplicate records skipped: {import_stats['total_duplicates']}")
+    return 0
+
+
+def cmd_migrate(args) -> int:
+    import sensor_store
+    return _run_with_argv(sensor_store.main, 'sensor_store.py', [args.db, args.store])
+
+
+def cmd_process(args) -> int:
+    import main as process_main
+    return _run_with_argv(process_main.main, 'main.py', args.args)
+
+
+def cmd_stats(args) -> int:
+    import temperature_statistics
+    return _run_with_argv(temperature_statistics.main, 'temperature_statistics.py', args.args)
+
+
+def cmd_heating(args) -> int:
+    import detect_heating
+    return _run_with_argv(detect_heating.main, 'detect_heating.py', args.args)
+
+
+def cmd_correlate(args) -> int:
+    import logging
+    from sensor_store import load_database
+    from cross_correlation import FleetCorrelationAnalyzer
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    analyzer = FleetCorrelationAnalyzer(load_database(args.db), step_minutes=args.step,
+                                        max_lag_hours=args.max_lag_hours, differenced=args.diff)
+    results = analyzer.analyze(args.devices or None)
+    if "error" in results:
+        print(f"Error: {results['error']}")
+        return 1
+
+    for path in analyzer.write_results(results, args.output_dir):
+        print(f"Saved: {path}")
+
+    if args.device:
+        print(f"\nDevices responding to {args.device} (positive lag: responds later):")
+        for response in FleetCorrelationAnalyzer.responses(results, args.device, args.min_correlation):
+            print(f"  {response['device']:<20} r={response['correlation']:6.3f}  lag={response['lag_minutes']:5d} min")
+    return 0
+
+
+def cmd_rollup(args) -> int:
+    import numpy as np
+    import pandas as pd
+    from out_of_core import OutOfCoreRunner
+
+    try:
+        runner = OutOfCoreRunner(args.db, args.memory_budget)
+        matrix, first_day = runner.hour_day_rollup(args.device, args.field, args.agg)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 1
+    table = pd.DataFrame(np.round(matrix, 2), columns=[f"{hour:02d}:00" for hour in range(24)],
+                         index=pd.date_range(start=pd.Timestamp(first_day), periods=len(matrix), freq='D').date
+                         if len(matrix) else [])
+    table.index.name = 'date'
+
+    output = Path(args.output or f"output/{args.device}_{args.field}_hourly_{args.agg}.csv")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    table.to_csv(output)
+    print(f"{len(table)} days x 24 hours ({args.agg} {args.field}) saved to {output}")
+    return 0
+
+
+def cmd_calendars(args) -> int:
+    import generate_calendars
+    return _run_with_argv(generate_calendars.main, 'generate_calendars.py', args.args)
+
+
+def cmd_heating_stats(args) -> int:
+    import heating_statistics
+    return _run_with_argv(heating_statistics.main, 'heating_statistics.py', [])
+
+
+def cmd_heatmap(args) -> int:
+    import create_heatmap
+    result = create_heatmap.main(args.args)
+    return result if isinstance(result, int) else 0
+
+
+def cmd_gui(args) -> int:
+    import temperature_gui
+    temperature_gui.main(args.db)
+    return 0
+
+
+def cmd_bench_imports(args) -> int:
+    """Measure the cold import time of every entry point in a fresh interpreter."""
+    import os
+    import subprocess
+
+    root = Path(__file__).parent
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join([str(root), str(root / 'src'), env.get('PYTHONPATH', '')])
+
+    code = ("import time, importlib; t = time.perf_counter(); "
+            "importlib.import_module({!r}); print(time.perf_counter() - t)")
+
+    def measure(command):
+        best = None
+        for _ in range(args.repeat):
+            result = subprocess.run(command, cwd=root, env=env, capture_output=True, text=True)
+            if result.returncode != 0:
+                return None, result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'failed'
+            value = float(result.stdout.strip().splitlines()[-1])
+            best = value if best is None else min(best, value)
+        return best, None
+
+    print(f"{'module':<26} {'used by':<16} {'import time':>12}")
+    for module, used_by in BENCH_MODULES:
+        seconds, error = measure([sys.executable, '-c', code.format(module)])
+        shown = f"{seconds * 1000:9.1f} ms" if error is None else f"error: {error}"
+        print(f"{module:<26} {used_by:<16} {shown:>12}")
+
+    # End-to-end time of a summary command next to a bare interpreter start
+    timer = ("import subprocess, sys, time; t = time.perf_counter(); "
+             "subprocess.run([sys.executable, '-c', 'pass'], check=True); print(time.perf_counter() - t)")
+    seconds, error = measure([sys.executable, '-c', timer])
+    shown = f"{seconds * 1000:9.1f} ms" if error is None else f"error: {error}"
+    print(f"{'python -c pass (total)':<26} {'baseline':<16} {shown:>12}")
+
+    timer = ("import subprocess, sys, time; t = time.perf_counter(); "
+             "subprocess.run([sys.executable, 'tempmon.py', 'devices', '--db', {!r}], "
+             "capture_output=True, check=True); print(time.perf_counter() - t)")
+    seconds, error = measure([sys.executable, '-c', timer.format(args.db)])
+    shown = f"{seconds * 1000:9.1f} ms" if error is None else f"error: {error}"
+    print(f"{'tempmon devices (total)':<26} {'':<16} {shown:>12}")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='tempmon', description='Temperature Monitoring tools')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    def add(name, handler, help_text, db=True):
+        sub = subparsers.add_parser(name, help=help_text)
+        if db:
+            sub.add_argument('--db', default=DEFAULT_DB,
+                             help=f'JSON database or sensor store directory (default: {DEFAULT_DB})')
+        sub.set_defaults(handler=handler)
+        return sub
+
+    add('devices', cmd_devices, 'List devices and record counts')
+
+    sub = add('range', cmd_range, 'Show the date range of the data')
+    sub.add_argument('device', nargs='?', help='Limit to one device')
+
+    sub = add('history', cmd_history, 'List the import runs or show what one of them added')
+    sub.add_argument('import_id', nargs='?', type=int, help='Import number (negative counts from the end)')
+    sub.add_argument('--last', type=int, default=10, help='Number of runs listed (default: 10)')
+
+    sub = add('import', cmd_import, 'Import TempLogs*.zip files')
+    sub.add_argument('--data-folder', default='data', help='Folder with the ZIP files')
+    sub.add_argument('--store', help='Import into a sensor store directory')
+    sub.add_argument('--memory-budget', type=float, metavar='MB',
+                     help='Merge into the store out-of-core using at most this much memory')
+    sub.add_argument('--alerts', action='store_true',
+                     help='Evaluate the alert rules on the new readings (log: data/alerts/alerts.jsonl)')
+    sub.add_argument('--alert-rules', metavar='JSON', help='Alert rules file (default: built-in rules)')
+    sub.add_argument('--alert-webhook', metavar='URL', help='Also hand the alerts to the webhook stub')
+
+    sub = add('migrate', cmd_migrate, 'Convert the JSON database into a sensor store')
+    sub.add_argument('--store', default='data/temperature_store', help='Target store directory')
+
+    passthrough = [
+        ('process', cmd_process, 'Process one ZIP file (arguments of src/main.py)'),
+        ('heating', cmd_heating, 'Detect heating cycles (arguments of detect_heating.py)'),
+        ('heatmap', cmd_heatmap, 'Create temperature difference heatmaps (arguments of create_heatmap.py)'),
+        ('stats', cmd_stats, 'Run STAT001/STAT002 statistics (arguments of temperature_statistics.py)'),
+        ('calendars', cmd_calendars, 'Generate calendar images (arguments of generate_calendars.py)'),
+    ]
+    for name, handler, help_text in passthrough:
+        sub = add(name, handler, help_text, db=False)
+        sub.add_argument('args', nargs=argparse.REMAINDER)
+
+    sub = add('rollup', cmd_rollup, 'Hourly rollup of one device, streamed out-of-core from a sensor store')
+    sub.add_argument('device', help='Device name')
+    sub.add_argument('--field', default='temperature', choices=['temperature', 'humidity', 'battery_mv'])
+    sub.add_argument('--agg', default='mean', choices=['mean', 'min', 'max', 'count'])
+    sub.add_argument('--memory-budget', type=float, default=256, metavar='MB',
+                     help='Peak memory for the chunk data (default: 256)')
+    sub.add_argument('--output', help='CSV file (default: output/<device>_<field>_hourly_<agg>.csv)')
+
+    sub = add('correlate', cmd_correlate, 'Pairwise correlation and lag matrix of all devices')
+    sub.add_argument('devices', nargs='*', help='Devices to include (default: all)')
+    sub.add_argument('--device', help='List the devices responding to this device (e.g. T8_Z1)')
+    sub.add_argument('--step', type=int, default=15, help='Grid step in minutes')
+    sub.add_argument('--max-lag-hours', type=float, default=12.0, help='Largest lag evaluated')
+    sub.add_argument('--diff', action='store_true', help='Correlate temperature changes instead of levels')
+    sub.add_argument('--min-correlation', type=float, default=0.3, help='Smallest reported response')
+    sub.add_argument('--output-dir', default='output/correlation', help='Output directory')
+
+    add('heating-stats', cmd_heating_stats, 'Heating statistics and gas correlation', db=False)
+    add('gui', cmd_gui, 'Start the interactive GUI')
+
+    sub = add('bench-imports', cmd_bench_imports, 'Measure cold import time of the entry points')
+    sub.add_argument('--repeat', type=int, default=3, help='Runs per module (best is reported)')
+
+    return parser
+
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else list(argv)
+    parser = build_parser()
+
+    # Pass-through commands hand all their arguments to the wrapped script
+    # (argparse.REMAINDER does not capture arguments starting with '-')
+    if len(argv) > 1 and argv[0] in PASSTHROUGH_COMMANDS:
+        args = parser.parse_args(argv[:1])
+        args.args = argv[1:]
+    else:
+        args = parser.parse_args(argv)
+    try:
+        return args.handler(args)
+    except (FileNotFoundError, IndexError) as e:
+        print(f"Error: {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,40 @@
+"""
+Shared fixtures for the unit tests.
+"""
+
+import pytest
+from datetime import datetime, timedelta
+
+
+def _value_for(value, index):
+    """A fixed value, or the value of a per-reading callable."""
+    return value(index) if callable(value) else value
+
+
+@pytest.fixture
+def make_records():
+    """
+    Factory of sensor records as produced by the processor, one per temperature.
+
+    Args of the factory:
+        temperatures: Temperature of every reading
+        start: Time of the first reading
+        step_minutes: Logging interval
+        offset_minutes: Shift of all timestamps
+        humidity, battery, quality: Fixed values, or callables of the reading index
+        iso_timestamps: Timestamps as ISO strings (as stored in the database)
+    """
+    def make(temperatures, start=datetime(2024, 1, 1), step_minutes=5, offset_minutes=0,
+             humidity=50.0, battery=3000, quality=0, iso_timestamps=False):
+        records = []
+        for i, temperature in enumerate(temperatures):
+            timestamp = start + timedelta(minutes=step_minutes * i + offset_minutes)
+            records.append({
+                'timestamp': timestamp.isoformat() if iso_timestamps else timestamp,
+                'temperature': temperature,
+                'humidity': _value_for(humidity, i),
+                'battery_mv': _value_for(battery, i),
+                'quality': _value_for(quality, i)
+            })
+        return records
+    return make
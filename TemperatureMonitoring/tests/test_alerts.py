@@ -0,0 +1,101 @@
+"""
+Unit tests for the incremental alert rules.
+"""
+
+import json
+import pytest
+from datetime import datetime, timedelta
+from pathlib import Path
+import sys
+
+# Add src directory to path
+sys.path.append(str(Path(__file__).parent.parent / 'src'))
+
+from alerts import AlertEngine, JsonlAlertSink, WebhookAlertSink, validate_rules
+from data_importer import TemperatureDataImporter
+from data_quality import QF_BATTERY
+
+
+def _engine(rules, tmp_path, sinks=None):
+    return AlertEngine(rules, state_path=str(tmp_path / 'state.json'), sinks=sinks or [])
+
+
+FROST = {'name': 'frost', 'type': 'threshold', 'field': 'temperature', 'below': 3.0, 'for_minutes': 15}
+
+
+class TestAlertEngine:
+    """Test cases for AlertEngine."""
+
+    def test_threshold_fires_once_per_sustained_run(self, tmp_path, make_records):
+        engine = _engine([FROST], tmp_path)
+        events = engine.evaluate('T2_Terasz', make_records([5, 2, 2, 2, 2, 2, 5, 2, 2, 5, 1, 1, 1, 1]))
+
+        assert [e['timestamp'] for e in events] == ['2024-01-01T00:20:00', '2024-01-01T01:05:00']
+        assert events[0]['rule'] == 'frost'
+
+    def test_open_condition_continues_across_imports(self, tmp_path, make_records):
+        records = make_records([5, 2, 2, 2, 2, 2, 2, 2])
+        engine = _engine([FROST], tmp_path)
+        assert engine.evaluate('D', records[:3]) == []
+        engine.save_state()
+
+        # A new engine picks up the open run from the state file
+        resumed = _engine([FROST], tmp_path)
+        events = resumed.evaluate('D', records)
+        assert [e['timestamp'] for e in events] == ['2024-01-01T00:20:00']
+        assert resumed.evaluate('D', records) == []
+
+    def test_rate_gap_and_device_patterns(self, tmp_path, make_records):
+        rules = [
+            {'name': 'jump', 'type': 'rate', 'field': 'temperature', 'max_change_per_hour': 20.0},
+            {'name': 'silent', 'type': 'gap', 'max_gap_minutes': 30, 'devices': ['T*_Z*']},
+        ]
+        engine = _engine(rules, tmp_path)
+        records = make_records([20, 20, 25, 25]) + make_records([25, 25], start=datetime(2024, 1, 1, 2, 0))
+
+        events = engine.evaluate('T8_Z1', records)
+        assert [e['rule'] for e in events] == ['jump', 'silent']
+        assert events[1]['value'] == pytest.approx(105)
+        assert [e['rule'] for e in engine.evaluate('Room', records)] == ['jump']
+
+    def test_battery_trend(self, tmp_path, make_records):
+        rule = {'name': 'drain', 'type': 'battery_trend', 'window_days': 5, 'max_drop_mv_per_day': 15}
+        engine = _engine([rule], tmp_path)
+        days = [make_records([20.0] * 4, start=datetime(2024, 1, 1) + timedelta(days=d), battery=3000 - 40 * d)
+                for d in range(6)]
+
+        fired = [engine.evaluate('D', day) for day in days]
+        assert [len(events) for events in fired] == [0, 0, 1, 0, 0, 0]
+        assert fired[2][0]['value'] == pytest.approx(-40)
+
+    def test_battery_low_fires_on_flagged_readings(self, tmp_path, make_records):
+        rule = {'name': 'battery_low', 'type': 'threshold', 'field': 'battery_mv', 'below': 2400}
+        engine = _engine([rule, FROST], tmp_path)
+        records = make_records([1.0] * 4, battery=2100, quality=QF_BATTERY)
+
+        events = engine.evaluate('T2_Terasz', records)
+
+        # A brown-out reading is a valid battery reading but not a valid temperature
+        assert [(e['rule'], e['value']) for e in events] == [('battery_low', 2100)]
+
+    def test_invalid_rules(self):
+        with pytest.raises(ValueError):
+            validate_rules([{'name': 'x', 'type': 'unknown'}])
+        with pytest.raises(ValueError):
+            validate_rules([{'name': 'x', 'type': 'threshold', 'field': 'temperature'}])
+
+    def test_importer_writes_alert_log(self, tmp_path, make_records):
+        log_path = tmp_path / 'alerts.jsonl'
+        webhook = WebhookAlertSink('http://localhost/hook')
+        engine = _engine([FROST], tmp_path, sinks=[JsonlAlertSink(str(log_path)), webhook])
+        importer = TemperatureDataImporter(json_db_path=str(tmp_path / 'db.json'), alerts=engine)
+
+        batch = [{'device_name': 'T2_Terasz', 'data': make_records([1.0] * 10)}]
+        importer.import_device_data(batch)
+        importer.import_device_data(batch)
+        importer._save_database()
+
+        lines = [json.loads(line) for line in log_path.read_text().splitlines()]
+        assert [(e['device'], e['rule']) for e in lines] == [('T2_Terasz', 'frost')]
+        assert len(webhook.sent) == 1
+        assert (tmp_path / 'state.json').exists()
@@ -0,0 +1,85 @@
+"""
+Unit tests for the FFT based fleet cross-correlation.
+"""
+
+import numpy as np
+import pytest
+from datetime import datetime, timedelta
+from pathlib import Path
+import sys
+
+# Add src directory to path
+sys.path.append(str(Path(__file__).parent.parent / 'src'))
+
+from cross_correlation import FleetCorrelationAnalyzer, _spectra, lagged_correlation_block
+
+
+def _pearson_at_lag(a, b, lag):
+    if lag >= 0:
+        x, y = a[:len(a) - lag], b[lag:]
+    else:
+        x, y = a[-lag:], b[:len(b) + lag]
+    valid = ~np.isnan(x) & ~np.isnan(y)
+    return np.corrcoef(x[valid], y[valid])[0, 1]
+
+
+def _database(signals, start=datetime(2024, 1, 1)):
+    return {
+        'devices': {
+            name: {'records': [
+                {'timestamp': (start + timedelta(minutes=15 * i)).isoformat(), 'temperature': float(v)}
+                for i, v in enumerate(values) if not np.isnan(v)
+            ]}
+            for name, values in signals.items()
+        }
+    }
+
+
+class TestFleetCorrelation:
+    """Test cases for FleetCorrelationAnalyzer."""
+
+    def test_block_matches_direct_pearson_with_gaps(self):
+        rng = np.random.default_rng(0)
+        rows = rng.normal(size=(3, 500))
+        rows[0, 50:80] = np.nan
+        rows[2, 300:420] = np.nan
+        lags = np.arange(-5, 6)
+        nfft = 1024
+
+        spectra = _spectra(rows, nfft)
+        corr, _ = lagged_correlation_block(spectra, spectra, nfft, lags % nfft, min_overlap=10)
+
+        for i in range(3):
+            for j in range(3):
+                for k, lag in enumerate(lags):
+                    assert corr[i, j, k] == pytest.approx(_pearson_at_lag(rows[i], rows[j], lag), abs=1e-9)
+
+    def test_detects_lagged_response(self):
+        rng = np.random.default_rng(1)
+        driver = np.cumsum(rng.normal(size=2000))
+        follower = np.r_[np.full(8, np.nan), driver[:-8]] + rng.normal(0, 0.1, 2000)
+        unrelated = np.cumsum(rng.normal(size=2000))
+
+        analyzer = FleetCorrelationAnalyzer(_database({'Z1': driver, 'Room': follower, 'Other': unrelated}),
+                                            max_lag_hours=4, block_size=2, differenced=True)
+        results = analyzer.analyze()
+
+        responses = FleetCorrelationAnalyzer.responses(results, 'Z1', min_correlation=0.5)
+        assert [r['device'] for r in responses] == ['Room']
+        assert responses[0]['lag_minutes'] == 8 * 15
+
+        row, col = results['devices'].index('Room'), results['devices'].index('Z1')
+        assert results['peak_lag_minutes'][row, col] == -8 * 15
+        assert results['peak_correlation'][row, row] == pytest.approx(1.0)
+
+    def test_missing_device_returns_error(self):
+        analyzer = FleetCorrelationAnalyzer(_database({'A': np.arange(10.0)}))
+        assert 'error' in analyzer.analyze(['A', 'B'])
+
+    def test_write_results(self, tmp_path):
+        rng = np.random.default_rng(2)
+        analyzer = FleetCorrelationAnalyzer(_database({'A': rng.normal(size=300), 'B': rng.normal(size=300)}),
+                                            max_lag_hours=1)
+        written = analyzer.write_results(analyzer.analyze(), str(tmp_path))
+        assert {Path(p).name for p in written} == {
+            'peak_correlation.csv', 'peak_lag_minutes.csv', 'zero_lag_correlation.csv', 'summary.json'}
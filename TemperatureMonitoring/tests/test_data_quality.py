@@ -0,0 +1,112 @@
+"""
+Unit tests for the ingest data quality checks.
+"""
+
+import pytest
+import numpy as np
+from pathlib import Path
+import sys
+
+# Add src directory to path
+sys.path.append(str(Path(__file__).parent.parent / 'src'))
+
+from data_quality import (compute_quality_mask, annotate_records, filter_records, summarize_flags,
+                          QF_RANGE, QF_SPIKE, QF_FLATLINE, QF_CLOCK, QF_BATTERY)
+
+
+def _series(temperatures, humidity=None, battery=None, step_minutes=5):
+    n = len(temperatures)
+    times = np.datetime64('2024-01-01T00:00:00') + np.arange(n) * np.timedelta64(step_minutes * 60, 's')
+    humidity = np.full(n, 50.0) if humidity is None else np.asarray(humidity, dtype=float)
+    battery = np.full(n, 3000) if battery is None else np.asarray(battery)
+    return times, np.asarray(temperatures, dtype=float), humidity, battery
+
+
+class TestComputeQualityMask:
+    """Test cases for the vectorized quality mask."""
+
+    def test_clean_series_has_no_flags(self):
+        mask = compute_quality_mask(*_series([20.0, 20.1, 20.3, 20.2, 20.4]))
+
+        assert not mask.any()
+
+    def test_range_check(self):
+        times, temps, hum, batt = _series([20.0, 120.0, 20.0])
+        hum[2] = 130.0
+
+        mask = compute_quality_mask(times, temps, hum, batt)
+
+        assert list(mask & QF_RANGE) == [0, QF_RANGE, QF_RANGE]
+
+    def test_spike_detection(self):
+        mask = compute_quality_mask(*_series([20.0, 20.1, 20.0, 35.0, 20.1, 20.0, 20.2]))
+
+        assert mask[3] & QF_SPIKE
+        assert not (mask[[0, 1, 2, 4, 5, 6]] & QF_SPIKE).any()
+
+    def test_flatline_detection(self):
+        temps = [21.0] * 4 + [21.5]
+        mask = compute_quality_mask(*_series(temps), config={'flatline_min_samples': 4})
+
+        assert list(mask & QF_FLATLINE) == [QF_FLATLINE] * 4 + [0]
+
+    def test_clock_going_backwards(self):
+        times, temps, hum, batt = _series([20.0, 20.1, 20.2, 20.3])
+        times[2] = times[0]
+
+        mask = compute_quality_mask(times, temps, hum, batt)
+
+        assert list(mask & QF_CLOCK) == [0, 0, QF_CLOCK, 0]
+
+    def test_out_of_order_row_is_not_a_clock_fault(self):
+        times, temps, hum, batt = _series([20.0, 20.1, 20.2, 20.3])
+        times[[1, 2]] = times[[2, 1]]
+
+        mask = compute_quality_mask(times, temps, hum, batt)
+
+        assert not (mask & QF_CLOCK).any()
+
+    def test_clock_jump_beyond_tolerance(self):
+        times, temps, hum, batt = _series([20.0, 20.1, 20.2, 20.3])
+        times[3] = times[0] - np.timedelta64(2, 'h')
+
+        mask = compute_quality_mask(times, temps, hum, batt)
+
+        assert list(mask & QF_CLOCK) == [0, 0, 0, QF_CLOCK]
+        assert not compute_quality_mask(times, temps, hum, batt,
+                                        config={'clock_tolerance_seconds': 3 * 3600}).any()
+
+    def test_repeated_identical_reading_is_not_a_clock_fault(self):
+        times, temps, hum, batt = _series([20.0, 20.1, 20.1])
+        times[2] = times[1]
+
+        mask = compute_quality_mask(times, temps, hum, batt)
+
+        assert not (mask & QF_CLOCK).any()
+
+    def test_battery_brown_out(self):
+        mask = compute_quality_mask(*_series([20.0, 20.1], battery=[3000, 1900]))
+
+        assert list(mask & QF_BATTERY) == [0, QF_BATTERY]
+
+    def test_unknown_setting_rejected(self):
+        with pytest.raises(ValueError, match="Unknown quality settings"):
+            compute_quality_mask(*_series([20.0]), config={'spike_size': 1})
+
+
+class TestRecordHelpers:
+    """Test cases for the record level helpers."""
+
+    def test_annotate_and_filter(self):
+        from datetime import datetime, timedelta
+        start = datetime(2024, 1, 1)
+        records = [
+            {'timestamp': start + timedelta(minutes=5 * i), 'temperature': t, 'humidity': 50.0, 'battery_mv': 3000}
+            for i, t in enumerate([20.0, 200.0, 20.1])
+        ]
+
+        annotate_records(records)
+
+        assert [r['quality'] for r in records] == [0, QF_RANGE, 0]
+        assert len(filter_records(records)) == 2
+        assert summarize_flags([r['quality'] for r in records])['range'] == 1
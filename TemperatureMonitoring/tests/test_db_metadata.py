@@ -0,0 +1,68 @@
+"""
+Unit tests for the precomputed database metadata.
+"""
+
+import json
+import os
+from pathlib import Path
+import sys
+
+# Add src directory to path
+sys.path.append(str(Path(__file__).parent.parent / 'src'))
+
+from db_metadata import read_metadata, write_sidecar, sidecar_path
+
+
+def _database():
+    return {
+        'metadata': {'last_updated': '2024-01-02T00:00:00'},
+        'devices': {
+            'T1': {'records': [
+                {'timestamp': '2024-01-01T12:00:00', 'temperature': 20.0},
+                {'timestamp': '2024-01-01T12:05:00', 'temperature': 20.5},
+            ]},
+            'T2': {'records': []},
+        }
+    }
+
+
+class TestDatabaseMetadata:
+    """Test cases for read_metadata and the JSON sidecar."""
+
+    def test_sidecar_is_used_when_current(self, tmp_path):
+        db_path = tmp_path / 'db.json'
+        db_path.write_text(json.dumps(_database()))
+        write_sidecar(_database(), db_path)
+
+        # Tamper with the sidecar to prove the database itself is not read
+        sidecar = json.loads(sidecar_path(db_path).read_text())
+        sidecar['total_records'] = 99
+        sidecar_path(db_path).write_text(json.dumps(sidecar))
+
+        assert read_metadata(db_path)['total_records'] == 99
+
+    def test_outdated_sidecar_is_rebuilt(self, tmp_path):
+        db_path = tmp_path / 'db.json'
+        db_path.write_text(json.dumps(_database()))
+        write_sidecar(_database(), db_path)
+
+        stat = os.stat(db_path)
+        os.utime(db_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+        metadata = read_metadata(db_path)
+
+        assert metadata['total_records'] == 2
+        assert metadata['devices']['T1']['first_record'] == '2024-01-01T12:00:00'
+        assert metadata['devices']['T2']['last_record'] is None
+
+    def test_store_manifest(self, tmp_path):
+        (tmp_path / 'manifest.json').write_text(json.dumps({
+            'format': 'sensor-store',
+            'metadata': {'total_records': 3, 'last_updated': '2024-01-02T00:00:00'},
+            'devices': {'T1': {'record_count': 3, 'first_record': '2024-01-01T00:00:00',
+                               'last_record': '2024-01-01T00:10:00', 'version': 1}}
+        }))
+
+        metadata = read_metadata(tmp_path)
+
+        assert metadata['devices']['T1']['record_count'] == 3
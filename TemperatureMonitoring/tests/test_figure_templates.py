@@ -0,0 +1,107 @@
+"""
+Unit tests for the reusable figure templates.
+"""
+
+import numpy as np
+import pandas as pd
+from datetime import date
+from pathlib import Path
+import sys
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.dates as mdates
+import matplotlib.image as mpimg
+
+# Add src directory to path
+sys.path.append(str(Path(__file__).parent.parent / 'src'))
+
+from figure_templates import (CalendarTemplate, FigureTemplateCache, PointChartTemplate,
+                              calendar_date_labels, calendar_date_ticks)
+
+
+def _calendar():
+    return CalendarTemplate(10, 96, 15, 'coolwarm', 'gray', 'Temperature (°C)')
+
+
+class TestFigureTemplates:
+    """Test cases for the figure template cache and templates."""
+
+    def test_cache_reuses_and_evicts(self):
+        cache = FigureTemplateCache(max_templates=2)
+        built = []
+
+        def factory(name):
+            return lambda: built.append(name) or name
+
+        assert cache.get('a', factory('a')) == 'a'
+        assert cache.get('b', factory('b')) == 'b'
+        assert cache.get('a', factory('a')) == 'a'
+        cache.get('c', factory('c'))
+        cache.get('b', factory('b'))
+
+        assert built == ['a', 'b', 'c', 'b']
+        assert len(cache) == 2
+
+    def test_date_ticks_and_labels(self):
+        assert calendar_date_ticks(5) == [0, 1, 2, 3, 4]
+        assert calendar_date_ticks(41) == list(range(0, 41, 3)) + [40]
+
+        ticks, labels = calendar_date_labels(date(2024, 2, 27), 5)
+        assert ticks == [0, 1, 2, 3, 4]
+        assert labels == ['2024-02-27', '2024-02-28', '2024-02-29', '2024-03-01', '2024-03-02']
+
+    def test_date_axis_ticks_every_monday(self, tmp_path):
+        template = PointChartTemplate((8, 4), 'b.', 'Date', 'Number of Cycles', date_axis=True)
+
+        for first_day, days in [('2024-01-03', 67), ('2024-05-18', 12), ('2023-11-29', 180)]:
+            dates = pd.Series(pd.date_range(first_day, periods=days, freq='D'))
+            template.render(dates, np.ones(days), first_day, tmp_path / 'chart.png')
+
+            lower, upper = template.ax.get_xlim()
+            ticks = [tick for tick in template.ax.get_xticks() if lower <= tick <= upper]
+            assert all(mdates.num2date(tick).weekday() == 0 for tick in ticks)
+            assert np.all(np.diff(ticks) == 7)
+            assert ticks[0] - lower < 7 and upper - ticks[-1] < 7
+
+    def test_reused_calendar_matches_fresh_template(self, tmp_path):
+        rng = np.random.default_rng(0)
+        first = rng.normal(20, 2, (10, 96))
+        second = rng.normal(5, 3, (10, 96))
+        second[3, 10:20] = np.nan
+
+        reused = _calendar()
+        reused.render(first, date(2024, 1, 1), 'First', tmp_path / 'first.png')
+        reused.render(second, date(2024, 3, 1), 'Second', tmp_path / 'reused.png')
+        _calendar().render(second, date(2024, 3, 1), 'Second', tmp_path / 'fresh.png')
+
+        np.testing.assert_array_equal(mpimg.imread(tmp_path / 'reused.png'),
+                                      mpimg.imread(tmp_path / 'fresh.png'))
+
+    def test_all_nan_calendar_does_not_keep_previous_scale(self, tmp_path):
+        empty = np.full((10, 96), np.nan)
+
+        reused = _calendar()
+        reused.render(np.full((10, 96), 21.5), date(2024, 1, 1), 'First', tmp_path / 'first.png')
+        reused.render(empty, date(2024, 1, 1), 'Empty', tmp_path / 'reused.png')
+        fresh = _calendar()
+        fresh.render(empty, date(2024, 1, 1), 'Empty', tmp_path / 'fresh.png')
+
+        assert reused.image.get_clim() == fresh.image.get_clim()
+        assert not reused.image.get_clim()[0] <= 21.5 <= reused.image.get_clim()[1]
+        np.testing.assert_array_equal(mpimg.imread(tmp_path / 'reused.png'),
+                                      mpimg.imread(tmp_path / 'fresh.png'))
+
+    def test_reused_point_chart_matches_fresh_template(self, tmp_path):
+        def chart():
+            return PointChartTemplate((8, 4), 'b.', 'Date', 'Number of Cycles', date_axis=True)
+
+        dates = pd.Series(pd.date_range('2024-01-01', periods=60, freq='D'))
+        reused = chart()
+        reused.render(dates, np.arange(60) % 7, 'First', tmp_path / 'first.png')
+        reused.render(dates[:30], np.arange(30) * 2, 'Second', tmp_path / 'reused.png')
+        chart().render(dates[:30], np.arange(30) * 2, 'Second', tmp_path / 'fresh.png')
+
+        np.testing.assert_array_equal(mpimg.imread(tmp_path / 'reused.png'),
+                                      mpimg.imread(tmp_path / 'fresh.png'))
+        assert reused.ax.get_ylim()[0] == 0
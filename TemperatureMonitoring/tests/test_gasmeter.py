@@ -0,0 +1,107 @@
+"""
+Unit tests for the gas meter series.
+"""
+
+import json
+import numpy as np
+import pytest
+from pathlib import Path
+import sys
+
+# Add src directory to path
+sys.path.append(str(Path(__file__).parent.parent / 'src'))
+
+from gasmeter import GasmeterSeries, gas_series_path, load_gas_series, parse_gasmeter_csv
+from sensor_store import SensorStore
+
+CSV = """Date,Time,Gas meter
+11/01/2024,07:38,5054.83
+11/03/2024, 08:00 ,5060.10,note
+11/02/2024,20:15,5057.5
+11/04/2024
+bad,07:00,1
+11/05/2024,09:00,x
+
+11/06/2024,09:00,5049.0
+"""
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / 'gas.csv'
+    path.write_text(CSV)
+    return path
+
+
+class TestGasmeterSeries:
+    """Test cases for parsing and merging gas meter readings."""
+
+    def test_parse_skips_invalid_rows(self, csv_path):
+        times, values, skipped = parse_gasmeter_csv(str(csv_path))
+
+        assert [str(t) for t in times] == ['2024-11-01T07:38:00', '2024-11-03T08:00:00',
+                                          '2024-11-02T20:15:00', '2024-11-06T09:00:00']
+        assert values.tolist() == [5054.83, 5060.10, 5057.5, 5049.0]
+        assert skipped == 3
+
+    def test_parse_missing_file(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            parse_gasmeter_csv(str(tmp_path / 'missing.csv'))
+
+    def test_merge_is_idempotent_and_sorted(self, tmp_path, csv_path):
+        series = GasmeterSeries(tmp_path / 'series')
+        times, values, _ = parse_gasmeter_csv(str(csv_path))
+
+        assert series.merge(times, values) == (4, 0)
+        version = series.manifest['version']
+        assert series.merge(times, values) == (0, 4)
+        assert series.manifest['version'] == version
+
+        columns = GasmeterSeries(tmp_path / 'series').read()
+        assert np.all(np.diff(columns['timestamp'].astype(np.int64)) > 0)
+        np.testing.assert_allclose(columns['consumption'], [np.nan, 2.67, 2.6, -11.1], equal_nan=True)
+        assert columns['interval_hours'][1] == pytest.approx(36 + 37 / 60)
+        assert columns['rate'][2] == pytest.approx(2.6 / (11 + 45 / 60))
+        assert np.isnan(columns['rate'][3])
+
+    def test_series_location(self, tmp_path):
+        assert gas_series_path(tmp_path / 'db.json') == tmp_path / 'db.gasmeter'
+
+        store = SensorStore(str(tmp_path / 'store'))
+        store.save_manifest()
+        assert gas_series_path(tmp_path / 'store') == tmp_path / 'store' / 'gasmeter'
+
+    def test_legacy_section_fallback_and_migration(self, tmp_path):
+        legacy = {'devices': {}, 'gasmeter': {'records': [
+            {'timestamp': '2024-11-02T07:00:00', 'value': 12.0},
+            {'timestamp': '2024-11-01T07:00:00', 'value': 10.0},
+        ]}}
+        json_path = tmp_path / 'db.json'
+        json_path.write_text(json.dumps(legacy))
+
+        gas = load_gas_series(json_path, legacy)
+        assert gas['value'].tolist() == [10.0, 12.0]
+        assert gas['rate'][1] == pytest.approx(2.0 / 24)
+
+        SensorStore.from_json(str(json_path), str(tmp_path / 'store'))
+        migrated = load_gas_series(tmp_path / 'store')
+        for name, values in gas.items():
+            np.testing.assert_array_equal(migrated[name], values)
+
+        assert load_gas_series(tmp_path / 'other.json', {'devices': {}}) is None
+
+    def test_legacy_section_combined_with_series(self, tmp_path):
+        legacy = {'devices': {}, 'gasmeter': {'records': [
+            {'timestamp': '2024-11-01T07:00:00', 'value': 10.0},
+            {'timestamp': '2024-11-02T07:00:00', 'value': 12.0},
+        ]}}
+        json_path = tmp_path / 'db.json'
+        json_path.write_text(json.dumps(legacy))
+
+        GasmeterSeries.for_database(json_path).merge(
+            np.array(['2024-11-02T07:00:00', '2024-11-03T07:00:00'], dtype='datetime64[s]'),
+            np.array([12.5, 14.0]))
+
+        gas = load_gas_series(json_path, legacy)
+        assert gas['value'].tolist() == [10.0, 12.5, 14.0]
+        assert gas['consumption'][1] == pytest.approx(2.5)
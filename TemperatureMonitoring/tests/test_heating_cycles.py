@@ -0,0 +1,109 @@
+"""
+Unit tests for heating cycle detection and the parameter sweep.
+"""
+
+import numpy as np
+import pytest
+from pathlib import Path
+import sys
+
+# Add src directory to path
+sys.path.append(str(Path(__file__).parent.parent / 'src'))
+
+from heating_cycles import (daily_minimums, detect_cycles, parameter_grid, reference_agreement,
+                            sweep_parameters)
+
+
+def _reference_cycles(times, temperatures, rise, drop, gap):
+    """Row by row implementation of the original detect_heating.py loop."""
+    days = times.astype('datetime64[D]')
+    daily_min = {day: temperatures[days == day].min() for day in np.unique(days)}
+
+    raw, in_cycle = [], False
+    for t, temp, day in zip(times, temperatures, days):
+        if not in_cycle:
+            if temp >= daily_min[day] + rise:
+                start, peak, in_cycle = t, temp, True
+        else:
+            peak = max(peak, temp)
+            if temp <= peak + drop:
+                raw.append([start, t, peak])
+                in_cycle = False
+    if in_cycle:
+        raw.append([start, times[-1], peak])
+
+    merged = []
+    for cycle in raw:
+        if merged and (cycle[0] - merged[-1][1]) / np.timedelta64(1, 'm') <= gap:
+            merged[-1][1] = cycle[1]
+            merged[-1][2] = max(merged[-1][2], cycle[2])
+        else:
+            merged.append(list(cycle))
+    return merged
+
+
+def _series(days=6, seed=1):
+    rng = np.random.default_rng(seed)
+    times = np.datetime64('2024-01-01T00:00:00') + np.arange(days * 288) * np.timedelta64(5, 'm')
+    hours = (times - times.astype('datetime64[D]')) / np.timedelta64(1, 'h')
+    heating = ((hours % 6) < 2).astype(float) * 8.0
+    temperatures = 18.0 + np.convolve(heating, np.ones(6) / 6, mode='same') + rng.normal(0, 0.4, len(times))
+    return times.astype('datetime64[s]'), np.round(temperatures, 1)
+
+
+class TestHeatingCycles:
+    """Test cases for the array based cycle detection."""
+
+    def test_daily_minimums(self):
+        times = np.array(['2024-01-01T10:00', '2024-01-01T20:00', '2024-01-02T01:00'], dtype='datetime64[s]')
+        result = daily_minimums(times, np.array([5.0, 3.0, 7.0]))
+        assert result.tolist() == [3.0, 3.0, 7.0]
+
+    @pytest.mark.parametrize('rise,drop,gap', [(5.0, -1.0, 15), (3.0, -0.5, 30), (6.0, -2.0, 0)])
+    def test_matches_row_by_row_detection(self, rise, drop, gap):
+        times, temperatures = _series()
+
+        starts, ends, max_temps = detect_cycles(times, temperatures, rise, drop, gap)
+        expected = _reference_cycles(times, temperatures, rise, drop, gap)
+
+        assert len(expected) > 0
+        assert starts.tolist() == [c[0] for c in expected]
+        assert ends.tolist() == [c[1] for c in expected]
+        assert max_temps.tolist() == [c[2] for c in expected]
+
+    def test_cycle_running_at_data_end(self):
+        times = np.datetime64('2024-01-01T00:00:00') + np.arange(4) * np.timedelta64(5, 'm')
+        starts, ends, _ = detect_cycles(times, np.array([10.0, 16.0, 17.0, 18.0]), 5.0, -1.0, 15)
+        assert starts.tolist() == [times[1]]
+        assert ends.tolist() == [times[-1]]
+
+    def test_reference_agreement(self):
+        times = np.datetime64('2024-01-01T00:00:00') + np.arange(10) * np.timedelta64(1, 'h')
+        agreement = reference_agreement(times, times[[2]], times[[5]], times[[4]], times[[7]])
+        assert agreement['precision'] == pytest.approx(0.5)
+        assert agreement['recall'] == pytest.approx(0.5)
+        assert agreement['f1'] == pytest.approx(0.5)
+
+
+class TestParameterSweep:
+    """Test cases for the shared memory parameter sweep."""
+
+    def test_sweep_in_process_and_in_pool_agree(self):
+        series = {'T8_Z1': _series(seed=1), 'T6_Z2': _series(seed=2)}
+        grid = parameter_grid([4.0, 5.0], [-1.0], [15])
+        gas_times = np.datetime64('2024-01-01T00:00:00') + np.arange(7) * np.timedelta64(1, 'D')
+        gas = (gas_times, np.cumsum(np.r_[0.0, 3.0, 4.0, 3.5, 5.0, 4.5, 3.0]))
+        starts, ends, _ = detect_cycles(*series['T8_Z1'], 5.0, -1.0, 15)
+        references = {'T8_Z1': (starts, ends)}
+
+        local = sweep_parameters(series, grid, gas=gas, references=references, max_workers=1)
+        pooled = sweep_parameters(series, grid, gas=gas, references=references, max_workers=2)
+
+        assert len(local) == 2
+        for a, b in zip(local, pooled):
+            assert a.keys() == b.keys()
+            for key in a:
+                assert a[key] == pytest.approx(b[key], nan_ok=True)
+        assert local[1]['T8_Z1_cycles'] == len(starts)
+        assert local[1]['reference_f1'] == pytest.approx(1.0)
+        assert 'gas_correlation' in local[0]
@@ -0,0 +1,119 @@
+"""
+Unit tests for the import log.
+"""
+
+import json
+import pytest
+from datetime import datetime, timedelta
+from pathlib import Path
+import sys
+
+# Add src directory to path
+sys.path.append(str(Path(__file__).parent.parent / 'src'))
+
+from data_importer import TemperatureDataImporter
+from import_log import LOG_FIELDS, ImportLog, compact_entry, open_import_log
+from sensor_store import SensorStore
+
+
+def _stats(new_by_device, start='2024-01-01T00:00:00'):
+    devices = [{'name': name, 'new_records': new, 'duplicates': 1} for name, new in new_by_device.items()]
+    return {
+        'start_time': start,
+        'end_time': start,
+        'zip_files_processed': 2,
+        'devices_found': len(devices),
+        'total_new_records': sum(new_by_device.values()),
+        'total_duplicates': len(devices),
+        'files_processed': [{'filename': 'a.zip', 'devices': devices},
+                            {'filename': 'b.zip', 'devices': devices[:1]}],
+        'errors': ['Error processing c.zip: bad']
+    }
+
+
+def _records(count, start=datetime(2024, 1, 1)):
+    return [{'timestamp': start + timedelta(minutes=5 * i), 'temperature': 20.0 + i,
+             'humidity': 50.0, 'battery_mv': 3000} for i in range(count)]
+
+
+class TestImportLog:
+    """Test cases for ImportLog."""
+
+    def test_compact_entry(self):
+        entry = compact_entry(_stats({'T1': 5, 'T2': 0}), 3, 100)
+
+        assert tuple(entry) == LOG_FIELDS
+        assert entry['added'] == {'T1': 10}
+        assert entry['errors'] == 1
+        assert entry['total_records'] == 100
+
+    def test_append_and_lookup(self, tmp_path):
+        log = ImportLog.for_database(tmp_path / 'db.json')
+        assert log.path == tmp_path / 'db.imports.jsonl'
+        assert len(log) == 0
+
+        for i in range(5):
+            log.append(_stats({'T1': i}), total_records=10 * i)
+
+        reopened = ImportLog.for_database(tmp_path / 'db.json')
+        assert len(reopened) == 5
+        assert reopened.get(3)['added'] == {'T1': 6}
+        assert reopened.get(-1)['import_id'] == 4
+        assert [e['total_records'] for e in reopened.tail(2)] == [30, 40]
+        with pytest.raises(IndexError):
+            reopened.get(5)
+
+    def test_interrupted_append_rebuilds_index(self, tmp_path):
+        log = ImportLog(tmp_path / 'imports.jsonl')
+        log.append(_stats({'T1': 1}))
+        log.append(_stats({'T1': 2}))
+
+        # Log line written, index entry lost
+        log.index_path.write_bytes(log.index_path.read_bytes()[:8])
+        reopened = ImportLog(tmp_path / 'imports.jsonl')
+        assert len(reopened) == 2
+        assert reopened.get(1)['new_records'] == 2
+
+    def test_importer_moves_legacy_history(self, tmp_path):
+        db_path = tmp_path / 'db.json'
+        legacy = {'metadata': {'created': 'x', 'last_updated': 'x', 'version': '1.0.0'},
+                  'devices': {}, 'import_history': [_stats({'T1': 3}), _stats({'T2': 4})]}
+        db_path.write_text(json.dumps(legacy))
+
+        importer = TemperatureDataImporter(json_db_path=str(db_path))
+        assert 'import_history' not in importer.database
+        importer.import_device_data([{'device_name': 'T1', 'data': _records(10)}])
+        importer.import_device_data([{'device_name': 'T2', 'data': _records(4)}])
+        assert importer.database['metadata']['total_records'] == 14
+        importer._save_database()
+
+        assert 'import_history' not in json.loads(db_path.read_text())
+        log = TemperatureDataImporter(json_db_path=str(db_path)).import_log
+        assert [e['added'] for e in log.tail()] == [{'T1': 6}, {'T2': 8}]
+
+        store = SensorStore.from_json(str(db_path), str(tmp_path / 'store'))
+        assert store.manifest['metadata']['total_records'] == 14
+        assert len(ImportLog.for_database(tmp_path / 'store')) == 2
+
+    def test_store_legacy_history_file(self, tmp_path):
+        store = SensorStore(str(tmp_path / 'store'))
+        store.save_manifest()
+        (store.root / 'import_history.json').write_text(json.dumps([_stats({'T1': 1})]))
+
+        log = open_import_log(ImportLog.for_store(store.root))
+        assert len(log) == 1
+        assert not (store.root / 'import_history.json').exists()
+
+    def test_legacy_history_merged_into_non_empty_log(self, tmp_path):
+        store = SensorStore(str(tmp_path / 'store'))
+        store.save_manifest()
+        ImportLog.for_store(store.root).extend([compact_entry(_stats({'T1': 1}), 0)])
+        (store.root / 'import_history.json').write_text(json.dumps(
+            [_stats({'T1': 1}), _stats({'T2': 2}, start='2024-02-01T00:00:00')]))
+
+        log = open_import_log(ImportLog.for_store(store.root))
+        assert [e['added'] for e in log.tail()] == [{'T1': 2}, {'T2': 4}]
+        assert not (store.root / 'import_history.json').exists()
+
+        # Opening again does not add the runs twice
+        assert len(open_import_log(ImportLog.for_store(store.root))) == 2
@@ -0,0 +1,138 @@
+"""
+Unit tests for out-of-core processing: chunked results must equal the in-memory results.
+"""
+
+import numpy as np
+import pytest
+from datetime import datetime, timedelta
+from pathlib import Path
+import sys
+
+# Add src directory to path
+sys.path.append(str(Path(__file__).parent.parent / 'src'))
+
+from heating_cycles import StreamingCycleDetector, detect_cycles
+from out_of_core import CalendarAccumulator, OutOfCoreRunner
+from sensor_store import SensorStore, load_database
+from temperature_statistics import TemperatureStatistics
+from timeseries import hour_day_matrix, records_to_arrays
+
+
+def _records(start, count, step_minutes=5, seed=0):
+    rng = np.random.default_rng(seed)
+    records = []
+    for i in range(count):
+        hour = (i * step_minutes / 60) % 24
+        heating = 8.0 if 6 <= hour < 9 or 18 <= hour < 21 else 0.0
+        records.append({
+            'timestamp': start + timedelta(minutes=step_minutes * i),
+            'temperature': round(18.0 + heating + rng.normal(0, 0.3), 1),
+            'humidity': 50.0,
+            'battery_mv': 3000,
+            'quality': 2 if i % 97 == 0 else 0
+        })
+    return records
+
+
+@pytest.fixture
+def store_path(tmp_path):
+    store = SensorStore(str(tmp_path / 'store'))
+    records = (_records(datetime(2024, 1, 1), 2000) +
+               _records(datetime(2024, 1, 10, 3, 0), 1500, seed=1))
+    store.import_device_data([
+        {'device_name': 'T8_Z1', 'data': records},
+        {'device_name': 'T2_Terasz', 'data': _records(datetime(2024, 1, 2), 900, step_minutes=30, seed=2)},
+    ])
+    return str(tmp_path / 'store')
+
+
+def _small_chunks(store_path, rows=333):
+    runner = OutOfCoreRunner(store_path, memory_budget_mb=1)
+    runner.chunk_rows = rows
+    return runner
+
+
+class TestOutOfCore:
+    """Test cases for the chunked analyses."""
+
+    def test_stat001_matches_in_memory(self, store_path):
+        in_memory = TemperatureStatistics(store_path).stat001_active_time_intervals()
+
+        stats = TemperatureStatistics(store_path, memory_budget_mb=1)
+        stats.out_of_core.chunk_rows = 333
+        assert stats.stat001_active_time_intervals() == in_memory
+        assert len(in_memory['T8_Z1']) == 2
+
+    @pytest.mark.parametrize('agg', ['mean', 'min', 'max', 'count'])
+    def test_hour_day_rollup_matches_in_memory(self, store_path, agg):
+        times, values = records_to_arrays(load_database(store_path)['devices']['T8_Z1']['records'])
+        expected, expected_day = hour_day_matrix(times, values, agg)
+
+        matrix, first_day = _small_chunks(store_path).hour_day_rollup('T8_Z1', agg=agg)
+        assert first_day == expected_day
+        np.testing.assert_array_equal(matrix, expected)
+
+    @pytest.mark.parametrize('rows', [7, 100, 5000])
+    def test_heating_cycles_match_in_memory(self, store_path, rows):
+        times, values = records_to_arrays(load_database(store_path)['devices']['T8_Z1']['records'])
+        expected = detect_cycles(times, values, 5.0, -1.0, 15)
+
+        result = _small_chunks(store_path, rows).heating_cycles('T8_Z1', 5.0, -1.0, 15)
+        assert len(expected[0]) > 0
+        for got, want in zip(result, expected):
+            np.testing.assert_array_equal(got, want)
+
+    def test_streaming_detector_with_open_cycle_at_end(self):
+        times = np.datetime64('2024-01-01T22:00:00') + np.arange(40) * np.timedelta64(5, 'm')
+        temperatures = np.r_[np.full(10, 15.0), np.linspace(21, 30, 30)]
+
+        detector = StreamingCycleDetector(5.0, -1.0, 15)
+        for start in range(0, 40, 6):
+            detector.update(times[start:start + 6], temperatures[start:start + 6])
+
+        for got, want in zip(detector.finish(), detect_cycles(times, temperatures, 5.0, -1.0, 15)):
+            np.testing.assert_array_equal(got, want)
+
+    def test_calendar_matches_sequential_fill(self, store_path):
+        records = load_database(store_path)['devices']['T2_Terasz']['records']
+        start = datetime.fromisoformat(records[0]['timestamp']).date()
+        end = datetime.fromisoformat(records[-1]['timestamp']).date()
+        expected = np.full(((end - start).days + 1, 288), np.nan)
+        for record in records:
+            ts = datetime.fromisoformat(record['timestamp'])
+            expected[(ts.date() - start).days, (ts.hour * 60 + ts.minute) // 5] = record['temperature']
+
+        calendar = _small_chunks(store_path, 50).calendar('T2_Terasz')
+        assert calendar.date_range == (start, end)
+        np.testing.assert_array_equal(calendar.matrix, expected)
+
+    def test_calendar_keeps_last_reading_per_cell(self):
+        accumulator = CalendarAccumulator()
+        times = np.array(['2024-01-01T10:00:00', '2024-01-01T10:01:00', '2024-01-01T10:02:00'],
+                         dtype='datetime64[s]')
+        accumulator.update(times, np.array([1.0, 2.0, 3.0]))
+        assert accumulator.matrix[0, 120] == 3.0
+
+    def test_out_of_core_import_matches_in_memory(self, tmp_path):
+        batches = [
+            _records(datetime(2024, 1, 1), 3000),
+            _records(datetime(2024, 1, 5), 800, seed=3) + _records(datetime(2024, 1, 3), 200),
+            _records(datetime(2024, 2, 1), 100, seed=4),
+        ]
+        in_memory = SensorStore(str(tmp_path / 'a'))
+        chunked = SensorStore(str(tmp_path / 'b'), memory_budget_mb=0.001)
+
+        for batch in batches:
+            expected = in_memory.import_device_data([{'device_name': 'T1', 'data': batch}])
+            assert chunked.import_device_data([{'device_name': 'T1', 'data': batch}]) == expected
+
+        reloaded = SensorStore(str(tmp_path / 'b')).read_device('T1')
+        for name, values in in_memory.read_device('T1').items():
+            np.testing.assert_array_equal(reloaded[name], values)
+        assert chunked.device_info('T1')['record_count'] == len(reloaded['timestamp'])
+
+    def test_requires_sensor_store(self, tmp_path):
+        json_path = tmp_path / 'db.json'
+        json_path.write_text('{"devices": {}}')
+        with pytest.raises(ValueError):
+            OutOfCoreRunner(str(json_path))
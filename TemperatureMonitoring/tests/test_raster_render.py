@@ -0,0 +1,58 @@
+"""
+Unit tests for the raster rendering helpers.
+"""
+
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+from pathlib import Path
+import sys
+
+# Add src directory to path
+sys.path.append(str(Path(__file__).parent.parent / 'src'))
+
+from raster_render import rasterize_series, draw_raster_series
+
+
+class TestRasterizeSeries:
+    """Test cases for rasterize_series."""
+
+    def test_column_spans_cover_min_and_max(self):
+        x = np.array([0.0, 0.1, 0.2, 5.5])
+        y = np.array([1.0, 8.0, 4.0, 2.0])
+
+        mask = rasterize_series(x, y, (0.0, 10.0), (0.0, 10.0), width=10, height=10)
+
+        assert mask.shape == (10, 10)
+        assert list(np.flatnonzero(mask[:, 0])) == list(range(1, 9))
+        assert list(np.flatnonzero(mask[:, 5])) == [2]
+        assert not mask[:, 1:5].any()
+
+    def test_adjacent_columns_are_connected(self):
+        x = np.array([0.5, 1.5])
+        y = np.array([1.0, 6.0])
+
+        mask = rasterize_series(x, y, (0.0, 10.0), (0.0, 10.0), width=10, height=10)
+
+        assert list(np.flatnonzero(mask[:, 0])) == list(range(1, 7))
+        assert list(np.flatnonzero(mask[:, 1])) == list(range(1, 7))
+
+    def test_nan_values_are_skipped(self):
+        mask = rasterize_series(np.array([0.5]), np.array([np.nan]), (0.0, 1.0), (0.0, 1.0), 4, 4)
+
+        assert not mask.any()
+
+
+def test_draw_raster_series_composites_into_one_image():
+    times = np.datetime64('2024-01-01T00:00') + np.arange(10000) * np.timedelta64(5, 'm')
+    values = np.sin(np.arange(10000) / 100.0)
+    fig, ax = plt.subplots(figsize=(4, 3), dpi=50)
+
+    handles = draw_raster_series(ax, [('A', times, values, 'red'), ('B', times, values + 1, 'blue')])
+    ax.legend()
+
+    assert len(ax.images) == 1
+    assert ax.images[0].get_array().shape[2] == 4
+    assert [h.get_label() for h in handles] == ['A', 'B']
+    plt.close(fig)
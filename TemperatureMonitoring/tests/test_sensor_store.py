@@ -0,0 +1,196 @@
+"""
+Unit tests for the sharded sensor store.
+"""
+
+import json
+import logging
+import shutil
+from datetime import datetime, timedelta
+from pathlib import Path
+import sys
+
+# Add src directory to path
+sys.path.append(str(Path(__file__).parent.parent / 'src'))
+
+from data_importer import TemperatureDataImporter
+import sensor_store
+from sensor_store import SensorStore, load_database
+
+
+def _records(count, start=datetime(2024, 1, 1, 12, 0), temperature=20.0):
+    return [
+        {
+            'timestamp': start + timedelta(minutes=5 * i),
+            'temperature': temperature + i,
+            'humidity': 50.0,
+            'battery_mv': 3000
+        }
+        for i in range(count)
+    ]
+
+
+class TestSensorStore:
+    """Test cases for SensorStore."""
+
+    def test_import_creates_manifest_and_shards(self, tmp_path):
+        store = SensorStore(str(tmp_path))
+
+        stats = store.import_device_data([
+            {'device_name': 'T1', 'data': _records(3)},
+            {'device_name': 'T2', 'data': _records(2)},
+        ])
+
+        assert {s['name']: s['new_records'] for s in stats} == {'T1': 3, 'T2': 2}
+        manifest = json.loads((tmp_path / 'manifest.json').read_text())
+        assert manifest['metadata']['total_records'] == 5
+        assert manifest['devices']['T1']['version'] == 1
+        assert (tmp_path / 'devices' / 'T1' / 'v1' / 'timestamp.npy').exists()
+
+    def test_reimport_skips_duplicates_and_bumps_version(self, tmp_path):
+        store = SensorStore(str(tmp_path))
+        store.import_device_data([{'device_name': 'T1', 'data': _records(3)}])
+
+        stats = store.import_device_data([{'device_name': 'T1', 'data': _records(4)}])
+
+        assert stats == [{'name': 'T1', 'new_records': 1, 'duplicates': 3}]
+        info = SensorStore(str(tmp_path)).device_info('T1')
+        assert info['version'] == 2
+        assert info['record_count'] == 4
+        assert not (tmp_path / 'devices' / 'T1' / 'v1').exists()
+
+    def test_old_version_that_cannot_be_removed_is_retried(self, tmp_path, monkeypatch, caplog):
+        store = SensorStore(str(tmp_path))
+        store.import_device_data([{'device_name': 'T1', 'data': _records(3)}])
+        rmtree = shutil.rmtree
+
+        def locked_rmtree(path, *args, **kwargs):
+            if Path(path).name == 'v1':
+                raise PermissionError(f"still mapped: {path}")
+            rmtree(path, *args, **kwargs)
+
+        monkeypatch.setattr(sensor_store.shutil, 'rmtree', locked_rmtree)
+        with caplog.at_level(logging.WARNING, logger='sensor_store'):
+            store.import_device_data([{'device_name': 'T1', 'data': _records(4)}])
+        assert (tmp_path / 'devices' / 'T1' / 'v1').exists()
+        assert 'v1' in caplog.text
+
+        monkeypatch.undo()
+        SensorStore(str(tmp_path)).import_device_data([{'device_name': 'T1', 'data': _records(5)}])
+        assert [p.name for p in (tmp_path / 'devices' / 'T1').iterdir()] == ['v3']
+
+    def test_cached_columns_mapping_an_old_version_are_released(self, tmp_path):
+        store = SensorStore(str(tmp_path))
+        store.import_device_data([{'device_name': 'T1', 'data': _records(3)}])
+        store.write_device('T1', store.read_device('T1', mmap=True))
+        store.save_manifest()
+
+        store._remove_stale_versions()
+
+        assert 'T1' not in store._columns_cache
+        assert not (tmp_path / 'devices' / 'T1' / 'v1').exists()
+        assert len(store.read_device('T1')['timestamp']) == 3
+
+    def test_records_round_trip(self, tmp_path):
+        store = SensorStore(str(tmp_path))
+        store.import_device_data([{'device_name': 'T1', 'data': _records(2)}])
+
+        records = SensorStore(str(tmp_path)).read_records('T1')
+
+        assert records[0] == {
+            'timestamp': '2024-01-01T12:00:00',
+            'temperature': 20.0,
+            'humidity': 50.0,
+            'battery_mv': 3000,
+            'quality': 0
+        }
+        assert records[1]['timestamp'] == '2024-01-01T12:05:00'
+
+    def test_database_view_loads_devices_lazily(self, tmp_path):
+        store = SensorStore(str(tmp_path))
+        store.import_device_data([
+            {'device_name': 'T1', 'data': _records(2)},
+            {'device_name': 'T2', 'data': _records(2)},
+        ])
+
+        reader = SensorStore(str(tmp_path))
+        database = reader.as_database()
+
+        assert sorted(database['devices']) == ['T1', 'T2']
+        assert reader._columns_cache == {}
+        assert len(database['devices']['T1']['records']) == 2
+        assert list(reader._columns_cache) == ['T1']
+
+    def test_migrate_from_json(self, tmp_path):
+        json_path = tmp_path / 'db.json'
+        json_path.write_text(json.dumps({
+            'metadata': {'created': '2024-01-01T00:00:00'},
+            'devices': {
+                'T1': {
+                    'first_seen': '2024-01-01T00:00:00',
+                    'records': [
+                        {'timestamp': '2024-01-01T12:05:00', 'temperature': 21.5,
+                         'humidity': 40.0, 'battery_mv': 2900},
+                        {'timestamp': '2024-01-01T12:00:00', 'temperature': 21.0,
+                         'humidity': 41.0, 'battery_mv': 2900},
+                    ]
+                }
+            },
+            'import_history': []
+        }))
+
+        SensorStore.from_json(str(json_path), str(tmp_path / 'store'))
+        database = load_database(str(tmp_path / 'store'))
+
+        records = database['devices']['T1']['records']
+        assert [r['temperature'] for r in records] == [21.0, 21.5]
+        assert database['metadata']['total_records'] == 2
+
+    def test_load_database_drops_flagged_records(self, tmp_path):
+        records = _records(3)
+        records[1]['quality'] = 2
+        SensorStore(str(tmp_path)).import_device_data([{'device_name': 'T1', 'data': records}])
+
+        clean = load_database(str(tmp_path))
+        raw = load_database(str(tmp_path), drop_flagged=False)
+
+        assert [r['temperature'] for r in clean['devices']['T1']['records']] == [20.0, 22.0]
+        assert len(raw['devices']['T1']['records']) == 3
+
+    def test_reimported_clean_copy_clears_flags(self, tmp_path):
+        flagged = _records(2)
+        flagged[1]['quality'] = 8
+        store = SensorStore(str(tmp_path))
+        store.import_device_data([{'device_name': 'T1', 'data': flagged}])
+
+        store.import_device_data([{'device_name': 'T1', 'data': _records(2)}])
+
+        clean = load_database(str(tmp_path))
+        assert [r['temperature'] for r in clean['devices']['T1']['records']] == [20.0, 21.0]
+
+    def test_malformed_device_is_skipped(self, tmp_path):
+        malformed = _records(2)
+        del malformed[1]['temperature']
+        store = SensorStore(str(tmp_path))
+
+        stats = store.import_device_data([
+            {'device_name': 'T1', 'data': _records(3)},
+            {'device_name': 'Broken', 'data': malformed},
+            {'device_name': 'T2', 'data': _records(2)},
+        ])
+
+        assert stats == [{'name': 'T1', 'new_records': 3, 'duplicates': 0},
+                         {'name': 'T2', 'new_records': 2, 'duplicates': 0}]
+        assert sorted(load_database(str(tmp_path))['devices']) == ['T1', 'T2']
+
+    def test_importer_skips_malformed_device_in_json_mode(self, tmp_path):
+        malformed = _records(2)
+        malformed[1]['timestamp'] = None
+
+        importer = TemperatureDataImporter(json_db_path=str(tmp_path / 'db.json'))
+        stats = importer.import_device_data([
+            {'device_name': 'Broken', 'data': malformed},
+            {'device_name': 'T1', 'data': _records(3)},
+        ])
+
+        assert stats == [{'name': 'T1', 'new_records': 3, 'duplicates': 0}]
+        assert len(importer.database['devices']['T1']['records']) == 3
@@ -0,0 +1,93 @@
+"""
+Unit tests for the streaming data export.
+"""
+
+import threading
+import pytest
+import pandas as pd
+from datetime import datetime, timedelta
+from pathlib import Path
+import sys
+
+# Add src directory to path
+sys.path.append(str(Path(__file__).parent.parent / 'src'))
+
+from streaming_export import StreamingExporter, ExportCancelled, difference_frame
+
+
+def _records(temperatures, start=datetime(2024, 1, 1), step_minutes=60 * 12, offset_minutes=0):
+    return [
+        {
+            'timestamp': (start + timedelta(minutes=i * step_minutes + offset_minutes)).isoformat(),
+            'temperature': temp,
+            'humidity': 50.0,
+            'battery_mv': 3000
+        }
+        for i, temp in enumerate(temperatures)
+    ]
+
+
+@pytest.fixture
+def database():
+    return {
+        'devices': {
+            'Room': {'records': _records([22.0, 23.0, 24.0, 25.0, 26.0, 27.0])},
+            'Intake': {'records': _records([20.0, 20.0, 20.0, 20.0, 20.0, 20.0], offset_minutes=5)},
+        }
+    }
+
+
+class TestStreamingExporter:
+    """Test cases for StreamingExporter."""
+
+    def test_csv_rows_are_time_ordered_across_chunks(self, database, tmp_path):
+        exporter = StreamingExporter(database, ['Room', 'Intake'],
+                                     derived=[('Diff', 'Room', 'Intake')], chunk_days=1)
+        output = tmp_path / 'export.csv'
+
+        progress = []
+        result = exporter.export(str(output), progress_callback=lambda f, m: progress.append(f))
+
+        frame = pd.read_csv(output, parse_dates=['timestamp'])
+        assert result['rows'] == 18
+        assert len(frame) == 18
+        assert frame['timestamp'].is_monotonic_increasing
+        assert list(frame['device'][:3]) == ['Room', 'Diff', 'Intake']
+        assert list(frame.loc[frame['device'] == 'Diff', 'temperature']) == [2.0, 3.0, 4.0, 5.0, 6.0, 7.0]
+        assert len(progress) > 1 and progress[-1] == 1.0
+
+    def test_date_range_is_applied(self, database, tmp_path):
+        exporter = StreamingExporter(database, ['Room'],
+                                     start_date=datetime(2024, 1, 2), end_date=datetime(2024, 1, 2, 23, 59))
+        output = tmp_path / 'export.csv'
+
+        exporter.export(str(output))
+
+        frame = pd.read_csv(output)
+        assert list(frame['temperature']) == [24.0, 25.0]
+
+    def test_xlsx_export(self, database, tmp_path):
+        exporter = StreamingExporter(database, ['Room'])
+        output = tmp_path / 'export.xlsx'
+
+        exporter.export(str(output))
+
+        frame = pd.read_excel(output)
+        assert list(frame.columns) == ['timestamp', 'device', 'temperature', 'humidity', 'battery_mv']
+        assert len(frame) == 6
+
+    def test_cancel_removes_partial_file(self, database, tmp_path):
+        exporter = StreamingExporter(database, ['Room'], chunk_days=1)
+        output = tmp_path / 'export.csv'
+        cancel = threading.Event()
+
+        with pytest.raises(ExportCancelled):
+            exporter.export(str(output), progress_callback=lambda f, m: cancel.set(), cancel_event=cancel)
+
+        assert not output.exists()
+
+
+def test_difference_frame(database):
+    frame = difference_frame(database, 'Room', 'Intake', end_date=datetime(2024, 1, 1, 23, 0))
+
+    assert list(frame['temperature_difference']) == [2.0, 3.0]
@@ -178,6 +178,62 @@ class TestTemperatureDataProcessor:
             assert 'Device_1' in device_names
             assert 'Device_2' in device_names
 
+    
+    def test_overlapping_csv_files_are_merged(self, processor):
+        """Test merging overlapping, partly unsorted files of one device."""
+        header = ["T3_TestDevice", "Time-Data=(A2/86400)+25569;Temp;Humi;Vbat"]
+        csv_content1 = header + [
+            "1609459200;13.72;86.58;2943",
+            "1609459800;13.5;86.88;2960",
+            "1609459500;13.57;86.7;2957"     # out of order
+        ]
+        csv_content2 = header + [
+            "1609459500;13.57;86.7;2957",    # duplicate of file 1
+            "1609460100;13.4;87.0;2955"
+        ]
+        
+        with tempfile.NamedTemporaryFile(suffix='.zip', delete=False) as zip_file:
+            with zipfile.ZipFile(zip_file.name, 'w') as zf:
+                zf.writestr('part1.csv', '\n'.join(csv_content1))
+                zf.writestr('part2.csv', '\n'.join(csv_content2))
+            
+            result = processor.process_zip_file(zip_file.name)
+        
+        assert len(result) == 1
+        records = result[0]['data']
+        assert [r['temperature'] for r in records] == [13.72, 13.57, 13.5, 13.4]
+        assert records == sorted(records, key=lambda r: r['timestamp'])
+
+    def test_duplicate_keeps_the_clean_copy(self, processor):
+        """Test that a clean duplicate from a later file replaces a flagged copy."""
+        flagged = {'timestamp': datetime(2021, 1, 1, 0, 5), 'temperature': 13.57, 'humidity': 86.7,
+                   'battery_mv': 2957, 'quality': 8}
+        clean = dict(flagged, quality=0)
+        later = dict(flagged, timestamp=datetime(2021, 1, 1, 0, 10), quality=0)
+
+        merged, duplicates = processor._merge_runs([iter([flagged]), iter([clean, later])])
+
+        assert duplicates == 1
+        assert merged[0] is clean
+        assert [r['quality'] for r in merged] == [0, 0]
+
+    def test_out_of_order_row_is_not_flagged(self, processor):
+        """Test that a valid row that is only out of order in its file keeps a clean quality mask."""
+        csv_content = ["T3_TestDevice", "Time-Data=(A2/86400)+25569;Temp;Humi;Vbat",
+                       "1609459200;13.72;86.58;2943",
+                       "1609459800;13.5;86.88;2960",
+                       "1609459500;13.57;86.7;2957"]
+
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False) as f:
+            f.write('\n'.join(csv_content))
+            csv_path = f.name
+        try:
+            data = processor.parse_csv_file(csv_path)
+        finally:
+            Path(csv_path).unlink()
+
+        assert [r['quality'] for r in data['data']] == [0, 0, 0]
+
 
 if __name__ == '__main__':
     pytest.main([__file__])
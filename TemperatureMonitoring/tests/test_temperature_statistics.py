@@ -340,6 +340,40 @@ class TestTemperatureStatistics:
             assert "2024-01-01 12:05:00" in report
             assert "2 / 2 expected" in report
 
+    def test_stat002_multi_pair_default_pairs(self):
+        """Test batch STAT002 pairs every room with every available reference device."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_path = Path(temp_dir)
+            
+            base_time = datetime(2024, 1, 1, 12, 0, 0)
+            
+            def make_records(temperature):
+                return [
+                    {
+                        "timestamp": (base_time + timedelta(minutes=i * 15)).isoformat(),
+                        "temperature": temperature,
+                        "humidity": 50.0,
+                        "battery": 3000
+                    }
+                    for i in range(4)
+                ]
+            
+            devices_data = {
+                "T1_BE": {"records": make_records(18.0), "total_records": 4},
+                "T2_Terasz": {"records": make_records(5.0), "total_records": 4},
+                "T3_Kek": {"records": make_records(21.0), "total_records": 4}
+            }
+            
+            db_path = self.create_test_database(temp_path, devices_data)
+            stats = TemperatureStatistics(str(db_path))
+            
+            result = stats.stat002_multi_pair_ventilation_analysis()
+            
+            pairs = [(p["room_device"], p["reference_device"]) for p in result["pairs"]]
+            assert pairs == [("T3_Kek", "T1_BE"), ("T3_Kek", "T2_Terasz")]
+            assert result["pairs"][0]["temperature_difference_statistics"]["mean_celsius"] == 3.0
+            assert result["pairs"][1]["temperature_difference_statistics"]["mean_celsius"] == 16.0
+
 
 if __name__ == "__main__":
     pytest.main([__file__])
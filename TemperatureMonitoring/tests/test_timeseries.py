@@ -0,0 +1,92 @@
+"""
+Unit tests for the timeseries helper module.
+"""
+
+import pytest
+import numpy as np
+from pathlib import Path
+import sys
+
+# Add src directory to path
+sys.path.append(str(Path(__file__).parent.parent / 'src'))
+
+from timeseries import records_to_arrays, align_nearest, hour_day_matrix
+
+
+def _times(*values):
+    return np.array(values, dtype='datetime64[s]')
+
+
+class TestRecordsToArrays:
+    """Test cases for converting stored records to arrays."""
+
+    def test_sorts_records_by_timestamp(self):
+        records = [
+            {'timestamp': '2024-01-01T12:10:00', 'temperature': 21.0},
+            {'timestamp': '2024-01-01T12:00:00', 'temperature': 20.0},
+        ]
+
+        times, values = records_to_arrays(records)
+
+        assert times[0] == np.datetime64('2024-01-01T12:00:00')
+        assert list(values) == [20.0, 21.0]
+
+    def test_empty_records(self):
+        times, values = records_to_arrays([])
+
+        assert len(times) == 0
+        assert len(values) == 0
+
+
+class TestAlignNearest:
+    """Test cases for the sorted-array nearest join."""
+
+    def test_picks_nearest_sample_within_tolerance(self):
+        left = _times('2024-01-01T12:00', '2024-01-01T12:30', '2024-01-01T14:00')
+        right = _times('2024-01-01T11:58', '2024-01-01T12:20', '2024-01-01T12:34')
+        values = np.array([1.0, 2.0, 3.0])
+
+        aligned = align_nearest(left, right, values, tolerance_minutes=15)
+
+        assert aligned[0] == 1.0
+        assert aligned[1] == 3.0
+        assert np.isnan(aligned[2])
+
+    def test_empty_right_series(self):
+        aligned = align_nearest(_times('2024-01-01T12:00'), _times(), np.array([]))
+
+        assert np.isnan(aligned).all()
+
+
+class TestHourDayMatrix:
+    """Test cases for hour x day aggregation."""
+
+    @pytest.fixture
+    def series(self):
+        times = _times('2024-01-01T10:05', '2024-01-01T10:35', '2024-01-03T23:55')
+        values = np.array([1.0, 3.0, 5.0])
+        return times, values
+
+    def test_mean_aggregation(self, series):
+        matrix, first_day = hour_day_matrix(*series, agg='mean')
+
+        assert matrix.shape == (3, 24)
+        assert first_day == np.datetime64('2024-01-01')
+        assert matrix[0, 10] == 2.0
+        assert matrix[2, 23] == 5.0
+        assert np.isnan(matrix[1]).all()
+
+    @pytest.mark.parametrize('agg,expected', [('min', 1.0), ('max', 3.0), ('count', 2.0)])
+    def test_other_aggregations(self, series, agg, expected):
+        matrix, _ = hour_day_matrix(*series, agg=agg)
+
+        assert matrix[0, 10] == expected
+
+    def test_count_leaves_zero_in_empty_cells(self, series):
+        matrix, _ = hour_day_matrix(*series, agg='count')
+
+        assert matrix[1, 0] == 0
+
+    def test_invalid_aggregation(self, series):
+        with pytest.raises(ValueError, match="Unsupported aggregation"):
+            hour_day_matrix(*series, agg='median')
@@ -0,0 +1,72 @@
+"""
+Unit tests for the multi-pair ventilation analysis engine.
+"""
+
+import pytest
+from datetime import datetime, timedelta
+from pathlib import Path
+import sys
+
+# Add src directory to path
+sys.path.append(str(Path(__file__).parent.parent / 'src'))
+
+from ventilation_analysis import VentilationBatchAnalyzer
+
+
+def _records(temperatures, start=datetime(2024, 1, 1, 12, 0), step_minutes=15, offset_minutes=0):
+    return [
+        {
+            'timestamp': (start + timedelta(minutes=i * step_minutes + offset_minutes)).isoformat(),
+            'temperature': temp
+        }
+        for i, temp in enumerate(temperatures)
+    ]
+
+
+class TestVentilationBatchAnalyzer:
+    """Test cases for VentilationBatchAnalyzer."""
+
+    @pytest.fixture
+    def database(self):
+        return {
+            'devices': {
+                'Room1': {'records': _records([22.0, 22.0, 22.0, 22.0])},
+                'Room2': {'records': _records([18.0, 18.0, 20.2, 20.0], offset_minutes=3)},
+                'Intake': {'records': _records([20.0, 20.0, 20.0, 20.0], offset_minutes=1)},
+            }
+        }
+
+    def test_all_pairs_analyzed_on_common_grid(self, database):
+        analyzer = VentilationBatchAnalyzer(database, step_minutes=15, neutral_band_celsius=0.5)
+
+        result = analyzer.analyze([('Room1', 'Intake'), ('Room2', 'Intake')])
+
+        assert 'error' not in result
+        assert result['differences'].shape == (2, 4)
+
+        room1, room2 = result['pairs']
+        assert room1['total_data_points'] == 4
+        assert room1['temperature_difference_statistics']['mean_celsius'] == 2.0
+        assert room1['ventilation_summary']['off_percentage'] == 100.0
+
+        assert room2['ventilation_summary']['ventilation_on_periods'] == 2
+        assert room2['ventilation_summary']['uncertain_periods'] == 2
+
+    def test_missing_device_returns_error(self, database):
+        analyzer = VentilationBatchAnalyzer(database)
+
+        result = analyzer.analyze([('Room1', 'Unknown')])
+
+        assert 'error' in result
+        assert 'Unknown' in result['error']
+
+    def test_write_results_creates_pair_tables(self, database, tmp_path):
+        analyzer = VentilationBatchAnalyzer(database)
+        result = analyzer.analyze([('Room1', 'Intake')])
+
+        written = analyzer.write_results(result, str(tmp_path))
+
+        table = tmp_path / 'Room1_vs_Intake.csv'
+        assert str(table) in written
+        assert (tmp_path / 'summary.json').exists()
+        assert table.read_text().splitlines()[0] == 'timestamp,room,reference,difference,state'
@@ -110,6 +110,12 @@ class TestTemperatureVisualizer:
         with pytest.raises(ValueError, match="No device data provided"):
             visualizer.create_multi_device_comparison([], 'temperature')
     
+    def test_create_multi_device_comparison_invalid_render_mode(self, visualizer, multiple_device_data):
+        """Test rejecting an unknown render mode."""
+        with pytest.raises(ValueError, match="Unsupported render mode"):
+            visualizer.create_multi_device_comparison(multiple_device_data, 'temperature',
+                                                      render_mode='dots')
+    
     def test_create_statistics_heatmap_valid_data(self, visualizer, multiple_device_data):
         """Test creating statistics heatmap with valid data."""
         # Test data structure
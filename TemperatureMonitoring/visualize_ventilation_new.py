@@ -25,7 +25,7 @@ def main():
     print("Visualization Complete!")
     print("=" * 60)
     print("\nOutput:")
-    print("- ventilation_temperature_difference_heatmap.png")
+    print("- heatmap_T3_Kek_vs_T1_BE_mean.png")
     print("\nThis heatmap shows the temperature difference between")
     print("the room (T3_Kek) and intake (T1_BE) sensors, which provides")
     print("the most reliable indication of ventilation system behavior.")